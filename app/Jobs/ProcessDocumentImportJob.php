@@ -591,6 +591,12 @@ private function saveNodesToDatabase(string $path, string $bookId, FileHelpers $
             $columns = ['book', 'startLine', 'chunk_id', 'node_id', 'content', 'footnotes', 'plainText', 'type', 'created_at', 'updated_at'];
             $now = (string) now();
             $nodesPerChunk = 100;
+            // The pipeline groups nodes into byte-budgeted chunks (conversion_stats.json "chunking",
+            // app/Python/digestion/finalize/chunking.py) — keep its grouping, scaled like ours. A
+            // HYPERLIT_CHUNKING=legacy conversion (or an older one) keeps the fixed renumbering.
+            $statsPath = "{$path}/conversion_stats.json";
+            $stats = File::exists($statsPath) ? json_decode(File::get($statsPath), true) : null;
+            $pipelineChunks = (($stats['chunking']['strategy'] ?? null) === 'bytes');
             $batch = [];
             $index = 0;
 
@@ -604,7 +610,9 @@ private function saveNodesToDatabase(string $path, string $bookId, FileHelpers $
                 if ($chunk === null) continue;
 
                 $newStartLine = ($index + 1) * 100;
-                $chunkIndex = floor($index / $nodesPerChunk);
+                $chunkIndex = ($pipelineChunks && isset($chunk['chunk_id']))
+                    ? (int) $chunk['chunk_id']
+                    : floor($index / $nodesPerChunk);
                 $newChunkId = $chunkIndex * 100;
                 $nodeId = $helpers->generateNodeId($bookId);
                 $content = $helpers->ensureNodeIdInContent($chunk['content'], $newStartLine, $nodeId);
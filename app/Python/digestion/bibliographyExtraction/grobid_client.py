@@ -6,18 +6,27 @@ whole blob keyed to its first author and every later entry was uncitable).
 
 OPT-IN: only used when the GROBID_URL env var is set AND the book has its source PDF on disk AND
 the server answers /api/isalive — anything else falls back to the regex path, so conversion never
-gains a hard dependency on the service. Stdlib-only (urllib + xml.etree); requests are CHUNKED by
-page-window (pypdf) so a memory-capped GROBID (~1GB droplet container) never sees a 300-page PDF
-in one bite.
+gains a hard dependency on the service. Stdlib-only (http.client + xml.etree); requests are CHUNKED
+by page-window (pypdf) so a memory-capped GROBID (~1GB droplet container) never sees a 300-page PDF
+in one bite. Windows go out GROBID_CONCURRENCY at a time (size it to the container's worker count)
+over keep-alive connections, and each window's parsed references are cached per (PDF hash, server,
+window) so replays and vibe reconverts never re-post to the same server.
 """
 
+import hashlib
+import http.client
 import io
+import json
 import os
 import re
+import threading
 import time
+import urllib.parse
 import urllib.request
 import uuid
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
 
 _TEI_NS = {'t': 'http://www.tei-c.org/ns/1.0'}
 
@@ -27,19 +36,51 @@ _TEI_NS = {'t': 'http://www.tei-c.org/ns/1.0'}
 # generous — tune via env if a huge corpus book genuinely needs more.
 _REQUEST_TIMEOUT_S = int(os.environ.get('GROBID_REQUEST_TIMEOUT', '120'))
 _TOTAL_DEADLINE_S = int(os.environ.get('GROBID_TOTAL_DEADLINE', '300'))
+# Windows in flight at once. GROBID queues past its own worker pool (and a memory-capped container
+# can fall over), so this should match the container's concurrency, not exceed it. The lightweight
+# image on a ~1GB droplet comfortably runs 2.
+_CONCURRENCY = max(1, int(os.environ.get('GROBID_CONCURRENCY', '2')))
+
+# Parsed-reference cache per (PDF sha1, server URL + version, page window): GROBID_CACHE_DIR overrides
+# the location, "off" disables. Bump _CACHE_VERSION when _parse_tei_references' output shape changes.
+_DEFAULT_CACHE_ROOT = Path(__file__).resolve().parents[4] / 'storage' / 'app' / 'grobid-cache'
+_CACHE_VERSION = 1
+_TEI = '{http://www.tei-c.org/ns/1.0}'
+
+# Set once a configured server failed to answer in this process (down, HTTP error, deadline): the
+# regex fallback then stood in for it, and a caller caching the conversion must not file that output
+# under the key a healthy GROBID run produces.
+_UNANSWERED = threading.Event()
+
+
+def grobid_unanswered():
+    """True if GROBID was asked for something in this process and did not answer."""
+    return _UNANSWERED.is_set()
 
 
 def grobid_alive(base_url, timeout=5):
     """True if a GROBID server answers at base_url."""
     try:
         with urllib.request.urlopen(f'{base_url.rstrip("/")}/api/isalive', timeout=timeout) as r:
-            return b'true' in r.read().lower()
+            if b'true' in r.read().lower():
+                return True
+    except Exception:
+        pass
+    _UNANSWERED.set()
+    return False
+
+
+def grobid_version(base_url, timeout=5):
+    """The server's /api/version string, or None if it does not answer."""
+    try:
+        with urllib.request.urlopen(f'{base_url.rstrip("/")}/api/version', timeout=timeout) as r:
+            return r.read().decode('utf-8', 'replace').strip() or None
     except Exception:
-        return False
+        return None
 
 
-def _post_pdf(base_url, pdf_bytes, timeout=_REQUEST_TIMEOUT_S):
-    """POST pdf bytes to /api/processReferences (includeRawCitations) → TEI XML string."""
+def _multipart(pdf_bytes):
+    """The /api/processReferences form body (includeRawCitations) → (body bytes, content type)."""
     boundary = uuid.uuid4().hex
     body = io.BytesIO()
     body.write(f'--{boundary}\r\n'
@@ -49,13 +90,111 @@ def _post_pdf(base_url, pdf_bytes, timeout=_REQUEST_TIMEOUT_S):
     body.write(f'\r\n--{boundary}\r\n'
                f'Content-Disposition: form-data; name="includeRawCitations"\r\n\r\n1\r\n'
                f'--{boundary}--\r\n'.encode())
-    req = urllib.request.Request(
-        f'{base_url.rstrip("/")}/api/processReferences',
-        data=body.getvalue(),
-        headers={'Content-Type': f'multipart/form-data; boundary={boundary}',
-                 'Accept': 'application/xml'})
-    with urllib.request.urlopen(req, timeout=timeout) as r:
-        return r.read().decode('utf-8', 'replace')
+    return body.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+class _GrobidSession:
+    """Keep-alive POSTs to /api/processReferences: one persistent HTTP/1.1 connection per worker
+    thread (urllib opens and tears down a TCP connection per request). A connection the server has
+    dropped between requests is reopened once; any other failure raises to the caller."""
+
+    def __init__(self, base_url, timeout=_REQUEST_TIMEOUT_S):
+        url = urllib.parse.urlsplit(base_url.rstrip('/'))
+        self._conn_cls = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self._netloc = url.netloc
+        self._path = f'{url.path}/api/processReferences'
+        self._timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open = []
+
+    def _conn(self, fresh=False):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or fresh:
+            if conn is not None:
+                conn.close()
+            conn = self._conn_cls(self._netloc, timeout=self._timeout)
+            self._local.conn = conn
+            with self._lock:
+                self._open.append(conn)
+        return conn
+
+    def references(self, pdf_bytes):
+        """POST one window and stream-parse the TEI straight off the socket → parsed refs."""
+        body, ctype = _multipart(pdf_bytes)
+        headers = {'Content-Type': ctype, 'Accept': 'application/xml', 'Connection': 'keep-alive'}
+        for attempt in (0, 1):
+            conn = self._conn(fresh=attempt > 0)
+            try:
+                conn.request('POST', self._path, body=body, headers=headers)
+                resp = conn.getresponse()
+            except (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                    ConnectionResetError, BrokenPipeError):
+                if attempt:
+                    raise
+                continue
+            try:
+                if resp.status == 204:
+                    return []
+                if resp.status != 200:
+                    raise RuntimeError(f'GROBID HTTP {resp.status} {resp.reason}')
+                return list(_iter_tei_references(resp))
+            finally:
+                resp.read()                      # drain, so the connection can carry the next window
+                if resp.will_close:
+                    conn.close()
+                    self._local.conn = None
+
+    def close(self):
+        with self._lock:
+            for conn in self._open:
+                conn.close()
+            self._open = []
+
+
+def _ref_from_bibl(bibl):
+    surnames = [s.text for s in bibl.iter(f'{_TEI}surname') if s.text]
+    date = bibl.find('.//t:date[@type="published"]', _TEI_NS)
+    year = ''
+    if date is not None:
+        year = (date.get('when') or (date.text or ''))[:4]
+    title_el = bibl.find('.//t:title[@level="a"]', _TEI_NS)
+    if title_el is None:
+        title_el = bibl.find('.//t:title', _TEI_NS)
+    doi_el = bibl.find('.//t:idno[@type="DOI"]', _TEI_NS)
+    raw_el = bibl.find('.//t:note[@type="raw_reference"]', _TEI_NS)
+    return {
+        'raw': raw_el.text if raw_el is not None and raw_el.text else None,
+        'first_author': surnames[0] if surnames else '',
+        'year': year if re.fullmatch(r'\d{4}', year or '') else '',
+        'title': (title_el.text or '') if title_el is not None else '',
+        'doi': (doi_el.text or '') if doi_el is not None else '',
+    }
+
+
+def _iter_tei_references(stream):
+    """Stream-parse TEI from a binary file-like (an HTTP response) → parsed refs, in document order.
+    Each finished top-level biblStruct (with any nested in it, which count as entries too) is
+    cleared once read, so a window's TEI is never held as a whole tree. An empty body (GROBID's
+    no-references answer) yields nothing; a body that breaks off mid-document raises."""
+    depth = 0
+    started = False
+    try:
+        for event, el in ET.iterparse(stream, events=('start', 'end')):
+            started = True
+            if el.tag != f'{_TEI}biblStruct':
+                continue
+            if event == 'start':
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 0:
+                for bibl in el.iter(f'{_TEI}biblStruct'):
+                    yield _ref_from_bibl(bibl)
+                el.clear()
+    except ET.ParseError:
+        if started:
+            raise
 
 
 def _parse_tei_references(xml_text):
@@ -64,60 +203,138 @@ def _parse_tei_references(xml_text):
     zero-refs result, not an error (an empty window must not abort a chunked whole-document run)."""
     if not (xml_text or '').strip():
         return []
-    refs = []
-    root = ET.fromstring(xml_text)
-    for bibl in root.iter('{http://www.tei-c.org/ns/1.0}biblStruct'):
-        surnames = [s.text for s in bibl.iter('{http://www.tei-c.org/ns/1.0}surname') if s.text]
-        date = bibl.find('.//t:date[@type="published"]', _TEI_NS)
-        year = ''
-        if date is not None:
-            year = (date.get('when') or (date.text or ''))[:4]
-        title_el = bibl.find('.//t:title[@level="a"]', _TEI_NS)
-        if title_el is None:
-            title_el = bibl.find('.//t:title', _TEI_NS)
-        doi_el = bibl.find('.//t:idno[@type="DOI"]', _TEI_NS)
-        raw_el = bibl.find('.//t:note[@type="raw_reference"]', _TEI_NS)
-        refs.append({
-            'raw': raw_el.text if raw_el is not None and raw_el.text else None,
-            'first_author': surnames[0] if surnames else '',
-            'year': year if re.fullmatch(r'\d{4}', year or '') else '',
-            'title': (title_el.text or '') if title_el is not None else '',
-            'doi': (doi_el.text or '') if doi_el is not None else '',
-        })
-    return refs
+    return list(_iter_tei_references(io.BytesIO(xml_text.encode('utf-8'))))
 
 
 def _pdf_page_windows(pdf_path, max_pages):
-    """Yield pdf-bytes windows of at most max_pages pages (whole file if small enough)."""
+    """Yield (first_page, build) per window of at most max_pages pages; build() returns the window's
+    pdf bytes (the whole file if small enough). Lazy, so a window served from the cache is never
+    split out of the PDF at all."""
     from pypdf import PdfReader, PdfWriter   # already a pipeline dependency (OCR chunking)
     reader = PdfReader(pdf_path)
     n = len(reader.pages)
     if n <= max_pages:
-        yield open(pdf_path, 'rb').read()
+        yield 0, lambda: open(pdf_path, 'rb').read()
         return
     for start in range(0, n, max_pages):
-        writer = PdfWriter()
-        for i in range(start, min(start + max_pages, n)):
-            writer.add_page(reader.pages[i])
-        buf = io.BytesIO()
-        writer.write(buf)
-        yield buf.getvalue()
+        def build(start=start):
+            writer = PdfWriter()
+            for i in range(start, min(start + max_pages, n)):
+                writer.add_page(reader.pages[i])
+            buf = io.BytesIO()
+            writer.write(buf)
+            return buf.getvalue()
+        yield start, build
+
+
+class _WindowCache:
+    """Parsed references per (PDF sha1, server, first page, window size) as
+    `<sha[:2]>/<sha>.<server>.p<start>-<size>.json`, `server` a digest of the base URL + /api/version —
+    another server or an upgraded model segments differently. Only successful windows are stored (a
+    transport failure is never cached), so a replay or vibe reconvert of the same PDF against the same
+    server answers from disk without posting a window."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    @classmethod
+    def from_env(cls):
+        root = os.environ.get('GROBID_CACHE_DIR', '')
+        if root.lower() in ('off', '0', 'false'):
+            return None
+        return cls(root or _DEFAULT_CACHE_ROOT)
+
+    @staticmethod
+    def server_key(base_url, version):
+        return hashlib.sha1(f'{base_url.rstrip("/")}\n{version}'.encode('utf-8')).hexdigest()[:16]
+
+    def _path(self, digest, server, start, size):
+        return self.root / digest[:2] / f'{digest}.{server}.p{start}-{size}.v{_CACHE_VERSION}.json'
+
+    def get(self, digest, server, start, size):
+        try:
+            return json.loads(self._path(digest, server, start, size).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def put(self, digest, server, start, size, refs):
+        path = self._path(digest, server, start, size)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+            tmp.write_text(json.dumps(refs, ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f'  ⚠️ could not cache GROBID window (page {start}): {e}')
 
 
-def extract_refs_from_pdf(pdf_path, base_url, max_pages_per_request=40):
+def extract_refs_from_pdf(pdf_path, base_url, max_pages_per_request=40, concurrency=None,
+                          cache=True):
     """Segment + parse the PDF's references via GROBID. Returns a list of parsed refs (possibly
     empty); raises on transport errors — the CALLER decides fallback. Page-window chunking keeps
     per-request memory bounded; references living wholly inside a window survive, a rare entry
     STRADDLING a window boundary may be lost or duplicated (documents cite per-chapter, so windows
-    of 40 pages make that unlikely). De-dupes identical (first_author, year, title-prefix) repeats."""
-    seen = set()
-    out = []
+    of 40 pages make that unlikely). De-dupes identical (first_author, year, title-prefix) repeats.
+
+    Up to `concurrency` (GROBID_CONCURRENCY) windows are in flight at once over keep-alive
+    connections; only that many are split out of the PDF ahead of the server, so memory stays
+    bounded. Results merge in PAGE order whatever order they finish in, so the output is the same
+    as one-at-a-time posting. `cache` (a _WindowCache, False for none, True for the configured one)
+    serves windows this server (URL + /api/version) already parsed for this exact PDF; it is bypassed
+    when the version can't be read."""
+    concurrency = max(1, concurrency or _CONCURRENCY)
+    if cache is True:
+        cache = _WindowCache.from_env()
+    digest = server = None
+    if cache:
+        version = grobid_version(base_url)
+        if version is None:
+            cache = None
+        else:
+            from shared.conversion_cache import sha1_file
+            digest = sha1_file(pdf_path)
+            server = _WindowCache.server_key(base_url, version)
     deadline = time.monotonic() + _TOTAL_DEADLINE_S
-    for pdf_bytes in _pdf_page_windows(pdf_path, max_pages_per_request):
-        if time.monotonic() > deadline:
+    by_window = {}
+    pending = {}
+    session = _GrobidSession(base_url)
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='grobid')
+
+    def collect():
+        remaining = deadline - time.monotonic()
+        done, _ = wait(pending, timeout=max(0, remaining), return_when=FIRST_COMPLETED)
+        if not done:
             raise TimeoutError(f'GROBID total deadline ({_TOTAL_DEADLINE_S}s) exceeded')
-        tei = _post_pdf(base_url, pdf_bytes)
-        for ref in _parse_tei_references(tei):
+        for fut in done:
+            start = pending.pop(fut)
+            by_window[start] = fut.result()
+            if cache:
+                cache.put(digest, server, start, max_pages_per_request, by_window[start])
+
+    try:
+        for start, build in _pdf_page_windows(pdf_path, max_pages_per_request):
+            hit = cache.get(digest, server, start, max_pages_per_request) if cache else None
+            if hit is not None:
+                by_window[start] = hit
+                continue
+            while len(pending) >= concurrency:
+                collect()
+            if time.monotonic() > deadline:
+                raise TimeoutError(f'GROBID total deadline ({_TOTAL_DEADLINE_S}s) exceeded')
+            pending[pool.submit(session.references, build())] = start
+        while pending:
+            collect()
+    except BaseException:
+        _UNANSWERED.set()
+        raise
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        session.close()          # also unblocks any worker still waiting on a breached deadline
+
+    seen = set()
+    out = []
+    for start in sorted(by_window):
+        for ref in by_window[start]:
             key = (ref['first_author'].lower(), ref['year'],
                    re.sub(r'[^a-z0-9]', '', ref['title'].lower())[:40])
             if key in seen:
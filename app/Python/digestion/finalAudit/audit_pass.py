@@ -21,15 +21,17 @@ class AuditPass(DocPass):
     def apply(self, ctx):
         if ctx.is_stem:
             return
-        soup = ctx.soup
-        output_dir = ctx.output_dir
         # ====================================================================
         # AUDIT PASS: Validate footnote linking
         # ====================================================================
         emit_progress(77, "doc_audit", "Validating footnote linking")
         print("\n--- AUDIT: Validating footnote linking ---")
-        audit_data = compute_footnote_audit(soup, ctx.footnotes_data)
+        self.report(ctx, compute_footnote_audit(ctx.soup, ctx.footnotes_data), len(ctx.all_footnotes_data))
 
+    def report(self, ctx, audit_data, footnotes_matched):
+        """Record the verdict and write audit.json + conversion_stats.json for `audit_data` (one
+        document's audit, or the per-section audits summed by digestion/section_stream.py)."""
+        output_dir = ctx.output_dir
         print(f"📊 Audit: {audit_data['total_refs']} refs, {audit_data['total_defs']} defs, "
               f"{len(audit_data['gaps'])} gaps, {len(audit_data['duplicates'])} duplicates, "
               f"{len(audit_data['unmatched_refs'])} unmatched refs, {len(audit_data['unmatched_defs'])} unmatched defs")
@@ -84,7 +86,7 @@ class AuditPass(DocPass):
             'references_found': len(ctx.references_data),
             'citations_total': ctx.citations_found,
             'citations_linked': ctx.citations_linked,
-            'footnotes_matched': len(ctx.all_footnotes_data),
+            'footnotes_matched': footnotes_matched,
             'footnote_strategy': ctx.strategy,
             'citation_style': citation_style,
             'font_encoding_warning_count': len(ctx.footnote_warnings),
@@ -0,0 +1,84 @@
+"""Digestion — nodes.diff.jsonl: what a stable-id conversion changed since the book's previous conversion.
+
+One line per added / changed / removed node or footnote (HYPERLIT_STABLE_IDS=1, shared/stable_ids.py), so
+the importer can upsert a handful of rows instead of replacing the whole book. A reconvert deletes
+nodes.jsonl / footnotes.jsonl before it runs, so the previous side is a compact id → digest index
+(stable_ids.baseline.json) written beside the outputs after every stable-id run; without one, a
+nodes.jsonl / footnotes.jsonl still in the dir stands in, and a first conversion diffs as all-added.
+"""
+import hashlib
+import json
+import os
+import re
+
+DIFF_NAME = 'nodes.diff.jsonl'
+BASELINE_NAME = 'stable_ids.baseline.json'
+_KINDS = (('node', 'nodes.jsonl', 'id'), ('footnote', 'footnotes.jsonl', 'footnoteId'))
+# Positional fields: where a node sits, not what it is (the importer renumbers both anyway).
+_POSITIONAL = ('startLine', 'chunk_id')
+_TOP_LEVEL_ID = re.compile(r'^(<[A-Za-z][\w-]*\b[^>]*?)\s+id="\d+"')
+
+
+def record_digest(kind, record):
+    """Digest of what a record SAYS — a node's positional fields and the numeric DOM id finalize
+    stamps on its top-level element are left out, so a node that only moved is unchanged."""
+    if kind == 'node':
+        record = {k: v for k, v in record.items() if k not in _POSITIONAL}
+        record['content'] = _TOP_LEVEL_ID.sub(r'\1', record.get('content', ''), count=1)
+    blob = json.dumps(record, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(blob.encode('utf-8')).hexdigest()
+
+
+def _read_jsonl(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    except (OSError, ValueError):
+        return
+
+
+def load_baseline(output_dir):
+    """{'node': {id: digest}, 'footnote': {id: digest}} of the previous conversion in output_dir.
+    Call BEFORE the run overwrites the artifacts it falls back to."""
+    try:
+        with open(os.path.join(output_dir, BASELINE_NAME), encoding='utf-8') as f:
+            baseline = json.load(f)
+        return {kind: dict(baseline.get(kind, {})) for kind, _name, _key in _KINDS}
+    except (OSError, ValueError):
+        pass
+    return {kind: {r.get(key, ''): record_digest(kind, r)
+                   for r in _read_jsonl(os.path.join(output_dir, name))}
+            for kind, name, key in _KINDS}
+
+
+def write_artifact_diff(output_dir, baseline):
+    """Diff the just-written nodes.jsonl / footnotes.jsonl against `baseline` into nodes.diff.jsonl
+    and roll the baseline forward. Returns {kind: {op: count}}."""
+    counts, current = {}, {}
+    diff_path = os.path.join(output_dir, DIFF_NAME)
+    with open(diff_path, 'w', encoding='utf-8') as out:
+        for kind, name, key in _KINDS:
+            previous = baseline.get(kind, {})
+            seen = current[kind] = {}
+            ops = counts[kind] = {'added': 0, 'changed': 0, 'removed': 0}
+            for record in _read_jsonl(os.path.join(output_dir, name)):
+                rid = record.get(key, '')
+                seen[rid] = digest = record_digest(kind, record)
+                op = 'added' if rid not in previous else 'changed' if previous[rid] != digest else None
+                if op:
+                    ops[op] += 1
+                    out.write(json.dumps({'op': op, 'kind': kind, 'id': rid, 'record': record},
+                                         ensure_ascii=False) + '\n')
+            for rid in previous:
+                if rid not in seen:
+                    ops['removed'] += 1
+                    out.write(json.dumps({'op': 'removed', 'kind': kind, 'id': rid}, ensure_ascii=False) + '\n')
+    with open(os.path.join(output_dir, BASELINE_NAME), 'w', encoding='utf-8') as f:
+        json.dump(dict(current, version=1), f)
+    print(f"Stable-id diff: " + '; '.join(
+        f"{kind}s +{c['added']} ~{c['changed']} -{c['removed']}" for kind, c in counts.items())
+        + f" → {diff_path}")
+    return counts
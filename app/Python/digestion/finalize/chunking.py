@@ -0,0 +1,101 @@
+"""Digestion — node chunk_id assignment.
+
+The reader lazy-loads a book chunk by chunk. The default strategy fills each chunk up to a byte budget of
+node content (HYPERLIT_CHUNK_BYTES) with a node-count ceiling, never ends a chunk on a heading (the heading
+moves forward to open the next chunk with its first paragraph), and records the resulting size
+distribution under "chunking" in conversion_stats.json. HYPERLIT_CHUNKING=legacy keeps the fixed 50 nodes
+per chunk for books that must not re-chunk.
+"""
+import json
+import os
+
+LEGACY_CHUNK_SIZE = 50
+DEFAULT_CHUNK_BYTES = 48 * 1024
+MAX_NODES_PER_CHUNK = 200          # DOM cost: a chunk of tiny nodes still has to stay renderable
+_HEADINGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+
+
+def chunking_strategy():
+    return 'legacy' if os.environ.get('HYPERLIT_CHUNKING', '').strip().lower() == 'legacy' else 'bytes'
+
+
+def chunk_budget():
+    try:
+        return max(1024, int(os.environ.get('HYPERLIT_CHUNK_BYTES', '') or DEFAULT_CHUNK_BYTES))
+    except ValueError:
+        return DEFAULT_CHUNK_BYTES
+
+
+def budget_chunk_ids(sizes, headings, budget, max_nodes=MAX_NODES_PER_CHUNK):
+    """chunk ids for nodes of `sizes` bytes: a chunk closes before the node that would push it past
+    `budget` (or `max_nodes`), and trailing headings move into the next chunk with the node they
+    introduce — unless that would leave the closing chunk empty. An oversized node gets a chunk alone."""
+    ids = []
+    chunk = start = used = 0
+    for i, size in enumerate(sizes):
+        if i > start and (used + size > budget or i - start >= max_nodes):
+            j = i
+            while j - 1 > start and headings[j - 1]:
+                j -= 1
+            chunk += 1
+            for k in range(j, i):
+                ids[k] = chunk
+            start, used = j, sum(sizes[j:i])
+        ids.append(chunk)
+        used += size
+    return ids
+
+
+def _spread(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {'min': ordered[0], 'p50': pick(0.5), 'p90': pick(0.9), 'max': ordered[-1],
+            'mean': round(sum(ordered) / len(ordered), 1)}
+
+
+def assign_chunk_ids(nodes):
+    """Set each node dict's chunk_id by the configured strategy; returns the stats block."""
+    ids, stats = plan_chunk_ids([len(n.get('content', '').encode('utf-8')) for n in nodes],
+                                [n.get('type') in _HEADINGS for n in nodes])
+    for node, chunk_id in zip(nodes, ids):
+        node['chunk_id'] = chunk_id
+    return stats
+
+
+def plan_chunk_ids(sizes, headings):
+    """(chunk ids, stats block) for nodes of `sizes` content bytes, `headings` flagging h1-h6 — the
+    same plan as assign_chunk_ids for a caller that streamed the nodes out and kept only their sizes."""
+    strategy = chunking_strategy()
+    if strategy == 'legacy':
+        ids = [i // LEGACY_CHUNK_SIZE for i in range(len(sizes))]
+        budget = None
+    else:
+        budget = chunk_budget()
+        ids = budget_chunk_ids(sizes, headings, budget)
+    per_chunk_bytes, per_chunk_nodes = {}, {}
+    for chunk_id, size in zip(ids, sizes):
+        per_chunk_bytes[chunk_id] = per_chunk_bytes.get(chunk_id, 0) + size
+        per_chunk_nodes[chunk_id] = per_chunk_nodes.get(chunk_id, 0) + 1
+    return ids, {'strategy': strategy, 'budget_bytes': budget,
+                 'max_nodes': MAX_NODES_PER_CHUNK if budget else LEGACY_CHUNK_SIZE,
+                 'chunks': len(per_chunk_bytes), 'bytes_per_chunk': _spread(list(per_chunk_bytes.values())),
+                 'nodes_per_chunk': _spread(list(per_chunk_nodes.values()))}
+
+
+def record_chunk_stats(output_dir, stats):
+    """Merge the chunking block into conversion_stats.json (written earlier by the audit / STEM pass)."""
+    path = os.path.join(output_dir, 'conversion_stats.json')
+    try:
+        with open(path, encoding='utf-8') as f:
+            conversion_stats = json.load(f)
+    except (OSError, ValueError):
+        conversion_stats = {}
+    conversion_stats['chunking'] = stats
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(conversion_stats, f, ensure_ascii=False, indent=4)
+    print(f"Chunking ({stats['strategy']}): {stats['chunks']} chunk(s), "
+          f"bytes/chunk p50 {stats['bytes_per_chunk'].get('p50', 0)} max {stats['bytes_per_chunk'].get('max', 0)}")
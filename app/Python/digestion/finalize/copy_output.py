@@ -0,0 +1,177 @@
+"""Digestion — PostgreSQL COPY-ready outputs (opt-in, HYPERLIT_COPY_OUTPUT=text|csv).
+
+With the flag on, SanitizeAndWrite also writes nodes.copy / footnotes.copy / bibliography.copy: the SAME
+rows ProcessDocumentImportJob derives from nodes.jsonl (its startLine / chunk_id renumbering, node_id
+minting and id + data-node-id stamping on the node's first tag), in the importer's column order, escaped
+for COPY, plus copy_manifest.json naming each file's table, columns, row count and the `COPY … FROM STDIN`
+statement that loads it unchanged. Footnote sub-book rows (library + preview node) need the parent library
+row, so they stay importer-side.
+
+The rows carry write-time timestamps and minted node ids, so they are never cached: a conversion-cache hit
+rebuilds them from the restored jsonl outputs (refresh_copy_outputs), and a run with the flag off removes
+any left by an earlier one.
+"""
+import json
+import os
+import re
+import time
+
+from shared.stable_ids import IDS
+
+COPY_MANIFEST_NAME = 'copy_manifest.json'
+COPY_FILES = ('nodes.copy', 'footnotes.copy', 'bibliography.copy', COPY_MANIFEST_NAME)
+COPY_FORMATS = ('text', 'csv')
+
+# Column lists exactly as ProcessDocumentImportJob writes them.
+NODE_COLUMNS = ('book', 'startLine', 'chunk_id', 'node_id', 'content', 'footnotes', 'plainText', 'type',
+                'created_at', 'updated_at')
+FOOTNOTE_COLUMNS = ('book', 'footnoteId', 'content', 'sub_book_id', 'created_at', 'updated_at')
+BIBLIOGRAPHY_COLUMNS = ('book', 'referenceId', 'source_id', 'content', 'created_at', 'updated_at')
+
+_NODES_PER_CHUNK = 100                                   # the importer's legacy renumbering
+_FIRST_TAG = re.compile(r'^(<[a-z][a-z0-9]*)((?:\s+[^>]*)?)(>)', re.I)
+_ID_ATTR = re.compile(r'\s+id="[^"]*"')
+_NODE_ID_ATTR = re.compile(r'\s+data-node-id="[^"]*"')
+
+
+def copy_format():
+    """The configured COPY format, or None when the emitter is off."""
+    fmt = os.environ.get('HYPERLIT_COPY_OUTPUT', '').strip().lower()
+    if fmt in ('', '0', 'off'):
+        return None
+    return fmt if fmt in COPY_FORMATS else 'text'
+
+
+def _text_field(value):
+    if value is None:
+        return '\\N'
+    value = str(value).replace('\x00', '').replace('\\u0000', '')
+    return (value.replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def _csv_field(value):
+    # Every non-null value quoted: in CSV mode an UNQUOTED empty field is NULL, a quoted one ''.
+    if value is None:
+        return ''
+    value = str(value).replace('\x00', '').replace('\\u0000', '')
+    return '"' + value.replace('"', '""') + '"'
+
+
+def format_row(values, fmt):
+    """One COPY line (without its newline) for `values` in `fmt`."""
+    if fmt == 'csv':
+        return ','.join(_csv_field(v) for v in values)
+    return '\t'.join(_text_field(v) for v in values)
+
+
+def stamp_node_id(content, start_line, node_id):
+    """FileHelpers::ensureNodeIdInContent: id + data-node-id replace any on the first opening tag."""
+    def _stamp(m):
+        attrs = _NODE_ID_ATTR.sub('', _ID_ATTR.sub('', m.group(2)))
+        return f'{m.group(1)} id="{start_line}" data-node-id="{_html_attr(node_id)}"{attrs}{m.group(3)}'
+    return _FIRST_TAG.sub(_stamp, content, count=1) if content else content
+
+
+def _html_attr(value):
+    return (str(value).replace('&', '&amp;').replace('"', '&quot;').replace("'", '&#039;')
+            .replace('<', '&lt;').replace('>', '&gt;'))
+
+
+def _or(value, default):
+    return default if value is None else value          # PHP's `??`
+
+
+def _node_rows(book_id, nodes, now, pipeline_chunks):
+    for index, node in enumerate(nodes):
+        start_line = (index + 1) * 100
+        node_id = IDS.row_node_id(book_id, node.get('id', ''))
+        chunk = node.get('chunk_id', 0) if pipeline_chunks else index // _NODES_PER_CHUNK
+        yield (book_id, start_line, chunk * 100, node_id,
+               stamp_node_id(node.get('content', ''), start_line, node_id),
+               json.dumps(_or(node.get('footnotes'), []), ensure_ascii=False),
+               _or(node.get('plainText'), ''), _or(node.get('type'), 'p'), now, now)
+
+
+def _footnote_rows(book_id, footnotes, now):
+    for fn in footnotes:
+        fn_id = fn.get('footnoteId')
+        if fn_id:
+            # SubBookIdHelper::build for a level-1 (foundation) book; a nested parent's is left NULL.
+            sub_book = f'{book_id}/{fn_id}' if '/' not in str(book_id) else None
+            yield (book_id, fn_id, fn.get('content', ''), sub_book, now, now)
+
+
+def _bibliography_rows(book_id, references, now):
+    deduped = {}                                         # last wins, as the importer's dedup does
+    for ref in references:
+        ref_id = ref.get('referenceId')
+        if ref_id:
+            deduped[ref_id] = (book_id, ref_id, ref.get('source_id'), ref.get('content', ''), now, now)
+    return deduped.values()
+
+
+def write_copy_outputs(output_dir, book_id, nodes, footnotes, references, fmt, pipeline_chunks=False):
+    """Write the three COPY files + copy_manifest.json into output_dir. Returns the manifest.
+    pipeline_chunks: keep the nodes' byte-budgeted chunk_ids (scaled ×100, as the importer does for a
+    'bytes' chunking) instead of the importer's legacy 100-nodes-per-chunk renumbering."""
+    now = time.strftime('%Y-%m-%d %H:%M:%S')
+    tables = []
+    for table, name, columns, rows in (
+            ('nodes', 'nodes.copy', NODE_COLUMNS, _node_rows(book_id, nodes, now, pipeline_chunks)),
+            ('footnotes', 'footnotes.copy', FOOTNOTE_COLUMNS, _footnote_rows(book_id, footnotes, now)),
+            ('bibliography', 'bibliography.copy', BIBLIOGRAPHY_COLUMNS, _bibliography_rows(book_id, references, now))):
+        count = 0
+        with open(os.path.join(output_dir, name), 'w', encoding='utf-8', newline='') as f:
+            for row in rows:
+                f.write(format_row(row, fmt) + '\n')
+                count += 1
+        cols = ', '.join(f'"{c}"' for c in columns)
+        tables.append({'table': table, 'file': name, 'columns': list(columns), 'rows': count,
+                       'copy': f'COPY "{table}" ({cols}) FROM STDIN WITH (FORMAT {fmt})'})
+    manifest = {'version': 1, 'format': fmt, 'encoding': 'UTF8', 'book': book_id, 'generated_at': now,
+                'tables': tables}
+    with open(os.path.join(output_dir, COPY_MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(f"COPY output ({fmt}): " + ', '.join(f"{t['rows']} {t['table']}" for t in tables)
+          + f" → {os.path.join(output_dir, COPY_MANIFEST_NAME)}")
+    return manifest
+
+
+def remove_copy_outputs(output_dir):
+    """Delete COPY files an earlier HYPERLIT_COPY_OUTPUT run left in output_dir."""
+    for name in COPY_FILES:
+        try:
+            os.remove(os.path.join(output_dir, name))
+        except FileNotFoundError:
+            pass
+
+
+def _read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def refresh_copy_outputs(output_dir, book_id):
+    """Bring the COPY files in line with the nodes.jsonl / footnotes.jsonl / references.json already in
+    output_dir (a conversion-cache hit restores those but never the COPY files): rebuilt, freshly
+    stamped, when the flag is on; removed when it is off."""
+    fmt = copy_format()
+    if not fmt:
+        remove_copy_outputs(output_dir)
+        return None
+    try:
+        with open(os.path.join(output_dir, 'references.json'), encoding='utf-8') as f:
+            references = json.load(f)
+    except (OSError, ValueError):
+        references = []
+    try:
+        with open(os.path.join(output_dir, 'conversion_stats.json'), encoding='utf-8') as f:
+            chunking = json.load(f).get('chunking') or {}
+    except (OSError, ValueError):
+        chunking = {}
+    IDS.reset(book_id)
+    return write_copy_outputs(output_dir, book_id, _read_jsonl(os.path.join(output_dir, 'nodes.jsonl')),
+                              _read_jsonl(os.path.join(output_dir, 'footnotes.jsonl')), references, fmt,
+                              pipeline_chunks=chunking.get('strategy') == 'bytes')
@@ -6,12 +6,15 @@ Extracted from process_document.py (the orchestrator now just imports these into
 import json
 import os
 import re
-from bs4 import BeautifulSoup, NavigableString
-from PIL import Image as PILImage
+from bs4 import NavigableString
 from shared.assessment import ASSESSMENT
 from shared.refkeys import is_likely_reference
 from shared.sanitize import sanitize_html
+from shared.html_parsing import parse_fragment
 from shared.pipeline_base import DocPass
+from shared.stable_ids import IDS
+from digestion.finalize.copy_output import copy_format, remove_copy_outputs, write_copy_outputs
+from digestion.finalize.chunking import assign_chunk_ids, record_chunk_stats
 from digestion._doc_shared import emit_progress
 
 
@@ -36,10 +39,18 @@ class StructuralCoverageAssessment(DocPass):
     def apply(self, ctx):
         if ctx.is_stem:          # STEM uses numeric [N] refs, counted differently
             return
-        soup = ctx.soup
-        if soup is None:
+        if ctx.soup is None:
             return
+        self.assess(ctx, *self.count(ctx.soup))
+
+    @staticmethod
+    def count(soup):
+        """(reference-shaped <p>s, footnote refs inside <li>) — additive, so a streamed book sums them."""
         ref_shaped = sum(1 for p in soup.find_all('p') if is_likely_reference(p))
+        fn_in_list = sum(1 for sup in soup.find_all('sup', class_='footnote-ref') if sup.find_parent('li'))
+        return ref_shaped, fn_in_list
+
+    def assess(self, ctx, ref_shaped, fn_in_list):
         extracted = len(ctx.references_data or [])
         if ref_shaped >= self.MIN_REF_SHAPED and extracted <= max(2, ref_shaped * self.EXTRACTED_RATIO):
             ASSESSMENT.record(
@@ -70,7 +81,6 @@ class StructuralCoverageAssessment(DocPass):
         # as footnotes (rudolph1981finance: a page-list's page-numbers became 66 false <sup class="footnote-ref">).
         # NavStripper removes TAGGED page-list/landmarks navs upstream; this catches the UNTAGGED variants and
         # routes the fix to footnote DETECTION, not the linker.
-        fn_in_list = sum(1 for sup in soup.find_all('sup', class_='footnote-ref') if sup.find_parent('li'))
         if fn_in_list >= self.MIN_FN_IN_LIST:
             ASSESSMENT.record(
                 module='structural_coverage',
@@ -139,7 +149,7 @@ def _strip_spans_html(html):
     """Same, for an HTML STRING (footnote / reference content captured as a string before this pass)."""
     if not html or '<span' not in html:
         return html
-    frag = BeautifulSoup(html, 'html.parser')
+    frag = parse_fragment(html)
     _unwrap_spans(frag)
     return str(frag)
 
@@ -178,21 +188,27 @@ class StripStylingSpans(DocPass):
 
 class GenerateNodeChunks(DocPass):
     name = 'generate_node_chunks'
-    description = 'PASS 3 — walk the body into node chunks (numeric ids, extracted refs/footnotes, images).'
+    description = ('PASS 3 — walk the body into node chunks (numeric ids, extracted refs/footnotes, images), '
+                   'then group them into byte-budgeted chunk_ids (chunking.py).')
 
     def apply(self, ctx):
-        soup = ctx.soup
-        output_dir = ctx.output_dir
-        book_id = ctx.book_id
         # ====================================================================
         # PASS 3: GENERATE FINAL JSON OUTPUT
         # ====================================================================
         emit_progress(78, "doc_json_gen", "Building node chunks")
         print("\n--- PASS 3: Generating Final JSON Output ---")
+        node_chunks_data, _ = self.build(ctx.soup, ctx.output_dir, ctx.book_id)
+        ctx.chunking = assign_chunk_ids(node_chunks_data)
+        record_chunk_stats(ctx.output_dir, ctx.chunking)
+        ctx.node_chunks_data = node_chunks_data
+
+    def build(self, soup, output_dir, book_id, start_line=0, section=''):
+        """The node dicts for `soup`'s top-level elements, numbered on from `start_line` under the
+        heading text `section` (both carried across sections by digestion/section_stream.py).
+        Returns (nodes, section) — the heading in force after the last node. chunk_ids stay 0."""
         # Use the passed book_id parameter instead of generating a new one
         node_chunks_data = []
-        start_line_counter = 0
-        CHUNK_SIZE = 50
+        start_line_counter = start_line
         content_root = soup.body if soup.body else soup
 
         # Rewrite bare image src to servable route path: img-1.jpeg → /{book_id}/media/img-1.jpeg
@@ -202,6 +218,7 @@ class GenerateNodeChunks(DocPass):
             if src and not src.startswith('/') and not src.startswith('http'):
                 # Inject dimensions from file on disk before rewriting src
                 img_path = os.path.join(output_dir, 'media', src)
+                from PIL import Image as PILImage    # imported on the first local image, not per document
                 try:
                     with PILImage.open(img_path) as pil_img:
                         w, h = pil_img.size
@@ -211,11 +228,10 @@ class GenerateNodeChunks(DocPass):
                     pass  # image missing or unreadable — skip silently
                 img_tag['src'] = f'/{book_id}/media/{src}'
 
+        # `section`: the enclosing heading's text — the structural half of a stable node key
         for node in content_root.find_all(recursive=False):
             if isinstance(node, NavigableString) and not node.strip(): continue
             start_line_counter += 1
-            chunk_id = (start_line_counter - 1) // CHUNK_SIZE
-            node_key = f"{book_id}_{start_line_counter}"
 
             # Store original ID if it exists (for anchor preservation)
             original_id = node.get('id') if node.has_attr('id') else None
@@ -296,17 +312,56 @@ class GenerateNodeChunks(DocPass):
                         footnote_id = fn_link['href'].lstrip('#')
                         if footnote_id:
                             footnotes_in_node.append({'id': footnote_id, 'marker': marker})
+            # Keyed on the node's text under its section heading (its markup when it has no text, e.g. a
+            # lone image), so a footnote-id or styling change shows up as a CHANGED node, not a new one.
+            plain_text = node.get_text(strip=True)
+            node_key = IDS.node_key(book_id, start_line_counter, section,
+                                    node.name + (node.get_text(' ', strip=True) or node.decode_contents()))
+            if node.name in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
+                section = node.get_text(' ', strip=True)
             node_object = {
-                "id": node_key, "book": book_id, "chunk_id": chunk_id,
+                "id": node_key, "book": book_id, "chunk_id": 0,        # assigned below, once sizes are known
                 "startLine": start_line_counter, "content": str(node),
                 "references": references_in_node, "footnotes": footnotes_in_node,
                 "hypercites": [], "hyperlights": [],
-                "plainText": node.get_text(strip=True),
+                "plainText": plain_text,
                 "type": node.name if hasattr(node, 'name') else 'p'
             }
             node_chunks_data.append(node_object)
-
-        ctx.node_chunks_data = node_chunks_data
+        return node_chunks_data, section
+
+
+def sanitize_node(node):
+    """A copy of the node dict with its content HTML sanitized."""
+    sanitized_node = node.copy()
+    sanitized_node["content"] = sanitize_html(node.get("content", ""))
+    return sanitized_node
+
+
+def write_references(output_dir, sanitized_references):
+    """Write references.json unless a populated one is already there. Returns the kept list, or None."""
+    # Preserve a populated references.json written by an upstream step in the same
+    # run (e.g. ar5iv_preprocessor.py translates LaTeXML bibitems into Hyperlit's
+    # bib shape before process_document.py runs). Only fall back to our own
+    # extracted references when no usable file already exists. The import pipeline
+    # deletes references.json at the start of every import/reconvert, so a file
+    # present here was written deliberately this run. Mirrors the guard the legacy
+    # html_footnote_processor.py applied on the old HTML path.
+    references_path = os.path.join(output_dir, 'references.json')
+    existing_refs = None
+    if os.path.exists(references_path):
+        try:
+            with open(references_path, 'r', encoding='utf-8') as f:
+                existing_refs = json.load(f)
+        except Exception:
+            existing_refs = None
+    if isinstance(existing_refs, list) and existing_refs:
+        print(f"Keeping existing references.json with {len(existing_refs)} entries")
+        return existing_refs
+    with open(references_path, 'w', encoding='utf-8') as f:
+        json.dump(sanitized_references, f, ensure_ascii=False)
+    print(f"Successfully created {references_path}")
+    return None
 
 
 class SanitizeAndWrite(DocPass):
@@ -335,35 +390,13 @@ class SanitizeAndWrite(DocPass):
         total_nodes = len(node_chunks_data)
         sanitized_nodes = []
         for i, node in enumerate(node_chunks_data):
-            sanitized_node = node.copy()
-            sanitized_node["content"] = sanitize_html(node.get("content", ""))
-            sanitized_nodes.append(sanitized_node)
+            sanitized_nodes.append(sanitize_node(node))
             if (i + 1) % 5000 == 0:
                 emit_progress(80 + int((i / total_nodes) * 4), "doc_sanitize", f"Sanitized {i + 1} / {total_nodes} nodes")
 
         emit_progress(84, "doc_json_write", "Writing output files")
 
-        # Preserve a populated references.json written by an upstream step in the same
-        # run (e.g. ar5iv_preprocessor.py translates LaTeXML bibitems into Hyperlit's
-        # bib shape before process_document.py runs). Only fall back to our own
-        # extracted references when no usable file already exists. The import pipeline
-        # deletes references.json at the start of every import/reconvert, so a file
-        # present here was written deliberately this run. Mirrors the guard the legacy
-        # html_footnote_processor.py applied on the old HTML path.
-        references_path = os.path.join(output_dir, 'references.json')
-        existing_refs = None
-        if os.path.exists(references_path):
-            try:
-                with open(references_path, 'r', encoding='utf-8') as f:
-                    existing_refs = json.load(f)
-            except Exception:
-                existing_refs = None
-        if isinstance(existing_refs, list) and existing_refs:
-            print(f"Keeping existing references.json with {len(existing_refs)} entries")
-        else:
-            with open(references_path, 'w', encoding='utf-8') as f:
-                json.dump(sanitized_references, f, ensure_ascii=False)
-            print(f"Successfully created {references_path}")
+        existing_refs = write_references(output_dir, sanitized_references)
 
         # Write footnotes as JSONL for memory-efficient PHP streaming
         footnotes_path = os.path.join(output_dir, 'footnotes.jsonl')
@@ -378,6 +411,14 @@ class SanitizeAndWrite(DocPass):
             for node in sanitized_nodes:
                 f.write(json.dumps(node, ensure_ascii=False) + '\n')
         print(f"Successfully created {nodes_path}")
+        # Optional COPY-ready twins of the same rows (HYPERLIT_COPY_OUTPUT=text|csv).
+        fmt = copy_format()
+        if fmt:
+            write_copy_outputs(output_dir, ctx.book_id, sanitized_nodes, sanitized_footnotes,
+                               existing_refs or sanitized_references, fmt,
+                               pipeline_chunks=(ctx.chunking or {}).get('strategy') == 'bytes')
+        else:
+            remove_copy_outputs(output_dir)
         emit_progress(85, "doc_json_written", f"Written {len(sanitized_nodes)} nodes, {len(sanitized_footnotes)} footnotes, {len(sanitized_references)} references")
 
         # Decision-trace: what the pipeline decided, in which module, and why.
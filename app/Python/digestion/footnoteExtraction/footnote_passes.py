@@ -1,13 +1,11 @@
 """Digestion — footnote-EXTRACTION DocPasses (whole-document / sectioned strategies + map flattening).
 Extracted from process_document.py (the orchestrator imports these into DOC_PASSES)."""
-from bs4 import BeautifulSoup
 from shared.pipeline_base import DocPass
+from shared.html_parsing import parse_fragment
 from digestion._doc_shared import emit_progress
 from shared.sanitize import get_element_html_content
-import random
+from shared.stable_ids import IDS
 import re
-import string
-import time
 
 
 class TraditionalFootnotes(DocPass):
@@ -34,8 +32,7 @@ class TraditionalFootnotes(DocPass):
                 identifier = id_match.group(1)
 
                 # Generate unique footnote ID for traditional footnotes (shorter format without book prefix)
-                random_suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=4))
-                unique_fn_id = f"Fn{int(time.time() * 1000)}_{random_suffix}"
+                unique_fn_id = IDS.footnote_id(li.get_text())
 
                 # Add anchor with unique ID and count attribute
                 anchor_tag = soup.new_tag('a', id=unique_fn_id)
@@ -46,7 +43,7 @@ class TraditionalFootnotes(DocPass):
                 back_link['href'] = f"#{unique_fn_id}"
 
                 # Extract content for JSON
-                temp_li = BeautifulSoup(str(li), 'html.parser')
+                temp_li = parse_fragment(str(li))
                 temp_back_link = temp_li.find('a', class_='footnote-back')
                 if temp_back_link:
                     temp_back_link.decompose()
@@ -137,8 +134,7 @@ class SectionedFootnotes(DocPass):
                 print(f"Processing footnote {identifier} in section {section_id}: {full_content[:30]}... ({len(content_parts)} parts)")
 
                 # Generate unique footnote ID with section prefix (shorter format without book prefix)
-                random_suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=4))
-                unique_fn_id = f"s{section_id}_Fn{int(time.time() * 1000)}_{random_suffix}"
+                unique_fn_id = IDS.footnote_id(full_content, prefix=f"s{section_id}_")
 
                 # Add anchor with unique ID and section info to the first element
                 anchor_tag = soup.new_tag('a', id=unique_fn_id)
@@ -8,14 +8,13 @@ This is a PURE extraction of the original method — the rules preserve its exac
 including the in-place mutation of the caller's `all_footnotes` list (reverse-definition appends to
 it, and epub_normalizer's `_write_assessment` reads it afterwards).
 """
-import random
 import re
-import string
-import time
 
-from bs4 import BeautifulSoup, NavigableString
+from bs4 import NavigableString
 
 from shared.link_base import LinkRule, run_link_rules     # was `.link_base` (link_base moved to shared/)
+from shared.stable_ids import IDS
+from shared.html_parsing import parse_fragment
 
 _BLOCK_TAGS = {'p', 'div', 'li', 'aside', 'section', 'blockquote', 'td'}
 
@@ -51,7 +50,7 @@ def strip_leading_footnote_number(content):
     ('5. Text' / '[5] Text' / '<sup>5</sup>. Text' / '* Text' → 'Text')."""
     if not content:
         return content
-    soup = BeautifulSoup(content, 'html.parser')
+    soup = parse_fragment(content)
 
     def strip_marker_element(container):
         first_elem = None
@@ -152,8 +151,8 @@ def convert_noteref_element(elem, new_id, fn_count, soup) -> bool:
     return False
 
 
-def _new_fn_id():
-    return f"Fn{int(time.time() * 1000)}_{''.join(random.choices(string.ascii_lowercase + string.digits, k=8))}"
+def _new_fn_id(*parts):
+    return IDS.footnote_id(*parts, suffix_len=8)
 
 
 # ---------------------------------------------------------------------------
@@ -225,7 +224,7 @@ class IdMappingBuilder(LinkRule):
                 continue
             elem = fn.get('element')
             content_html = extract_footnote_content(elem, old_id) if elem else ""
-            ctx.id_mapping[old_id] = {'new_id': _new_fn_id(), 'count': count,
+            ctx.id_mapping[old_id] = {'new_id': _new_fn_id(content_html), 'count': count,
                                       'content': content_html, 'element': elem}
             count += 1
 
@@ -259,7 +258,7 @@ class NoterefConverter(LinkRule):
             mapping = ctx.id_mapping[target_id]
             new_id = mapping['new_id']
             if new_id in ctx.used_ref_ids:
-                new_id = _new_fn_id()
+                new_id = _new_fn_id('duplicate', target_id, mapping['content'])
                 mapping.setdefault('_duplicate_entries', []).append(new_id)
             ctx.used_ref_ids.add(new_id)
             if original_marker and not original_marker.isdigit():
@@ -6,30 +6,38 @@ Extracted from process_document.py (the orchestrator imports these into DOC_PASS
 import json
 import os
 import re
-from bs4 import BeautifulSoup
 from shared.assessment import ASSESSMENT
+from shared.stable_ids import IDS
 from shared.pipeline_base import DocPass
+from shared.html_parsing import parse_fragment, parse_html
 from digestion._doc_shared import emit_progress
 
 
+def read_footnote_meta(ctx):
+    """Copy the PDF stage's footnote_meta.json signals (STEM classification, mojibake warnings,
+    segment boundaries) onto ctx; a missing file leaves the defaults."""
+    # Check if this is a STEM bibliography-style document
+    footnote_meta_path = os.path.join(ctx.output_dir, 'footnote_meta.json')
+    if os.path.exists(footnote_meta_path):
+        with open(footnote_meta_path, 'r') as f:
+            footnote_meta = json.load(f)
+            ctx.is_stem = footnote_meta.get('classification') == 'wackSTEMbibliographyNotes'
+            ctx.footnote_warnings = footnote_meta.get('footnote_warnings', []) or []
+            ctx.segment_boundaries = footnote_meta.get('segment_boundaries', []) or []
+
+
 class LoadDocument(DocPass):
     name = 'load_document'
     description = 'Seed the assessment trace, parse the HTML, and read footnote_meta.json (STEM signals).'
 
     def apply(self, ctx):
         ASSESSMENT.reset(ctx.output_dir)
+        IDS.reset(ctx.book_id)
         emit_progress(48, "doc_parse", "Parsing HTML document")
         with open(ctx.html_file_path, "r", encoding="utf-8") as f:
-            ctx.soup = BeautifulSoup(f, "html.parser")
+            ctx.soup = parse_html(f)
 
-        # Check if this is a STEM bibliography-style document
-        footnote_meta_path = os.path.join(ctx.output_dir, 'footnote_meta.json')
-        if os.path.exists(footnote_meta_path):
-            with open(footnote_meta_path, 'r') as f:
-                footnote_meta = json.load(f)
-                ctx.is_stem = footnote_meta.get('classification') == 'wackSTEMbibliographyNotes'
-                ctx.footnote_warnings = footnote_meta.get('footnote_warnings', []) or []
-                ctx.segment_boundaries = footnote_meta.get('segment_boundaries', []) or []
+        read_footnote_meta(ctx)
         if ctx.is_stem:
             print("📐 STEM bibliography mode detected — using wackSTEM marker conversion")
             # HYBRID paper (MDPI shape): superscript FOOTNOTES alongside the [N] citations.
@@ -82,14 +90,14 @@ class SplitBibliographyParagraphs(DocPass):
             # Count lines that look like reference entries (start with uppercase + contain a year)
             ref_lines = 0
             for l in lines:
-                line_text = BeautifulSoup(l, 'html.parser').get_text()
+                line_text = parse_fragment(l).get_text()
                 if line_text and line_text[0].isupper() and re.search(r'\d{4}', line_text):
                     ref_lines += 1
             if ref_lines >= 2:
                 new_elements = []
                 for line in lines:
                     new_p = soup.new_tag('p')
-                    new_p.append(BeautifulSoup(line, 'html.parser'))
+                    new_p.append(parse_fragment(line))
                     new_elements.append(new_p)
                 # Insert after original in reverse, then remove original
                 for new_p in reversed(new_elements):
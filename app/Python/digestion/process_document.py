@@ -5,6 +5,8 @@ nodes/footnotes/references. main() is a thin shell over the ordered DOC_PASSES r
 """
 import sys
 import os
+import json
+import shutil
 import argparse
 
 # Re-exported here for backward-compat (`process_document.ASSESSMENT`); the DocPasses record to it.
@@ -14,8 +16,18 @@ from shared.assessment import ASSESSMENT
 # citationLinking/ · footnoteLinking/ · finalAudit/ · finalize/). This file is just the orchestrator:
 # registry + main(). DocPass stays imported HERE so an op:add can register a NEW pass into DOC_PASSES.
 from shared.pipeline_base import DocPass, run_passes
+from shared.conversion_cache import ConversionCache, stage_key, path_digest
+from shared.pass_checkpoint import PassCheckpoints, CheckpointError, checkpoint_passes
+from shared.stable_ids import stable_ids_enabled
+from shared.deep_profile import profiler_from_env, soup_facts
+from shared.admission import admit, MB
+from digestion.finalize.artifact_diff import load_baseline, write_artifact_diff
+from digestion.finalize.copy_output import refresh_copy_outputs
+from digestion.section_stream import stream_sections_enabled, stream_document
+from digestion._doc_shared import emit_progress
 from digestion.load.load import LoadDocument, SafariRtlFix, SplitBibliographyParagraphs
 from digestion.bibliographyExtraction.bib_passes import StemBibliography, ExtractBibliography
+from digestion.bibliographyExtraction.grobid_client import grobid_unanswered
 from digestion.strategySelection.strategy_pass import SelectFootnoteStrategy
 from digestion.footnoteExtraction.footnote_passes import TraditionalFootnotes, SectionedFootnotes, FlattenFootnoteMap
 from digestion.citationLinking.citation_pass import LinkCitationsPass
@@ -71,6 +83,7 @@ class DocContext:
         self.audit_data = None
         # PASS 3
         self.node_chunks_data = []
+        self.chunking = None                # chunk strategy + size distribution (finalize/chunking.py)
 
 
 
@@ -119,12 +132,162 @@ DOC_PASSES = [
 
 # --- MAIN PROCESSING LOGIC ---
 
-def main(html_file_path, output_dir, book_id):
+# What the passes write into output_dir — the set a conversion-cache hit restores. The COPY files
+# (HYPERLIT_COPY_OUTPUT) are rebuilt from these on a hit instead: their rows carry write-time stamps.
+DOC_OUTPUTS = ('nodes.jsonl', 'footnotes.jsonl', 'references.json', 'assessment.json',
+               'audit.json', 'conversion_stats.json')
+# Upstream hand-offs the passes READ from output_dir (footnote_meta from the PDF stage, an EPUB /
+# ar5iv footnotes.json + references.json, the seeded assessment trace) — part of the cache key.
+DOC_SIDE_INPUTS = ('footnote_meta.json', 'footnotes.json', 'references.json', 'assessment.json')
+# Side inputs the passes also WRITE. Left in place, a rerun would read the previous run's output as its
+# upstream hand-off (re-adopting the whole assessment trace, keeping the old references.json) and key the
+# cache on it, so with the cache on the seeds are snapshotted into DOC_SEED_DIR and put back while the file
+# still holds exactly what digestion last wrote. With it off, nothing is snapshotted or restored.
+DOC_SEEDED = ('references.json', 'assessment.json')
+DOC_SEED_DIR = 'digestion_seed'
+_WRITTEN = 'written.json'
+
+
+def _restore_seeds(output_dir):
+    """Make the seeded side files what the upstream stages handed over: snapshot a fresh hand-off,
+    restore the snapshot over digestion's own previous output."""
+    seed_dir = os.path.join(output_dir, DOC_SEED_DIR)
+    try:
+        with open(os.path.join(seed_dir, _WRITTEN), encoding='utf-8') as f:
+            written = json.load(f)
+    except (OSError, ValueError):
+        written = {}
+    os.makedirs(seed_dir, exist_ok=True)
+    for name in DOC_SEEDED:
+        path, saved = os.path.join(output_dir, name), os.path.join(seed_dir, name)
+        current = path_digest(path)
+        if current is not None and current == written.get(name):
+            if os.path.isfile(saved):
+                shutil.copyfile(saved, path)
+            else:
+                os.remove(path)
+        elif current is None:
+            if os.path.isfile(saved):
+                os.remove(saved)
+        else:
+            shutil.copyfile(path, saved)
+
+
+def _record_written(output_dir):
+    """Remember what this run left in the seeded side files (see _restore_seeds)."""
+    written = {name: path_digest(os.path.join(output_dir, name)) for name in DOC_SEEDED}
+    with open(os.path.join(output_dir, DOC_SEED_DIR, _WRITTEN), 'w', encoding='utf-8') as f:
+        json.dump(written, f)
+
+
+def _conversion_key(html_file_path, output_dir, book_id):
+    """Conversion-cache key: the HTML + every side input that reaches the output. book_id is in it
+    because node/footnote ids embed it; media/ because finalize stamps image dimensions from it; the
+    source markers because get_pipeline_type() routes on them; the PDF only when GROBID can read it."""
+    inputs = {
+        'html': path_digest(html_file_path),
+        'book_id': book_id,
+        'side': {name: path_digest(os.path.join(output_dir, name)) for name in DOC_SIDE_INPUTS},
+        'media': path_digest(os.path.join(output_dir, 'media')),
+        'markers': [name for name in ('ocr_response.json', 'original.epub', 'epub_original', 'original.docx')
+                    if os.path.exists(os.path.join(output_dir, name))],
+    }
+    if os.environ.get('GROBID_URL'):
+        inputs['pdf'] = [path_digest(os.path.join(output_dir, name)) for name in ('original.pdf', 'source.pdf')]
+    return stage_key('digestion', inputs)
+
+
+def _store(conv_cache, conv_key, outputs):
+    """Cache this run's outputs — unless a configured GROBID did not answer: the key says "GROBID on",
+    the outputs are the regex fallback, and a hit would keep replaying them after the server recovers."""
+    if grobid_unanswered():
+        print("GROBID did not answer — digestion outputs not cached")
+        return
+    conv_cache.store('digestion', conv_key, outputs)
+
+
+def main(html_file_path, output_dir, book_id, checkpoint=None, resume_from=None, profile=False):
     """Thin shell — build a DocContext and run the ordered DOC_PASSES registry. The conversion logic
     lives in the DocPass units above; this preserves the CLI contract (same args, byte-identical
-    output) the PHP jobs + vibe loop invoke."""
-    ctx = DocContext(html_file_path, output_dir, book_id)
-    run_passes(DOC_PASSES, ctx)
+    output) the PHP jobs + vibe loop invoke. An unchanged input set under unchanged digestion code
+    restores the previous outputs from the conversion cache (shared/conversion_cache.py) instead.
+
+    checkpoint: pass names to save the context after ('all', a comma list; default
+    HYPERLIT_CHECKPOINT). resume_from: restore the checkpoint taken before this pass and run from it
+    (shared/pass_checkpoint.py). Either one bypasses the conversion cache — the point is to RUN.
+
+    With HYPERLIT_STABLE_IDS on, ids are content-derived and nodes.diff.jsonl records what changed
+    since the previous conversion in output_dir (digestion/finalize/artifact_diff.py).
+
+    With HYPERLIT_STREAM_SECTIONS on (and no checkpointing), a book whose notes are local to its
+    sections is converted one bounded section group at a time (digestion/section_stream.py).
+
+    profile (or HYPERLIT_PROFILE): write a profile/ bundle — cProfile stats, sampled stacks and a
+    tracemalloc diff per DocPass — into output_dir (shared/deep_profile.py). Bypasses the cache too."""
+    profiler = profiler_from_env(output_dir, 'digestion', flag=profile)
+    try:
+        _convert(html_file_path, output_dir, book_id, checkpoint, resume_from, profiler)
+    finally:
+        if profiler:
+            profiler.finish()
+
+
+def _convert(html_file_path, output_dir, book_id, checkpoint, resume_from, profiler):
+    if checkpoint is None:
+        checkpoint = os.environ.get('HYPERLIT_CHECKPOINT', '')
+    save_after = checkpoint_passes(checkpoint, DOC_PASSES)
+    conv_cache = ConversionCache.from_env() if not (save_after or resume_from or profiler) else None
+    conv_key = None
+    outputs = {name: os.path.join(output_dir, name) for name in DOC_OUTPUTS}
+    baseline = load_baseline(output_dir) if stable_ids_enabled() else None
+    if conv_cache:
+        _restore_seeds(output_dir)
+        conv_key = _conversion_key(html_file_path, output_dir, book_id)
+        if conv_cache.fetch('digestion', conv_key, outputs):
+            print(f"Conversion cache hit (digestion {conv_key[:12]}…) — restored outputs to {output_dir}")
+            refresh_copy_outputs(output_dir, book_id)
+            emit_progress(85, "doc_json_written", "Restored unchanged conversion from cache")
+            _record_written(output_dir)
+            if baseline is not None:
+                write_artifact_diff(output_dir, baseline)
+            return
+    # Admission control (shared/admission.py): a cache miss is the heavy part — wait until the
+    # estimated peak fits beside the other conversions running on this host instead of racing them
+    # into the OOM killer.
+    ticket = admit('digestion', on_wait=lambda msg: emit_progress(47, "queued", msg),
+                   html_mb=os.path.getsize(html_file_path) / MB)
+    try:
+        if stream_sections_enabled() and not (save_after or resume_from):
+            if stream_document(html_file_path, output_dir, book_id, DocContext):
+                if profiler:
+                    profiler.facts(input_bytes=os.path.getsize(html_file_path))
+                    profiler.mark('stream_document')
+                if conv_key:
+                    _record_written(output_dir)
+                    _store(conv_cache, conv_key, outputs)
+                if baseline is not None:
+                    write_artifact_diff(output_dir, baseline)
+                return
+        ctx = DocContext(html_file_path, output_dir, book_id)
+        checkpoints = PassCheckpoints(output_dir, DOC_PASSES)
+        start = checkpoints.load(ctx, resume_from) if resume_from else 0
+
+        def _after_pass(ctx, i):
+            if DOC_PASSES[i].name in save_after:
+                checkpoints.save(ctx, i)
+            if profiler:
+                if not profiler.input_facts and ctx.soup is not None:
+                    profiler.facts(input_bytes=os.path.getsize(html_file_path), **soup_facts(ctx.soup))
+                profiler.mark(DOC_PASSES[i].name)
+
+        run_passes(DOC_PASSES, ctx, start=start, after_pass=_after_pass if (save_after or profiler) else None)
+        if conv_key:
+            _record_written(output_dir)
+            _store(conv_cache, conv_key, outputs)
+        if baseline is not None:
+            write_artifact_diff(output_dir, baseline)
+    finally:
+        ticket.release()
 
 
 if __name__ == "__main__":
@@ -132,10 +295,22 @@ if __name__ == "__main__":
     parser.add_argument("html_file", help="Path to the input HTML file.")
     parser.add_argument("output_dir", help="Directory to save the output JSON files.")
     parser.add_argument("book_id", help="Book ID to use for generating unique footnote IDs.")
+    parser.add_argument("--checkpoint", nargs="?", const="all", default=None, metavar="PASSES",
+                        help="Save the context after each pass (or after a comma list of pass names) "
+                             "into <output_dir>/checkpoints/.")
+    parser.add_argument("--resume-from", metavar="PASS",
+                        help="Restore the checkpoint taken before PASS and run from PASS onward.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a profiling bundle into <output_dir>/profile/ (as HYPERLIT_PROFILE=1).")
     args = parser.parse_args()
 
     if not os.path.isfile(args.html_file):
         print(f"Error: Input file not found at {args.html_file}")
         sys.exit(1)
 
-    main(args.html_file, args.output_dir, args.book_id)
+    try:
+        main(args.html_file, args.output_dir, args.book_id,
+             checkpoint=args.checkpoint, resume_from=args.resume_from, profile=args.profile)
+    except CheckpointError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,407 @@
+"""Digestion — section-streaming mode (opt-in, HYPERLIT_STREAM_SECTIONS=1) for books too large for one soup.
+
+When a book's notes are local to its chapters, the body is cut at its top-level headings WITHOUT building
+the tree (a tag-depth scan of the raw HTML), and the book is converted in two bounded sweeps:
+
+  • Sweep 1 parses one section at a time for the global pieces — load prep, bibliography extraction (ids
+    kept unique book-wide) and a notes profile saying where a cut is safe — and spools each prepped
+    section to disk. Cuts that would separate footnote markers from their definitions are closed up, so
+    sections are grouped; a book whose notes all sit at the end groups into one and takes the normal path.
+  • Sweep 2 parses one group at a time and runs strategy selection through sanitization on it, carrying
+    node numbering, the heading in force, footnote-section ids and the audit / citation totals across
+    groups while nodes and footnotes stream straight to disk.
+
+chunk_ids are planned from the kept node sizes at the end. Peak memory scales with the largest group
+rather than the book.
+"""
+import json
+import os
+import re
+import shutil
+from collections import Counter
+from html.parser import HTMLParser
+
+from shared.assessment import ASSESSMENT
+from shared.html_parsing import parse_html
+from shared.pipeline_base import run_passes
+from shared.sanitize import sanitize_html
+from shared.stable_ids import IDS
+from digestion._doc_shared import emit_progress
+from digestion.load.load import SafariRtlFix, SplitBibliographyParagraphs, read_footnote_meta
+from digestion.bibliographyExtraction.bibliography import REFERENCE_HEADERS, extract_bibliography
+from digestion.strategySelection.strategy import _FOOTNOTE_DEF_RE
+from digestion.strategySelection.strategy_pass import SelectFootnoteStrategy
+from digestion.footnoteExtraction.footnote_passes import TraditionalFootnotes, SectionedFootnotes, FlattenFootnoteMap
+from digestion.citationLinking.citation_pass import LinkCitationsPass
+from digestion.footnoteLinking.footnote_link_pass import LinkFootnotesPass
+from digestion.finalAudit.audit import compute_footnote_audit
+from digestion.finalAudit.audit_pass import AuditPass
+from digestion.finalize.finalize import (
+    StructuralCoverageAssessment, StripStylingSpans, GenerateNodeChunks,
+    _strip_spans_html, sanitize_node, write_references,
+)
+from digestion.finalize.chunking import plan_chunk_ids, record_chunk_stats
+from digestion.finalize.copy_output import copy_format, remove_copy_outputs, write_copy_outputs
+
+DEFAULT_MIN_GROUP_BYTES = 1024 * 1024   # below this a group is not worth its own parse — merge on
+SPOOL_DIR = '.section_stream'
+_HEADINGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+# html.parser's void elements: BeautifulSoup never nests anything inside these.
+_VOID = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source',
+         'track', 'wbr'}
+
+
+def stream_sections_enabled():
+    return os.environ.get('HYPERLIT_STREAM_SECTIONS', '').strip().lower() in ('1', 'on', 'true', 'yes')
+
+
+def min_group_bytes():
+    try:
+        return max(0, int(os.environ.get('HYPERLIT_STREAM_MIN_BYTES', '') or DEFAULT_MIN_GROUP_BYTES))
+    except ValueError:
+        return DEFAULT_MIN_GROUP_BYTES
+
+
+class _TopLevelScanner(HTMLParser):
+    """Records where each top-level <body> child starts, tracking nesting the way BeautifulSoup's
+    html.parser builder does (an end tag closes up to its open match; strays are ignored)."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.stack = []
+        self.in_body = False
+        self.body_start = self.body_end = None
+        self.children = []           # ((line, col), tag) per top-level element
+
+    def handle_starttag(self, tag, attrs):
+        if not self.in_body:
+            if tag == 'body' and self.body_start is None:
+                self.in_body = True
+                self.body_start = (self.getpos(), len(self.get_starttag_text()))
+            return
+        if not self.stack:
+            self.children.append((self.getpos(), tag))
+        if tag not in _VOID:
+            self.stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if self.in_body and not self.stack:
+            self.children.append((self.getpos(), tag))
+
+    def handle_endtag(self, tag):
+        if not self.in_body:
+            return
+        if tag == 'body':
+            self.body_end = self.getpos()
+            self.in_body = False
+            self.stack = []
+        elif tag in self.stack:
+            while self.stack.pop() != tag:
+                pass
+
+
+def split_sections(html):
+    """Cut the body of `html` before each top-level heading of the highest level that occurs at
+    least twice there (a lone <h1> book title does not count). Returns the section HTML strings
+    (front matter joins the first section); a single string means there is nothing to cut."""
+    scanner = _TopLevelScanner()
+    scanner.feed(html)
+    scanner.close()
+    if scanner.body_start is None:
+        return [html]
+    line_starts = [0]
+    for m in re.finditer('\n', html):
+        line_starts.append(m.end())
+
+    def offset(pos):
+        return line_starts[pos[0] - 1] + pos[1]
+
+    body_from = offset(scanner.body_start[0]) + scanner.body_start[1]
+    body_to = offset(scanner.body_end) if scanner.body_end else len(html)
+    levels = Counter(tag for _, tag in scanner.children if tag in _HEADINGS)
+    level = next((h for h in _HEADINGS if levels[h] >= 2), None)
+    if level is None:
+        return [html[body_from:body_to]]
+    cuts = [offset(pos) for pos, tag in scanner.children if tag == level]
+    if cuts[0] == offset(scanner.children[0][0]):
+        cuts = cuts[1:]                              # nothing but whitespace before the first heading
+    bounds = [body_from] + cuts + [body_to]
+    return [html[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def _parse(body_html):
+    return parse_html(f'<html><body>{body_html}</body></html>')
+
+
+def note_profile(soup):
+    """(footnote refs, definition-shaped lines, sequential ref-section markers, def-section markers)
+    in one section — the signals analyze_document_structure counts, used here only to place safe
+    cuts. Definition-shaped lines under a bibliography heading count too: the whole_document
+    extractor can still claim them, so they must never be cut away from the markers before them."""
+    refs = defs = 0
+    for element in soup.find_all(['p', 'div', 'section', 'li', 'hr']):
+        text = element.get_text().strip()
+        if _FOOTNOTE_DEF_RE.search(text):
+            defs += 1
+        elif (re.search(r'\[\^?\d+\]', text)
+              or any(s.get_text(strip=True).isdigit() for s in element.find_all('sup'))):
+            refs += 1
+    if soup.find('section', class_='footnotes'):
+        defs += 1
+    return (refs, defs, len(soup.find_all('a', class_='footnoteSectionStart')),
+            len(soup.find_all('a', class_='footnoteDefinitionsStart')))
+
+
+def group_sections(profiles, sizes, min_bytes):
+    """Group consecutive section indices so no group boundary separates markers from the notes they
+    point at. Sequential books (explicit restart markers) cut only once every ref section opened so
+    far has met its def section. Otherwise markers with no definitions yet keep the group open until
+    definitions arrive, and a section of definitions with no markers of its own (an endnotes or
+    reference list) always joins the group before it. A group also stays open until it holds
+    `min_bytes`."""
+    sequential = any(p[2] or p[3] for p in profiles)
+    groups, current, size = [], [], 0
+    pending = False
+    open_refs = 0
+    for i, (refs, defs, ref_marks, def_marks) in enumerate(profiles):
+        if sequential:
+            safe = open_refs == 0
+        else:
+            safe = not pending and not (defs and not refs)
+        if current and safe and size >= min_bytes:
+            groups.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += sizes[i]
+        open_refs += ref_marks - def_marks
+        if defs:
+            pending = False
+        elif refs:
+            pending = True
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _has_reference_heading(soup):
+    # The heading test _find_reference_paragraphs applies: with one anywhere in the book, the
+    # whole-document scan reads ONLY the heading-led runs, so only their sections are extracted.
+    return any(h.get_text(strip=True).lower() in REFERENCE_HEADERS for h in soup.find_all(_HEADINGS))
+
+
+def _spool_path(spool, index):
+    return os.path.join(spool, f'{index:05d}.html')
+
+
+def _spool_write(spool, index, soup):
+    """Spool the section's prepped body; returns its size in bytes."""
+    body = soup.body.decode_contents()
+    with open(_spool_path(spool, index), 'w', encoding='utf-8') as f:
+        f.write(body)
+    return len(body.encode('utf-8'))
+
+
+def _extract_into(ctx, soup, used_ids):
+    bibliography_map, references = extract_bibliography(soup)
+    _merge_bibliography(soup, bibliography_map, references, ctx.bibliography_map, ctx.references_data, used_ids)
+
+
+def _merge_bibliography(soup, bibliography_map, references, global_map, global_references, used_ids):
+    """Fold one section's extraction into the book's. An entry id an earlier section already used is
+    re-suffixed (in the spooled soup too) so ids stay unique book-wide; earlier sections win a key."""
+    renamed = {}
+    for ref in references:
+        entry_id = ref['referenceId']
+        if entry_id in used_ids:
+            suffix = 1
+            while entry_id + chr(ord('a') + suffix) in used_ids:
+                suffix += 1
+            new_id = entry_id + chr(ord('a') + suffix)
+            anchor = soup.find('a', {'id': entry_id, 'class': 'bib-entry'})
+            if anchor:
+                anchor['id'] = new_id
+                parent_p = anchor.find_parent('p')
+                ref['content'] = str(parent_p) if parent_p else ref['content']
+            renamed[entry_id] = ref['referenceId'] = new_id
+        used_ids.add(ref['referenceId'])
+        global_references.append(ref)
+    for key, entry_id in bibliography_map.items():
+        global_map.setdefault(key, renamed.get(entry_id, entry_id))
+
+
+def _offset_section_ids(footnote_sections, offset):
+    # detect_footnote_sections numbers from 1 in every group; shift so fn-section-id / the "s<id>_"
+    # footnote-id prefix stay what one whole-book detection would have numbered them.
+    for section in footnote_sections:
+        section['id'] = re.sub(r'\d+$', lambda m: str(int(m.group()) + offset), section['id'])
+
+
+def _sum_audit(total, part):
+    if total is None:
+        return part
+    for key in ('total_refs', 'total_defs'):
+        total[key] += part[key]
+    for key in ('gaps', 'duplicates', 'unmatched_refs', 'unmatched_defs'):
+        total[key].extend(part[key])
+    return total
+
+
+def _read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def _record_stream_stats(output_dir, stats):
+    path = os.path.join(output_dir, 'conversion_stats.json')
+    try:
+        with open(path, encoding='utf-8') as f:
+            conversion_stats = json.load(f)
+    except (OSError, ValueError):
+        conversion_stats = {}
+    conversion_stats['streaming'] = stats
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(conversion_stats, f, ensure_ascii=False, indent=4)
+
+
+def stream_document(html_file_path, output_dir, book_id, new_context):
+    """Convert the book section by section. Returns False — having written nothing but its own spool
+    — when the book does not qualify (STEM, pre-extracted footnotes.json, GROBID on, or no safe cut
+    into 2+ groups); the caller then runs DOC_PASSES. `new_context` builds a fresh DocContext."""
+    ctx = new_context(html_file_path, output_dir, book_id)
+    read_footnote_meta(ctx)
+    if ctx.is_stem or os.path.exists(os.path.join(output_dir, 'footnotes.json')) or os.environ.get('GROBID_URL'):
+        print("Section streaming: not applicable (STEM / pre-extracted footnotes / GROBID) — whole-document run")
+        return False
+    with open(html_file_path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    sections = split_sections(html)
+    del html
+    if len(sections) < 2:
+        print("Section streaming: no repeated top-level heading to cut at — whole-document run")
+        return False
+
+    emit_progress(48, "doc_parse", f"Streaming {len(sections)} sections")
+    ASSESSMENT.reset(output_dir)
+    IDS.reset(book_id)
+    spool = os.path.join(output_dir, SPOOL_DIR)
+    os.makedirs(spool, exist_ok=True)
+    try:
+        # --- Sweep 1: load prep + bibliography per section; spool the prepped HTML -------------------
+        profiles, sizes = [], []
+        used_ids = set()
+        bib_sections = 0
+        for i in range(len(sections)):
+            sctx = new_context(html_file_path, output_dir, book_id)
+            sctx.soup = _parse(sections[i])
+            sections[i] = None
+            SafariRtlFix().apply(sctx)
+            SplitBibliographyParagraphs().apply(sctx)
+            if _has_reference_heading(sctx.soup):
+                bib_sections += 1
+                _extract_into(ctx, sctx.soup, used_ids)
+            profiles.append(note_profile(sctx.soup))
+            sizes.append(_spool_write(spool, i, sctx.soup))
+        if not bib_sections:
+            # No "References" heading anywhere: the whole-document scan falls back to reading
+            # reference-shaped paragraphs backwards from the END of the book — the last section.
+            last = len(sections) - 1
+            with open(_spool_path(spool, last), encoding='utf-8') as f:
+                soup = _parse(f.read())
+            _extract_into(ctx, soup, used_ids)
+            sizes[last] = _spool_write(spool, last, soup)
+        groups = group_sections(profiles, sizes, min_group_bytes())
+        if len(groups) < 2:
+            print(f"Section streaming: {len(sections)} sections but no safe cut (notes are not local to "
+                  f"a section) — whole-document run")
+            return False
+        print(f"Section streaming: {len(sections)} sections → {len(groups)} groups, largest "
+              f"{max(sum(sizes[i] for i in g) for g in groups)} bytes")
+
+        # --- Sweep 2: the section-local passes, one group's soup at a time --------------------------
+        # (the DOC_PASSES after strategy selection that only ever look inside their own section)
+        link_passes = [TraditionalFootnotes(), SectionedFootnotes(), FlattenFootnoteMap(), LinkCitationsPass(),
+                       LinkFootnotesPass()]
+        audit_data = None
+        strategies = Counter()
+        ref_shaped = fn_in_list = footnote_count = 0
+        node_sizes, node_headings = [], []
+        start_line, section, section_offset = 0, '', 0
+        nodes_partial = os.path.join(spool, 'nodes.partial.jsonl')
+        footnotes_path = os.path.join(output_dir, 'footnotes.jsonl')
+        with open(nodes_partial, 'w', encoding='utf-8') as nodes_out, \
+                open(footnotes_path, 'w', encoding='utf-8') as footnotes_out:
+            for g, group in enumerate(groups):
+                emit_progress(50 + int(30 * g / len(groups)), "doc_stream", f"Section group {g + 1} / {len(groups)}")
+                body = []
+                for i in group:
+                    with open(_spool_path(spool, i), encoding='utf-8') as f:
+                        body.append(f.read())
+                sctx = new_context(html_file_path, output_dir, book_id)
+                sctx.soup = _parse(''.join(body))
+                del body
+                sctx.footnote_warnings, sctx.segment_boundaries = ctx.footnote_warnings, ctx.segment_boundaries
+                sctx.bibliography_map = ctx.bibliography_map     # global; references stay on ctx
+                SelectFootnoteStrategy().apply(sctx)
+                _offset_section_ids(sctx.footnote_sections, section_offset)
+                section_offset += len(sctx.footnote_sections)
+                run_passes(link_passes, sctx)
+                strategies[sctx.strategy] += 1
+                ctx.citations_found += sctx.citations_found
+                ctx.citations_linked += sctx.citations_linked
+                ctx.citations_unlinked.extend(sctx.citations_unlinked)
+                audit_data = _sum_audit(audit_data, compute_footnote_audit(sctx.soup, sctx.footnotes_data))
+                counts = StructuralCoverageAssessment.count(sctx.soup)
+                ref_shaped += counts[0]
+                fn_in_list += counts[1]
+                footnote_count += len(sctx.all_footnotes_data)
+                StripStylingSpans().apply(sctx)
+                nodes, section = GenerateNodeChunks().build(sctx.soup, output_dir, book_id, start_line, section)
+                start_line += len(nodes)
+                for node in nodes:
+                    node_sizes.append(len(node['content'].encode('utf-8')))
+                    node_headings.append(node['type'] in _HEADINGS)
+                    nodes_out.write(json.dumps(sanitize_node(node), ensure_ascii=False) + '\n')
+                for fn in sctx.footnotes_data:
+                    footnotes_out.write(json.dumps({"footnoteId": fn.get("footnoteId", ""),
+                                                    "content": sanitize_html(fn.get("content", ""))},
+                                                   ensure_ascii=False) + '\n')
+
+        # --- Book-wide tail: audit verdict, coverage, chunk plan, references, COPY -------------------
+        for ref in ctx.references_data:
+            if ref.get('content'):
+                ref['content'] = _strip_spans_html(ref['content'])
+        ctx.strategy = max(strategies, key=lambda s: (s != 'no_footnotes', strategies[s]))
+        AuditPass().report(ctx, audit_data, footnote_count)
+        StructuralCoverageAssessment().assess(ctx, ref_shaped, fn_in_list)
+        chunk_ids, ctx.chunking = plan_chunk_ids(node_sizes, node_headings)
+        record_chunk_stats(output_dir, ctx.chunking)
+        _record_stream_stats(output_dir, {'sections': len(sections), 'groups': len(groups),
+                                          'largest_group_bytes': max(sum(sizes[i] for i in g) for g in groups),
+                                          'strategies': dict(strategies)})
+        nodes_path = os.path.join(output_dir, 'nodes.jsonl')
+        with open(nodes_path, 'w', encoding='utf-8') as f:
+            for node, chunk_id in zip(_read_jsonl(nodes_partial), chunk_ids):
+                node['chunk_id'] = chunk_id
+                f.write(json.dumps(node, ensure_ascii=False) + '\n')
+        print(f"Successfully created {footnotes_path}")
+        print(f"Successfully created {nodes_path}")
+        sanitized_references = [
+            {"referenceId": r.get("referenceId", ""), "content": sanitize_html(r.get("content", ""))}
+            for r in ctx.references_data
+        ]
+        existing_refs = write_references(output_dir, sanitized_references)
+        fmt = copy_format()
+        if fmt:
+            write_copy_outputs(output_dir, book_id, _read_jsonl(nodes_path), _read_jsonl(footnotes_path),
+                               existing_refs or sanitized_references, fmt,
+                               pipeline_chunks=ctx.chunking['strategy'] == 'bytes')
+        else:
+            remove_copy_outputs(output_dir)
+        emit_progress(85, "doc_json_written", f"Written {len(chunk_ids)} nodes, {footnote_count} footnotes, "
+                                              f"{len(sanitized_references)} references")
+        ASSESSMENT.dump(output_dir)
+        print(f"Successfully created {os.path.join(output_dir, 'assessment.json')} ({len(ASSESSMENT.records)} records)")
+        return True
+    finally:
+        shutil.rmtree(spool, ignore_errors=True)
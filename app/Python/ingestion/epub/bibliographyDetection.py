@@ -9,7 +9,6 @@ import random
 import string
 import json
 from bs4 import BeautifulSoup, NavigableString
-import bleach
 from ingestion.epub.epub_base import EpubTransform
 
 
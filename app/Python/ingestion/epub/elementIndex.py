@@ -0,0 +1,225 @@
+"""Phase ① helper — a maintained id / tag / class index over the combined EPUB soup, so transform lookups
+stop being whole-tree walks.
+
+Every `soup.find(id=x)` walks the tree from the top. StyleHeadingDetector did one per toc.ncx navPoint and
+BlindNotesFootnoteDetector one per note, so TOC-heavy and note-heavy books went quadratic. The orchestrator
+owns ONE ElementIndex per combined soup and hands it to every transform that defines
+`set_element_index(index)` — duck-typed, exactly like set_style_context, so a transform opts in by defining
+the method and a transform run standalone (unit tests, the vibe loop) falls back to the tree walk through
+`find_by_id`.
+
+Consistency contract:
+  • BETWEEN transforms — `detect()` is read-only, so the index survives every transform that did not fire;
+    the orchestrator calls invalidate() after one that did (or that raised), and the next lookup rebuilds
+    in a single pass.
+  • WITHIN a transform — mutations made through unwrap() / decompose() / replace_with() / add() keep it
+    current. Every hit is re-verified anyway (still in the tree, id / name / class unchanged), so an entry
+    made stale by a direct soup mutation degrades to a miss, never to a wrong element.
+
+Lookups answer in DOCUMENT order as of the last build; elements added since are appended after it. The
+index is also the document CAPABILITY profile: satisfies(prerequisites) answers "could this transform
+match?" from its buckets, so the orchestrator skips detectors whose signals are absent without running
+their detect() scans. A ZERO-import leaf (stdlib only), like styleProfiler — phase modules import it
+without pulling in the orchestrator.
+"""
+import re
+from functools import lru_cache
+
+# Attributes indexed by presence (the footnote / landmark semantics detectors key on).
+INDEXED_ATTRS = ('epub:type', 'role')
+
+
+@lru_cache(maxsize=None)
+def _pattern(regex):
+    return re.compile(regex, re.I)
+
+
+def _classes(el):
+    cls = el.get('class')
+    if not cls:
+        return ()
+    return cls.split() if isinstance(cls, str) else cls
+
+
+class ElementIndex:
+    """id / tag / class / attribute-presence → elements of one soup, built lazily in one pass."""
+
+    def __init__(self, soup):
+        self.soup = soup
+        self.builds = 0          # full passes taken — the debug log reports it
+        self._ids = None         # id → {id(el): el}, insertion (document) order; a dict keeps removal O(1)
+        self._tags = None
+        self._classes = None
+        self._attrs = None
+
+    # --- build / invalidate ---------------------------------------------------------------------------
+    def invalidate(self):
+        """Forget everything; the next lookup rebuilds. Called after a transform rewrote the soup."""
+        self._ids = self._tags = self._classes = self._attrs = None
+
+    def _ensure(self):
+        if self._ids is None:
+            self._ids, self._tags, self._classes, self._attrs = {}, {}, {}, {}
+            for el in self.soup.find_all(True):
+                self._add_one(el)
+            self.builds += 1
+
+    def _add_one(self, el):
+        key = id(el)
+        eid = el.get('id')
+        if eid is not None:
+            self._ids.setdefault(eid, {})[key] = el
+        self._tags.setdefault(el.name, {})[key] = el
+        for c in _classes(el):
+            self._classes.setdefault(c, {})[key] = el
+        for attr in INDEXED_ATTRS:
+            if el.has_attr(attr):
+                self._attrs.setdefault(attr, {})[key] = el
+
+    def _drop_one(self, el):
+        key = id(el)
+        eid = el.get('id')
+        if eid is not None and eid in self._ids:
+            self._ids[eid].pop(key, None)
+        self._tags.get(el.name, {}).pop(key, None)
+        for c in _classes(el):
+            self._classes.get(c, {}).pop(key, None)
+        for attr in INDEXED_ATTRS:
+            self._attrs.get(attr, {}).pop(key, None)
+
+    def _attached(self, el):
+        top = el
+        while top.parent is not None:
+            top = top.parent
+        return top is self.soup
+
+    # --- lookups ----------------------------------------------------------------------------------------
+    def by_id(self, eid):
+        """The first live element whose id is `eid` (what `soup.find(id=eid)` returns), or None."""
+        self._ensure()
+        bucket = self._ids.get(eid)
+        if not bucket:
+            return None
+        for key, el in list(bucket.items()):
+            if el.get('id') == eid and self._attached(el):
+                return el
+            del bucket[key]
+        return None
+
+    def has_id(self, eid):
+        return self.by_id(eid) is not None
+
+    def ids(self):
+        """Every id currently in the document (a snapshot set)."""
+        self._ensure()
+        return {eid for eid in list(self._ids) if self.by_id(eid) is not None}
+
+    def class_names(self):
+        """Every class name currently in the document (a snapshot set)."""
+        self._ensure()
+        return {c for c in list(self._classes)
+                if self._any_live(self._classes[c], lambda el, c=c: c in _classes(el))}
+
+    def _live(self, bucket, keep):
+        if not bucket:
+            return []
+        out = []
+        for key, el in list(bucket.items()):
+            if keep(el) and self._attached(el):
+                out.append(el)
+            else:
+                del bucket[key]
+        return out
+
+    def _any_live(self, bucket, keep):
+        if not bucket:
+            return False
+        for key, el in list(bucket.items()):
+            if keep(el) and self._attached(el):
+                return True
+            del bucket[key]
+        return False
+
+    def by_tag(self, name):
+        """Live elements named `name`."""
+        self._ensure()
+        return self._live(self._tags.get(name), lambda el: el.name == name)
+
+    def by_class(self, cls):
+        """Live elements carrying class `cls`."""
+        self._ensure()
+        return self._live(self._classes.get(cls), lambda el: cls in _classes(el))
+
+    def with_attr(self, attr):
+        """Live elements that carry `attr` (one of INDEXED_ATTRS)."""
+        if attr not in INDEXED_ATTRS:
+            raise KeyError(f"attribute {attr!r} is not indexed (INDEXED_ATTRS: {INDEXED_ATTRS})")
+        self._ensure()
+        return self._live(self._attrs.get(attr), lambda el: el.has_attr(attr))
+
+    def satisfies(self, prereq):
+        """Does ANY signal of `prereq` (epub_base.Prerequisites) occur in the document? Cheapest first:
+        tag / attribute buckets, then the distinct class names, then the distinct ids."""
+        self._ensure()
+        for tag in prereq.tags:
+            if self._any_live(self._tags.get(tag), lambda el, tag=tag: el.name == tag):
+                return True
+        for attr in prereq.attrs:
+            if attr not in INDEXED_ATTRS:
+                return True                          # not indexed: cannot rule it out
+            if self._any_live(self._attrs.get(attr), lambda el, attr=attr: el.has_attr(attr)):
+                return True
+        patterns = [_pattern(p) for p in prereq.classes]
+        for cls in list(self._classes) if patterns else ():
+            if (any(p.search(cls) for p in patterns)
+                    and self._any_live(self._classes[cls], lambda el, cls=cls: cls in _classes(el))):
+                return True
+        patterns = [_pattern(p) for p in prereq.ids]
+        for eid in list(self._ids) if patterns else ():
+            if any(p.match(eid) for p in patterns) and self.by_id(eid) is not None:
+                return True
+        return False
+
+    # --- mutations that keep the index current ----------------------------------------------------------
+    def add(self, el):
+        """Index `el` and its descendants after inserting them into the soup."""
+        if self._ids is None:
+            return                                   # not built yet: the build will see them
+        self._add_one(el)
+        for d in el.find_all(True):
+            self._add_one(d)
+
+    def unwrap(self, el):
+        """`el.unwrap()` — its children stay (and stay indexed), `el` leaves the index."""
+        if self._ids is not None:
+            self._drop_one(el)
+        return el.unwrap()
+
+    def decompose(self, el):
+        """`el.decompose()` — `el` and its whole subtree leave the index."""
+        if self._ids is not None:
+            self._drop_one(el)
+            for d in el.find_all(True):
+                self._drop_one(d)
+        el.decompose()
+
+    def replace_with(self, old, new):
+        """`old.replace_with(new)` — `old`'s subtree leaves the index, `new`'s joins it."""
+        if self._ids is not None:
+            self._drop_one(old)
+            for d in old.find_all(True):
+                self._drop_one(d)
+        old.replace_with(new)
+        self.add(new)
+        return old
+
+
+def covering(index, soup):
+    """`index` if it indexes `soup`, else None (a transform handed an index but run on another soup)."""
+    return index if (index is not None and index.soup is soup) else None
+
+
+def find_by_id(soup, index, eid):
+    """`index.by_id(eid)` when `index` covers `soup`, else the `soup.find(id=eid)` tree walk it replaces."""
+    index = covering(index, soup)
+    return index.by_id(eid) if index else soup.find(id=eid)
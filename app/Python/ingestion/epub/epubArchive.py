@@ -0,0 +1,155 @@
+"""Phase ⓪ helper — read a .epub straight from its zip, touching only the members the loader needs.
+
+`ebooklib.epub.read_epub` reads and decodes EVERY manifest item up front — images, fonts, audio — before
+the loader looks at a single spine document, so an image-heavy book paid its whole size in memory just to
+be opened. EpubArchive parses META-INF/container.xml and the OPF, and reads nothing else until asked:
+the spine documents, the stylesheets and toc.ncx are read by name; an image member is opened only when
+ImageProcessor copies it into media/ (a streaming zip → file copy, never a full read).
+
+Parity with the EbookLib loader it replaces is deliberate, down to its quirks, so the produced HTML does
+not move:
+  • documents() = every manifest item of media-type application/xhtml+xml, in MANIFEST order (EbookLib's
+    ITEM_DOCUMENT list — not the spine; the extracted-directory loader is the one that follows the spine);
+  • render_document() passes each document through EbookLib's own EpubHtml / EpubCoverHtml rendering
+    (lxml re-parse + pretty-printed XHTML), which is what `item.get_content()` returned;
+  • stylesheets() / ncx() pick items by file extension (.css / .ncx), as EbookLib's get_type() does.
+
+Stdlib-only at import time; EbookLib is imported lazily, by render_document() alone.
+"""
+import os
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from urllib.parse import unquote
+
+_DC = '{http://purl.org/dc/elements/1.1/}'
+_OPEN = {}                   # (path, pid) → open EpubArchive (open_archive / close_archive)
+_RENDER_BOOK = []            # per process: the EpubBook whose templates render_document() uses
+
+
+def _strip_ns(root):
+    for elem in root.iter():
+        elem.tag = re.sub(r'\{.*?\}', '', elem.tag)
+    return root
+
+
+class ManifestItem:
+    """One OPF <manifest><item>: its (percent-decoded) href, media-type and properties."""
+
+    def __init__(self, item_id, href, media_type, properties):
+        self.id = item_id
+        self.href = href
+        self.media_type = media_type
+        self.properties = properties
+
+    @property
+    def is_cover_page(self):
+        """An xhtml item flagged `cover` (and not `nav`): EbookLib rebuilds it as its own default cover page."""
+        return (self.media_type == 'application/xhtml+xml' and 'cover' in self.properties
+                and 'nav' not in self.properties)
+
+    @property
+    def name(self):
+        """The name EbookLib gives the item (`get_name()`): the href, or "cover.xhtml" for a cover page."""
+        return 'cover.xhtml' if self.is_cover_page else self.href
+
+
+class EpubArchive:
+    """A .epub opened for reading. Member names are zip paths; hrefs are OPF-relative (as in the OPF)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.zf = zipfile.ZipFile(path)
+        self._names = set(self.zf.namelist())
+        container = _strip_ns(ET.fromstring(self.zf.read('META-INF/container.xml')))
+        rootfile = container.find('rootfiles/rootfile')
+        if rootfile is None or not rootfile.get('full-path'):
+            raise ValueError("Could not find <rootfile> in container.xml")
+        self.opf_file = rootfile.get('full-path')
+        self.opf_dir = posixpath.dirname(self.opf_file)
+
+        opf = ET.fromstring(self.zf.read(self.opf_file))
+        self.titles = [(el.text or '', dict(el.attrib)) for el in opf.iter(_DC + 'title')]
+        _strip_ns(opf)
+        self.manifest = [
+            ManifestItem(item.get('id'), unquote(item.get('href') or ''), item.get('media-type'),
+                         (item.get('properties') or '').split())
+            for item in opf.findall('.//manifest/item')
+        ]
+
+    def close(self):
+        self.zf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    # --- members --------------------------------------------------------------------------------------
+    def member(self, href):
+        """The zip member an OPF-relative `href` names, or None when the archive has no such member."""
+        name = posixpath.normpath(posixpath.join(self.opf_dir, href))
+        return name if name in self._names else None
+
+    def read(self, href):
+        """The bytes of the member `href` names (KeyError when absent)."""
+        name = self.member(href)
+        if name is None:
+            raise KeyError(f"{href!r} is not in {os.path.basename(self.path)}")
+        return self.zf.read(name)
+
+    def open(self, href):
+        """A streaming file object over the member `href` names (KeyError when absent)."""
+        name = self.member(href)
+        if name is None:
+            raise KeyError(f"{href!r} is not in {os.path.basename(self.path)}")
+        return self.zf.open(name)
+
+    # --- the items the loader reads -------------------------------------------------------------------
+    def documents(self):
+        return [it for it in self.manifest if it.media_type == 'application/xhtml+xml']
+
+    def stylesheets(self):
+        return [it for it in self.manifest if os.path.splitext(it.name)[1].lower() == '.css']
+
+    def ncx(self):
+        return next((it for it in self.manifest if os.path.splitext(it.name)[1].lower() == '.ncx'), None)
+
+
+def open_archive(path):
+    """The open EpubArchive for `path`, shared within this process (the loader, its spine tasks and
+    ImageProcessor read the same handle). Keyed by pid too: a forked spine worker inherits the cache, and
+    reading through the parent's zip handle would share its file offset — it opens its own, once."""
+    key = (path, os.getpid())
+    archive = _OPEN.get(key)
+    if archive is None:
+        archive = _OPEN[key] = EpubArchive(path)
+    return archive
+
+
+def close_archive(path):
+    archive = _OPEN.pop((path, os.getpid()), None)
+    if archive is not None:
+        archive.close()
+
+
+def render_document(raw, item):
+    """A spine document's markup exactly as EbookLib's `item.get_content()` returned it."""
+    from ebooklib import epub
+    if not _RENDER_BOOK:
+        _RENDER_BOOK.append(epub.EpubBook())
+    if item.is_cover_page:
+        doc = epub.EpubCoverHtml()
+    else:
+        doc = epub.EpubHtml(uid=item.id, file_name=item.href, media_type=item.media_type)
+    doc.content = raw
+    doc.book = _RENDER_BOOK[0]
+    return doc.get_content().decode('utf-8')
+
+
+def read_document(epub_path, item):
+    """Read + render the spine document `item` of the .epub at `epub_path`."""
+    return render_document(open_archive(epub_path).read(item.href), item)
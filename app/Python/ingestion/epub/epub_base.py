@@ -1,12 +1,46 @@
-"""Zero-import leaf — the EpubTransform base class ONLY.
+"""Zero-import leaf — the EpubTransform base class (+ its Prerequisites declaration) ONLY.
 
 Lives apart from epub_normalizer.py on purpose: the live backend runs epub_normalizer.py as
 `__main__` (the shim delegates via runpy), so if the phase modules imported the base back from
 epub_normalizer they would re-import it as a SECOND module and deadlock (circular import). A
 leaf that imports nothing from the package can never cycle. Both the orchestrator and every
 phase module (structuralNormalisation / headingMatching / footnoteMatching / bibliographyDetection)
-import EpubTransform from here."""
+import EpubTransform from here. (patternClassifier is itself a stdlib-only leaf.)"""
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+from ingestion.epub.patternClassifier import classifier_for
+
+
+@dataclass(frozen=True)
+class Prerequisites:
+    """Cheap NECESSARY conditions for a transform to match — if NONE of these signals occurs in the soup,
+    detect() could not return True, so the pipeline skips detect()/transform() without scanning. Each
+    field is a tuple of alternatives and ANY one present anywhere in the document is enough to run:
+
+      tags     — element names (<table>)
+      attrs    — attribute names, by presence (epub:type, role — elementIndex.INDEXED_ATTRS)
+      classes  — regexes searched in each class name, case-insensitive (a plain word is a substring)
+      ids      — regexes matched at the start of each id, case-insensitive
+
+    Keep a declaration COARSER than detect(): a signal too narrow silently skips a detector that would
+    have fired. Evaluated against the pipeline's ElementIndex (elementIndex.ElementIndex.satisfies)."""
+    tags: tuple = ()
+    attrs: tuple = ()
+    classes: tuple = ()
+    ids: tuple = ()
+
+    def describe(self):
+        parts = []
+        if self.tags:
+            parts.append('tags ' + ', '.join(f'<{t}>' for t in self.tags))
+        if self.attrs:
+            parts.append('attributes ' + ', '.join(self.attrs))
+        if self.classes:
+            parts.append('classes ' + ', '.join(f'/{c}/' for c in self.classes))
+        if self.ids:
+            parts.append('ids ' + ', '.join(f'/{i}/' for i in self.ids))
+        return '; '.join(parts) or 'nothing'
 
 
 class EpubTransform(ABC):
@@ -22,6 +56,22 @@ class EpubTransform(ABC):
 
     name = "BaseTransform"  # Override in subclass
     description = "Base transform class"  # Override in subclass
+    prerequisites = None  # A Prerequisites, or None ⇒ detect() always runs
+    # Named id / class / href regex families (patternClassifier.PatternFamily) this transform queries via
+    # patterns(). The orchestrator compiles every transform's families together and hands each declaring
+    # transform the document's precomputed table through set_pattern_table().
+    pattern_families = ()
+    _pattern_table = None
+
+    def set_pattern_table(self, table):
+        self._pattern_table = table
+
+    def patterns(self):
+        """The pattern table to query — the pipeline's, else (run standalone) one over this transform's own
+        families, filled as it is asked."""
+        if self._pattern_table is None:
+            self._pattern_table = classifier_for(tuple(self.pattern_families)).table()
+        return self._pattern_table
 
     @abstractmethod
     def detect(self, soup) -> bool:
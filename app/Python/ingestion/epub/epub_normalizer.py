@@ -75,14 +75,22 @@ import time
 import random
 import string
 import json
+import zipfile
 from urllib.parse import unquote
 from abc import ABC, abstractmethod
-from ebooklib import epub, ITEM_DOCUMENT, ITEM_STYLE, ITEM_NAVIGATION
 from bs4 import BeautifulSoup, NavigableString
-import bleach
 
 from digestion.footnoteLinking.footnote_link_rules import link_epub_footnotes
 from ingestion.epub.styleProfiler import StyleProfiler, TocIndex, spine_id_prefix
+from ingestion.epub.elementIndex import ElementIndex
+from ingestion.epub.patternClassifier import classifier_for, pipeline_families
+from ingestion.epub.spineLoader import SpineTask, load_spine, load_workers
+from ingestion.epub.epubArchive import open_archive, close_archive
+from shared.html_parsing import parse_fragment, parse_html
+from shared.conversion_cache import ConversionCache, stage_key, path_digest
+from shared.stable_ids import IDS
+from shared.deep_profile import profiler_from_env, soup_facts
+from shared.admission import admit, MB
 
 
 # =============================================================================
@@ -140,6 +148,7 @@ def sanitize_url(url):
 
 def sanitize_html(html_string):
     """Sanitize HTML to prevent XSS from malicious EPUB content."""
+    import bleach    # ~50ms to import (its vendored html5lib): only a conversion that sanitises pays it
     # First pass: bleach sanitization
     cleaned = bleach.clean(
         html_string,
@@ -149,7 +158,7 @@ def sanitize_html(html_string):
     )
 
     # Second pass: sanitize URLs in href and src attributes
-    soup = BeautifulSoup(cleaned, 'html.parser')
+    soup = parse_fragment(cleaned)
 
     # Sanitize href attributes
     for elem in soup.find_all(href=True):
@@ -298,16 +307,18 @@ def _report_detector_error(transform, exc, log):
     print(tail, file=sys.stderr)
 
 
-def _count_footnote_markers(soup):
+def _count_footnote_markers(soup, index=None):
     """Count candidate footnote MARKERS (noterefs) in the soup — anchors whose href targets a footnote-ish
     id, plus epub:type=noteref elements. Used by the structural-fidelity check: a big DROP across the
-    Phase-1 structural transforms means a cleanup step DETACHED noterefs before detection could use them."""
+    Phase-1 structural transforms means a cleanup step DETACHED noterefs before detection could use them.
+    With the pipeline's ElementIndex the two scans are bucket reads instead of tree walks."""
     seen = set()
-    for a in soup.find_all('a', href=True):
+    anchors = index.by_tag('a') if index else soup.find_all('a', href=True)
+    for a in anchors:
         href = a.get('href', '')
         if href.startswith('#') and re.search(r'(?:fn|ftn|foot|note|end|ref)', href, re.I):
             seen.add(id(a))
-    for el in soup.find_all(attrs={'epub:type': True}):
+    for el in (index.with_attr('epub:type') if index else soup.find_all(attrs={'epub:type': True})):
         if 'noteref' in str(el.get('epub:type', '')).lower():
             seen.add(id(el))
     return len(seen)
@@ -355,7 +366,7 @@ class EpubNormalizer:
 
     Handles both:
     - Extracted EPUB directories (epub_original/)
-    - Direct .epub files (using EbookLib)
+    - Direct .epub files (read straight from the zip — epubArchive.py)
     """
 
     def __init__(self, input_path, output_dir, book_id=None):
@@ -378,6 +389,26 @@ class EpubNormalizer:
         self._toc_ncx_xml = None
         self.style_profiler = None
         self.toc_index = None
+        # id / tag / class index over combined_soup, handed to transforms that define set_element_index
+        # (elementIndex.py). Built by _run_pipeline; rebuilt lazily after each transform that fired.
+        self.element_index = None
+        # The document's id / class / href classification over every transform's pattern_families
+        # (patternClassifier.py), handed to the transforms that declare some. Built by _run_pipeline.
+        self.pattern_table = None
+        self.spine_count = 0
+        # The open .epub (epubArchive.EpubArchive) for a .epub input — ImageProcessor copies images out of
+        # it on demand; closed when run() ends. None for an extracted directory.
+        self.archive = None
+        # Optional shared/deep_profile.StageProfiler — marked after each step and each transform.
+        self.profiler = None
+
+    def _mark(self, step):
+        if self.profiler:
+            self.profiler.mark(step)
+
+    def _load_workers(self, n_items):
+        # Pool workers' parsing would never reach this process's profiler — load serially when profiling.
+        return 1 if self.profiler else load_workers(n_items)
 
     def _progress(self, pct, stage, detail=""):
         """Emit a machine-readable progress line for the PHP job runner."""
@@ -387,6 +418,7 @@ class EpubNormalizer:
     def process(self):
         """Run the full normalization pipeline."""
         debug_log_path = os.path.join(self.output_dir, 'epub_normalizer_debug.txt')
+        IDS.reset(self.book_id)
 
         with open(debug_log_path, 'w', encoding='utf-8') as debug_log:
             self.debug_log = debug_log
@@ -407,6 +439,9 @@ class EpubNormalizer:
                     self._load_from_directory()
                 else:
                     self._load_from_epub_file()
+                if self.profiler:
+                    self.profiler.facts(spine_documents=self.spine_count, **soup_facts(self.combined_soup))
+                self._mark('load')
 
                 # Build the "universal key" from the collected CSS + toc.ncx. Both no-op gracefully when
                 # absent (the whole existing corpus has no CSS), so style-driven detectors stay inert there.
@@ -426,6 +461,7 @@ class EpubNormalizer:
                         self._log(f"Document profile: {profile['shape_signals']}")
                 except Exception as e:
                     self._log(f"Warning: could not write document_profile.json: {e}")
+                self._mark('style_profile')
 
                 # Step 2: Run transform pipeline
                 self._log("\n--- Running Transform Pipeline ---")
@@ -439,6 +475,7 @@ class EpubNormalizer:
                 self._convert_footnotes()
                 fn_count = len(self.results.get('footnotes_json', []))
                 self._progress(35, "epub_footnotes", f"Detected {fn_count} footnotes")
+                self._mark('convert_footnotes')
 
                 # Step 4: Sanitize for security
                 self._log("\n--- Sanitizing HTML ---")
@@ -446,6 +483,7 @@ class EpubNormalizer:
                 final_html = str(self.combined_soup)
                 sanitized_html = sanitize_html(final_html)
                 self._log(f"Sanitized: {len(final_html)} -> {len(sanitized_html)} chars")
+                self._mark('sanitize')
 
                 # Step 5: Write output
                 self._log("\n--- Writing Output ---")
@@ -457,6 +495,7 @@ class EpubNormalizer:
 
                 # Step 6: Write footnotes.json
                 self._write_footnotes_json()
+                self._mark('write')
                 self._progress(45, "epub_complete", "EPUB normalization complete")
 
                 # Summary
@@ -470,6 +509,10 @@ class EpubNormalizer:
                 import traceback
                 self._log(traceback.format_exc())
                 raise
+            finally:
+                if self.archive is not None:
+                    close_archive(self.input_path)
+                    self.archive = None
 
     def _log(self, message):
         """Log to both console and debug file."""
@@ -493,33 +536,53 @@ class EpubNormalizer:
         # and matched nothing. detect() is captured at the detector's own position in the
         # pipeline, which is the real decision (the soup mutates as we go).
         fn_detector_results = []
+        # Transforms skipped on their declared Prerequisites (name → the signals that were absent); the
+        # footnote detectors among them still land in fn_detector_results → the "considered" set.
+        self._skipped = {}
 
         # Structural-transform FIDELITY: snapshot the footnote-marker count of the RAW combined soup, then
         # again right before the FIRST footnote detector runs (i.e. after the Phase-1 structural transforms).
         # A big drop means a structural cleanup step detached noterefs before detection — recorded as a
         # flagged fork in _write_assessment so the fix-loop is sent to structuralNormalisation.py.
-        self._markers_before = _count_footnote_markers(self.combined_soup)
+        self.element_index = ElementIndex(self.combined_soup)
+        self._markers_before = _count_footnote_markers(self.combined_soup, self.element_index)
         self._markers_after_structural = None
         self._last_structural = None
+        # ONE compiled classifier over every transform's declared id / class / href pattern families, and ONE
+        # pass classifying the document's ids + class names up front — detectors then read a dict.
+        families = pipeline_families(TRANSFORM_PIPELINE)
+        try:
+            self.pattern_table = classifier_for(families).table(self.element_index)
+        except Exception as e:
+            # e.g. a (vibe-registered) family reusing another's name — each detector falls back to a table
+            # over its own families, exactly as when run standalone.
+            self.pattern_table = None
+            self._log(f"Pattern classifier unavailable ({e}) — detectors classify with their own families")
 
         for transform in TRANSFORM_PIPELINE:
             if self._markers_after_structural is None and transform.name.endswith('FootnoteDetector'):
-                self._markers_after_structural = _count_footnote_markers(self.combined_soup)
+                self._markers_after_structural = _count_footnote_markers(self.combined_soup, self.element_index)
             elif self._markers_after_structural is None:
                 self._last_structural = transform.name   # the last Phase-1 transform before detection
             # Set context for transforms that need it. output_dir is where the
             # media/ handoff dir goes (BookImageStore ingests from {output_dir}/media).
             if isinstance(transform, ImageProcessor):
-                transform.set_context(self.book_id, self.source_root, self.output_dir)
+                transform.set_context(self.book_id, self.source_root, self.output_dir, archive=self.archive)
             # Hand style-driven detectors the parsed CSS + toc.ncx (duck-typed, so any future
             # style-aware transform opts in just by defining set_style_context).
             if hasattr(transform, 'set_style_context'):
                 transform.set_style_context(self.style_profiler, self.toc_index)
+            # Same duck-typing for the element index: id / tag / class lookups without a tree walk.
+            if hasattr(transform, 'set_element_index'):
+                transform.set_element_index(self.element_index)
+            if getattr(transform, 'pattern_families', None):
+                transform.set_pattern_table(self.pattern_table)
 
             detected = False
             found_here = 0
+            skipped = not self._may_match(transform)
             try:
-                detected = transform.detect(self.combined_soup)
+                detected = not skipped and transform.detect(self.combined_soup)
                 if detected:
                     self._log(f"\n[{transform.name}]")
                     result = transform.transform(self.combined_soup, self._log)
@@ -574,14 +637,44 @@ class EpubNormalizer:
                 # to the model so it can fix its detector.
                 _report_detector_error(transform, e, self._log)
                 detected, found_here = False, 0
+                self.element_index.invalidate()      # it may have died half-way through a rewrite
+            if detected:
+                self.element_index.invalidate()      # transform() rewrote the soup; detect() never does
 
             if transform.name.endswith('FootnoteDetector'):
                 fn_detector_results.append(
-                    {'name': transform.name, 'detected': bool(detected), 'found': found_here})
+                    {'name': transform.name, 'detected': bool(detected), 'found': found_here,
+                     **({'skipped': True} if skipped else {})})
+            self._mark(transform.name)
 
         self.results['all_footnotes'] = all_footnotes
         self.results['all_noterefs'] = all_noterefs
         self.results['fn_detector_results'] = fn_detector_results
+        self._log(f"\nElement index: {self.element_index.builds} build(s) across {len(TRANSFORM_PIPELINE)} transforms; "
+                  f"{len(self._skipped)} skipped on absent prerequisites"
+                  + (f" ({', '.join(self._skipped)})" if self._skipped else ""))
+        if self.pattern_table is not None:
+            self._log(f"Pattern classifier: {len(families)} families; {self.pattern_table.precomputed} ids / "
+                      f"class names classified up front")
+        if self.style_profiler is not None and self.style_profiler.lookups:
+            st = self.style_profiler.stats()
+            self._log(f"StyleProfiler: {st['lookups']} fingerprint lookups over {st['keys']} distinct "
+                      f"(tag, classes, style) keys → {st['signatures']} distinct signatures")
+
+    def _may_match(self, transform):
+        """False when the transform declares Prerequisites and none of them occurs in the current soup —
+        detect() could not fire, so neither it nor transform() runs. Read off the element index (rebuilt in
+        one pass after a transform that fired), never a per-detector scan. Undecidable ⇒ run it."""
+        prereq = getattr(transform, 'prerequisites', None)
+        if prereq is None:
+            return True
+        try:
+            if self.element_index.satisfies(prereq):
+                return True
+        except Exception:
+            return True
+        self._skipped[transform.name] = prereq.describe()
+        return False
 
     def _convert_footnotes(self):
         """Convert detected footnotes to Hyperlit format."""
@@ -708,9 +801,13 @@ class EpubNormalizer:
         fn_results = self.results.get('fn_detector_results', [])
         fired = [r['name'] for r in fn_results if r['detected'] and r['found'] > 0]
         # Roads not taken: footnote detectors that matched nothing (skip the always-on heuristic).
+        skipped = getattr(self, '_skipped', {})
         considered = [
             {'option': f"identify footnotes via {r['name']}",
              'rejected_because': ('detect() matched but it extracted 0 definitions' if r['detected']
+                                  else f"skipped before detect(): none of its prerequisites "
+                                       f"({skipped.get(r['name'], 'its target markup')}) occur in this EPUB"
+                                  if r.get('skipped')
                                   else 'its structural signal was absent in this EPUB'),
              'would_need': self._DETECTOR_NEEDS.get(r['name'], 'its target markup')}
             for r in fn_results
@@ -887,6 +984,7 @@ class EpubNormalizer:
         manifest = {item.get('id'): item.get('href') for item in root.findall('.//manifest/item')}
         spine = [item.get('idref') for item in root.findall('.//spine/itemref')]
         self._log(f"Manifest: {len(manifest)} items, Spine: {len(spine)} items")
+        self.spine_count = len(spine)
 
         # Collect the stylesheet(s) + toc.ncx for the StyleProfiler / TocIndex (the "universal key").
         # Best-effort: a missing/broken CSS or ncx must NEVER break the conversion (the style detectors
@@ -910,15 +1008,12 @@ class EpubNormalizer:
             self._log(f"Warning: CSS/toc collection failed: {e}")
 
         # Combine spine items
-        self.combined_soup = BeautifulSoup(
-            '<html><head><title>Combined EPUB</title></head><body></body></html>',
-            'html.parser'
-        )
+        self.combined_soup = parse_html('<html><head><title>Combined EPUB</title></head><body></body></html>')
         body = self.combined_soup.body
 
-        # Build global ID map: original_id -> prefixed_id
-        global_id_map = {}
-
+        # Parse + id-prefix every spine document (a process pool for big books — spineLoader.py), appended
+        # in spine order; the global ID map (original_id -> prefixed_id) comes back for the serial pass below.
+        tasks = []
         for idref in spine:
             if idref not in manifest:
                 continue
@@ -934,64 +1029,11 @@ class EpubNormalizer:
             if not os.path.exists(file_path):
                 continue
 
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-
-                item_soup = BeautifulSoup(content, 'html.parser')
-                item_body = item_soup.body if item_soup.body else item_soup
-
-                if item_body:
-                    # Generate prefix from file name to avoid duplicate IDs across chapters
-                    # (SHARED with TocIndex via spine_id_prefix so toc.ncx targets resolve identically).
-                    file_prefix = spine_id_prefix(file_href)
-
-                    # Collect all IDs in this chapter (before prefixing)
-                    local_ids = set()
-                    for elem in item_body.find_all(id=True):
-                        local_ids.add(elem['id'])
-                    for elem in item_body.find_all(attrs={'name': True}):
-                        if elem.name == 'a':
-                            local_ids.add(elem['name'])
-
-                    # Prefix all IDs to make them unique, add to global map
-                    for elem in item_body.find_all(id=True):
-                        orig_id = elem['id']
-                        prefixed_id = file_prefix + orig_id
-                        global_id_map[orig_id] = prefixed_id
-                        elem['id'] = prefixed_id
-                    for elem in item_body.find_all(attrs={'name': True}):
-                        if elem.name == 'a':
-                            orig_name = elem['name']
-                            prefixed_name = file_prefix + orig_name
-                            global_id_map[orig_name] = prefixed_name
-                            elem['name'] = prefixed_name
-
-                    # Fix internal links - same-file references get prefixed now
-                    for a_tag in item_body.find_all('a', href=True):
-                        href = a_tag['href']
-                        if '#' in href:
-                            target = href.split('#', 1)[-1]
-                            if target in local_ids:
-                                # Same-file reference - prefix immediately
-                                a_tag['href'] = '#' + file_prefix + target
-
-                    # Fix image paths
-                    for img in item_body.find_all('img', src=True):
-                        src = img['src']
-                        if not src.startswith(('http', 'data:')):
-                            img_path = os.path.normpath(os.path.join(os.path.dirname(file_href), src))
-                            # Relative to the SOURCE root (holds epub_original/), NOT output_dir — so the apply's
-                            # temp out dir can't turn this into a ../../../ path ImageProcessor then rejects.
-                            final_path = os.path.relpath(os.path.join(opf_dir, img_path), self.source_root)
-                            img['src'] = final_path
-
-                    for child in list(item_body.children):
-                        if hasattr(child, 'name') and child.name:
-                            body.append(child)
-
-            except Exception as e:
-                self._log(f"Error loading {file_path}: {e}")
+            # Generate prefix from file name to avoid duplicate IDs across chapters
+            # (SHARED with TocIndex via spine_id_prefix so toc.ncx targets resolve identically).
+            tasks.append(SpineTask(file_path, spine_id_prefix(file_href), os.path.dirname(file_href),
+                                   path=file_path, opf_dir=opf_dir, source_root=self.source_root))
+        global_id_map = load_spine(tasks, body, self._log, self._load_workers(len(tasks)))
 
         # Second pass: Fix cross-file hrefs using the global ID map
         # Same-file references were already prefixed in the first pass
@@ -1010,92 +1052,42 @@ class EpubNormalizer:
                     a_tag['href'] = '#' + fragment
 
     def _load_from_epub_file(self):
-        """Load EPUB content from a .epub file using EbookLib."""
-        book = epub.read_epub(self.input_path)
-        self._log(f"Title: {book.get_metadata('DC', 'title')}")
+        """Load EPUB content straight from a .epub file (epubArchive.py): only container.xml, the OPF, the
+        documents, the CSS and toc.ncx are read; images stay in the zip until ImageProcessor copies them."""
+        self.archive = archive = open_archive(self.input_path)
+        self._log(f"Title: {archive.titles}")
 
         # Collect stylesheet(s) + toc.ncx for the StyleProfiler / TocIndex. Best-effort (never fatal).
         try:
             css_parts = []
-            for item in book.get_items_of_type(ITEM_STYLE):
+            for item in archive.stylesheets():
                 try:
-                    css_parts.append(item.get_content().decode('utf-8', errors='replace'))
+                    css_parts.append(archive.read(item.href).decode('utf-8', errors='replace'))
                 except Exception:
                     pass
             self._raw_css = "\n".join(css_parts)
-            for item in book.get_items_of_type(ITEM_NAVIGATION):
+            ncx = archive.ncx()
+            if ncx is not None:
                 try:
-                    self._toc_ncx_xml = item.get_content().decode('utf-8', errors='replace')
-                    break
+                    self._toc_ncx_xml = archive.read(ncx.href).decode('utf-8', errors='replace')
                 except Exception:
                     pass
         except Exception as e:
             self._log(f"Warning: CSS/toc collection failed: {e}")
 
-        self.combined_soup = BeautifulSoup(
-            '<html><head><title>Combined EPUB</title></head><body></body></html>',
-            'html.parser'
-        )
+        self.combined_soup = parse_html('<html><head><title>Combined EPUB</title></head><body></body></html>')
         body = self.combined_soup.body
 
-        # Build global ID map: original_id -> prefixed_id
-        global_id_map = {}
-
-        spine_items = [item for item in book.get_items() if item.get_type() == ITEM_DOCUMENT]
+        spine_items = archive.documents()
         self._log(f"Spine items: {len(spine_items)}")
+        self.spine_count = len(spine_items)
 
-        for item in spine_items:
-            try:
-                content = item.get_content().decode('utf-8')
-                item_soup = BeautifulSoup(content, 'html.parser')
-                item_body = item_soup.body if item_soup.body else item_soup
-
-                if item_body:
-                    # Generate prefix from item name to avoid duplicate IDs across chapters
-                    item_name = item.get_name()
-                    file_prefix = spine_id_prefix(item_name)
-
-                    # Collect all IDs in this chapter (before prefixing)
-                    local_ids = set()
-                    for elem in item_body.find_all(id=True):
-                        local_ids.add(elem['id'])
-                    for elem in item_body.find_all(attrs={'name': True}):
-                        if elem.name == 'a':
-                            local_ids.add(elem['name'])
-
-                    # Prefix all IDs to make them unique, add to global map
-                    for elem in item_body.find_all(id=True):
-                        orig_id = elem['id']
-                        prefixed_id = file_prefix + orig_id
-                        global_id_map[orig_id] = prefixed_id
-                        elem['id'] = prefixed_id
-                    for elem in item_body.find_all(attrs={'name': True}):
-                        if elem.name == 'a':
-                            orig_name = elem['name']
-                            prefixed_name = file_prefix + orig_name
-                            global_id_map[orig_name] = prefixed_name
-                            elem['name'] = prefixed_name
-
-                    # Fix internal links - same-file references get prefixed now
-                    for a_tag in item_body.find_all('a', href=True):
-                        href = a_tag['href']
-                        if '#' in href:
-                            target = href.split('#', 1)[-1]
-                            if target in local_ids:
-                                a_tag['href'] = '#' + file_prefix + target
-
-                    for img in item_body.find_all('img', src=True):
-                        src = img['src']
-                        if not src.startswith(('http', 'data:')):
-                            item_dir = os.path.dirname(item_name)
-                            img['src'] = os.path.normpath(os.path.join(item_dir, src))
-
-                    for child in list(item_body.children):
-                        if hasattr(child, 'name') and child.name:
-                            body.append(child)
-
-            except Exception as e:
-                self._log(f"Error loading {item.get_name()}: {e}")
+        # Each document is read + rendered by whichever process parses it (spineLoader.py). Generate the
+        # prefix from the item name to avoid duplicate IDs across chapters.
+        tasks = [SpineTask(item.name, spine_id_prefix(item.name), os.path.dirname(item.name),
+                           path=self.input_path, item=item)
+                 for item in spine_items]
+        global_id_map = load_spine(tasks, body, self._log, self._load_workers(len(tasks)))
 
         # Second pass: Fix cross-file hrefs using the global ID map
         for a_tag in body.find_all('a', href=True):
@@ -1112,16 +1104,41 @@ class EpubNormalizer:
 # MAIN
 # =============================================================================
 
+_SPINE_EXTS = ('.html', '.xhtml', '.htm')
+
+
+def _admission_facts(input_path):
+    """What the admission estimate prices (shared/admission.py): the book's (X)HTML bytes — read from the zip
+    directory or the file sizes, nothing is parsed — and the spine-load pool it will start."""
+    sizes = []
+    if os.path.isdir(input_path):
+        for root, _dirs, files in os.walk(input_path):
+            sizes += [os.path.getsize(os.path.join(root, f)) for f in files if f.lower().endswith(_SPINE_EXTS)]
+    else:
+        try:
+            with zipfile.ZipFile(input_path) as zf:
+                sizes = [i.file_size for i in zf.infolist() if i.filename.lower().endswith(_SPINE_EXTS)]
+        except (OSError, zipfile.BadZipFile):
+            pass
+    workers = load_workers(len(sizes))
+    return {'html_mb': sum(sizes) / MB, 'workers': workers if workers > 1 else 0}
+
+
 def main():
+    # --profile (or HYPERLIT_PROFILE=1): write a profile/ bundle into output_dir (shared/deep_profile.py)
+    profile = '--profile' in sys.argv
+    if profile:
+        sys.argv = [a for a in sys.argv if a != '--profile']
     if len(sys.argv) < 2:
         print("EPUB Normalizer - Transform Pipeline")
         print("")
-        print("Usage: python epub_normalizer.py <epub_or_dir> [output_dir] [book_id]")
+        print("Usage: python epub_normalizer.py <epub_or_dir> [output_dir] [book_id] [--profile]")
         print("")
         print("Arguments:")
         print("  epub_or_dir  Path to .epub file or extracted EPUB directory")
         print("  output_dir   Output directory (default: parent of input)")
         print("  book_id      Book ID for footnote IDs (default: auto-generated)")
+        print("  --profile    Write a profiling bundle into <output_dir>/profile/")
         sys.exit(1)
 
     input_path = sys.argv[1]
@@ -1145,9 +1162,45 @@ def main():
             print("Expected META-INF/container.xml")
             sys.exit(1)
 
+    # Conversion cache (shared/conversion_cache.py): an unchanged source + unchanged normalizer code
+    # restores the previous outputs instead of re-running the transforms. Only with an explicit
+    # book_id — footnote ids embed it, and the auto-generated one is different every run.
+    outputs = {name: os.path.join(output_dir, name)
+               for name in ('main-text.html', 'footnotes.json', 'assessment.json',
+                            'document_profile.json', 'epub_normalizer_debug.txt', 'media')}
+    profiler = profiler_from_env(output_dir, 'epub_normalize', flag=profile)
+    conv_cache = ConversionCache.from_env() if book_id and not profiler else None
+    conv_key = None
+    if conv_cache:
+        source_root = os.environ.get('HYPERLIT_SOURCE_ROOT') or output_dir
+        conv_key = stage_key('epub_normalize', {
+            'source': path_digest(input_path),
+            'book_id': book_id,
+            # image srcs are written relative to the source root, so the layout reaches the output
+            'layout': os.path.relpath(os.path.abspath(input_path), os.path.abspath(source_root)),
+        })
+        if conv_cache.fetch('epub_normalize', conv_key, outputs):
+            print(f"Conversion cache hit (epub_normalize {conv_key[:12]}…) — restored outputs to {output_dir}")
+            print("PROGRESS:" + json.dumps({"percent": 45, "stage": "epub_complete",
+                                            "detail": "EPUB normalization complete (cached)"}), flush=True)
+            return
+
+    # Admission control (shared/admission.py): wait until the estimated peak fits beside the other
+    # conversions running on this host instead of racing them into the OOM killer.
+    ticket = admit('epub_normalize', **_admission_facts(input_path), on_wait=lambda msg: print(
+        "PROGRESS:" + json.dumps({"percent": 4, "stage": "queued", "detail": msg}), flush=True))
+
     # Run normalizer
     normalizer = EpubNormalizer(input_path, output_dir, book_id)
-    normalizer.process()
+    normalizer.profiler = profiler
+    try:
+        normalizer.process()
+    finally:
+        ticket.release()
+        if profiler:
+            profiler.finish()
+    if conv_key:
+        conv_cache.store('epub_normalize', conv_key, outputs)
 
 
 if __name__ == '__main__':
@@ -10,8 +10,8 @@ import random
 import string
 import json
 from bs4 import BeautifulSoup, NavigableString
-import bleach
-from ingestion.epub.epub_base import EpubTransform
+from ingestion.epub.epub_base import EpubTransform, Prerequisites
+from ingestion.epub.elementIndex import covering
 
 
 class HeadingNormalizer(EpubTransform):
@@ -60,6 +60,13 @@ class HeadingNormalizer(EpubTransform):
         return {'total_headings': len(headings), 'changes': changes}
 
 
+def _unwrap(tag, index):
+    if index:
+        index.unwrap(tag)
+    else:
+        tag.unwrap()
+
+
 class DeadInternalLinkUnwrapper(EpubTransform):
     """
     Removes dead internal navigation links while preserving external links.
@@ -71,6 +78,12 @@ class DeadInternalLinkUnwrapper(EpubTransform):
 
     name = "DeadInternalLinkUnwrapper"
     description = "Remove dead internal links, keep external URLs"
+    prerequisites = Prerequisites(tags=('a',))
+
+    element_index = None
+
+    def set_element_index(self, index):
+        self.element_index = index
 
     def detect(self, soup) -> bool:
         # Run if there are any internal links (fragments or relative file links)
@@ -85,14 +98,17 @@ class DeadInternalLinkUnwrapper(EpubTransform):
         return False
 
     def transform(self, soup, log) -> dict:
-        # Build set of all IDs in document
-        all_ids = {elem.get('id') for elem in soup.find_all(id=True)}
+        # Set of all IDs in document — from the pipeline's element index when it covers this soup
+        index = covering(self.element_index, soup)
+        all_ids = index.ids() if index else {elem.get('id') for elem in soup.find_all(id=True)}
+        anchors = ([a for a in index.by_tag('a') if a.has_attr('href')] if index
+                   else soup.find_all('a', href=True))
 
         removed = 0
         kept_external = 0
         kept_valid = 0
 
-        for a_tag in list(soup.find_all('a', href=True)):
+        for a_tag in anchors:
             href = a_tag.get('href', '')
 
             # Keep external links
@@ -110,14 +126,14 @@ class DeadInternalLinkUnwrapper(EpubTransform):
                     continue
 
                 # Unwrap dead link (keep text content)
-                a_tag.unwrap()
+                _unwrap(a_tag, index)
                 removed += 1
                 continue
 
             # Remove relative file links (e.g., chapter03.html, notes.html)
             # These are dead after EPUB files are combined
             if href.endswith(('.html', '.xhtml', '.htm')) or '.html#' in href or '.xhtml#' in href:
-                a_tag.unwrap()
+                _unwrap(a_tag, index)
                 removed += 1
                 continue
 
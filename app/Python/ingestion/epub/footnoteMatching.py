@@ -10,8 +10,9 @@ import random
 import string
 import json
 from bs4 import BeautifulSoup, NavigableString
-import bleach
-from ingestion.epub.epub_base import EpubTransform
+from ingestion.epub.epub_base import EpubTransform, Prerequisites
+from ingestion.epub.elementIndex import covering, find_by_id
+from ingestion.epub.patternClassifier import PatternFamily
 from digestion.footnoteLinking.footnote_link_rules import link_epub_footnotes
 
 
@@ -29,6 +30,7 @@ class Epub3SemanticFootnoteDetector(EpubTransform):
     description = "Detect footnotes via epub:type attributes (W3C EPUB3 spec)"
     plain = ('EPUB3\'s W3C-standard scheme: elements tagged epub:type="footnote" / "noteref". The '
              'cleanest, most reliable signal — present in well-made modern EPUBs; runs first.')
+    prerequisites = Prerequisites(attrs=('epub:type',))
 
     def detect(self, soup) -> bool:
         return bool(soup.find(attrs={'epub:type': True}))
@@ -77,6 +79,7 @@ class AriaRoleFootnoteDetector(EpubTransform):
     description = "Detect footnotes via ARIA role attributes"
     plain = ('Accessibility-tagged footnotes: role="doc-footnote" / "doc-noteref" ARIA attributes. '
              'Common in EPUBs built for screen-readers; nearly as reliable as the epub:type scheme.')
+    prerequisites = Prerequisites(attrs=('role',))
 
     def detect(self, soup) -> bool:
         return bool(soup.find(attrs={'role': re.compile(r'^doc-(foot|end)?note')}))
@@ -135,11 +138,16 @@ class ClassPatternFootnoteDetector(EpubTransform):
         r'\bnoteref\b', r'\bfootnote-ref\b', r'\bfnref\b',
         r'\bendnoteref\b', r'\bendnote-ref\b'
     ]
+    # detect() searches these in the joined class string; none spans a space, so per-class is the same test
+    prerequisites = Prerequisites(classes=tuple(FOOTNOTE_PATTERNS + NOTEREF_PATTERNS))
+    pattern_families = (PatternFamily('footnote-class', 'class', FOOTNOTE_PATTERNS),
+                        PatternFamily('noteref-class', 'class', NOTEREF_PATTERNS))
 
     def detect(self, soup) -> bool:
-        for elem in soup.find_all(['aside', 'div', 'section', 'p', 'li', 'a', 'ol', 'ul']):
-            class_str = ' '.join(elem.get('class', []))
-            if any(re.search(p, class_str, re.I) for p in self.FOOTNOTE_PATTERNS + self.NOTEREF_PATTERNS):
+        patterns = self.patterns()
+        for elem in soup.find_all(['aside', 'div', 'section', 'p', 'li', 'a', 'ol', 'ul'], class_=True):
+            classes = elem.get('class')
+            if patterns.any_class(classes, 'footnote-class') or patterns.any_class(classes, 'noteref-class'):
                 return True
         return False
 
@@ -147,12 +155,13 @@ class ClassPatternFootnoteDetector(EpubTransform):
         footnotes = []
         noterefs = []
         seen_ids = set()
+        patterns = self.patterns()
 
         # First, handle list containers (<ol class="footnotes">, <ul class="footnotes">)
         # These contain <li> children where the footnote ID is on a child <a> tag
         for list_elem in soup.find_all(['ol', 'ul']):
             class_str = ' '.join(list_elem.get('class', []))
-            if any(re.search(p, class_str, re.I) for p in self.FOOTNOTE_PATTERNS):
+            if patterns.any_class(list_elem.get('class'), 'footnote-class'):
                 log(f"    Found footnotes list container: <{list_elem.name} class=\"{class_str}\">")
                 # Process each <li> child as a potential footnote
                 for li in list_elem.find_all('li', recursive=False):
@@ -171,8 +180,7 @@ class ClassPatternFootnoteDetector(EpubTransform):
                             log(f"    Found footnote (list item): id={child_id}")
 
         for elem in soup.find_all(['aside', 'div', 'section', 'p', 'li']):
-            class_str = ' '.join(elem.get('class', []))
-            if any(re.search(p, class_str, re.I) for p in self.FOOTNOTE_PATTERNS):
+            if patterns.any_class(elem.get('class'), 'footnote-class'):
                 elem_id = elem.get('id', '')
 
                 # A footnote definition is ONE element — register it once. Prefer the
@@ -210,8 +218,7 @@ class ClassPatternFootnoteDetector(EpubTransform):
                     log(f"    Found footnote (class): id={elem_id}")
 
         for elem in soup.find_all('a'):
-            class_str = ' '.join(elem.get('class', []))
-            if any(re.search(p, class_str, re.I) for p in self.NOTEREF_PATTERNS):
+            if patterns.any_class(elem.get('class'), 'noteref-class'):
                 href = elem.get('href', '')
                 if href.startswith('#'):
                     noterefs.append({
@@ -239,6 +246,7 @@ class NotesClassFootnoteDetector(EpubTransform):
     description = "Detect footnotes in <p class='notes'> with child anchor ID"
     plain = ('Publisher format: <p class="notes"> definition paragraphs whose child anchor back-links to '
              'the in-text marker. Matched by the structure (note paragraph + backlink), not a footnote class.')
+    prerequisites = Prerequisites(classes=('notes',))
 
     def detect(self, soup) -> bool:
         return bool(soup.find('p', class_='notes'))
@@ -358,6 +366,12 @@ class BlindNotesFootnoteDetector(EpubTransform):
     plain = ('Blind-notes scheme (trade non-fiction): the body has NO clickable marker — only an empty '
              '<span id> anchor — and the back-of-book note carries the sole link, a reversed "GO TO NOTE '
              'REFERENCE IN TEXT" back-link. We pair by that back-link\'s id and inject the missing numbered marker.')
+    prerequisites = Prerequisites(classes=('blindnotes', 'link_to_text'))
+
+    element_index = None
+
+    def set_element_index(self, index):
+        self.element_index = index
 
     def detect(self, soup) -> bool:
         # The blindnotes list wrapper, or any reversed-back-link note paragraph (the defining signal).
@@ -373,6 +387,9 @@ class BlindNotesFootnoteDetector(EpubTransform):
         footnotes = []
         noterefs = []
         seen_targets = set()
+        # The anchor lookup runs once per note — through the index when the pipeline supplied one, with
+        # this transform's own mutations made through it so it stays current.
+        index = covering(self.element_index, soup)
 
         # Each note definition is a block carrying a reversed back-link to its in-text anchor.
         for link_p in list(soup.find_all('p', class_='link_to_text')):
@@ -390,19 +407,25 @@ class BlindNotesFootnoteDetector(EpubTransform):
                 continue
 
             # Drop the reversed back-link so "GO TO NOTE REFERENCE IN TEXT" can't leak into content.
-            link_p.decompose()
+            if index:
+                index.decompose(link_p)
+            else:
+                link_p.decompose()
 
             footnotes.append({'id': target, 'element': note_el, 'type': 'endnote', 'strategy': 'blind_notes'})
 
             # The in-text marker is the empty anchor the back-link pointed at. Swap the bare <span>
             # for an empty <a> so the shared converter (which only rewrites <a>/<sup>) emits the <sup>.
-            anchor = soup.find(id=target)
+            anchor = find_by_id(soup, index, target)
             if anchor is None:
                 # No surviving in-text anchor → definition only (the linker counts it as orphaned).
                 continue
             if anchor.name != 'a':
                 new_a = soup.new_tag('a', id=target)
-                anchor.replace_with(new_a)
+                if index:
+                    index.replace_with(anchor, new_a)
+                else:
+                    anchor.replace_with(new_a)
                 anchor = new_a
             # Drop the marker at the end of the sentence it opens (keeps it inline; avoids a stray
             # top-level <sup> when the anchor sits between blocks).
@@ -435,6 +458,7 @@ class TableFootnoteDetector(EpubTransform):
     description = "Detect footnotes in table-based layouts"
     plain = ('Footnotes laid out as a two-column TABLE — the marker/number in one cell, the note text in '
              'the other (e.g. Pluto Press). Identified by the table\'s class or its first-cell anchors.')
+    prerequisites = Prerequisites(tags=('table',))
 
     def detect(self, soup) -> bool:
         # Look for tables that might contain footnotes
@@ -505,6 +529,7 @@ class PandocFootnoteDetector(EpubTransform):
     description = "Detect Pandoc-style footnotes section"
     plain = ('The standard Pandoc / HTML <section class="footnotes"> (or <div class="footnotes">) block — '
              'what Word→pandoc and many conversion tools emit. Very common for DOCX-sourced EPUBs.')
+    prerequisites = Prerequisites(classes=('footnotes',))
 
     def detect(self, soup) -> bool:
         return bool(
@@ -573,6 +598,7 @@ class EndnoteCharactersFootnoteDetector(EpubTransform):
     description = "Detect Word/Calibre endnotes via EndnoteCharacters class"
     plain = ('InDesign / Word export: footnote markers wrapped in <span class="EndnoteCharacters">. A '
              'specific vendor signal — when present it is unambiguous.')
+    prerequisites = Prerequisites(classes=('EndnoteCharacters',))
 
     def detect(self, soup) -> bool:
         return bool(soup.find('span', class_='EndnoteCharacters'))
@@ -663,10 +689,13 @@ class EnoteFootnoteDetector(EpubTransform):
     description = "Detect enote class footnotes (Marxists.org format)"
     plain = ('Marxists.org format: <sup class="enote…"> superscript markers. A site-specific scheme — '
              'the reason this corpus has its own detector.')
+    prerequisites = Prerequisites(classes=('enote',))
+    pattern_families = (PatternFamily('enote-class', 'class', ('(?-i:enote)',)),)
 
     def detect(self, soup) -> bool:
         """Check if document has enote-class superscripts."""
-        return bool(soup.find('sup', class_=lambda c: c and 'enote' in c))
+        patterns = self.patterns()
+        return bool(soup.find('sup', class_=lambda c: patterns.matches('class', c, 'enote-class')))
 
     def transform(self, soup, log) -> dict:
         footnotes = []
@@ -675,7 +704,8 @@ class EnoteFootnoteDetector(EpubTransform):
         seen_ref_targets = set()
 
         # Pattern 1: <sup class="enote..."><a href="#nX">
-        for sup in soup.find_all('sup', class_=lambda c: c and 'enote' in c):
+        patterns = self.patterns()
+        for sup in soup.find_all('sup', class_=lambda c: patterns.matches('class', c, 'enote-class')):
             a_tag = sup.find('a', href=True)
             if not a_tag:
                 # Check if sup is inside an anchor (Pattern 2)
@@ -845,6 +875,8 @@ class AnchoredFootnoteScheme(EpubTransform):
     _BOUNDARIES = {'heading', 'heading-or-anchor'}
     # A self-anchored-block definition's text begins with the note number ("1. ", "12) ").
     _NUM_PREFIX_RE = re.compile(r'^\s*\d{1,4}[.\)\s]')
+    # Every marker shape is an <a href="#X"> (_linked_ids) — no anchor, no linked definitions.
+    prerequisites = Prerequisites(tags=('a',))
 
     def __init__(self, definition, marker='sup-link', content='following-siblings', boundary=None,
                  strip_number=None, normalize_marker=None, note_type='footnote', strategy=None,
@@ -1154,6 +1186,12 @@ class HeuristicFootnoteDetector(EpubTransform):
         r'.*fn\d+_\d+$',  # Similar without leading underscore
     ]
 
+    # Every marker pattern needs an <a>; only the id-based definition pattern does not. With neither, the
+    # "always-on" fallback has nothing to find.
+    prerequisites = Prerequisites(tags=('a',), ids=tuple(ID_PATTERNS))
+    pattern_families = (PatternFamily('heuristic-id', 'id', ID_PATTERNS),
+                        PatternFamily('cross-file-fn-href', 'href', (r'fn\.html#',)))
+
     def detect(self, soup) -> bool:
         # Always run as fallback
         return True
@@ -1163,6 +1201,7 @@ class HeuristicFootnoteDetector(EpubTransform):
         noterefs = []
         seen_ref_ids = set()
         seen_fn_ids = set()
+        patterns = self.patterns()
 
         # Pattern 1a: <sup><a href="#..."> - superscript containing link
         # Skip when inner <a> has a class attribute — in EPUBs, verse numbers use
@@ -1202,7 +1241,7 @@ class HeuristicFootnoteDetector(EpubTransform):
         for elem in soup.find_all(['p', 'div', 'li', 'aside', 'section', 'blockquote', 'td', 'a']):
             elem_id = elem.get('id', '')
             if elem_id and elem_id not in seen_fn_ids:
-                if any(re.match(p, elem_id, re.I) for p in self.ID_PATTERNS):
+                if patterns.matches('id', elem_id, 'heuristic-id'):
                     seen_fn_ids.add(elem_id)
                     footnotes.append({
                         'id': elem_id,
@@ -1242,7 +1281,7 @@ class HeuristicFootnoteDetector(EpubTransform):
                     # (points back to the in-text reference)
                     has_backlink = first_a.get('href', '').strip() != ''
 
-                    if has_backlink and any(re.match(p, a_id, re.I) for p in self.ID_PATTERNS):
+                    if has_backlink and patterns.matches('id', a_id, 'heuristic-id'):
                         seen_fn_ids.add(a_id)
                         footnotes.append({
                             'id': a_id,
@@ -1254,7 +1293,7 @@ class HeuristicFootnoteDetector(EpubTransform):
 
         # Pattern 4: Cross-file footnote links (href="pg0XXXfn.html#pgXXXfnYY")
         # Common in Penguin Classics and similar publisher formats
-        for a_tag in soup.find_all('a', href=re.compile(r'fn\.html#')):
+        for a_tag in soup.find_all('a', href=lambda h: patterns.matches('href', h, 'cross-file-fn-href')):
             href = a_tag.get('href', '')
             target_id = self._extract_target_id(href)
             if target_id and target_id not in seen_ref_ids:
@@ -54,8 +54,8 @@ import random
 import string
 import json
 from bs4 import BeautifulSoup, NavigableString
-import bleach
-from ingestion.epub.epub_base import EpubTransform
+from ingestion.epub.epub_base import EpubTransform, Prerequisites
+from ingestion.epub.elementIndex import find_by_id
 
 
 class CalibreSpanHeadingDetector(EpubTransform):
@@ -85,6 +85,7 @@ class CalibreSpanHeadingDetector(EpubTransform):
 
     # Bold-only spans are typically subsection headings (h3)
     BOLD_HEADING_CLASSES = ['bold']
+    prerequisites = Prerequisites(classes=(r'^calibre\d+$', r'^bold$'))
 
     def detect(self, soup) -> bool:
         # Look for spans with calibreN or bold classes inside paragraphs
@@ -338,6 +339,10 @@ class CSSClassHeadingDetector(EpubTransform):
     # These get merged into a single <h1> before the main transform loop
     CHAPTER_NUM_CLASSES = {'ch-num', 'ch-num1'}
     CHAPTER_TITLE_CLASSES = {'ch-title', 'ch-title1'}
+    # detect() needs a <p> carrying one of these classes exactly
+    prerequisites = Prerequisites(classes=tuple(
+        f'^{re.escape(c)}$' for c in sorted(set(EXPLICIT_CLASSES) | AUTO_DETECT_CLASSES
+                                            | CHAPTER_NUM_CLASSES | CHAPTER_TITLE_CLASSES)))
 
     def detect(self, soup) -> bool:
         body = soup.body if soup.body else soup
@@ -489,6 +494,7 @@ class SectionNumberHeadingDetector(EpubTransform):
              '(1.→h1, 1.1.→h2, 2.3.2.1.→h4), or PART/CHAPTER → h1. For the scheme the <p>-only detectors miss.')
 
     _WRAPPERS = ('blockquote', 'div')
+    prerequisites = Prerequisites(tags=('b', 'strong'), classes=('^bold$',))    # _is_bold
     # a dot-separated number group that ENDS in a dot, then whitespace + a non-space (the heading text)
     _NUM = re.compile(r'^(\d+(?:\.\d+)*)\.\s+\S')
     _MAJOR = re.compile(r'^(PART\s+[IVXLCDM]+|CHAPTER\s+\d+|BOOK\s+[IVXLCDM\d]+)\b', re.I)
@@ -564,6 +570,7 @@ class StyledSectionTitleHeadingDetector(EpubTransform):
         'glossary', 'abbreviations', 'acknowledgments', 'acknowledgements',
     }
     _WRAPPERS = ('p', 'blockquote', 'div')
+    prerequisites = Prerequisites(tags=('b', 'strong'), classes=('^bold$',))    # _is_bold
 
     @staticmethod
     def _is_bold(el):
@@ -654,12 +661,16 @@ class StyleHeadingDetector(EpubTransform):
     def __init__(self):
         self.profiler = None
         self.toc = None
+        self.element_index = None
         self._plan = []
 
     def set_style_context(self, profiler, toc_index):
         self.profiler = profiler
         self.toc = toc_index
 
+    def set_element_index(self, index):
+        self.element_index = index
+
     def _is_heading_shape(self, el):
         txt = el.get_text(strip=True)
         if not txt or len(txt) > self._MAX_HEADING_LEN:
@@ -743,7 +754,7 @@ class StyleHeadingDetector(EpubTransform):
         # body paragraph / page number) can't promote non-headings.
         if toc:
             for pid, depth in toc._depth.items():
-                target = soup.find(id=pid)
+                target = find_by_id(soup, self.element_index, pid)   # one per navPoint: indexed, not a walk
                 if target is None:
                     continue
                 blk = block_of(target)
@@ -0,0 +1,184 @@
+"""Phase ② helper — ONE compiled classifier for the id / href / class-name patterns the footnote detectors
+key on, answered from a per-document table instead of a regex loop per element.
+
+HeuristicFootnoteDetector tried its ~20 ID_PATTERNS one `re.match` at a time against every candidate id
+(twice — definitions, then numbered-anchor endnotes); ClassPatternFootnoteDetector re-searched its 13
+class patterns in every element's joined class string, three times over. A detector now DECLARES its
+patterns as named families on the class:
+
+    pattern_families = (PatternFamily('heuristic-id', 'id', ID_PATTERNS),)
+
+and asks `self.patterns().matches('id', elem_id, 'heuristic-id')`. Every family of one kind is compiled
+into a single alternation — one named group per family — so a string that matches nothing (the vast
+majority of ids and classes) costs ONE regex run, and one that matches is named by the group that fired
+(`lastgroup`); only the families after it are tried individually, to report every family it belongs to.
+
+The orchestrator gathers the families of EVERY transform in TRANSFORM_PIPELINE (so a vibe-registered
+detector contributes its patterns just by declaring `pattern_families`), builds the classifier once per
+family set, and precomputes the classification of every id and class name in the document from the
+ElementIndex: detectors then read a dict. A value not seen at precompute time (an id a transform added,
+an href) is classified on first sight and memoised. A detector run standalone (unit tests, the vibe
+loop) builds the same table from its own families, empty, and fills it as it goes.
+
+Semantics match the loops they replace, case-insensitive throughout:
+  id     — `re.match` at the start of the id (as Prerequisites.ids)
+  class  — `re.search` in each class name (the detectors searched the joined class string; no declared
+           pattern spans a space, so per-class is the same test)
+  href   — `re.search` in the href (bs4's `href=re.compile(...)`)
+A zero-import leaf (stdlib only), like elementIndex — phase modules import it without the orchestrator.
+"""
+import re
+from functools import lru_cache
+
+KINDS = ('id', 'class', 'href')
+_SEARCH_KINDS = ('class', 'href')
+# A backreference (\1, (?P=name)) would be renumbered by the combined pattern's groups — such a family is
+# kept out of the alternation and tried on its own.
+_BACKREF_RE = re.compile(r'\\[1-9]|\(\?P=')
+
+
+class PatternFamily:
+    """A named set of regexes of one kind ('id' | 'class' | 'href'); a value belongs to the family when ANY
+    of its patterns matches. Names are pipeline-wide (two different families may not share one); hashable by
+    content, so equal declarations share one compiled classifier."""
+
+    def __init__(self, name, kind, patterns):
+        if kind not in KINDS:
+            raise ValueError(f"PatternFamily: kind must be one of {KINDS}, got {kind!r}")
+        self.name = name
+        self.kind = kind
+        self.patterns = tuple(patterns)
+
+    def key(self):
+        return (self.name, self.kind, self.patterns)
+
+    def __eq__(self, other):
+        return isinstance(other, PatternFamily) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return f"PatternFamily({self.name!r}, {self.kind!r}, {len(self.patterns)} patterns)"
+
+
+def _body(family):
+    """The family as one regex source with the kind's semantics, anchored for `.match()`."""
+    alts = '|'.join(f'(?:{p})' for p in family.patterns)
+    return f'(?s:.*?)(?:{alts})' if family.kind in _SEARCH_KINDS else f'(?:{alts})'
+
+
+class PatternClassifier:
+    """Every registered family, compiled: one alternation per kind plus one regex per family."""
+
+    def __init__(self, families):
+        self.families = {kind: [] for kind in KINDS}
+        seen = {}
+        for fam in families:
+            if not fam.patterns or seen.get(fam.name) == fam:
+                continue
+            if fam.name in seen:
+                raise ValueError(f"PatternClassifier: two different families are named {fam.name!r}")
+            seen[fam.name] = fam
+            self.families[fam.kind].append(fam)
+        self._single = {}            # family name → its own compiled regex
+        self._combined = {}          # kind → (alternation regex | None, group name → family name, unbundled)
+        for kind, fams in self.families.items():
+            groups, parts, loose = {}, [], []
+            for fam in fams:
+                single = re.compile(_body(fam), re.I)
+                self._single[fam.name] = single
+                if any(_BACKREF_RE.search(p) for p in fam.patterns):
+                    loose.append(fam.name)
+                    continue
+                group = f'f{len(groups)}'
+                groups[group] = fam.name
+                parts.append(f'(?P<{group}>{_body(fam)})')
+            combined = None
+            if parts:
+                try:
+                    combined = re.compile('|'.join(parts), re.I)
+                except re.error:     # a pattern that will not combine (e.g. a mid-pattern global flag)
+                    loose = [fam.name for fam in fams]
+                    groups = {}
+            self._combined[kind] = (combined, groups, loose)
+
+    def names(self, kind):
+        return [fam.name for fam in self.families[kind]]
+
+    def classify(self, kind, value):
+        """The frozenset of family names (of `kind`) that `value` belongs to."""
+        combined, groups, loose = self._combined[kind]
+        hits = []
+        m = combined.match(value) if combined is not None and groups else None
+        if m is not None:
+            # Alternatives are tried in order at position 0, so no family before the one that fired can
+            # match; the ones after it might too.
+            order = list(groups.values())
+            first = groups[m.lastgroup]
+            hits.append(first)
+            hits.extend(n for n in order[order.index(first) + 1:] if self._single[n].match(value))
+        hits.extend(n for n in loose if self._single[n].match(value))
+        return frozenset(hits)
+
+    def table(self, index=None):
+        """A PatternTable for one document, precomputed over `index`'s ids and class names when given."""
+        table = PatternTable(self)
+        if index is not None:
+            table.precompute(index)
+        return table
+
+
+@lru_cache(maxsize=64)
+def classifier_for(families):
+    """The compiled classifier for a tuple of families — compiled once per distinct family set."""
+    return PatternClassifier(families)
+
+
+def pipeline_families(transforms):
+    """Every `pattern_families` declared by the transforms, in pipeline order (the classifier's key)."""
+    out = []
+    for t in transforms:
+        out.extend(getattr(t, 'pattern_families', None) or ())
+    return tuple(out)
+
+
+class PatternTable:
+    """kind → value → frozenset of families, for one document. Lookups of unseen values classify and
+    memoise, so the table never answers differently from the classifier."""
+
+    def __init__(self, classifier):
+        self.classifier = classifier
+        self._memo = {kind: {} for kind in KINDS}
+        self.precomputed = 0
+
+    def precompute(self, index):
+        """Classify every id and class name currently in `index` (elementIndex.ElementIndex) in one go."""
+        ids, classes = self._memo['id'], self._memo['class']
+        classify = self.classifier.classify
+        for eid in index.ids():
+            if eid not in ids:
+                ids[eid] = classify('id', eid)
+        for cls in index.class_names():
+            if cls not in classes:
+                classes[cls] = classify('class', cls)
+        self.precomputed = len(ids) + len(classes)
+
+    def families(self, kind, value):
+        memo = self._memo[kind]
+        hit = memo.get(value)
+        if hit is None:
+            hit = memo[value] = self.classifier.classify(kind, value)
+        return hit
+
+    def matches(self, kind, value, family):
+        """Does `value` belong to `family`? Falsy values never do."""
+        return bool(value) and family in self.families(kind, value)
+
+    def any_class(self, classes, family):
+        """Does any of an element's classes (its bs4 `class` list or a class string) belong to `family`?"""
+        if not classes:
+            return False
+        if isinstance(classes, str):
+            classes = classes.split()
+        return any(family in self.families('class', c) for c in classes)
@@ -9,7 +9,6 @@ import random
 import string
 import json
 from bs4 import BeautifulSoup, NavigableString
-import bleach
 from ingestion.epub.epub_base import EpubTransform
 
 
@@ -216,7 +215,8 @@ class SpanUnwrapper(EpubTransform):
 class ImageProcessor(EpubTransform):
     """
     Processes images from EPUB:
-    1. Copies images from epub_original into the conversion's media/ handoff dir
+    1. Copies images from epub_original (or, for a .epub input, straight out of the zip) into the
+       conversion's media/ handoff dir
     2. Rewrites each <img src> to the BARE filename
     3. Converts nested div wrappers to proper <figure> elements
     4. Detects and preserves figure captions as <figcaption>
@@ -235,16 +235,19 @@ class ImageProcessor(EpubTransform):
         self.book_id = None
         self.input_dir = None
         self.output_dir = None
+        self.archive = None
         self.images_copied = 0
 
     def detect(self, soup) -> bool:
         return bool(soup.find('img'))
 
-    def set_context(self, book_id, input_dir, output_dir=None):
-        """Set context for image processing (called before transform)."""
+    def set_context(self, book_id, input_dir, output_dir=None, archive=None):
+        """Set context for image processing (called before transform). `archive` is the open .epub
+        (epubArchive.EpubArchive) when the input was one — its srcs are OPF-relative member hrefs."""
         self.book_id = book_id
         self.input_dir = input_dir
         self.output_dir = output_dir
+        self.archive = archive
 
     def transform(self, soup, log) -> dict:
         if not self.book_id or not self.input_dir or not self.output_dir:
@@ -296,16 +299,23 @@ class ImageProcessor(EpubTransform):
                     src_path = resolved
                     break
 
-            if not src_path:
+            # A .epub input: the image is a zip member, opened only now and streamed into media/.
+            member = self.archive.member(src) if (not src_path and self.archive is not None) else None
+
+            if not src_path and not member:
                 log(f"    Warning: Image not found: {src}")
                 continue
 
             # Copy image into the media/ handoff dir.
-            filename = src_path.name
+            filename = src_path.name if src_path else pathlib.PurePosixPath(member).name
             dest_path = media_dir / filename
             if not dest_path.exists():
                 import shutil
-                shutil.copy2(src_path, dest_path)
+                if src_path:
+                    shutil.copy2(src_path, dest_path)
+                else:
+                    with self.archive.open(src) as fsrc, open(dest_path, 'wb') as fdst:
+                        shutil.copyfileobj(fsrc, fdst)
                 self.images_copied += 1
 
             # Rewrite src to the BARE filename — finalize.py injects width/height
@@ -14,6 +14,10 @@ Two pieces:
   • StyleProfiler — parse the concatenated CSS into per-class typographic fingerprints (StyleSig) and answer
     `fingerprint(el)` / `prominence(sig, baseline)`. The detector picks the body baseline + clusters styles
     into heading tiers (it needs the soup's per-style usage tally); the profiler just supplies the styles.
+    A Calibre book has a few dozen distinct (tag, classes, inline style) combinations across tens of
+    thousands of elements, so fingerprints are cached by that key and INTERNED (one frozen StyleSig per
+    distinct declaration set), and prominence() is cached per (sig, baseline) — a detector sweeping every
+    block pays a dict lookup per element, not a CSS merge.
   • TocIndex — parse toc.ncx (every EPUB has one — the spec requires a nav document) into prefixed target
     id → nesting depth. Authoritative for WHICH blocks are headings + their LEVEL, independent of styling.
 
@@ -23,11 +27,7 @@ that carries no stylesheet — which is the whole existing regression corpus.
 import os
 import re
 from dataclasses import dataclass
-
-try:
-    import tinycss2
-except Exception:  # pragma: no cover - tinycss2 is a declared dependency, but never hard-fail a conversion
-    tinycss2 = None
+from functools import lru_cache
 
 
 # Font-family buckets — a serif↔sans SWITCH from the body baseline is one heading signal (publishers often
@@ -71,9 +71,10 @@ def _parse_size_em(value):
     return n
 
 
-@dataclass
+@dataclass(frozen=True)
 class StyleSig:
-    """A resolved typographic fingerprint for an element. Sizes are em relative to the body baseline."""
+    """A resolved typographic fingerprint for an element. Sizes are em relative to the body baseline.
+    Frozen: interned instances are shared across elements, and (sig, baseline) keys the prominence cache."""
     font_size_em: float = None
     bold: bool = False
     italic: bool = False
@@ -145,6 +146,9 @@ class StyleProfiler:
     def __init__(self, class_rules, tag_rules):
         self._class_rules = class_rules     # {classname: {prop: value}}
         self._tag_rules = tag_rules         # {tagname: {prop: value}} (body/html/p — for a declared baseline)
+        self._sig_by_key = {}               # (tag, classes, inline style) → StyleSig | None
+        self._interned = {}                 # merged declarations (sorted items) → the one StyleSig for them
+        self.lookups = 0                    # fingerprint() calls — the pipeline logs lookups vs distinct keys
 
     @property
     def has_css(self):
@@ -154,7 +158,11 @@ class StyleProfiler:
     def from_css_text(cls, css_text):
         """Parse concatenated CSS into a StyleProfiler. Returns a profiler with `has_css == False` when there
         is nothing usable (no CSS / parse failure) — the no-op switch every detector gates on."""
-        if not css_text or tinycss2 is None:
+        if not css_text:
+            return cls({}, {})
+        try:
+            import tinycss2     # only a book that ships a stylesheet pays the import
+        except Exception:  # pragma: no cover - tinycss2 is a declared dependency, but never hard-fail a conversion
             return cls({}, {})
         class_rules, tag_rules = {}, {}
         try:
@@ -185,30 +193,49 @@ class StyleProfiler:
 
     def fingerprint(self, el):
         """Resolve an element's typographic StyleSig from its class(es) + inline style (inline wins).
-        Returns None when the element carries no style info (treat as body baseline)."""
+        Returns None when the element carries no style info (treat as body baseline). Cached by
+        (tag, classes, inline style): elements sharing all three share one interned StyleSig."""
         if not self.has_css:
             return None
+        self.lookups += 1
+        name = getattr(el, 'name', None)
+        classes = el.get('class') if hasattr(el, 'get') else None
+        style_attr = el.get('style') if hasattr(el, 'get') else None
+        key = (name, tuple(classes) if isinstance(classes, list) else classes, style_attr)
+        try:
+            return self._sig_by_key[key]
+        except KeyError:
+            pass
         merged = {}
-        tag_rule = self._tag_rules.get(getattr(el, 'name', None))
+        tag_rule = self._tag_rules.get(name)
         if tag_rule:
             merged.update(tag_rule)
-        classes = el.get('class') if hasattr(el, 'get') else None
         for c in (classes or []):
             if c in self._class_rules:
                 merged.update(self._class_rules[c])
-        style_attr = el.get('style') if hasattr(el, 'get') else None
         if style_attr:
             merged.update({k: v for k, v in _parse_inline(style_attr).items() if k in _KEEP_PROPS})
-        if not merged:
-            return None
-        return _sig_from_decls(merged)
+        sig = self._sig_by_key[key] = self._intern(merged) if merged else None
+        return sig
+
+    def _intern(self, decls):
+        dkey = tuple(sorted(decls.items()))
+        sig = self._interned.get(dkey)
+        if sig is None:
+            sig = self._interned[dkey] = _sig_from_decls(decls)
+        return sig
+
+    def stats(self):
+        """Cache accounting for the debug log: lookups, distinct element keys, distinct signatures."""
+        return {'lookups': self.lookups, 'keys': len(self._sig_by_key),
+                'signatures': len({sig for sig in self._sig_by_key.values() if sig is not None})}
 
     def body_baseline(self):
         """A declared body baseline from a `body`/`html`/`p` tag rule, if any (else None — the detector falls
         back to the most-used block style)."""
         for tag in ('body', 'html', 'p'):
             if tag in self._tag_rules:
-                return _sig_from_decls(self._tag_rules[tag])
+                return self._intern(self._tag_rules[tag])
         return None
 
     @staticmethod
@@ -216,30 +243,35 @@ class StyleProfiler:
         """A composite, axis-agnostic score of how much MORE PROMINENT `sig` is than the body `baseline` —
         the comparison that builds the font hierarchy. Higher = more title-like. Every prominence axis
         contributes monotonically, and NO single axis is required, so a book that signals headings by size,
-        by weight, by family-switch, or by caps all yield a usable ranking."""
+        by weight, by family-switch, or by caps all yield a usable ranking. Cached per (sig, baseline)."""
         if sig is None:
             return 0.0
-        b_size = (baseline.font_size_em if baseline and baseline.font_size_em is not None else 1.0)
-        s_size = (sig.font_size_em if sig.font_size_em is not None else 1.0)
-        score = 0.0
-        if s_size > b_size:
-            score += (s_size - b_size) * 4.0                       # bigger
-        if sig.bold and not (baseline and baseline.bold):
-            score += 1.0                                           # bolder
-        if sig.caps:
-            score += 1.0                                           # SMALL-CAPS / UPPERCASE
-        if sig.text_align == 'center' and not (baseline and baseline.text_align == 'center'):
-            score += 1.0                                           # centred
-        if (sig.serif is not None and baseline is not None and baseline.serif is not None
-                and sig.serif != baseline.serif):
-            score += 1.0                                           # font-family switch (serif↔sans)
-        if sig.italic and not (baseline and baseline.italic):
-            score += 0.3
-        mt = sig.margin_top_em or 0.0
-        b_mt = (baseline.margin_top_em if baseline else 0.0) or 0.0
-        if mt > b_mt:
-            score += min((mt - b_mt) * 0.2, 0.5)                   # more space above
-        return score
+        return _prominence(sig, baseline)
+
+
+@lru_cache(maxsize=4096)
+def _prominence(sig, baseline):
+    b_size = (baseline.font_size_em if baseline and baseline.font_size_em is not None else 1.0)
+    s_size = (sig.font_size_em if sig.font_size_em is not None else 1.0)
+    score = 0.0
+    if s_size > b_size:
+        score += (s_size - b_size) * 4.0                       # bigger
+    if sig.bold and not (baseline and baseline.bold):
+        score += 1.0                                           # bolder
+    if sig.caps:
+        score += 1.0                                           # SMALL-CAPS / UPPERCASE
+    if sig.text_align == 'center' and not (baseline and baseline.text_align == 'center'):
+        score += 1.0                                           # centred
+    if (sig.serif is not None and baseline is not None and baseline.serif is not None
+            and sig.serif != baseline.serif):
+        score += 1.0                                           # font-family switch (serif↔sans)
+    if sig.italic and not (baseline and baseline.italic):
+        score += 0.3
+    mt = sig.margin_top_em or 0.0
+    b_mt = (baseline.margin_top_em if baseline else 0.0) or 0.0
+    if mt > b_mt:
+        score += min((mt - b_mt) * 0.2, 0.5)                   # more space above
+    return score
 
 
 class TocIndex:
@@ -27,7 +27,9 @@ import re
 import sys
 import time
 
-from bs4 import BeautifulSoup
+
+from shared.html_parsing import parse_html
+from shared.stable_ids import IDS
 
 
 def looks_like_ar5iv(soup) -> bool:
@@ -229,7 +231,8 @@ def rewrite_footnotes(soup) -> list[dict]:
         else:
             content_html = ""
 
-        fn_id = f"Fn{base_id}{counter:03d}"
+        # HYPERLIT_STABLE_IDS: the content-derived id (shared/stable_ids.py) instead of the run stamp.
+        fn_id = IDS.footnote_id(content_html) if IDS.enabled else f"Fn{base_id}{counter:03d}"
 
         new_sup = soup.new_tag("sup")
         new_sup["class"] = "footnote-ref"
@@ -519,12 +522,13 @@ def _normalise_body_level_divs(soup) -> None:
 
 def main(html_file: str, output_dir: str) -> None:
     with open(html_file, "r", encoding="utf-8") as f:
-        soup = BeautifulSoup(f.read(), "html.parser")
+        soup = parse_html(f.read())
 
     if not looks_like_ar5iv(soup):
         print("ar5iv_preprocessor: not ar5iv — no-op")
         return
 
+    IDS.reset(os.path.basename(os.path.normpath(output_dir)))   # the book dir is named by its id
     references = rewrite_bibitems(soup)
     cite_count = rewrite_cites(soup)
     footnotes = rewrite_footnotes(soup)
@@ -4,6 +4,7 @@ Really simple Markdown to HTML converter that treats footnotes as plain text.
 No external dependencies - just basic regex-based conversion.
 """
 
+import os
 import sys
 import re
 import html
@@ -593,28 +594,65 @@ convert_markdown_to_html.plain = (
 
 
 def main():
-    if len(sys.argv) != 3:
-        print("Usage: python3 simple_md_to_html.py input.md output.html")
+    args = [a for a in sys.argv[1:] if a != '--profile']
+    if len(args) != 2:
+        print("Usage: python3 simple_md_to_html.py input.md output.html [--profile]")
         sys.exit(1)
     
-    input_file = sys.argv[1]
-    output_file = sys.argv[2]
+    input_file, output_file = args
     
+    # Conversion cache (shared/conversion_cache.py): the same markdown through the same converter
+    # restores the previous HTML. Imported here so importing this module stays dependency-free.
+    from shared.conversion_cache import ConversionCache, stage_key, sha1_file
+    from shared.regex_profile import install_from_env
+    from shared.deep_profile import profiler_from_env
+    # HYPERLIT_REGEX_PROFILE=1: time this converter's regex passes (shared/regex_profile.py); a
+    # profiled run must actually convert, so it skips the cache.
+    regex_profiler = install_from_env((globals(),))
+    # --profile / HYPERLIT_PROFILE=1: the profile/ bundle beside the output (shared/deep_profile.py).
+    profiler = profiler_from_env(os.path.dirname(os.path.abspath(output_file)), 'md_to_html',
+                                 flag='--profile' in sys.argv)
+    conv_cache = ConversionCache.from_env() if not (regex_profiler or profiler) else None
+    conv_key = None
+
     try:
+        if conv_cache:
+            conv_key = stage_key('md_to_html', {'markdown': sha1_file(input_file)})
+            if conv_cache.fetch('md_to_html', conv_key, {'intermediate.html': output_file}):
+                print(f"Conversion cache hit (md_to_html {conv_key[:12]}…) — restored {output_file}")
+                return
+
         with open(input_file, 'r', encoding='utf-8') as f:
             markdown_content = f.read()
+        if profiler:
+            profiler.facts(text_bytes=len(markdown_content.encode('utf-8')),
+                           lines=markdown_content.count('\n') + 1)
+            profiler.mark('read')
         
         print(f"Converting {input_file} to HTML...")
         html_content = convert_markdown_to_html(markdown_content)
+        if profiler:
+            profiler.mark('convert')
         
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write(html_content)
+        if profiler:
+            profiler.facts(output_bytes=len(html_content.encode('utf-8')))
+            profiler.mark('write')
         
         print(f"Successfully converted {input_file} to {output_file}")
+        if conv_key:
+            conv_cache.store('md_to_html', conv_key, {'intermediate.html': output_file})
+        if regex_profiler:
+            regex_profiler.uninstall()
+            regex_profiler.dump(os.path.dirname(os.path.abspath(output_file)), 'md_to_html')
         
     except Exception as e:
         print(f"Error converting markdown: {e}")
         sys.exit(1)
+    finally:
+        if profiler:
+            profiler.finish()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -5,16 +5,22 @@ import json
 import re
 import argparse
 import base64
+import contextlib
+import hashlib
+import io
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from statistics import median
-from mistralai.client import Mistral
-from pypdf import PdfReader, PdfWriter
 
 from ingestion.pdf.pdf_shared import *  # noqa: F401,F403
 from ingestion.pdf.recovery import (  # noqa: F401
     fix_mangled_urls, extract_pypdf_footnote_defs, recover_missing_defs,
     extract_pypdf_page_texts, resurrect_glued_markers_from_pypdf,
 )
+from ingestion.pdf.pageJournal import PageJournal
 
 # A footer line that opens a footnote DEFINITION, restricted to the marker shapes the shared
 # normaliser (normalize_all_footnote_refs → the `^[^N] text` → `[^N]:` rule) reliably turns into a
@@ -89,7 +95,8 @@ def fold_footer_defs_into_markdown(response_dict):
     if response_dict.get("_footer_folded"):
         return 0
     folded = 0
-    for page in response_dict.get("pages", []):
+    journal = PageJournal(response_dict)
+    for i, page in enumerate(response_dict.get("pages", [])):
         footer = page.get("footer") or ""
         if not footer.strip():
             continue
@@ -99,8 +106,12 @@ def fold_footer_defs_into_markdown(response_dict):
             continue
         md = page.get("markdown", "") or ""
         defs = footer.strip()
-        page["markdown"] = f"{md}\n\n{defs}" if md.strip() else defs
-        page["footer"] = ""  # folded — prevent the assemble-time append from re-adding it
+        if md.strip():
+            journal.edit(i, len(md), len(md), f"\n\n{defs}", "fold_footer")
+        else:
+            journal.replace(i, defs, "fold_footer")
+        # folded — clear the footer so the assemble-time append can't re-add it
+        journal.replace(i, "", "fold_footer", field="footer")
         folded += 1
     response_dict["_footer_folded"] = 1
     return folded
@@ -467,15 +478,27 @@ class PageBottomAssembler(FootnoteAssembler):
     plain = ('Footnotes live at the bottom of each page: pull them off the body, renumber across pages '
              'so they stay globally unique, then re-attach them as a definition list at the end.')
 
-    def per_page(self, ctx, i, page, md, md_stripped):
-        page_map = {}
-        pypdf_nums = {n for n, _t in (getattr(ctx, 'pypdf_page_defs', None) or {}).get(i, [])}
+    has_page_local = True
+
+    def page_tables(self, ctx):
+        return {'defs': getattr(ctx, 'pypdf_page_defs', None) or {},
+                'texts': getattr(ctx, 'pypdf_page_texts', None) or {}}
+
+    def page_local(self, tables, i, md):
         # Markers Mistral dropped ENTIRELY (no digit left to license) — resurrect from the PDF
         # text layer's glued-superscript seams before renumbering, so they enter the page map
         # and the missing-def recovery can pair them.
-        ptext = (getattr(ctx, 'pypdf_page_texts', None) or {}).get(i)
+        pypdf_nums = {n for n, _t in tables['defs'].get(i, [])}
+        ptext = tables['texts'].get(i)
         if pypdf_nums and ptext:
             md, _n = resurrect_glued_markers_from_pypdf(md, ptext, pypdf_nums, f' (page {i})')
+        return md
+
+    def per_page(self, ctx, i, page, md, md_stripped):
+        page_map = {}
+        pypdf_nums = {n for n, _t in (getattr(ctx, 'pypdf_page_defs', None) or {}).get(i, [])}
+        # (page_local has already resurrected the dropped markers; the global renumber counter is
+        # the cross-page state that keeps this half serial.)
         md, ctx.global_fn_counter = renumber_page_footnotes(
             md, ctx.global_fn_counter, page_map, pypdf_licensed=pypdf_nums)
         if page_map:
@@ -634,12 +657,12 @@ class DocumentEndnotesAssembler(FootnoteAssembler):
              '(brackets / superscripts) to [^N], format the end definitions as [^N]:, and rejoin '
              'page breaks.')
 
-    def per_page(self, ctx, i, page, md, md_stripped):
+    has_page_local = True
+
+    def page_local(self, tables, i, md):
         # Convert all footnote ref formats to [^N] — shared per-page converter (document_endnotes also
-        # unwraps *[2]* → [2] first).
-        md = convert_inline_footnote_markers(md, strip_italic_brackets=True)
-        if md_stripped:
-            ctx.md_parts.append(md)
+        # unwraps *[2]* → [2] first). Base per_page then keeps the converted body.
+        return convert_inline_footnote_markers(md, strip_italic_brackets=True)
 
     def post_combine(self, ctx, combined):
         combined = re.sub(r'^(\[\^\d+\])\s+(?=[A-Za-z\d"\'(*“‘])', r'\1: ', combined, flags=re.MULTILINE)
@@ -824,31 +847,35 @@ class ChapterEndnotesAssembler(FootnoteAssembler):
 
             ctx.chapter_fn_offsets = chapter_fn_offsets
 
-    def per_page(self, ctx, i, page, md, md_stripped):
+    has_page_local = True
+
+    def page_tables(self, ctx):
+        # Both offset tables are final once setup has run — the per-page conversion reads only them.
+        return {'offsets': ctx.chapter_fn_offsets, 'transitions': ctx.notes_transition_pages}
+
+    def page_local(self, tables, i, md):
         # Convert all footnote ref formats to [^N] (before offset) — shared per-page converter
         md = convert_inline_footnote_markers(md)
 
         # Apply chapter offset for global uniqueness
-        if ctx.chapter_fn_offsets:
-            if i in ctx.notes_transition_pages:
+        if tables['offsets']:
+            if i in tables['transitions']:
                 # Transition page: old chapter tail + new chapter start need different offsets
-                threshold, old_off, new_off = ctx.notes_transition_pages[i]
+                threshold, old_off, new_off = tables['transitions'][i]
                 def _apply_transition(m, _thr=threshold, _old=old_off, _new=new_off):
                     num = int(m.group(1))
                     off = _old if num >= _thr else _new
                     return f'[^{num + off}]' if off > 0 else m.group(0)
                 md = re.sub(r'\[\^(\d+)\]', _apply_transition, md)
             else:
-                offset = ctx.chapter_fn_offsets[i]
+                offset = tables['offsets'][i]
                 if offset > 0:
                     md = re.sub(
                         r'\[\^(\d+)\]',
                         lambda m: f'[^{int(m.group(1)) + offset}]',
                         md
                     )
-
-        if md_stripped:
-            ctx.md_parts.append(md)
+        return md
 
     def post_combine(self, ctx, combined):
         # Superscripts already converted per-page with chapter offsets applied.
@@ -1212,8 +1239,120 @@ def _front_matter_chrome(pages, header_names):
     return chrome
 
 
+# Page-parallel assembly. The page-local head of each page's assembly — the spine's prelude (stray
+# fences, LaTeX bullets, the page-number anchor, the header's section name, footer defs) and the
+# assembler's declared page_local step — depends only on the page plus tables fixed before the loop,
+# so a long document runs it across a process pool (the tables broadcast ONCE, through the pool
+# initializer) while the stateful steps (sticky notes mode, heading dedupe/injection, renumber
+# counters, continuation joins) stay in the ordered serial merge. The assembler step is SPECULATIVE:
+# a worker runs it on the markdown the merge will reach when no stateful spine step touches the page,
+# and the merge uses that result only when its actual markdown matches byte-for-byte — otherwise it
+# recomputes — so the pooled path's output is identical to the serial path by construction.
+# HYPERLIT_ASSEMBLY_WORKERS: opt-in — unset, 0 or 1 = serial; a count applies at any length. Off by
+# default because the pool only pays once its workers are warm: a 480-page document assembled in 2.35s
+# serially, 3.53s on a cold pool (every conversion is a fresh process, so every pool is cold) and 1.45s
+# only with a warm forkserver.
+_WORKER_STATE = {}
+# Workers start from a forkserver (spawn where there is none), never as forks of this process: when
+# assembly runs, mistral_ocr's image-writer threads are still going, and a fork would inherit whatever
+# locks they hold (logging, file objects, PIL). The document tables reach the workers via the initializer.
+_POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def _assembly_workers(n_pages):
+    raw = os.environ.get("HYPERLIT_ASSEMBLY_WORKERS", "").strip()
+    try:
+        return max(1, int(raw)) if raw and n_pages > 1 else 1
+    except ValueError:
+        return 1
+
+
+def _page_prelude(i, md, header, footer, shared, assembler=None):
+    """The page-local head of page i's assembly: a dict of everything the serial merge needs from the
+    page alone. `shared` carries the document-wide tables; with `assembler` given, the assembler's
+    page_local step also runs speculatively (its printed output captured for the merge to replay)."""
+    md, n_fences = _strip_stray_code_fences(md)
+    # A book's triangle/arrow bullets OCR as LaTeX glyph commands at line start
+    # ("$\triangleright$ increased user involvement…") — downstream that renders as a <latex>
+    # element in a <p>, not a list item. Normalise to a markdown bullet so the list survives.
+    md = _LATEX_BULLET_RE.sub('- ', md)
+    md_stripped = md.strip()
+    pre = {'n_fences': n_fences, 'md_stripped': md_stripped}
+
+    # A blank page OCR'd as bare punctuation (3f202e8f p276: an empty verso rendered as
+    # '.') would otherwise become a lone '.' paragraph node in the reader — skip it.
+    if md_stripped and re.fullmatch(r'[.,;:·•*\-–—]{1,3}', md_stripped):
+        pre['blank'] = True
+        return pre
+
+    # Replace trailing page number with inline anchor tag. (The merge's sticky-notes detection still
+    # reads the pre-anchor md_stripped, as it always has.)
+    offset = shared['page_number_offset']
+    if offset is not None:
+        expected = i + offset
+        last_line = md_stripped.rsplit('\n', 1)[-1].strip() if md_stripped else ''
+        if re.match(r'^\d{1,4}$', last_line) and int(last_line) == expected:
+            md = md.rstrip()
+            md = md[:md.rfind('\n')].rstrip() if '\n' in md else ''
+            md += f' <a class="pageNumber" data-page="{int(expected)}"></a>'
+    pre['md'] = md
+    pre['anchored_stripped'] = md.strip()
+
+    # Section name from the header field (first line that is a real name, not a running header).
+    pre['section_name'] = None
+    for line in header.split('\n'):
+        name = extract_section_name(line)
+        if name and name not in shared['running_headers']:
+            pre['section_name'] = name
+            break
+
+    pre['footer_defs'] = _footer_footnote_defs(footer) if shared['footer_defs'] else ''
+    pre['footer_bare'] = _footer_bare_num_defs(footer) if shared['footer_bare'] else {}
+
+    if assembler is not None:
+        spec = md
+        if pre['footer_defs'] and shared['append_footer']:
+            spec = f"{md}\n\n{pre['footer_defs']}" if pre['anchored_stripped'] else pre['footer_defs']
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            local = assembler.page_local(shared['tables'], i, spec)
+        pre['speculated'] = (spec, local, out.getvalue())
+    return pre
+
+
+def _init_page_worker(classification, shared):
+    _WORKER_STATE['assembler'] = PDF_ASSEMBLERS.get(classification, _DEFAULT_ASSEMBLER)
+    _WORKER_STATE['shared'] = shared
+
+
+def _page_worker(task):
+    i, md, header, footer = task
+    assembler = _WORKER_STATE['assembler']
+    return _page_prelude(i, md, header, footer, _WORKER_STATE['shared'],
+                         assembler if assembler.has_page_local else None)
+
+
+def _page_preludes(pages, classification, shared, workers):
+    """Every page's prelude, in page order — across a process pool when workers > 1 (falling back to
+    the serial path if the pool cannot run here)."""
+    tasks = [(i, page.get("markdown", ""), page.get("header") or "", page.get("footer") or "")
+             for i, page in enumerate(pages)]
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_page_worker,
+                                     initargs=(classification, shared),
+                                     mp_context=multiprocessing.get_context(_POOL_START_METHOD)) as pool:
+                preludes = list(pool.map(_page_worker, tasks,
+                                         chunksize=max(1, len(tasks) // (workers * 4))))
+            print(f"  Page-local assembly on {workers} worker processes ({len(tasks)} pages)")
+            return preludes
+        except (OSError, BrokenProcessPool) as e:
+            print(f"  Page-parallel assembly unavailable ({e.__class__.__name__}) — running serially")
+    return [_page_prelude(i, md, header, footer, shared) for i, md, header, footer in tasks]
+
+
 def assemble_markdown(response_dict, classification="unknown", footnote_meta=None, pdf_path=None,
-                       segment_boundaries=None, footnote_warnings=None):
+                       segment_boundaries=None, footnote_warnings=None, workers=None):
     """Assemble pages into markdown, injecting section headings from headers. Thin conductor over the
     PDF_ASSEMBLERS registry: it runs the SHARED spine (running-header detection, sticky-notes
     tracking, page-number anchors, heading injection, numbered-notes→defs) and the SHARED tail
@@ -1226,6 +1365,8 @@ def assemble_markdown(response_dict, classification="unknown", footnote_meta=Non
     footnote_warnings (optional list[dict]): mojibake warnings from
         scan_footnote_mojibake. When non-empty, the pypdf def-recovery pass
         runs regardless of classification.
+    workers (optional int): processes for the page-local steps (see _page_prelude);
+        None = HYPERLIT_ASSEMBLY_WORKERS (unset = serial), 1 = serial.
     """
     ctx = AssemblyContext(response_dict, classification, footnote_meta)
     pages = ctx.pages
@@ -1298,23 +1439,30 @@ def assemble_markdown(response_dict, classification="unknown", footnote_meta=Non
             if entry.get('refs'):
                 ctx.last_ref_page_idx = max(ctx.last_ref_page_idx, entry['index'])
 
+    # The page-local prelude of every page (pooled for long documents); the loop below is the
+    # ordered serial merge of the stateful steps.
+    _skip_footer = classification in ("chapter_endnotes", "wackSTEMbibliographyNotes")
+    shared = {
+        'page_number_offset': ctx.page_number_offset,
+        'running_headers': running_headers,
+        'footer_defs': not _skip_footer,
+        'footer_bare': assembler is _DEFAULT_ASSEMBLER and not _skip_footer,
+        'append_footer': assembler is not _DEFAULT_ASSEMBLER,
+        'tables': assembler.page_tables(ctx),
+    }
+    if workers is None:
+        workers = _assembly_workers(len(pages))
+    preludes = _page_preludes(pages, classification, shared, workers)
+
     for i, page in enumerate(pages):
-        md = page.get("markdown", "")
+        pre = preludes[i]
         header = page.get("header") or ""
-        md, _n_fences = _strip_stray_code_fences(md)
-        if _n_fences:
-            fence_lines_stripped += _n_fences
+        if pre['n_fences']:
+            fence_lines_stripped += pre['n_fences']
             fence_pages += 1
-        # A book's triangle/arrow bullets OCR as LaTeX glyph commands at line start
-        # ("$\triangleright$ increased user involvement…") — downstream that renders as a <latex>
-        # element in a <p>, not a list item. Normalise to a markdown bullet so the list survives.
-        md = _LATEX_BULLET_RE.sub('- ', md)
-        md_stripped = md.strip()
-
-        # A blank page OCR'd as bare punctuation (3f202e8f p276: an empty verso rendered as
-        # '.') would otherwise become a lone '.' paragraph node in the reader — skip it.
-        if md_stripped and re.fullmatch(r'[.,;:·•*\-–—]{1,3}', md_stripped):
+        if pre.get('blank'):
             continue
+        md_stripped = pre['md_stripped']
 
         # Sticky notes section — only triggers once all body refs are done; mid-book "Notes" headings
         # (chapter-endnote books like Road from Mont Pelerin) sit BEFORE last_ref_page_idx, so they
@@ -1346,15 +1494,8 @@ def assemble_markdown(response_dict, classification="unknown", footnote_meta=Non
                           or i in ctx.def_heavy_pages
                           or ctx.in_notes_section)
 
-        # Replace trailing page number with inline anchor tag
-        if ctx.page_number_offset is not None:
-            expected = i + ctx.page_number_offset
-            last_line = md_stripped.rsplit('\n', 1)[-1].strip() if md_stripped else ''
-            if re.match(r'^\d{1,4}$', last_line) and int(last_line) == expected:
-                md = md.rstrip()
-                md = md[:md.rfind('\n')].rstrip() if '\n' in md else ''
-                md += f' <a class="pageNumber" data-page="{int(expected)}"></a>'
-                md_stripped = md.strip()
+        # The trailing page number is already an inline anchor tag (prelude).
+        md, md_stripped = pre['md'], pre['anchored_stripped']
 
         # A page whose body OPENS with a heading text we have already seen is the print running
         # header leaking into content: extract_header failed on this page (its `header` field got
@@ -1420,13 +1561,8 @@ def assemble_markdown(response_dict, classification="unknown", footnote_meta=Non
                 promoted_plain_sections.extend(_promoted_plain)
                 md_stripped = md.strip()
 
-        # Extract section name from header
-        section_name = None
-        for line in header.split('\n'):
-            name = extract_section_name(line)
-            if name and name not in running_headers:
-                section_name = name
-                break
+        # Section name from the header (prelude)
+        section_name = pre['section_name']
 
         # Only inject a heading from the header when ALL of:
         # 1. We got a real section name (not a running header / page number)
@@ -1546,14 +1682,23 @@ def assemble_markdown(response_dict, classification="unknown", footnote_meta=Non
         # Skipped for chapter_endnotes / wackSTEM: those apply a per-chapter/per-section number
         # OFFSET, so a stray page-bottom def would be re-keyed to the wrong note (a confident wrong
         # link). Their own assemblers + the pypdf pass own definition recovery.
-        footer_defs = ''
-        if classification not in ("chapter_endnotes", "wackSTEMbibliographyNotes"):
-            footer_defs = _footer_footnote_defs(page.get("footer") or "")
-            if footer_defs and assembler is not _DEFAULT_ASSEMBLER:
-                md = f"{md}\n\n{footer_defs}" if md_stripped else footer_defs
-                md_stripped = md.strip()
+        footer_defs = pre['footer_defs']
+        if footer_defs and shared['append_footer']:
+            md = f"{md}\n\n{footer_defs}" if md_stripped else footer_defs
+            md_stripped = md.strip()
+
+        # The assembler's page-local step: the worker's speculative result when this page reached it
+        # unchanged (its captured log replayed in page order), else computed here.
+        if assembler.has_page_local:
+            spec = pre.get('speculated')
+            if spec is not None and spec[0] == md:
+                md = spec[1]
+                if spec[2]:
+                    print(spec[2], end='')
+            else:
+                md = assembler.page_local(shared['tables'], i, md)
 
-        # Per-classification per-page footnote handling (renumber / convert / offset + append).
+        # Per-classification per-page footnote handling (renumber / split / append).
         assembler.per_page(ctx, i, page, md, md_stripped)
 
         # Default path: footnote defs never sit inline in the body. per_page has already split this
@@ -1572,9 +1717,8 @@ def assemble_markdown(response_dict, classification="unknown", footnote_meta=Non
 
         # Collect BARE-number footer defs ("27 I am ignoring…") as candidates — injected in
         # post_combine only where an in-text marker [^N] is orphaned (Default path only).
-        if assembler is _DEFAULT_ASSEMBLER and classification not in ("chapter_endnotes", "wackSTEMbibliographyNotes"):
-            for num, txt in _footer_bare_num_defs(page.get("footer") or "").items():
-                ctx.footer_bare_candidates.setdefault(num, txt)
+        for num, txt in pre['footer_bare'].items():
+            ctx.footer_bare_candidates.setdefault(num, txt)
 
     if fence_lines_stripped:
         print(f"  Stripped {fence_lines_stripped} stray code-fence line(s) on {fence_pages} page(s) "
@@ -1725,20 +1869,155 @@ def assemble_markdown(response_dict, classification="unknown", footnote_meta=Non
     return combined
 
 
-def save_images(response_dict, media_dir):
-    """Extract and save base64-encoded images from the OCR response."""
-    media_dir.mkdir(parents=True, exist_ok=True)
-    count = 0
-    for page in response_dict["pages"]:
+# Image writing runs on a small thread pool so it overlaps markdown assembly (file writes release the
+# GIL). Decoding is STREAMED in base64 slices (a multiple of 4 chars, so every slice decodes on its own)
+# — a 300-image response never holds more than IMAGE_WRITE_WORKERS slices of decoded bytes at once.
+IMAGE_WRITE_WORKERS = 4
+_B64_STREAM_CHARS = 1 << 20
+_MD_IMAGE_TARGET_RE = re.compile(r'(!\[[^\]]*\]\()([^)\s]+)(\))')
+
+
+def _image_b64(img):
+    """The bare base64 payload of one OCR image record ('' when absent), data-URI prefix stripped."""
+    img_b64 = img.get("image_base64", "") or ""
+    if img_b64.startswith("data:"):
+        img_b64 = img_b64.split(",", 1)[1]
+    return img_b64
+
+
+def _b64_digest(img_b64):
+    """sha256 of the base64 TEXT, hashed in slices (no full-size bytes copy). Mistral emits canonical
+    padded base64, so equal text ⇔ equal decoded bytes — hashing the text skips a decode per image."""
+    h = hashlib.sha256()
+    for start in range(0, len(img_b64), _B64_STREAM_CHARS):
+        h.update(img_b64[start:start + _B64_STREAM_CHARS].encode("ascii"))
+    return h.hexdigest()
+
+
+def _write_b64_stream(img_b64, img_path):
+    """Decode `img_b64` slice by slice straight into `img_path`. Whitespace (line-wrapped base64) is
+    dropped and the characters past a slice's last whole 4-char group carry into the next slice, so
+    the result is what base64.b64decode(img_b64) gives."""
+    carry = ""
+    with open(img_path, "wb") as f:
+        for start in range(0, len(img_b64), _B64_STREAM_CHARS):
+            chunk = carry + "".join(img_b64[start:start + _B64_STREAM_CHARS].split())
+            cut = len(chunk) - len(chunk) % 4
+            f.write(base64.b64decode(chunk[:cut]))
+            carry = chunk[cut:]
+        if carry:
+            f.write(base64.b64decode(carry))      # a truncated payload fails as the whole decode would
+
+
+def iter_unique_images(pages, aliases):
+    """Deduplicate images by content hash while streaming over `pages`. Repeated payloads (publisher
+    logos, ornaments, running-head graphics OCR'd once per page) collapse onto the FIRST id that
+    carried them. Yields (img_id, b64) for each distinct payload, in page order, and records
+    {duplicate_id: canonical_id} into `aliases` for the references that must be rewritten."""
+    first_by_digest = {}
+    for page in pages:
         for img in page.get("images", []):
             img_id = img.get("id", "")
-            img_b64 = img.get("image_base64", "")
+            img_b64 = _image_b64(img)
             if not img_b64 or not img_id:
                 continue
-            # Strip data URI prefix if present
-            if img_b64.startswith("data:"):
-                img_b64 = img_b64.split(",", 1)[1]
-            img_path = media_dir / img_id
-            img_path.write_bytes(base64.b64decode(img_b64))
-            count += 1
-    return count
+            canonical = first_by_digest.setdefault(_b64_digest(img_b64), img_id)
+            if canonical == img_id:
+                yield img_id, img_b64
+            else:
+                aliases[img_id] = canonical
+
+
+def rewrite_image_refs(md, aliases):
+    """Point markdown image links at their canonical (deduplicated) file. Only the link TARGET is
+    rewritten — `![alt](img-7.jpeg)` → `![alt](img-2.jpeg)` — so a shorter id that is a suffix of
+    a longer one (img-1 / c0-img-1) can never be hit by accident."""
+    if not aliases or not md:
+        return md
+    return _MD_IMAGE_TARGET_RE.sub(
+        lambda m: m.group(1) + aliases.get(m.group(2), m.group(2)) + m.group(3), md)
+
+
+class ImageWriteJob:
+    """In-flight image extraction started by start_image_writes. `aliases` is final as soon as the
+    job exists (page markdown is already rewritten); result() waits for the producer thread and the
+    writes, re-raises the first error, and returns the number of files written."""
+
+    def __init__(self, aliases, executor=None):
+        self.aliases = aliases
+        self._executor = executor
+        self._producer = None
+        self._futures = []
+        self._error = None
+
+    def start(self, pages, wanted, media_dir, max_pending):
+        """Queue the writes of the `wanted` ids from `pages` on a producer thread."""
+        in_flight = threading.BoundedSemaphore(max_pending)
+        self._producer = threading.Thread(target=self._produce, name="ocr-images-producer",
+                                          args=(pages, wanted, media_dir, in_flight))
+        self._producer.start()
+
+    def _produce(self, pages, wanted, media_dir, in_flight):
+        """Producer-thread body: submit one write per canonical id, at most 2×workers pending."""
+        try:
+            for page in pages:
+                for img in page.get("images", []):
+                    img_id = img.get("id", "")
+                    if img_id not in wanted:
+                        continue
+                    wanted.discard(img_id)
+                    in_flight.acquire()
+                    future = self._executor.submit(_write_b64_stream, _image_b64(img), media_dir / img_id)
+                    future.add_done_callback(lambda _f: in_flight.release())
+                    self._futures.append(future)
+        except BaseException as exc:                  # surfaced by result(), like a write error
+            self._error = exc
+
+    def result(self):
+        try:
+            if self._producer is not None:
+                self._producer.join()
+                self._producer = None
+            if self._error is not None:
+                raise self._error
+            for future in self._futures:
+                future.result()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        return len(self._futures)
+
+
+def start_image_writes(response_dict, media_dir, max_workers=None, image_pages=None):
+    """Begin writing the OCR images to `media_dir` in the background and return an ImageWriteJob.
+
+    `image_pages` (optional callable returning a fresh iterable of pages) sources the payloads
+    instead of response_dict — OcrPageStore.iter_pages streams them from disk, so a text-only
+    response never has to hold them. It is iterated twice: once here, and once on the producer thread.
+
+    Duplicate payloads are written ONCE (iter_unique_images). The dedup pass runs synchronously and
+    rewrites each page's markdown references to a duplicate to the canonical id in the in-memory
+    response BEFORE this returns; the writes themselves are queued by a producer thread (at most
+    2×workers pending payloads), so assembly runs concurrently with all of them and already emits the
+    deduplicated refs. The cached ocr_response.json is never touched."""
+    media_dir.mkdir(parents=True, exist_ok=True)
+    workers = max_workers or IMAGE_WRITE_WORKERS
+    pages = (lambda: response_dict["pages"]) if image_pages is None else image_pages
+    aliases = {}
+    wanted = {img_id for img_id, _ in iter_unique_images(pages(), aliases)}
+    if aliases:
+        for page in response_dict["pages"]:
+            if any(img.get("id") in aliases for img in page.get("images", [])):
+                page["markdown"] = rewrite_image_refs(page.get("markdown", ""), aliases)
+    if not wanted:
+        return ImageWriteJob(aliases)
+    job = ImageWriteJob(aliases, ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr-images"))
+    job.start(pages(), wanted, media_dir, 2 * workers)
+    return job
+
+
+def save_images(response_dict, media_dir):
+    """Extract and save base64-encoded images from the OCR response (blocking; duplicates are
+    written once and their page references rewritten). Returns the number of files written."""
+    return start_image_writes(response_dict, media_dir).result()
@@ -7,8 +7,6 @@ import argparse
 import base64
 from pathlib import Path
 from statistics import median
-from mistralai.client import Mistral
-from pypdf import PdfReader, PdfWriter
 
 from ingestion.pdf.pdf_shared import *  # noqa: F401,F403
 
@@ -318,9 +316,13 @@ def _pdf_classification_story(chosen, sig):
     return _PDF_RATIONALE[chosen], considered, _PDF_CLASSIFIERS_BY_NAME[chosen].margin(sig)
 
 
-def classify_footnotes(response_dict):
+def classify_footnotes(response_dict, page_signals=None):
     """Classify footnote style from raw OCR JSON before assembly.
 
+    `page_signals` (optional PageSignalTable): the caller's table for this response. It is refreshed
+    (only pages whose markdown changed since the last call are rescanned) rather than rebuilt, so
+    the repeated reclassifications in mistral_ocr.main cost the touched pages only.
+
     Returns a dict with classification, confidence, signals, page_summary, and the
     fork-story fields (rationale, considered, margin) consumed by assessment.json.
     """
@@ -328,42 +330,19 @@ def classify_footnotes(response_dict):
     total_pages = len(pages)
 
     # --- Step 1: Per-page signal collection ---
-    page_data = []  # list of {refs, defs, trailing_number}
-    for page in pages:
-        md_raw = page.get("markdown", "")
-        header = page.get("header") or ""
-        # The ONE per-page ref/def detector (pdf_shared.collect_page_refs_and_defs), shared
-        # with renumber_chunk_footnotes: caret-rendering normalization plus the pinpoint /
-        # TOC-entry / date-line guards. This function and the chunk renumberer carrying
-        # DRIFTING copies of this scan is how deloitte2025independent got a false +13
-        # renumber AND an unknown classification from the same junk signals.
-        refs, defs = collect_page_refs_and_defs(md_raw)
-        md = convert_bare_caret_footnotes(convert_footnotes(md_raw))
-
-        # Trailing standalone number (page number candidate)
-        trailing_num = None
-        last_line = md.rstrip().rsplit('\n', 1)[-1].strip()
-        if re.match(r'^\d{1,4}$', last_line):
-            trailing_num = int(last_line)
-
-        # Notes header detection
-        has_notes_header = bool(
-            re.search(r'\bNotes\b', header) or re.search(r'\bNOTES\b', header)
-        )
-
-        page_data.append({
-            "refs": refs,
-            "defs": defs,
-            "trailing_number": trailing_num,
-            "has_notes_header": has_notes_header,
-        })
-
-    # --- Step 2: Aggregate signals ---
-    pages_with_refs = sum(1 for p in page_data if p["refs"])
-    pages_with_defs = sum(1 for p in page_data if p["defs"])
-    pages_with_both = sum(
-        1 for p in page_data if p["refs"] & p["defs"]
-    )
+    # The ONE per-page ref/def detector (pdf_shared.collect_page_refs_and_defs), shared
+    # with renumber_chunk_footnotes through the PageSignalTable: caret-rendering normalization
+    # plus the pinpoint / TOC-entry / date-line guards. This function and the chunk renumberer
+    # carrying DRIFTING copies of this scan is how deloitte2025independent got a false +13
+    # renumber AND an unknown classification from the same junk signals.
+    table = PageSignalTable.for_response(response_dict, page_signals)
+    page_refs = table.refs
+    page_defs = table.defs
+
+    # --- Step 2: Aggregate signals (whole-column reductions over the table) ---
+    pages_with_refs = sum(map(bool, page_refs))
+    pages_with_defs = sum(map(bool, page_defs))
+    pages_with_both = sum(1 for r, d in zip(page_refs, page_defs) if r & d)
 
     co_location_ratio = (
         pages_with_both / pages_with_refs if pages_with_refs > 0 else 0.0
@@ -371,36 +350,27 @@ def classify_footnotes(response_dict):
     def_clustering_ratio = pages_with_defs / total_pages if total_pages > 0 else 0.0
 
     # Reset detection: when the lowest ref number on a page <= previous page's lowest ref
-    reset_count = 0
-    prev_min_ref = None
-    for p in page_data:
-        if p["refs"]:
-            cur_min = min(p["refs"])
-            if prev_min_ref is not None and cur_min <= prev_min_ref:
-                reset_count += 1
-            prev_min_ref = cur_min
+    min_refs = [min(r) for r in page_refs if r]
+    reset_count = sum(1 for prev, cur in zip(min_refs, min_refs[1:]) if cur <= prev)
 
     reset_frequency = reset_count / pages_with_refs if pages_with_refs > 0 else 0.0
 
     # Notes pages
-    notes_page_indices = [i for i, p in enumerate(page_data) if p["has_notes_header"]]
+    notes_page_indices = [i for i, flag in enumerate(table.has_notes_header) if flag]
     notes_page_count = len(notes_page_indices)
 
     # Positional endnote signal: what fraction of def-bearing pages sit AFTER the last
     # ref-bearing page? A back-of-book endnotes section scores 1.0 however many pages it
     # spans; page-bottom and chapter-endnote layouts interleave defs with refs and score low.
-    last_ref_idx = max((i for i, p in enumerate(page_data) if p["refs"]), default=-1)
-    def_page_idxs = [i for i, p in enumerate(page_data) if p["defs"]]
+    last_ref_idx = max((i for i, r in enumerate(page_refs) if r), default=-1)
+    def_page_idxs = [i for i, d in enumerate(page_defs) if d]
     trailing_def_page_ratio = (
         sum(1 for i in def_page_idxs if i > last_ref_idx) / len(def_page_idxs)
         if def_page_idxs else 0.0
     )
 
     # Page number detection via trailing numbers
-    trailing_offsets = []
-    for i, p in enumerate(page_data):
-        if p["trailing_number"] is not None:
-            trailing_offsets.append(p["trailing_number"] - i)
+    trailing_offsets = [n - i for i, n in enumerate(table.trailing_number) if n is not None]
 
     if trailing_offsets:
         trailing_page_number_offset = median(trailing_offsets)
@@ -414,8 +384,8 @@ def classify_footnotes(response_dict):
 
     # Bibliography signal: how many pages does each ref number appear on?
     ref_page_spread = {}  # ref_number -> set of page indices
-    for i, p in enumerate(page_data):
-        for r in p["refs"]:
+    for i, refs in enumerate(page_refs):
+        for r in refs:
             ref_page_spread.setdefault(r, set()).add(i)
 
     ref_number_max_page_spread = (
@@ -425,10 +395,7 @@ def classify_footnotes(response_dict):
         1 for pgs in ref_page_spread.values() if len(pgs) >= 2
     )
 
-    all_refs = set()
-    for p in page_data:
-        all_refs |= p["refs"]
-    max_ref_number = max(all_refs) if all_refs else 0
+    max_ref_number = max(ref_page_spread) if ref_page_spread else 0
 
     # Vancouver signature: multi-number bracket groups "[1,2,3]" / "[1–3]" are how STEM papers
     # cite ("as shown [3,7,8]"). Chapter/page footnotes are one-marker-per-call and essentially
@@ -436,12 +403,8 @@ def classify_footnotes(response_dict):
     # numbered-bibliography paper (709c9348: 9 groups / 27 singles ≈ 0.33) from a footnoted book
     # that has a stray "[5, 12]" (433d423b: 2 / 62 ≈ 0.03). Whole-doc, single-bracket refs only
     # (skip [^N] footnote markers and []( ) links).
-    group_hits = single_hits = 0
-    for p in pages:
-        md = p.get("markdown", "")
-        group_hits += len(re.findall(r'\[\d{1,3}(?:\s*[,–-]\s*\d{1,3})+\]', md))
-        for m in re.finditer(r'(?<![\d.\]!])\[(\d{1,3})\](?!\()', md):
-            single_hits += 1
+    group_hits = sum(table.group_hits)
+    single_hits = sum(table.single_hits)
     citation_group_ratio = (
         group_hits / (group_hits + single_hits) if (group_hits + single_hits) else 0.0
     )
@@ -496,13 +459,13 @@ def classify_footnotes(response_dict):
 
     # --- Build page summary (only pages with refs or defs) ---
     page_summary = []
-    for i, p in enumerate(page_data):
-        if p["refs"] or p["defs"]:
+    for i, (refs, defs) in enumerate(zip(page_refs, page_defs)):
+        if refs or defs:
             page_summary.append({
                 "index": i,
-                "refs": sorted(p["refs"]),
-                "defs": sorted(p["defs"]),
-                "trailing_number": p["trailing_number"],
+                "refs": sorted(refs),
+                "defs": sorted(defs),
+                "trailing_number": table.trailing_number[i],
             })
 
     rationale, considered, margin = _pdf_classification_story(classification, signals)
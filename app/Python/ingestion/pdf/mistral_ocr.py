@@ -8,8 +8,13 @@ Usage:
 The script reads the API key from --api-key or MISTRAL_OCR_API_KEY env var.
 Output:
   <output_dir>/main-text.md   — assembled markdown
-  <output_dir>/ocr_response.json — cached raw OCR response
+  <output_dir>/ocr_response.json — cached raw OCR response (ground truth, never rewritten)
+  <output_dir>/ocr_store/      — page-indexed sidecar of that cache (ocrStore.py), built on replay
   <output_dir>/media/          — extracted images
+  <output_dir>/edit_journal.json — (HYPERLIT_EDIT_JOURNAL=1) spans the pre-assembly passes rewrote
+Before any OCR call the shared content-addressed cache (ocrCache.py, keyed by PDF SHA-256 + model)
+is consulted; a hit is copied in as ocr_response.json. An unchanged OCR response through
+unchanged code restores main-text.md from the conversion cache (shared/conversion_cache.py).
 """
 
 import sys
@@ -20,8 +25,6 @@ import argparse
 import base64
 from pathlib import Path
 from statistics import median
-from mistralai.client import Mistral
-from pypdf import PdfReader, PdfWriter
 
 # ===========================================================================
 # PHASE MODULES (folders mirror the decision tree). The bases + shared text
@@ -35,11 +38,20 @@ from ingestion.pdf import ocrFetch as _ocrFetch          # noqa: E402
 from ingestion.pdf import classification as _classification  # noqa: E402
 from ingestion.pdf import recovery as _recovery          # noqa: E402
 from ingestion.pdf import assembly as _assembly          # noqa: E402
+from ingestion.pdf import ocrStore as _ocrStore          # noqa: E402
+from ingestion.pdf import ocrCache as _ocrCache          # noqa: E402
+from ingestion.pdf import pageJournal as _pageJournal    # noqa: E402
 # Re-export EVERYTHING (incl. single-underscore module-level names like _UNKNOWN_CLASSIFIER /
 # _DEFAULT_ASSEMBLER / _pdf_classification_story that `import *` would drop) so `mistral_ocr.X` resolves
 # exactly as before the split — the flat shim, the generators, and the unit tests all read these off it.
-for _phase in (_pdf_shared, _ocrFetch, _classification, _recovery, _assembly):
+for _phase in (_pdf_shared, _ocrFetch, _classification, _recovery, _assembly, _ocrStore, _ocrCache,
+               _pageJournal):
     globals().update({_k: _v for _k, _v in vars(_phase).items() if not _k.startswith('__')})
+from shared.conversion_cache import ConversionCache, stage_key, path_digest  # noqa: E402
+from shared.regex_profile import install_from_env as install_regex_profiler  # noqa: E402
+from shared.deep_profile import profiler_from_env  # noqa: E402
+from shared.admission import admit, MB  # noqa: E402
+from ingestion.pdf.pageJournal import dump_enabled as journal_dump_enabled  # noqa: E402
 
 
 def write_classification_assessment(footnote_meta, output_dir, markdown=None, footnote_warnings=None):
@@ -88,8 +100,31 @@ def main():
                         help="Mistral OCR model id (default: mistral-ocr-2512 = OCR 3). "
                              "The billing side prices per served model recorded in ocr_response.json.")
     parser.add_argument("--no-cache", action="store_true", help="Force re-download from Mistral")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a profiling bundle into <output_dir>/profile/ (as HYPERLIT_PROFILE=1)")
     args = parser.parse_args()
 
+    # --profile / HYPERLIT_PROFILE=1: cProfile, sampled stacks and a tracemalloc diff per phase
+    # (shared/deep_profile.py). Like the regex profiler it bypasses the conversion cache.
+    profiler = profiler_from_env(args.output_dir, "pdf_assembly", flag=args.profile)
+    try:
+        _convert(args, profiler)
+    finally:
+        if profiler:
+            profiler.finish()
+
+
+def _convert(args, profiler):
+    def mark(step):
+        if profiler:
+            profiler.mark(step)
+
+    # HYPERLIT_REGEX_PROFILE=1: time every regex pass of the normalisation layer (shared/regex_profile.py)
+    # and write the ranked report beside the outputs. A profiled run must do the work, so it also
+    # bypasses the conversion cache below.
+    regex_profiler = install_regex_profiler(
+        (_pdf_shared, _ocrFetch, _classification, _recovery, _assembly, globals()))
+
     api_key = args.api_key or os.environ.get("MISTRAL_OCR_API_KEY")
     ocr_model = args.ocr_model
 
@@ -99,6 +134,23 @@ def main():
     output_dir.mkdir(parents=True, exist_ok=True)
     json_cache = output_dir / "ocr_response.json"
 
+    # Shared content-addressed OCR cache (ocrCache.py): the same PDF already OCR'd for ANOTHER book
+    # (a second user's upload, a re-import as a new book) is copied in as this book's
+    # ocr_response.json and replayed below — no API call, no key needed, and the zero-amount
+    # ocr_charged.json marker keeps billing from charging for OCR that cost nothing. --no-cache skips
+    # the lookup but still refreshes the shared entry after the fetch.
+    ocr_cache = OcrResultCache.from_env()
+    pdf_digest = None
+    if ocr_cache and (args.no_cache or not json_cache.exists()) and pdf_path.is_file():
+        try:
+            if pdf_path.stat().st_size > 0:
+                pdf_digest = pdf_sha256(pdf_path)
+        except OSError:
+            pdf_digest = None
+    if pdf_digest and not args.no_cache and ocr_cache.fetch(pdf_digest, ocr_model, json_cache):
+        print(f"Shared OCR cache hit ({pdf_digest[:12]}…, {ocr_model}) → {json_cache}")
+        write_free_ocr_marker(output_dir)
+
     # API key only required when there's no cached OCR response
     if not api_key and not json_cache.exists():
         print("Error: No API key provided. Use --api-key or set MISTRAL_OCR_API_KEY.", file=sys.stderr)
@@ -110,11 +162,15 @@ def main():
     output_md = output_dir / "main-text.md"
     media_dir = output_dir / "media"
 
-    # Fetch or load cached OCR response
+    # Fetch or load cached OCR response. A replay reads the page-indexed sidecar (built from the
+    # cache on first replay): classification + assembly get a TEXT-ONLY response, and the image
+    # payloads — nearly all of the cache's bytes — stream from the store to the image writer.
+    ocr_store = None
     if json_cache.exists() and not args.no_cache:
         print(f"Using cached OCR response: {json_cache}")
         emit_progress(45, "ocr", "Using cached OCR result — skipping the page scan")
-        response_dict = json.loads(json_cache.read_text(encoding="utf-8"))
+        ocr_store = OcrPageStore.open(output_dir)
+        response_dict = ocr_store.response_dict(text_only=True)
     else:
         # Strip absurdly oversized image XObjects (see ocrFetch.MAX_IMAGE_PIXELS) BEFORE the
         # size branch below — normalising changes the file size, and that size is what picks
@@ -149,8 +205,10 @@ def main():
             emit_progress(45, "ocr", f"OCR complete — read {len(response_dict.get('pages', []))} pages")
         if normalize_report["oversized"]:
             response_dict["_normalized_images"] = normalize_report
-        json_cache.write_text(json.dumps(response_dict), encoding="utf-8")
+        write_json_atomic(json_cache, json.dumps(response_dict))
         print(f"Cached raw response to: {json_cache}")
+        if pdf_digest:
+            ocr_cache.store(pdf_digest, ocr_model, json_cache)
         # The rewritten copy exists only to satisfy the OCR request; ocr_response.json is
         # the artifact replays read, so keep nothing else around (it can be 20MB+).
         if ocr_pdf_path != pdf_path:
@@ -158,116 +216,185 @@ def main():
                 ocr_pdf_path.unlink()
             except OSError:
                 pass
+    if profiler:
+        pages = response_dict.get("pages", [])
+        profiler.facts(pages=len(pages),
+                       images=sum(len(p.get("images") or []) for p in pages),
+                       text_bytes=sum(len((p.get("markdown") or "").encode("utf-8")) for p in pages),
+                       input_bytes=pdf_path.stat().st_size if pdf_path.exists() else None)
+    mark("ocr_response")
+
+    # Conversion cache (shared/conversion_cache.py): the same OCR response (+ the PDF the mojibake
+    # recovery re-reads) through unchanged ingestion/pdf code restores main-text.md, footnote_meta
+    # and the seeded assessment (+ edit_journal.json under HYPERLIT_EDIT_JOURNAL) — classification,
+    # pypdf recovery and assembly all skipped. Images are not cached: they stream from the OCR
+    # response exactly as on a normal run.
+    conv_outputs = {"main-text.md": output_md,
+                    "footnote_meta.json": output_dir / "footnote_meta.json",
+                    "assessment.json": output_dir / "assessment.json"}
+    if journal_dump_enabled():
+        conv_outputs[_pageJournal.JOURNAL_NAME] = output_dir / _pageJournal.JOURNAL_NAME
+    conv_cache = ConversionCache.from_env() if not (regex_profiler or profiler) else None
+    conv_key = None
+    if conv_cache:
+        conv_key = stage_key("pdf_assembly", {
+            "ocr_response": path_digest(json_cache),
+            "pdf": path_digest(pdf_path) if pdf_path.exists() else None,
+        })
+        if conv_cache.fetch("pdf_assembly", conv_key, conv_outputs):
+            print(f"Conversion cache hit (pdf_assembly {conv_key[:12]}…) → {output_md}")
+            emit_progress(47, "ocr_assemble", "Restored unchanged document text from cache")
+            image_writes = start_image_writes(response_dict, media_dir,
+                                              image_pages=ocr_store.iter_pages if ocr_store else None)
+            img_count = image_writes.result()
+            if img_count:
+                print(f"Saved {img_count} images to {media_dir}")
+            return
+
+    # Admission control (shared/admission.py): classification + recovery + assembly (on a process pool
+    # for long documents) is the heavy part — wait until its estimated peak fits beside the other
+    # conversions running on this host instead of racing them into the OOM killer.
+    n_pages = len(response_dict.get("pages", []))
+    workers = _assembly._assembly_workers(n_pages)
+    text_bytes = sum(len((p.get("markdown") or "").encode("utf-8")) for p in response_dict.get("pages", []))
+    ticket = admit("pdf_assembly", on_wait=lambda msg: emit_progress(46, "queued", msg),
+                   pages=n_pages, text_mb=text_bytes / MB, workers=workers if workers > 1 else 0)
+    try:
+        # Initial classification (used to gate the renumber pass — chapter_endnotes
+        # books have their own per-chapter offset machinery and we must not double-shift).
+        emit_progress(46, "ocr_analyze", "Analyzing footnote layout")
+        # One per-page signal table for every classify / renumber / segment pass below: each later
+        # reclassification rescans only the pages the fold / renumber / revert actually rewrote.
+        page_signals = PageSignalTable(response_dict["pages"])
+        footnote_meta = classify_footnotes(response_dict, page_signals)
+        print(f"Footnote classification: {footnote_meta['classification']} "
+              f"(confidence: {footnote_meta['confidence']:.2f})")
+
+        # Normalise OCR-4-style responses to the OCR-3 shape BEFORE renumbering: OCR 4 lifts page-bottom
+        # footnote defs into each page's `footer` field (page-locally numbered), but renumber below
+        # rewrites the in-text ref to a GLOBAL number — so a footer def linked later no longer matches
+        # its ref (OCR 4 measured ~22% def coverage vs OCR 3's ~92%; folding restores it to ~89%).
+        # STRICTLY page_bottom only: that is the sole layout where extract_footer yields page-bottom
+        # DEFINITIONS. For other layouts a populated `footer` is references / numbered lists / chrome, and
+        # folding it corrupts them (measured regressions: author-year-bracket refs 16→3, a 'none' book
+        # 86→138). Re-classify on the richer markdown after folding.
+        if footnote_meta['classification'] == "page_bottom":
+            folded = fold_footer_defs_into_markdown(response_dict)
+            if folded:
+                footnote_meta = classify_footnotes(response_dict, page_signals)
+                print(f"Folded page-bottom footer defs on {folded} page(s); re-classified: "
+                      f"{footnote_meta['classification']} (confidence: {footnote_meta['confidence']:.2f})")
+        mark("classify")
 
-    # Initial classification (used to gate the renumber pass — chapter_endnotes
-    # books have their own per-chapter offset machinery and we must not double-shift).
-    emit_progress(46, "ocr_analyze", "Analyzing footnote layout")
-    footnote_meta = classify_footnotes(response_dict)
-    print(f"Footnote classification: {footnote_meta['classification']} "
-          f"(confidence: {footnote_meta['confidence']:.2f})")
-
-    # Normalise OCR-4-style responses to the OCR-3 shape BEFORE renumbering: OCR 4 lifts page-bottom
-    # footnote defs into each page's `footer` field (page-locally numbered), but renumber below
-    # rewrites the in-text ref to a GLOBAL number — so a footer def linked later no longer matches
-    # its ref (OCR 4 measured ~22% def coverage vs OCR 3's ~92%; folding restores it to ~89%).
-    # STRICTLY page_bottom only: that is the sole layout where extract_footer yields page-bottom
-    # DEFINITIONS. For other layouts a populated `footer` is references / numbered lists / chrome, and
-    # folding it corrupts them (measured regressions: author-year-bracket refs 16→3, a 'none' book
-    # 86→138). Re-classify on the richer markdown after folding.
-    if footnote_meta['classification'] == "page_bottom":
-        folded = fold_footer_defs_into_markdown(response_dict)
-        if folded:
-            footnote_meta = classify_footnotes(response_dict)
-            print(f"Folded page-bottom footer defs on {folded} page(s); re-classified: "
-                  f"{footnote_meta['classification']} (confidence: {footnote_meta['confidence']:.2f})")
-
-    # Renumber footnote IDs across chunk and multi-paper resets — skip for
-    # chapter_endnotes (existing chapter_fn_offsets handles those) AND for
-    # wackSTEM bibliography docs: their in-text citations re-cite low numbers
-    # constantly, so the "min ref == 1 → new-paper reset" heuristic fires on
-    # ordinary re-citations and offsets the reference-LIST lines (+320 on the
-    # Sci-Hub paper) while the [N] cites keep their real numbers — every
-    # stemref link then points at nothing. Worse, the mutation is PERSISTED
-    # into the cached ocr_response.json. Idempotent via the marker on
-    # response_dict.
-    # INVARIANT: ocr_response.json is Mistral's GROUND TRUTH and is never written
-    # back to. The renumber mutates only the in-memory copy; every run re-derives
-    # it deterministically (the `_chunk_boundaries` fetch provenance is cached, so
-    # replays get the same boundary hints the original fetch had). A previous
-    # version persisted the renumbered markdown over the cache "so re-runs see the
-    # new IDs" — that permanently vandalised the source of truth (the Sci-Hub case:
-    # refs 1–129 rewritten to 321–449 on disk, unrecoverable without a pristine
-    # copy from a fixture/bundle). Caches already carrying the
-    # `_footnote_renumber_version` marker from that era are served as-is (the
-    # marker makes renumber a no-op), but they are damaged goods — restore from a
-    # case bundle or fixture where one exists.
-    if footnote_meta['classification'] not in ("chapter_endnotes", "wackSTEMbibliographyNotes"):
-        renumber_chunk_footnotes(
+        # Renumber footnote IDs across chunk and multi-paper resets — skip for
+        # chapter_endnotes (existing chapter_fn_offsets handles those) AND for
+        # wackSTEM bibliography docs: their in-text citations re-cite low numbers
+        # constantly, so the "min ref == 1 → new-paper reset" heuristic fires on
+        # ordinary re-citations and offsets the reference-LIST lines (+320 on the
+        # Sci-Hub paper) while the [N] cites keep their real numbers — every
+        # stemref link then points at nothing. Worse, the mutation is PERSISTED
+        # into the cached ocr_response.json. Idempotent via the marker on
+        # response_dict.
+        # INVARIANT: ocr_response.json is Mistral's GROUND TRUTH and is never written
+        # back to. The renumber mutates only the in-memory copy; every run re-derives
+        # it deterministically (the `_chunk_boundaries` fetch provenance is cached, so
+        # replays get the same boundary hints the original fetch had). A previous
+        # version persisted the renumbered markdown over the cache "so re-runs see the
+        # new IDs" — that permanently vandalised the source of truth (the Sci-Hub case:
+        # refs 1–129 rewritten to 321–449 on disk, unrecoverable without a pristine
+        # copy from a fixture/bundle). Caches already carrying the
+        # `_footnote_renumber_version` marker from that era are served as-is (the
+        # marker makes renumber a no-op), but they are damaged goods — restore from a
+        # case bundle or fixture where one exists.
+        if footnote_meta['classification'] not in ("chapter_endnotes", "wackSTEMbibliographyNotes"):
+            renumber_chunk_footnotes(
+                response_dict,
+                response_dict.get("_chunk_boundaries"),
+                page_signals=page_signals,
+            )
+            # If renumber shifted anything, re-classify so page_summary reflects the
+            # corrected IDs.
+            if response_dict.get("_footnote_renumber_boundaries"):
+                footnote_meta = classify_footnotes(response_dict, page_signals)
+
+        # Revert the HALF-APPLIED segment renumbering (offsets hit [^N] + line-start defs but
+        # never inline bracket refs or plain "N Text" defs — mismatched pairs never license, and
+        # a ref links to the WRONG chapter's same-numbered note). page_bottom ONLY: its assembler
+        # renumbers each page's pairs together, so restoring the original per-chapter numbering
+        # is safe there and only there. See ocrFetch.revert_partial_renumber.
+        if footnote_meta['classification'] == 'page_bottom':
+            _reverted = revert_partial_renumber(response_dict)
+            if _reverted:
+                print(f"Reverted half-applied footnote renumbering on {_reverted} page(s) "
+                      f"(page-local print numbering restored; renumber_page_footnotes owns uniqueness)")
+                footnote_meta = classify_footnotes(response_dict, page_signals)
+        # HYPERLIT_EDIT_JOURNAL=1: every span the fold / renumber / revert passes rewrote (and which
+        # pass rewrote it) → edit_journal.json beside main-text.md.
+        if journal_dump_enabled():
+            PageJournal(response_dict).dump(output_dir)
+        mark("renumber")
+
+        # Detect multi-paper segment boundaries (anthology PDFs)
+        segment_boundaries = detect_segment_boundaries(response_dict, footnote_meta, page_signals)
+        if segment_boundaries:
+            print(f"Detected {len(segment_boundaries)} segment boundary/boundaries at pages: {segment_boundaries}")
+        footnote_meta["segment_boundaries"] = segment_boundaries
+        mark("segment_boundaries")
+
+        # Scan for OCR mojibake on def pages and attempt pypdf fallback
+        footnote_warnings = []
+        if pdf_path.exists():
+            footnote_warnings = scan_footnote_mojibake(response_dict, footnote_meta, pdf_path)
+            if footnote_warnings:
+                unrec = sum(len(w["unrecovered"]) for w in footnote_warnings)
+                rec = sum(len(w["recovered"]) for w in footnote_warnings)
+                print(f"Font-encoding mojibake on {len(footnote_warnings)} page(s): "
+                      f"recovered {rec} defs via pypdf, {unrec} unrecoverable.")
+        footnote_meta["footnote_warnings"] = footnote_warnings
+        mark("mojibake_scan")
+
+        # Save images to media/ subdirectory — on a thread pool, overlapped with assembly below.
+        # Duplicate payloads are written once; their page refs are rewritten before assembly starts.
+        image_writes = start_image_writes(response_dict, media_dir,
+                                          image_pages=ocr_store.iter_pages if ocr_store else None)
+
+        # Assemble markdown — may append additional mojibake warnings to
+        # `footnote_warnings` for pypdf-extracted defs we had to reject.
+        print("Assembling markdown...")
+        emit_progress(47, "ocr_assemble", "Assembling document text from OCR pages")
+        markdown = assemble_markdown(
             response_dict,
-            response_dict.get("_chunk_boundaries"),
+            classification=footnote_meta['classification'],
+            footnote_meta=footnote_meta,
+            pdf_path=pdf_path,
+            segment_boundaries=segment_boundaries,
+            footnote_warnings=footnote_warnings,
+            # Pool workers' regex scans would never reach this process's profiler — profile serially.
+            workers=1 if (regex_profiler or profiler) else None,
         )
-        # If renumber shifted anything, re-classify so page_summary reflects the
-        # corrected IDs.
-        if response_dict.get("_footnote_renumber_boundaries"):
-            footnote_meta = classify_footnotes(response_dict)
-
-    # Revert the HALF-APPLIED segment renumbering (offsets hit [^N] + line-start defs but
-    # never inline bracket refs or plain "N Text" defs — mismatched pairs never license, and
-    # a ref links to the WRONG chapter's same-numbered note). page_bottom ONLY: its assembler
-    # renumbers each page's pairs together, so restoring the original per-chapter numbering
-    # is safe there and only there. See ocrFetch.revert_partial_renumber.
-    if footnote_meta['classification'] == 'page_bottom':
-        _reverted = revert_partial_renumber(response_dict)
-        if _reverted:
-            print(f"Reverted half-applied footnote renumbering on {_reverted} page(s) "
-                  f"(page-local print numbering restored; renumber_page_footnotes owns uniqueness)")
-            footnote_meta = classify_footnotes(response_dict)
-
-    # Detect multi-paper segment boundaries (anthology PDFs)
-    segment_boundaries = detect_segment_boundaries(response_dict, footnote_meta)
-    if segment_boundaries:
-        print(f"Detected {len(segment_boundaries)} segment boundary/boundaries at pages: {segment_boundaries}")
-    footnote_meta["segment_boundaries"] = segment_boundaries
-
-    # Scan for OCR mojibake on def pages and attempt pypdf fallback
-    footnote_warnings = []
-    if pdf_path.exists():
-        footnote_warnings = scan_footnote_mojibake(response_dict, footnote_meta, pdf_path)
-        if footnote_warnings:
-            unrec = sum(len(w["unrecovered"]) for w in footnote_warnings)
-            rec = sum(len(w["recovered"]) for w in footnote_warnings)
-            print(f"Font-encoding mojibake on {len(footnote_warnings)} page(s): "
-                  f"recovered {rec} defs via pypdf, {unrec} unrecoverable.")
-    footnote_meta["footnote_warnings"] = footnote_warnings
-
-    # Save images to media/ subdirectory
-    img_count = save_images(response_dict, media_dir)
-    if img_count:
-        print(f"Saved {img_count} images to {media_dir}")
-
-    # Assemble markdown — may append additional mojibake warnings to
-    # `footnote_warnings` for pypdf-extracted defs we had to reject.
-    print("Assembling markdown...")
-    emit_progress(47, "ocr_assemble", "Assembling document text from OCR pages")
-    markdown = assemble_markdown(
-        response_dict,
-        classification=footnote_meta['classification'],
-        footnote_meta=footnote_meta,
-        pdf_path=pdf_path,
-        segment_boundaries=segment_boundaries,
-        footnote_warnings=footnote_warnings,
-    )
-    output_md.write_text(markdown, encoding="utf-8")
-
-    # Persist footnote_meta.json after assemble (which may have added warnings)
-    meta_path = output_dir / "footnote_meta.json"
-    meta_path.write_text(json.dumps(footnote_meta, indent=2), encoding="utf-8")
-
-    # Emit the classification decision + the harvest-fidelity discriminator into the assessment
-    # trace (process_document seeds from it). footnote_warnings carries the pypdf-recovery outcome
-    # so fidelity_loss reflects what re-extraction already salvaged vs the genuine upstream residual.
-    write_classification_assessment(footnote_meta, output_dir, markdown=markdown,
-                                    footnote_warnings=footnote_warnings)
+        output_md.write_text(markdown, encoding="utf-8")
+        mark("assemble")
+
+        img_count = image_writes.result()
+        if img_count:
+            deduped = len(image_writes.aliases)
+            print(f"Saved {img_count} images to {media_dir}"
+                  + (f" ({deduped} duplicate payload(s) deduplicated)" if deduped else ""))
+
+        # Persist footnote_meta.json after assemble (which may have added warnings)
+        meta_path = output_dir / "footnote_meta.json"
+        meta_path.write_text(json.dumps(footnote_meta, indent=2), encoding="utf-8")
+
+        # Emit the classification decision + the harvest-fidelity discriminator into the assessment
+        # trace (process_document seeds from it). footnote_warnings carries the pypdf-recovery outcome
+        # so fidelity_loss reflects what re-extraction already salvaged vs the genuine upstream residual.
+        write_classification_assessment(footnote_meta, output_dir, markdown=markdown,
+                                        footnote_warnings=footnote_warnings)
+        if conv_key:
+            conv_cache.store("pdf_assembly", conv_key, conv_outputs)
+    finally:
+        ticket.release()
+    mark("write")
 
     # Stats
     fn_count = len(re.findall(r'\[\^\d+\]', markdown))
@@ -278,6 +405,10 @@ def main():
     print(f"Footnotes: {fn_count}")
     print(f"Headings: {heading_count}")
 
+    if regex_profiler:
+        regex_profiler.uninstall()
+        regex_profiler.dump(output_dir, "pdf_assembly")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,174 @@
+"""Content-addressed OCR result cache shared across books.
+
+The per-book ocr_response.json only saves a re-OCR of the SAME book dir; the same PDF re-imported as a
+new book would go to Mistral again. Entries are keyed by the PDF's SHA-256 + the OCR model id,
+copied into the book dir on a hit (with the zero-amount ocr_charged.json marker — nothing was spent on
+Mistral, so the book is not billed for it), and evicted least-recently-used once the cache exceeds its
+byte budget.
+"""
+import hashlib
+import json
+import os
+import shutil
+import stat
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Default location: the Laravel storage/app tree (already git-ignored). HYPERLIT_OCR_CACHE_DIR
+# overrides it; set it to "off" (or "0") to disable the shared cache entirely.
+_DEFAULT_ROOT = Path(__file__).resolve().parents[4] / "storage" / "app" / "ocr-cache"
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024 * 1024
+
+
+def pdf_sha256(path):
+    """Streamed SHA-256 of a file (64KB reads — a 50MB PDF is never held in memory)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _model_key(model):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in (model or "default"))
+
+
+class OcrResultCache:
+    """A directory of `<sha[:2]>/<sha>.<model>.json` entries. Entries are read-only (0444): the OCR
+    cache is ground truth that the pipeline never rewrites in place. Books get their own writable
+    copy — a hard link would hand them the 0444 mode too, which every shutil.copy2 of the book dir
+    (sandbox, harvest) then carries along."""
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_env(cls):
+        """The configured cache, or None when disabled."""
+        root = os.environ.get("HYPERLIT_OCR_CACHE_DIR", "")
+        if root.lower() in ("off", "0", "false"):
+            return None
+        max_bytes = os.environ.get("HYPERLIT_OCR_CACHE_MAX_BYTES", "")
+        try:
+            max_bytes = int(max_bytes) if max_bytes else DEFAULT_MAX_BYTES
+        except ValueError:
+            max_bytes = DEFAULT_MAX_BYTES
+        return cls(root or _DEFAULT_ROOT, max_bytes)
+
+    def entry_path(self, digest, model):
+        return self.root / digest[:2] / f"{digest}.{_model_key(model)}.json"
+
+    def fetch(self, digest, model, dest):
+        """On a hit, copy the entry to `dest` (default mode, via a temp file + rename), mark it
+        recently used, and return True. Never raises — a cache problem just means a normal OCR fetch."""
+        entry = self.entry_path(digest, model)
+        if not entry.is_file():
+            return False
+        try:
+            dest = Path(dest)
+            tmp = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+            shutil.copyfile(entry, tmp)
+            os.replace(tmp, dest)
+            self._touch(entry)
+            return True
+        except OSError as e:
+            print(f"Warning: OCR cache hit could not be materialised ({e}) — fetching instead")
+            return False
+
+    def store(self, digest, model, src):
+        """Add a copy of `src` (a freshly fetched ocr_response.json) under (digest, model), then evict
+        down to the byte budget. `src` keeps its inode and mode. Best-effort; never breaks conversion."""
+        entry = self.entry_path(digest, model)
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            tmp = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+            # A copy, not a link: the 0444 below must not reach the book's own ocr_response.json.
+            shutil.copyfile(src, tmp)
+            os.chmod(tmp, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(tmp, entry)
+            self._touch(entry)
+        except OSError as e:
+            print(f"Warning: could not add OCR result to the shared cache: {e}")
+            return False
+        self.evict()
+        return True
+
+    @staticmethod
+    def _touch(entry):
+        """Record use. Recency lives on a `.used` sibling, NOT the entry's own mtime: the entry stays
+        read-only, and book dirs hard-linked to it before hits were copies would see their ocr_store/
+        sidecars marked stale."""
+        used = entry.with_name(entry.name + ".used")
+        used.touch()
+        os.utime(used, None)
+
+    def _entries(self):
+        out = []
+        if not self.root.is_dir():
+            return out
+        for shard in self.root.iterdir():
+            if not shard.is_dir():
+                continue
+            for entry in shard.iterdir():
+                if entry.suffix != ".json":
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                size, used = st.st_size, st.st_mtime
+                try:
+                    used = entry.with_name(entry.name + ".used").stat().st_mtime
+                except OSError:
+                    pass
+                out.append((used, size, entry))
+        return out
+
+    def evict(self):
+        """Drop least-recently-used entries until the cache fits max_bytes. Book dirs hold their own
+        copies, so eviction never touches a book. Returns how many."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            try:
+                entry.with_name(entry.name + ".used").unlink()
+            except OSError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+
+def write_json_atomic(path, text):
+    """Write `text` to `path` via a sibling temp file + rename. A book's ocr_response.json may still
+    be a read-only hard link into the shared cache (hits used to be linked): replacing the NAME leaves
+    the cache entry intact, where an in-place write would fail."""
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{int(time.time() * 1000)}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def write_free_ocr_marker(book_dir, source="shared_ocr_cache"):
+    """Write the zero-amount ocr_charged.json marker (same shape as PdfProcessor's native-OCR one) so
+    BillingService::billOcrForBook skips the charge. Leaves an existing marker alone — a real charge
+    already recorded for this book stays on the books."""
+    marker = Path(book_dir) / "ocr_charged.json"
+    if marker.exists():
+        return False
+    write_json_atomic(marker, json.dumps({
+        "book": Path(book_dir).name,
+        "amount": 0,
+        "source": source,
+        "charged_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }, indent=4))
+    return True
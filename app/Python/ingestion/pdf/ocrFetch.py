@@ -10,11 +10,10 @@ import io
 import zlib
 from pathlib import Path
 from statistics import median
-from mistralai.client import Mistral
-from pypdf import PdfReader, PdfWriter
-from pypdf.generic import BooleanObject, NameObject, NumberObject
 
 from ingestion.pdf.pdf_shared import *  # noqa: F401,F403
+from ingestion.pdf.pageJournal import PageJournal
+from shared.admission import admit
 
 MISTRAL_MAX_BYTES = 50 * 1024 * 1024
 
@@ -246,6 +245,7 @@ def _shrink_image_xobject(obj, width, height):
     Everything else is re-encoded as greyscale JPEG, which is all OCR needs.
     """
     from PIL import Image
+    from pypdf.generic import BooleanObject, NameObject, NumberObject
 
     is_mask = _pdf_bool(obj.get("/ImageMask"))
     previous_limit = Image.MAX_IMAGE_PIXELS
@@ -297,6 +297,8 @@ def _blank_image_xobject(obj):
     The escape hatch for an image too big to decode safely (or one whose decoder threw).
     The figure is lost; the book converts — which beats the whole import dying on a 400.
     """
+    from pypdf.generic import BooleanObject, NameObject, NumberObject
+
     is_mask = _pdf_bool(obj.get("/ImageMask"))
     obj[NameObject("/Filter")] = NameObject("/FlateDecode")
     obj._data = zlib.compress(b"\xff" if is_mask else b"\xff", 6)
@@ -350,27 +352,35 @@ def normalize_oversized_images(pdf_path, work_dir):
     )
     print(f"Normalizing {len(oversized)} oversized image(s) before OCR:")
 
-    budget = _decode_budget_pixels()
-    writer = PdfWriter(clone_from=str(pdf_path))
-    for name, obj, width, height in find_oversized_images(writer.pages):
-        print(f"  {name} {width}x{height} ({width * height / 1e6:.0f}MP)")
-        entry = {"name": name, "width": width, "height": height}
-        new_size = None
-        if width * height <= budget:
-            new_size = _shrink_image_xobject(obj, width, height)
-        else:
-            print(f"    {width * height / 1e6:.0f}MP exceeds the {budget / 1e6:.0f}MP memory "
-                  f"budget — blanking instead")
-            entry["reason"] = "decode_budget"
-        if new_size:
-            entry["new_width"], entry["new_height"] = new_size
-            report["downsampled"].append(entry)
-        else:
-            _blank_image_xobject(obj)
-            report["blanked"].append(entry)
+    # Admission control (shared/admission.py): images decode one at a time, so the step's peak is priced
+    # on the largest decode the static ceiling allows. The wait comes BEFORE the decode budget is read,
+    # so that budget sees the memory left once this conversion is admitted.
+    ticket = admit("pdf_normalize", decode_mpx=min(biggest, MAX_DECODE_PIXELS) / 1e6,
+                   on_wait=lambda msg: emit_progress(3, "queued", msg))
+    try:
+        budget = _decode_budget_pixels()
+        writer = PdfWriter(clone_from=str(pdf_path))
+        for name, obj, width, height in find_oversized_images(writer.pages):
+            print(f"  {name} {width}x{height} ({width * height / 1e6:.0f}MP)")
+            entry = {"name": name, "width": width, "height": height}
+            new_size = None
+            if width * height <= budget:
+                new_size = _shrink_image_xobject(obj, width, height)
+            else:
+                print(f"    {width * height / 1e6:.0f}MP exceeds the {budget / 1e6:.0f}MP memory "
+                      f"budget — blanking instead")
+                entry["reason"] = "decode_budget"
+            if new_size:
+                entry["new_width"], entry["new_height"] = new_size
+                report["downsampled"].append(entry)
+            else:
+                _blank_image_xobject(obj)
+                report["blanked"].append(entry)
 
-    normalized_path = Path(work_dir) / "normalized.pdf"
-    writer.write(str(normalized_path))
+        normalized_path = Path(work_dir) / "normalized.pdf"
+        writer.write(str(normalized_path))
+    finally:
+        ticket.release()
     size_mb = normalized_path.stat().st_size / 1024 / 1024
     print(f"  wrote {normalized_path.name} ({size_mb:.1f}MB) — "
           f"{len(report['downsampled'])} downsampled, {len(report['blanked'])} blanked")
@@ -535,7 +545,13 @@ def _collect_page_refs_and_defs(md):
     return sorted(r for r in refs if r >= 1), sorted(defs)
 
 
-def renumber_chunk_footnotes(response_dict, chunk_boundary_indices=None):
+# The three marker shapes the anthology renumber shifts (and its revert un-shifts).
+_CARET_REF_RE = re.compile(r'\[\^(\d+)\]')
+_BRACKET_DEF_LINE_RE = re.compile(r'^\[(\d+)\]( .)', re.MULTILINE)
+_NUMDOT_DEF_LINE_RE = re.compile(r'^(\d{1,3})\. (\S)', re.MULTILINE)
+
+
+def renumber_chunk_footnotes(response_dict, chunk_boundary_indices=None, page_signals=None):
     """Renumber footnote IDs across chunk boundaries so they stay globally unique.
 
     When a >50MB PDF is split for OCR, each chunk's Mistral response starts its
@@ -549,8 +565,12 @@ def renumber_chunk_footnotes(response_dict, chunk_boundary_indices=None):
     detection deterministic. When None (cache re-runs), fall back to heuristic
     detection based on number resets alone.
 
+    `page_signals` (optional PageSignalTable): reuse the classifier's per-page refs/defs instead
+    of rescanning every page.
+
     Idempotent via response_dict["_footnote_renumber_version"] marker.
-    Mutates page["markdown"] in place. Returns the response_dict.
+    Mutates page["markdown"] in place, every change recorded in the page edit journal
+    (pageJournal.py). Returns the response_dict.
     """
     if response_dict.get("_footnote_renumber_version"):
         return response_dict
@@ -560,8 +580,10 @@ def renumber_chunk_footnotes(response_dict, chunk_boundary_indices=None):
         response_dict["_footnote_renumber_version"] = 1
         return response_dict
 
-    # Collect per-page refs+defs
-    per_page = [_collect_page_refs_and_defs(p.get("markdown", "")) for p in pages]
+    # Collect per-page refs+defs (same shape as _collect_page_refs_and_defs)
+    table = PageSignalTable.for_response(response_dict, page_signals)
+    per_page = [(sorted(r for r in refs if r >= 1), sorted(defs))
+                for refs, defs in zip(table.refs, table.defs)]
 
     boundary_hint = set(chunk_boundary_indices or [])
     running_max = 0
@@ -602,6 +624,7 @@ def renumber_chunk_footnotes(response_dict, chunk_boundary_indices=None):
                 active_offset = boundary_map[i]
             page_offsets[i] = active_offset
 
+        journal = PageJournal(response_dict)
         for i, page in enumerate(pages):
             off = page_offsets[i]
             if off <= 0:
@@ -610,14 +633,14 @@ def renumber_chunk_footnotes(response_dict, chunk_boundary_indices=None):
 
             # Normalize superscripts and LaTeX-superscripts to [^N] before
             # shifting, otherwise non-[^N] forms slip through unchanged and
-            # collide with the un-shifted IDs from earlier pages.
-            md = convert_footnotes(md)
-            md = expand_latex_superscripts(md)
+            # collide with the un-shifted IDs from earlier pages. Journaled as its
+            # own pass: the revert below undoes the SHIFT, not the normalisation.
+            journal.replace(i, expand_latex_superscripts(convert_footnotes(md)), "renumber_normalise")
 
             # Renumber [^N] (refs and defs alike)
             def _shift_footnote_ref(m, _off=off):
                 return f'[^{int(m.group(1)) + _off}]'
-            md = re.sub(r'\[\^(\d+)\]', _shift_footnote_ref, md)
+            journal.sub(i, _CARET_REF_RE, _shift_footnote_ref, "renumber")
 
             # Renumber bracket-form [N] line-starts only when small N (defs),
             # so we don't corrupt things like [2015]
@@ -626,7 +649,7 @@ def renumber_chunk_footnotes(response_dict, chunk_boundary_indices=None):
                 if num < 1 or num > 500:
                     return m.group(0)
                 return f'[{num + _off}]{m.group(2)}'
-            md = re.sub(r'^\[(\d+)\]( .)', _shift_bracket_def, md, flags=re.MULTILINE)
+            journal.sub(i, _BRACKET_DEF_LINE_RE, _shift_bracket_def, "renumber")
 
             # Renumber "N. text" line-starts (numbered def lists on notes pages).
             # Only shift when the original N is small (def-sized) to avoid
@@ -636,9 +659,7 @@ def renumber_chunk_footnotes(response_dict, chunk_boundary_indices=None):
                 if num < 1 or num > 200:
                     return m.group(0)
                 return f'{num + _off}. {m.group(2)}'
-            md = re.sub(r'^(\d{1,3})\. (\S)', _shift_numdot_def, md, flags=re.MULTILINE)
-
-            page["markdown"] = md
+            journal.sub(i, _NUMDOT_DEF_LINE_RE, _shift_numdot_def, "renumber")
 
     response_dict["_footnote_renumber_version"] = 1
     response_dict["_footnote_renumber_boundaries"] = [b[0] for b in reset_boundaries]
@@ -657,9 +678,10 @@ def revert_partial_renumber(response_dict):
     every marker-form family Mistral uses would need its own shifted/unshifted bookkeeping.
 
     Reverting is exact: the RAW Mistral pages were internally consistent, ALL inconsistency
-    came from the shift, and the per-page offsets it applied are recorded in
-    _footnote_renumber_page_offsets. Subtract each page's offset from exactly the three
-    patterns the pass shifted, restoring the original print numbering everywhere. Chapter
+    came from the shift, and the edit journal holds every span the shift rewrote — undoing
+    those spans restores the original print numbering everywhere (a response renumbered
+    without a journal falls back to subtracting each page's recorded offset from the three
+    shifted patterns). Chapter
     restarts then don't matter: page_bottom assembly's renumber_page_footnotes owns global
     uniqueness and renumbers each page's ref+def pairs TOGETHER.
 
@@ -668,6 +690,15 @@ def revert_partial_renumber(response_dict):
     Idempotent via _footnote_renumber_reverted. Returns the number of pages touched."""
     if response_dict.get("_footnote_renumber_reverted"):
         return 0
+    journal = PageJournal(response_dict)
+    # Exact path: renumber journaled every span it shifted — put those spans back, O(edits).
+    touched = journal.revert("renumber") if "renumber" in journal.passes() else None
+    if touched is not None:
+        response_dict["_footnote_renumber_reverted"] = True
+        return touched
+    # Re-derivation fallback for a response renumbered without a journal (a cache persisted with the
+    # renumber marker by an older version): subtract each page's recorded offset from the three
+    # patterns the pass shifts.
     offsets = response_dict.get("_footnote_renumber_page_offsets") or []
     touched = 0
     for i, page in enumerate(response_dict.get("pages", [])):
@@ -688,17 +719,15 @@ def revert_partial_renumber(response_dict):
             num = int(m.group(1))
             return f'{num - _off}. {m.group(2)}' if 1 <= num - _off <= 200 else m.group(0)
 
-        new_md = re.sub(r'\[\^(\d+)\]', _unshift_caret, md)
-        new_md = re.sub(r'^\[(\d+)\]( .)', _unshift_bracket_def, new_md, flags=re.MULTILINE)
-        new_md = re.sub(r'^(\d{1,3})\. (\S)', _unshift_numdot_def, new_md, flags=re.MULTILINE)
-        if new_md != md:
-            page["markdown"] = new_md
-            touched += 1
+        new_md = _CARET_REF_RE.sub(_unshift_caret, md)
+        new_md = _BRACKET_DEF_LINE_RE.sub(_unshift_bracket_def, new_md)
+        new_md = _NUMDOT_DEF_LINE_RE.sub(_unshift_numdot_def, new_md)
+        touched += journal.replace(i, new_md, "revert_renumber")
     response_dict["_footnote_renumber_reverted"] = True
     return touched
 
 
-def detect_segment_boundaries(response_dict, footnote_meta):
+def detect_segment_boundaries(response_dict, footnote_meta, page_signals=None):
     """Identify multi-paper boundaries from footnote-number resets, anchored to headings.
 
     Only renumber-detected resets are treated as candidates for being paper
@@ -712,6 +741,8 @@ def detect_segment_boundaries(response_dict, footnote_meta):
     that don't correlate with any nearby `# ` heading are dropped, on the
     assumption that they're chunking artifacts rather than real paper breaks.
 
+    `page_signals` (optional PageSignalTable) supplies the per-page `# ` heading flags.
+
     Returns a sorted, deduplicated list of page indices. Empty for documents
     with no inter-paper resets.
     """
@@ -725,15 +756,14 @@ def detect_segment_boundaries(response_dict, footnote_meta):
     if not raw_boundaries:
         return []
 
+    has_heading = PageSignalTable.for_response(response_dict, page_signals).has_top_heading
     confirmed = set()
     for page_idx in raw_boundaries:
         if page_idx <= 0 or page_idx >= len(pages):
             continue
-        md = pages[page_idx].get("markdown", "") or ""
-        prev_md = pages[page_idx - 1].get("markdown", "") or ""
-        if re.search(r'^# [^#]', md, re.MULTILINE):
+        if has_heading[page_idx]:
             confirmed.add(page_idx)
-        elif re.search(r'^# [^#]', prev_md, re.MULTILINE):
+        elif has_heading[page_idx - 1]:
             confirmed.add(page_idx - 1)
         # No nearby heading → almost certainly a chunking artifact; skip.
 
@@ -0,0 +1,163 @@
+"""Page-addressable view of the cached OCR response.
+
+ocr_response.json stays the ground truth and is never rewritten. This builds a derived sidecar next to
+it: ocr_store/header.json (every top-level key but `pages`, plus the byte-offset index) and
+ocr_store/pages.jsonl (one page per line, optionally zlib-compressed per record). Replays can then
+iterate pages or fetch one by index without json.loads-ing a 20MB+ document, and classification /
+assembly work on a text-only view while image payloads stream straight to the writer.
+"""
+import json
+import os
+import zlib
+from pathlib import Path
+
+STORE_DIRNAME = "ocr_store"
+STORE_VERSION = 1
+_HEADER_NAME = "header.json"
+_PAGES_NAME = "pages.jsonl"
+_PAGES_Z_NAME = "pages.jsonl.z"
+
+
+def _compress_default():
+    return os.environ.get("HYPERLIT_OCR_STORE_COMPRESS", "") not in ("", "0")
+
+
+def _source_stamp(json_path):
+    st = os.stat(json_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _text_only(page):
+    """The page minus its image payloads: image records keep id / bbox / annotations but drop
+    `image_base64`, which is ~all of a response's bytes and irrelevant to classification/assembly."""
+    images = page.get("images")
+    if not images:
+        return page
+    slim = dict(page)
+    slim["images"] = [{k: v for k, v in img.items() if k != "image_base64"} for img in images]
+    return slim
+
+
+class OcrPageStore:
+    """Random-access + streaming reader over one book's OCR pages.
+
+    Open with OcrPageStore.open(output_dir): serves the ocr_store/ sidecar when it was built from
+    the CURRENT ocr_response.json (size + mtime recorded in its header), rebuilds it otherwise, and
+    falls back to reading the legacy single file directly when the sidecar cannot be written (a
+    read-only fixture dir). Page dicts are fresh objects on every read — mutating one never reaches
+    the store or the ground-truth JSON."""
+
+    def __init__(self, header, pages_path=None, offsets=None, compressed=False, pages=None):
+        self.header = header
+        self._pages_path = pages_path
+        self._offsets = offsets or []
+        self._compressed = compressed
+        self._pages = pages            # legacy fallback: the fully-parsed page list
+
+    # --- construction ---------------------------------------------------------------------------
+    @classmethod
+    def build(cls, json_path, store_dir=None, compress=None):
+        """(Re)build the sidecar from the legacy single-file response. Returns the opened store."""
+        json_path = Path(json_path)
+        store_dir = Path(store_dir) if store_dir else json_path.parent / STORE_DIRNAME
+        compressed = _compress_default() if compress is None else bool(compress)
+        stamp = _source_stamp(json_path)
+        response = json.loads(json_path.read_text(encoding="utf-8"))
+        pages = response.pop("pages", [])
+
+        store_dir.mkdir(parents=True, exist_ok=True)
+        pages_name = _PAGES_Z_NAME if compressed else _PAGES_NAME
+        offsets = []
+        tmp_pages = store_dir / (pages_name + ".tmp")
+        with open(tmp_pages, "wb") as f:
+            for page in pages:
+                record = json.dumps(page, ensure_ascii=False).encode("utf-8")
+                record = zlib.compress(record, 6) if compressed else record + b"\n"
+                offsets.append([f.tell(), len(record)])
+                f.write(record)
+        header = dict(response)
+        header["_store"] = {
+            "version": STORE_VERSION,
+            "source": stamp,
+            "page_count": len(pages),
+            "pages_file": pages_name,
+            "compressed": compressed,
+            "offsets": offsets,
+        }
+        tmp_header = store_dir / (_HEADER_NAME + ".tmp")
+        tmp_header.write_text(json.dumps(header), encoding="utf-8")
+        # Pages first, header last: a header on disk always describes a complete pages file.
+        os.replace(tmp_pages, store_dir / pages_name)
+        os.replace(tmp_header, store_dir / _HEADER_NAME)
+        return cls._from_header(header, store_dir)
+
+    @classmethod
+    def _from_header(cls, header, store_dir):
+        meta = header["_store"]
+        return cls({k: v for k, v in header.items() if k != "_store"},
+                   pages_path=Path(store_dir) / meta["pages_file"],
+                   offsets=meta["offsets"], compressed=meta["compressed"])
+
+    @classmethod
+    def open(cls, output_dir, json_name="ocr_response.json"):
+        """The store for `output_dir/json_name`, building the sidecar when absent or stale."""
+        output_dir = Path(output_dir)
+        json_path = output_dir / json_name
+        store_dir = output_dir / STORE_DIRNAME
+        header_path = store_dir / _HEADER_NAME
+        if header_path.exists():
+            try:
+                header = json.loads(header_path.read_text(encoding="utf-8"))
+                meta = header.get("_store") or {}
+                fresh = (meta.get("version") == STORE_VERSION
+                         and (not json_path.exists() or meta.get("source") == _source_stamp(json_path))
+                         and (store_dir / meta.get("pages_file", "")).is_file())
+                if fresh:
+                    return cls._from_header(header, store_dir)
+            except (OSError, ValueError, KeyError):
+                pass
+        try:
+            return cls.build(json_path, store_dir)
+        except OSError:
+            response = json.loads(json_path.read_text(encoding="utf-8"))
+            pages = response.pop("pages", [])
+            return cls(response, pages=pages)
+
+    # --- reading --------------------------------------------------------------------------------
+    def __len__(self):
+        return len(self._pages) if self._pages is not None else len(self._offsets)
+
+    def _decode(self, raw):
+        if self._compressed:
+            raw = zlib.decompress(raw)
+        return json.loads(raw)
+
+    def page(self, i, text_only=False):
+        """Page `i` (a fresh dict). `text_only` drops image payloads."""
+        if self._pages is not None:
+            page = json.loads(json.dumps(self._pages[i]))
+        else:
+            start, length = self._offsets[i]
+            with open(self._pages_path, "rb") as f:
+                f.seek(start)
+                page = self._decode(f.read(length))
+        return _text_only(page) if text_only else page
+
+    def iter_pages(self, text_only=False):
+        """Stream the pages in order, one decoded page in memory at a time."""
+        if self._pages is not None:
+            for i in range(len(self._pages)):
+                yield self.page(i, text_only)
+            return
+        with open(self._pages_path, "rb") as f:
+            for start, length in self._offsets:
+                f.seek(start)
+                page = self._decode(f.read(length))
+                yield _text_only(page) if text_only else page
+
+    def response_dict(self, text_only=False):
+        """A mutable response in the legacy shape (header keys + `pages`). With `text_only` the pages
+        carry no image payloads — pair it with iter_pages() to source the images for writing."""
+        response = json.loads(json.dumps(self.header))
+        response["pages"] = list(self.iter_pages(text_only))
+        return response
@@ -0,0 +1,160 @@
+"""Edit journal for the in-memory OCR page mutations.
+
+The pre-assembly passes (fold_footer_defs_into_markdown, renumber_chunk_footnotes,
+revert_partial_renumber) record each span-level substitution they make, with the pass that made it. The
+revert undoes exactly the recorded spans instead of re-deriving the renumber's work with inverse regexes,
+the touched spans are queryable per page, and HYPERLIT_EDIT_JOURNAL=1 dumps the journal to
+edit_journal.json for diagnostics. The journal is plain JSON data kept on the response dict (like the other
+`_`-prefixed pass markers) and never reaches ocr_response.json.
+"""
+import json
+import os
+import re
+
+JOURNAL_KEY = "_edit_journal"
+JOURNAL_NAME = "edit_journal.json"
+
+
+def dump_enabled():
+    return os.environ.get("HYPERLIT_EDIT_JOURNAL", "") not in ("", "0")
+
+
+class PageJournal:
+    """A view over response_dict["_edit_journal"]: an ordered list of edit GROUPS, one per pass call on
+    one page field — {"page", "field", "pass", "length", "edits": [[start, old, new], …]}. Edit spans
+    are in the coordinates of the text right AFTER the group (start = where `new` now sits), and
+    `length` is that text's length, so the top group on a page can be undone without rescanning.
+    Every mutation goes through sub / edit / replace, which write the page and journal together."""
+
+    def __init__(self, response_dict):
+        self.pages = response_dict.get("pages", [])
+        self.groups = response_dict.setdefault(JOURNAL_KEY, {"version": 1, "groups": []})["groups"]
+
+    # --- recording ----------------------------------------------------------------------------------
+    def sub(self, i, pattern, repl, pass_name, flags=0, field="markdown"):
+        """re.sub over one page field, journaled match by match. Returns the number of spans changed."""
+        rx = pattern if isinstance(pattern, re.Pattern) else re.compile(pattern, flags)
+        text = self.pages[i].get(field, "") or ""
+        out, edits, pos, shift = [], [], 0, 0
+        for m in rx.finditer(text):
+            old = m.group(0)
+            new = repl(m) if callable(repl) else m.expand(repl)
+            out.append(text[pos:m.start()])
+            out.append(new)
+            pos = m.end()
+            if new != old:
+                edits.append([m.start() + shift, old, new])
+                shift += len(new) - len(old)
+        if not edits:
+            return 0
+        out.append(text[pos:])
+        self._commit(i, field, pass_name, "".join(out), edits)
+        return len(edits)
+
+    def edit(self, i, start, end, new, pass_name, field="markdown"):
+        """Replace text[start:end] of one page field with `new`. Returns 1 when it changed anything."""
+        text = self.pages[i].get(field, "") or ""
+        old = text[start:end]
+        if old == new:
+            return 0
+        self._commit(i, field, pass_name, text[:start] + new + text[end:], [[start, old, new]])
+        return 1
+
+    def replace(self, i, new_text, pass_name, field="markdown"):
+        """Whole-field rewrite (a transform with no finer span structure) — one coarse edit."""
+        text = self.pages[i].get(field, "") or ""
+        return self.edit(i, 0, len(text), new_text, pass_name, field)
+
+    def _commit(self, i, field, pass_name, new_text, edits):
+        self.pages[i][field] = new_text
+        self.groups.append({"page": i, "field": field, "pass": pass_name,
+                            "length": len(new_text), "edits": edits})
+
+    # --- queries ------------------------------------------------------------------------------------
+    def passes(self):
+        return {g["pass"] for g in self.groups}
+
+    def dirty_spans(self, i, field="markdown"):
+        """[(start, end, pass)] of the spans on page i still standing from each pass's edits, in the
+        page's CURRENT coordinates (later groups' length changes applied)."""
+        spans = []
+        for g in self.groups:
+            if g["page"] != i or g["field"] != field:
+                continue
+            spans = [(_shift(s, g["edits"]), _shift(e, g["edits"]), p) for s, e, p in spans]
+            spans += [(start, start + len(new), g["pass"]) for start, old, new in g["edits"]]
+        return sorted(spans)
+
+    # --- undo ---------------------------------------------------------------------------------------
+    def revert(self, pass_name):
+        """Undo every edit `pass_name` recorded, restoring each span's original text. Only exact when
+        the pass's groups are the NEWEST on their page field and the field was not rewritten behind
+        the journal's back; otherwise nothing is touched and None is returned (the caller falls back
+        to re-deriving). Returns the number of pages restored."""
+        blocked = set()
+        todo = []
+        for gi in range(len(self.groups) - 1, -1, -1):
+            g = self.groups[gi]
+            key = (g["page"], g["field"])
+            if g["pass"] != pass_name:
+                blocked.add(key)
+            elif key in blocked:
+                return None
+            else:
+                todo.append(gi)
+        expected = {}
+        for gi in todo:                                   # newest first per key
+            g = self.groups[gi]
+            expected.setdefault((g["page"], g["field"]), g["length"])
+        for (i, field), length in expected.items():
+            if i >= len(self.pages) or len(self.pages[i].get(field, "") or "") != length:
+                return None
+        for gi in todo:
+            g = self.groups[gi]
+            page = self.pages[g["page"]]
+            page[g["field"]] = _undo(page.get(g["field"], "") or "", g["edits"])
+        for gi in todo:                                   # descending indices — safe to delete
+            del self.groups[gi]
+        return len({i for i, _field in expected})
+
+    # --- diagnostics --------------------------------------------------------------------------------
+    def summary(self):
+        """{pass: {"pages": n, "edits": n}} over the groups still in the journal."""
+        out = {}
+        for g in self.groups:
+            s = out.setdefault(g["pass"], {"pages": set(), "edits": 0})
+            s["pages"].add(g["page"])
+            s["edits"] += len(g["edits"])
+        return {p: {"pages": len(s["pages"]), "edits": s["edits"]} for p, s in out.items()}
+
+    def dump(self, output_dir):
+        path = os.path.join(str(output_dir), JOURNAL_NAME)
+        report = {"summary": self.summary(), "groups": [
+            dict(g, edits=[{"at": s, "old": o, "new": n} for s, o, n in g["edits"]]) for g in self.groups]}
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"Edit journal: {sum(len(g['edits']) for g in self.groups)} edit(s) → {path}")
+        except OSError as e:
+            print(f"Warning: could not write {JOURNAL_NAME}: {e}")
+
+
+def _shift(pos, edits):
+    """Map a position in the text BEFORE a group to the text after it."""
+    delta = 0
+    for start, old, new in edits:
+        if start - delta + len(old) > pos:
+            break
+        delta += len(new) - len(old)
+    return pos + delta
+
+
+def _undo(text, edits):
+    """Put each edit's old text back in place of its new text (edits ascend, non-overlapping)."""
+    out, pos = [], 0
+    for start, old, new in edits:
+        out.append(text[pos:start])
+        out.append(old)
+        pos = start + len(new)
+    out.append(text[pos:])
+    return "".join(out)
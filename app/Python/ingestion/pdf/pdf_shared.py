@@ -11,8 +11,24 @@ import threading
 from contextlib import contextmanager
 from pathlib import Path
 from statistics import median
-from mistralai.client import Mistral
-from pypdf import PdfReader, PdfWriter
+
+
+# The Mistral SDK (~0.4s: pydantic models for its whole API surface) and pypdf (~80ms) are imported on
+# first use, not at module load: every phase module star-imports these three names, and a run that is
+# served from the conversion cache, or a test that only touches the text passes, never needs either.
+def Mistral(*args, **kwargs):
+    from mistralai.client import Mistral as _Mistral
+    return _Mistral(*args, **kwargs)
+
+
+def PdfReader(*args, **kwargs):
+    from pypdf import PdfReader as _PdfReader
+    return _PdfReader(*args, **kwargs)
+
+
+def PdfWriter(*args, **kwargs):
+    from pypdf import PdfWriter as _PdfWriter
+    return _PdfWriter(*args, **kwargs)
 
 
 SUPERSCRIPT_MAP = str.maketrans("\u2070\u00b9\u00b2\u00b3\u2074\u2075\u2076\u2077\u2078\u2079", "0123456789")
@@ -941,6 +957,83 @@ def wrap_stem_definitions(text):
     return text
 
 
+_TRAILING_NUMBER_RE = re.compile(r'^\d{1,4}$')
+_CITATION_GROUP_RE = re.compile(r'\[\d{1,3}(?:\s*[,–-]\s*\d{1,3})+\]')
+_CITATION_SINGLE_RE = re.compile(r'(?<![\d.\]!])\[(\d{1,3})\](?!\()')
+_TOP_HEADING_RE = re.compile(r'^# [^#]', re.MULTILINE)
+
+
+class PageSignalTable:
+    """Columnar per-page footnote signals, shared by classify_footnotes, renumber_chunk_footnotes and
+    detect_segment_boundaries so a page's markdown is scanned ONCE, not once per consumer per call.
+
+    One list per signal, indexed by page: refs / defs (frozensets from collect_page_refs_and_defs),
+    trailing_number (standalone last-line number, the page-number candidate), has_notes_header,
+    group_hits / single_hits (bracket-citation counts for the Vancouver ratio) and has_top_heading
+    (a `# ` heading, the segment-boundary anchor). Aggregates are whole-column reductions.
+
+    mistral_ocr.main classifies up to four times (initial, after footer folding, after renumber,
+    after revert). Every mutation in between replaces page["markdown"], so refresh() diffs each
+    page's markdown + header against the copy it last scanned and recomputes ONLY the pages that
+    changed — reclassifying after a fold costs the folded pages, not the book."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self._resize(len(pages))
+        self.refresh()
+
+    def _resize(self, n):
+        self._markdown = [None] * n
+        self._header = [None] * n
+        self.refs = [frozenset()] * n
+        self.defs = [frozenset()] * n
+        self.trailing_number = [None] * n
+        self.has_notes_header = [False] * n
+        self.group_hits = [0] * n
+        self.single_hits = [0] * n
+        self.has_top_heading = [False] * n
+
+    def __len__(self):
+        return len(self._markdown)
+
+    @classmethod
+    def for_response(cls, response_dict, table=None):
+        """`table` refreshed when it tracks this response's page list, else a fresh table."""
+        if table is not None and table.pages is response_dict["pages"]:
+            table.refresh()
+            return table
+        return cls(response_dict["pages"])
+
+    def refresh(self):
+        """Rescan the pages whose markdown or header changed since the last scan. Returns how many."""
+        if len(self.pages) != len(self._markdown):
+            self._resize(len(self.pages))
+        dirty = 0
+        for i, page in enumerate(self.pages):
+            md = page.get("markdown", "")
+            header = page.get("header") or ""
+            if md is self._markdown[i] or md == self._markdown[i]:
+                if header == self._header[i]:
+                    continue
+            self._scan(i, md, header)
+            dirty += 1
+        return dirty
+
+    def _scan(self, i, md_raw, header):
+        refs, defs = collect_page_refs_and_defs(md_raw)
+        md = convert_bare_caret_footnotes(convert_footnotes(md_raw))
+        last_line = md.rstrip().rsplit('\n', 1)[-1].strip()
+        self._markdown[i] = md_raw
+        self._header[i] = header
+        self.refs[i] = frozenset(refs)
+        self.defs[i] = frozenset(defs)
+        self.trailing_number[i] = int(last_line) if _TRAILING_NUMBER_RE.match(last_line) else None
+        self.has_notes_header[i] = bool(re.search(r'\bNotes\b', header) or re.search(r'\bNOTES\b', header))
+        self.group_hits[i] = len(_CITATION_GROUP_RE.findall(md_raw))
+        self.single_hits[i] = sum(1 for _ in _CITATION_SINGLE_RE.finditer(md_raw))
+        self.has_top_heading[i] = bool(md_raw and _TOP_HEADING_RE.search(md_raw))
+
+
 class PdfClassifier:
     """One PDF footnote-layout class: its gate + confidence + fork-story. Mirrors the LinkRule /
     DocPass registry pattern. Subclasses set `name` + `would_need` and override the hooks."""
@@ -966,10 +1059,25 @@ class FootnoteAssembler:
     ONE PDF class. Registered in PDF_ASSEMBLERS by classification. The base is the generic path: keep
     each page body as-is (per_page); subclasses override the hooks they need."""
 
+    # True when the class has a PAGE-LOCAL step ahead of per_page: page_local(tables, i, md) must be a
+    # pure function of the page index, the page markdown and page_tables(ctx) — it never reads or
+    # writes ctx — so the conductor may run it across a process pool ahead of the ordered merge.
+    # Cross-page state (counters, continuation carries) stays in per_page, which always runs serially.
+    has_page_local = False
+
     def setup(self, ctx):
         """One-time precompute before the page loop (e.g. chapter-offset tables). Default: nothing."""
         pass
 
+    def page_tables(self, ctx):
+        """The document-wide tables page_local reads, fixed once setup has run (broadcast once to
+        every worker). Default: none."""
+        return None
+
+    def page_local(self, tables, i, md):
+        """The page-local transform of one page's markdown, run before per_page. Default: unchanged."""
+        return md
+
     def per_page(self, ctx, i, page, md, md_stripped):
         """Handle one page's footnotes + append to ctx.md_parts. Default: keep the body as-is."""
         if md_stripped:
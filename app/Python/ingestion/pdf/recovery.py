@@ -7,8 +7,6 @@ import argparse
 import base64
 from pathlib import Path
 from statistics import median
-from mistralai.client import Mistral
-from pypdf import PdfReader, PdfWriter
 
 from ingestion.pdf.pdf_shared import *  # noqa: F401,F403
 from ingestion.pdf.pdf_shared import _TOC_ENTRY_TAIL_RE, _DATE_LINE_RE  # underscored — not in import *
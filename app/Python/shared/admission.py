@@ -0,0 +1,325 @@
+"""Resource-aware admission control for concurrent conversions.
+
+Several queue workers share the host, and two large books whose heavy phases overlap can together exceed
+RAM. Before its heavy phase each stage entry point (mistral_ocr's assembly, ocrFetch's oversized-image
+decode, epub_normalizer, process_document) asks for admission: estimate() predicts the phase's peak memory
+and duration from input facts it already knows (pages, text bytes, spine HTML bytes, image pixels, pool
+workers) with the per-stage linear MODELS below. The phase is admitted when its estimate fits in the
+budget beside everything already running; otherwise it waits, first come first served, emitting a
+progress line every so often. A phase alone on the host is always admitted, however big.
+
+The controller needs no daemon: a directory (HYPERLIT_ADMISSION_DIR, default storage/app/admission; "off"
+disables) holds one ticket file per waiting or running phase (pid + process start time, reservation and
+facts), read and written under an fcntl lock. A ticket whose process is gone is swept, so a dead
+conversion never wedges the queue. Budget: HYPERLIT_ADMISSION_BUDGET_MB, default 70% of MemTotal; no
+/proc/meminfo and no override means no budget. A phase that has waited HYPERLIT_ADMISSION_WAIT_S (default
+180s, inside the callers' timeouts) runs anyway.
+
+Calibration: releasing a ticket appends the stage, facts, estimate and the measured peak RSS (the process
+and its pool workers) and duration to <dir>/calibration.jsonl. `python -m shared.admission` compares the
+estimates with what was measured, per stage, to re-fit MODELS.
+"""
+import atexit
+import itertools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+PY_ROOT = Path(__file__).resolve().parents[1]          # app/Python
+_DEFAULT_ROOT = PY_ROOT.parents[1] / "storage" / "app" / "admission"
+CALIBRATION_FILE = "calibration.jsonl"
+DEFAULT_BUDGET_FRACTION = 0.7
+# Per phase, and well inside the callers' limits: the PHP processors give a stage 900s and
+# ProcessDocumentImportJob the whole chain 900s, so a phase that waited longer would be killed as a
+# timeout before it ever ran. A PDF replay passes two gates (assembly, digestion).
+DEFAULT_WAIT_S = 180
+_POLL_S = 1.0
+_NOTIFY_EVERY_S = 30.0
+MB = 1024 * 1024
+_ticket_seq = itertools.count(1)        # ticket names are unique per process, across controllers
+
+# Per stage: peak MB = base + Σ per-unit × fact, seconds likewise. Facts a caller does not pass count as
+# zero. Fitted on synthetic scale-ups of the regression fixtures (a 3MB HTML body peaks at ~255MB in
+# process_document; a 1440-page OCR response at ~97MB in assembly, plus ~35MB per pool worker) and
+# rounded up; calibration.jsonl is what to re-fit them from.
+MODELS = {
+    "pdf_assembly": {"base_mb": 30, "mb": {"text_mb": 26, "workers": 35},
+                     "base_s": 0.5, "s": {"text_mb": 4.0, "pages": 0.002}},
+    "pdf_normalize": {"base_mb": 40, "mb": {"decode_mpx": 2.5},
+                      "base_s": 1.0, "s": {"decode_mpx": 0.02}},
+    "epub_normalize": {"base_mb": 35, "mb": {"html_mb": 75, "workers": 35},
+                       "base_s": 0.5, "s": {"html_mb": 6.0}},
+    "digestion": {"base_mb": 35, "mb": {"html_mb": 75},
+                  "base_s": 0.5, "s": {"html_mb": 9.0}},
+}
+
+
+@dataclass
+class Estimate:
+    stage: str
+    facts: dict
+    peak_bytes: int
+    seconds: float
+
+    def describe(self):
+        return f"{self.stage} ~{self.peak_bytes / MB:.0f}MB / ~{self.seconds:.0f}s"
+
+
+def estimate(stage, **facts):
+    """The predicted peak memory and duration of `stage` for these input facts (MODELS)."""
+    model = MODELS[stage]
+    facts = {k: round(v, 3) if isinstance(v, float) else v for k, v in facts.items() if v is not None}
+    peak_mb = model["base_mb"] + sum(per * facts.get(name, 0) for name, per in model["mb"].items())
+    seconds = model["base_s"] + sum(per * facts.get(name, 0) for name, per in model["s"].items())
+    return Estimate(stage, facts, int(peak_mb * MB), round(seconds, 1))
+
+
+# --- process identity (a ticket outlives its process only until someone notices) -------------------
+def _start_time(pid):
+    """The process's start time in clock ticks (Linux), so a recycled pid is not mistaken for the owner."""
+    try:
+        with open(f"/proc/{pid}/stat", encoding="utf-8") as f:
+            return int(f.read().rsplit(")", 1)[1].split()[19])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _alive(pid, start):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return start is None or _start_time(pid) in (None, start)
+
+
+def _mem_total_bytes():
+    try:
+        with open("/proc/meminfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _peak_rss_bytes():
+    """Peak RSS of this process and of its largest reaped child (the stage's pool workers)."""
+    import resource
+    scale = 1 if sys.platform == "darwin" else 1024           # ru_maxrss: bytes on macOS, KiB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return (own + children) * scale
+
+
+@dataclass
+class Ticket:
+    """One admitted phase. release() (idempotent; also run at interpreter exit) frees its reservation and
+    records the estimate against what the phase actually used."""
+    controller: object = None
+    estimate: Estimate = None
+    path: Path = None
+    waited: float = 0.0
+    admitted_at: float = field(default_factory=time.monotonic)
+    released: bool = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        if self.controller is not None:
+            self.controller._release(self)
+
+
+class AdmissionController:
+    def __init__(self, root, budget_bytes=None, wait_s=DEFAULT_WAIT_S, poll_s=_POLL_S):
+        self.root = Path(root)
+        self.budget = budget_bytes
+        self.wait_s = wait_s
+        self.poll_s = poll_s
+        self._pid = os.getpid()
+        self._start = _start_time(self._pid)
+
+    @classmethod
+    def from_env(cls):
+        """The configured controller, or None when disabled (or without fcntl — nothing to lock with)."""
+        root = os.environ.get("HYPERLIT_ADMISSION_DIR", "")
+        if root.lower() in ("off", "0", "false"):
+            return None
+        try:
+            import fcntl  # noqa: F401
+        except ImportError:
+            return None
+        budget = None
+        raw = os.environ.get("HYPERLIT_ADMISSION_BUDGET_MB", "").strip()
+        if raw:
+            try:
+                budget = int(float(raw) * MB)
+            except ValueError:
+                budget = None
+        if budget is None:
+            total = _mem_total_bytes()
+            budget = int(total * DEFAULT_BUDGET_FRACTION) if total else None
+        try:
+            wait_s = float(os.environ.get("HYPERLIT_ADMISSION_WAIT_S", "") or DEFAULT_WAIT_S)
+        except ValueError:
+            wait_s = DEFAULT_WAIT_S
+        return cls(root or _DEFAULT_ROOT, budget, wait_s)
+
+    # --- the ticket table ---------------------------------------------------------------------------
+    @contextmanager
+    def _locked(self):
+        import fcntl
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / "lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _tickets(self):
+        """Every live ticket (stale ones swept), oldest first. Call under the lock."""
+        live = []
+        for path in self.root.glob("*.ticket"):
+            try:
+                t = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if not _alive(t.get("pid", -1), t.get("start")):
+                path.unlink(missing_ok=True)
+                continue
+            t["path"] = path
+            live.append(t)
+        live.sort(key=lambda t: (t["since"], t["path"].name))
+        return live
+
+    def _write(self, path, state, est, since):
+        ticket = {"pid": self._pid, "start": self._start, "state": state, "since": since,
+                  "stage": est.stage, "reserved": self._reservation(est), "facts": est.facts}
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(ticket), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _budget_label(self):
+        return f"{self.budget / MB:.0f}MB" if self.budget else "no"
+
+    def _reservation(self, est):
+        return est.peak_bytes if self.budget is None else min(est.peak_bytes, self.budget)
+
+    # --- admission ----------------------------------------------------------------------------------
+    def acquire(self, est, log=print, on_wait=None):
+        """Block until `est` fits beside the running phases (and every earlier waiter has gone first);
+        returns its Ticket. This process's own tickets never block it — its phases run one at a time."""
+        path = self.root / f"{self._pid}-{next(_ticket_seq)}.ticket"
+        since = time.time()
+        t0 = time.monotonic()
+        last_note = None
+        queued = False
+        while True:
+            with self._locked():
+                others = [t for t in self._tickets() if t["pid"] != self._pid]
+                running = [t for t in others if t["state"] == "running"]
+                ahead = [t for t in others
+                         if t["state"] == "waiting" and (t["since"], t["path"].name) < (since, path.name)]
+                in_use = sum(t["reserved"] for t in running)
+                fits = not running or self.budget is None or in_use + self._reservation(est) <= self.budget
+                timed_out = time.monotonic() - t0 >= self.wait_s
+                if (fits and not ahead) or timed_out:
+                    self._write(path, "running", est, since)
+                    break
+                if not queued:
+                    self._write(path, "waiting", est, since)
+                    queued = True
+            now = time.monotonic()
+            if on_wait and (last_note is None or now - last_note >= _NOTIFY_EVERY_S):
+                last_note = now
+                on_wait(f"Waiting for memory: {len(running)} conversion(s) running "
+                        f"({in_use / MB:.0f}MB reserved, {self._budget_label()} budget), "
+                        f"{len(ahead)} ahead in the queue")
+            time.sleep(self.poll_s)
+        waited = time.monotonic() - t0
+        if log:
+            note = f"admitted after {waited:.0f}s in the queue" if queued else "admitted"
+            if timed_out and not fits:
+                note = f"still over budget after {waited:.0f}s — running anyway"
+            log(f"Admission: {est.describe()} — {note} ({len(running)} other phase(s) running, "
+                f"{self._budget_label()} budget)")
+        ticket = Ticket(self, est, path, waited)
+        atexit.register(ticket.release)
+        return ticket
+
+    def _release(self, ticket):
+        try:
+            ticket.path.unlink(missing_ok=True)
+        except OSError:
+            pass
+        est = ticket.estimate
+        record = {"stage": est.stage, "facts": est.facts, "ts": round(time.time(), 1),
+                  "est_mb": round(est.peak_bytes / MB, 1), "est_s": est.seconds,
+                  "peak_mb": round(_peak_rss_bytes() / MB, 1),
+                  "seconds": round(time.monotonic() - ticket.admitted_at, 2), "waited_s": round(ticket.waited, 2)}
+        try:
+            # One short line per O_APPEND write: concurrent releases never interleave within a record.
+            with open(self.root / CALIBRATION_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, sort_keys=True) + "\n")
+        except OSError:
+            pass
+
+
+def admit(stage, log=print, on_wait=None, **facts):
+    """Wait for admission of `stage`'s heavy phase (see the module docstring) and return its Ticket —
+    a no-op ticket when admission control is off. Call ticket.release() when the phase is done."""
+    controller = AdmissionController.from_env()
+    if controller is None:
+        return Ticket()
+    try:
+        return controller.acquire(estimate(stage, **facts), log=log, on_wait=on_wait)
+    except OSError as e:      # an unwritable admission dir must never block a conversion
+        if log:
+            log(f"Admission control unavailable ({e}) — running unqueued")
+        return Ticket()
+
+
+def calibration_report(path):
+    """Per stage: runs recorded, and the median measured/estimated ratio for peak memory and duration."""
+    import statistics
+    by_stage = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    r = json.loads(line)
+                except ValueError:
+                    continue
+                by_stage.setdefault(r["stage"], []).append(r)
+    except OSError:
+        return {}
+    report = {}
+    for stage, rows in sorted(by_stage.items()):
+        mem = [r["peak_mb"] / r["est_mb"] for r in rows if r.get("est_mb")]
+        dur = [r["seconds"] / r["est_s"] for r in rows if r.get("est_s")]
+        report[stage] = {"runs": len(rows),
+                         "peak_vs_estimate": round(statistics.median(mem), 2) if mem else None,
+                         "duration_vs_estimate": round(statistics.median(dur), 2) if dur else None,
+                         "max_peak_mb": max(r["peak_mb"] for r in rows)}
+    return report
+
+
+if __name__ == "__main__":
+    controller = AdmissionController.from_env()
+    root = controller.root if controller else Path(os.environ.get("HYPERLIT_ADMISSION_DIR") or _DEFAULT_ROOT)
+    print(json.dumps(calibration_report(root / CALIBRATION_FILE), indent=2))
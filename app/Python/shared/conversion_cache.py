@@ -0,0 +1,238 @@
+"""Whole-pipeline conversion result cache.
+
+Each stage entry point (mistral_ocr → main-text.md, simple_md_to_html → intermediate.html,
+epub_normalizer → main-text.html + footnotes.json, process_document → the final jsonl set) keys its
+outputs by (input content hash, a hash of the stage's app/Python source files, the env flags it reads)
+and restores them on a hit instead of recomputing. The source hashing is the one harvest_dedup uses to
+dedup resources/markdown.
+"""
+import functools
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+PY_ROOT = Path(__file__).resolve().parents[1]          # app/Python
+# Default location: beside the shared OCR cache under the Laravel storage/app tree (git-ignored).
+# HYPERLIT_CONVERSION_CACHE_DIR overrides it; "off" (or "0") disables the cache entirely.
+_DEFAULT_ROOT = PY_ROOT.parents[1] / "storage" / "app" / "conversion-cache"
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+CACHE_VERSION = 1
+_MANIFEST = "manifest.json"
+
+# Per stage: the app/Python source paths whose bytes define its behaviour (a directory means every
+# .py under it; shared/ for every stage that imports its helpers), and every env flag that changes its
+# outputs or the side files it writes. An edit to any listed file changes the stage's code hash, so a
+# stale entry is simply never looked up again — LRU eviction reclaims it.
+# This module is folded into every stage hash (a change to the keying invalidates everything).
+STAGES = {
+    "pdf_assembly": {"code": ("ingestion/pdf", "shared"), "env": ("HYPERLIT_EDIT_JOURNAL",)},
+    "md_to_html": {"code": ("ingestion/markdown_and_pdf_to_html", "shared"), "env": ()},
+    "epub_normalize": {"code": ("ingestion/epub", "shared", "digestion/footnoteLinking"),
+                       "env": ("HYPERLIT_STABLE_IDS", "HYPERLIT_HTML_PARSER")},
+    "digestion": {"code": ("digestion", "shared"),
+                  "env": ("GROBID_URL", "GROBID_ALWAYS", "GROBID_REQUEST_TIMEOUT", "GROBID_TOTAL_DEADLINE",
+                          "HYPERLIT_STABLE_IDS", "HYPERLIT_CHUNKING",
+                          "HYPERLIT_CHUNK_BYTES", "HYPERLIT_STREAM_SECTIONS", "HYPERLIT_STREAM_MIN_BYTES",
+                          "HYPERLIT_HTML_PARSER")},
+}
+
+
+# --- content hashing (shared with tests/conversion/harvest_dedup.py) ------------------------------
+def sha1_file(fp):
+    h = hashlib.sha1()
+    with open(fp, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def sha1_dir(d):
+    h = hashlib.sha1()
+    for root, dirs, files in os.walk(d):
+        dirs.sort()
+        for fn in sorted(files):
+            fp = os.path.join(root, fn)
+            h.update(os.path.relpath(fp, d).encode())
+            try:
+                h.update(sha1_file(fp).encode())
+            except OSError:
+                pass
+    return h.hexdigest()
+
+
+def book_source(book_dir):
+    """(pipeline, source sha1) for a resources/markdown/<book> dir — the harvest_dedup identity of a
+    book's underlying SOURCE (dir names are meaningless: many are the same book re-converted)."""
+    if os.path.isfile(os.path.join(book_dir, 'ocr_response.json')):
+        return 'pdf', sha1_file(os.path.join(book_dir, 'ocr_response.json'))
+    if os.path.isdir(os.path.join(book_dir, 'epub_original')):
+        return 'epub', sha1_dir(os.path.join(book_dir, 'epub_original'))
+    for ext in ('docx', 'doc'):
+        if os.path.isfile(os.path.join(book_dir, f'original.{ext}')):
+            return 'docx', sha1_file(os.path.join(book_dir, f'original.{ext}'))
+    if os.path.isfile(os.path.join(book_dir, 'original.html')):
+        return 'html', sha1_file(os.path.join(book_dir, 'original.html'))
+    if os.path.isfile(os.path.join(book_dir, 'original.md')):
+        return 'md', sha1_file(os.path.join(book_dir, 'original.md'))
+    return None, None
+
+
+def path_digest(path):
+    """sha1 of a file or directory tree; None when absent (absence is itself part of a key)."""
+    path = str(path)
+    if os.path.isdir(path):
+        return sha1_dir(path)
+    if os.path.exists(path):
+        return sha1_file(path)
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def code_digest(stage):
+    """sha1 over the stage's source files (relative path + bytes). Computed once per process."""
+    h = hashlib.sha1(f"v{CACHE_VERSION}".encode())
+    files = [Path(__file__).resolve()]
+    for rel in STAGES[stage]["code"]:
+        p = PY_ROOT / rel
+        files.extend(sorted(p.rglob("*.py")) if p.is_dir() else [p])
+    for fp in files:
+        if "__pycache__" in fp.parts:
+            continue
+        h.update(str(fp.relative_to(PY_ROOT)).encode())
+        try:
+            h.update(fp.read_bytes())
+        except OSError:
+            pass
+    return h.hexdigest()
+
+
+def pipeline_digest():
+    """One hash over every stage's code — what a whole-book result depends on."""
+    return hashlib.sha1("".join(code_digest(s) for s in sorted(STAGES)).encode()).hexdigest()
+
+
+def stage_key(stage, inputs):
+    """Cache key for one stage run: its code hash + the env flags it reads + `inputs` (a JSON-able
+    dict of input digests and the parameters that reach the output, e.g. book_id)."""
+    env = {k: os.environ.get(k, "") for k in STAGES[stage]["env"]}
+    blob = json.dumps({"code": code_digest(stage), "env": env, "inputs": inputs}, sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+class ConversionCache:
+    """A directory of `<stage>/<key[:2]>/<key>/` entries, each holding the stage's output files plus a
+    manifest.json naming them. Hits are COPIED out, never linked: later stages rewrite some outputs in
+    place (process_document re-dumps the assessment.json that mistral_ocr / epub_normalizer seeded),
+    and a hard link would carry that write back into the cache. Recency lives on a `.used` marker in
+    the entry; eviction drops least-recently-used entries once the cache exceeds its byte budget."""
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_env(cls):
+        """The configured cache, or None when disabled."""
+        root = os.environ.get("HYPERLIT_CONVERSION_CACHE_DIR", "")
+        if root.lower() in ("off", "0", "false"):
+            return None
+        max_bytes = os.environ.get("HYPERLIT_CONVERSION_CACHE_MAX_BYTES", "")
+        try:
+            max_bytes = int(max_bytes) if max_bytes else DEFAULT_MAX_BYTES
+        except ValueError:
+            max_bytes = DEFAULT_MAX_BYTES
+        return cls(root or _DEFAULT_ROOT, max_bytes)
+
+    def entry_dir(self, stage, key):
+        return self.root / stage / key[:2] / key
+
+    def fetch(self, stage, key, targets):
+        """On a hit, copy every stored output to its target path and return True. `targets` maps an
+        output name to where it goes; a stored `<name>/...` file lands under targets[name] (how a
+        media/ directory round-trips). Never raises — a cache problem just means a normal run."""
+        entry = self.entry_dir(stage, key)
+        try:
+            manifest = json.loads((entry / _MANIFEST).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+        files = manifest.get("files", [])
+        if any(rel.partition("/")[0] not in targets for rel in files):
+            return False
+        try:
+            for rel in files:
+                name, _, sub = rel.partition("/")
+                dest = Path(targets[name]) / sub if sub else Path(targets[name])
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(entry / rel, dest)
+            self._touch(entry)
+            return True
+        except OSError as e:
+            print(f"Warning: conversion cache hit could not be restored ({e}) — converting instead")
+            return False
+
+    def store(self, stage, key, sources):
+        """Add a stage's outputs (`sources`: name → file or directory; absent paths are skipped, and
+        stay absent on replay) under `key`, then evict down to the byte budget. Best-effort."""
+        entry = self.entry_dir(stage, key)
+        tmp = entry.with_name(f"{entry.name}.{os.getpid()}.{int(time.time() * 1000)}.tmp")
+        try:
+            tmp.mkdir(parents=True)
+            files = []
+            for name, src in sources.items():
+                src = Path(src)
+                if src.is_dir():
+                    for fp in sorted(p for p in src.rglob("*") if p.is_file()):
+                        rel = f"{name}/{fp.relative_to(src).as_posix()}"
+                        (tmp / rel).parent.mkdir(parents=True, exist_ok=True)
+                        shutil.copyfile(fp, tmp / rel)
+                        files.append(rel)
+                elif src.is_file():
+                    shutil.copyfile(src, tmp / name)
+                    files.append(name)
+            (tmp / _MANIFEST).write_text(json.dumps({"stage": stage, "files": files}), encoding="utf-8")
+            if entry.exists():
+                shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp, entry)
+            self._touch(entry)
+        except OSError as e:
+            shutil.rmtree(tmp, ignore_errors=True)
+            print(f"Warning: could not add {stage} outputs to the conversion cache: {e}")
+            return False
+        self.evict()
+        return True
+
+    @staticmethod
+    def _touch(entry):
+        used = entry / ".used"
+        used.touch()
+        os.utime(used, None)
+
+    def _entries(self):
+        out = []
+        if not self.root.is_dir():
+            return out
+        for manifest in self.root.glob(f"*/*/*/{_MANIFEST}"):
+            entry = manifest.parent
+            try:
+                size = sum(p.stat().st_size for p in entry.rglob("*") if p.is_file())
+                used = (entry / ".used").stat().st_mtime
+            except OSError:
+                continue
+            out.append((used, size, entry))
+        return out
+
+    def evict(self):
+        """Drop least-recently-used entries until the cache fits max_bytes. Returns how many."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
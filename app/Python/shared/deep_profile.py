@@ -0,0 +1,208 @@
+"""Opt-in deep profiling bundle for one conversion stage (HYPERLIT_PROFILE=1, or the stage's --profile).
+
+A profiled stage writes what is needed to diagnose a slow import into <output_dir>/profile/:
+
+  • <stage>.pstats — cProfile over the whole stage (`python -m pstats`, snakeviz);
+  • <stage>.collapsed — the stage's stack sampled every HYPERLIT_PROFILE_INTERVAL_MS, one
+    `outer;…;inner count` line per distinct stack (flamegraph.pl / speedscope input);
+  • <stage>.memory.json — per DocPass / transform / phase: wall time, traced and peak bytes, and the
+    source lines whose allocations grew most (tracemalloc);
+  • manifest.json — one section per stage: the input size facts (pages, elements, text bytes) and totals.
+
+Each stage runs in its own process, so the manifest accumulates one section per stage of the import. Off
+(the default), nothing is installed.
+"""
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+PROFILE_DIR = "profile"
+MANIFEST_NAME = "manifest.json"
+DEFAULT_INTERVAL_MS = 5
+_TOP_ALLOCATIONS = 15       # allocation sites kept per step
+_TRACE_FRAMES = 1           # tracemalloc frames per allocation: the allocating line is what ranks
+_MAX_STACK = 96             # sampled frames kept per stack (the innermost ones)
+
+
+def enabled(flag=False):
+    return bool(flag) or os.environ.get("HYPERLIT_PROFILE", "") not in ("", "0")
+
+
+def _interval_s():
+    try:
+        return max(1, int(os.environ.get("HYPERLIT_PROFILE_INTERVAL_MS", "") or DEFAULT_INTERVAL_MS)) / 1000
+    except ValueError:
+        return DEFAULT_INTERVAL_MS / 1000
+
+
+def _frame_label(code):
+    return f"{os.path.splitext(os.path.basename(code.co_filename))[0]}:{code.co_name}"
+
+
+def soup_facts(soup):
+    """Element count + text bytes of a parsed document (the size facts every stage reports)."""
+    if soup is None:
+        return {}
+    return {"elements": len(soup.find_all(True)), "text_bytes": len(soup.get_text().encode("utf-8"))}
+
+
+class _StackSampler(threading.Thread):
+    """Samples one thread's Python stack on a timer into collapsed-stack counts."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name="hyperlit-profile-sampler", daemon=True)
+        self._target_id = thread_id
+        self._interval = interval
+        self._stop_event = threading.Event()
+        self.paused = False                 # set while the profiler itself works (mark / finish)
+        self.counts = {}
+        self.samples = 0
+
+    def run(self):
+        while not self._stop_event.wait(self._interval):
+            if self.paused:
+                continue
+            frame = sys._current_frames().get(self._target_id)
+            stack = []
+            while frame is not None and len(stack) < _MAX_STACK:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                key = ";".join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+                self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class StageProfiler:
+    """cProfile + a stack sampler + tracemalloc over one stage. mark(step) closes a step (a DocPass,
+    an EPUB transform, an inline phase) and diffs the heap against the previous mark; finish() writes
+    the bundle. Works as a context manager, so a stage that crashes still leaves its bundle."""
+
+    def __init__(self, output_dir, stage):
+        self.output_dir = str(output_dir)
+        self.stage = stage
+        self.steps = []
+        self.input_facts = {}
+        self._profile = cProfile.Profile()
+        self._sampler = _StackSampler(threading.get_ident(), _interval_s())
+        self._owns_tracemalloc = False
+        self._started = self._mark_time = None
+        self._snapshot = None
+        self._overhead = 0.0                # seconds spent in mark() — snapshots are not cheap
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.finish()
+        return False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(_TRACE_FRAMES)
+            self._owns_tracemalloc = True
+        self._snapshot = self._take_snapshot()
+        self._started = self._mark_time = time.perf_counter()
+        self._sampler.start()
+        self._profile.enable()
+        return self
+
+    def _take_snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+
+    def facts(self, **facts):
+        """Record input size facts (pages, elements, text_bytes, …) for the manifest."""
+        self.input_facts.update({k: v for k, v in facts.items() if v is not None})
+
+    def mark(self, step):
+        """Close `step`: its wall time, the heap now / at its peak, and its top allocation growth."""
+        self._profile.disable()                          # keep the snapshot out of the cProfile numbers
+        self._sampler.paused = True                      # … and out of the sampled stacks
+        now = time.perf_counter()
+        snapshot = self._take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        growth = [{"site": f"{s.traceback[0].filename}:{s.traceback[0].lineno}",
+                   "size_diff": s.size_diff, "count_diff": s.count_diff, "size": s.size}
+                  for s in snapshot.compare_to(self._snapshot, "lineno")[:_TOP_ALLOCATIONS]
+                  if s.size_diff > 0]
+        self.steps.append({"step": step, "ms": round((now - self._mark_time) * 1000, 3),
+                           "traced_bytes": current, "peak_bytes": peak, "top_allocations": growth})
+        self._snapshot = snapshot
+        tracemalloc.reset_peak()
+        self._mark_time = time.perf_counter()
+        self._overhead += self._mark_time - now
+        self._sampler.paused = False
+        self._profile.enable()
+
+    def finish(self):
+        """Stop everything and write the bundle. Idempotent; never raises into the conversion."""
+        if self._started is None:
+            return
+        self._profile.disable()
+        self._sampler.stop()
+        if time.perf_counter() - self._mark_time > 0.001 or not self.steps:
+            self._profile.enable()
+            self.mark("(rest)")
+            self._profile.disable()
+        total_ms = round((time.perf_counter() - self._started - self._overhead) * 1000, 3)
+        self._started = None
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+        try:
+            self._write(total_ms)
+        except OSError as e:
+            print(f"Warning: could not write the {PROFILE_DIR}/ bundle: {e}")
+
+    def _write(self, total_ms):
+        folder = os.path.join(self.output_dir, PROFILE_DIR)
+        os.makedirs(folder, exist_ok=True)
+        files = {"pstats": f"{self.stage}.pstats", "collapsed": f"{self.stage}.collapsed",
+                 "memory": f"{self.stage}.memory.json"}
+        self._profile.dump_stats(os.path.join(folder, files["pstats"]))
+        with open(os.path.join(folder, files["collapsed"]), "w", encoding="utf-8") as f:
+            for stack, count in sorted(self._sampler.counts.items(), key=lambda kv: -kv[1]):
+                f.write(f"{stack} {count}\n")
+        with open(os.path.join(folder, files["memory"]), "w", encoding="utf-8") as f:
+            json.dump({"stage": self.stage, "steps": self.steps}, f, ensure_ascii=False, indent=2)
+        path = os.path.join(folder, MANIFEST_NAME)
+        manifest = {"stages": {}}
+        try:
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            pass
+        slowest = sorted(self.steps, key=lambda s: s["ms"], reverse=True)[:5]
+        manifest.setdefault("stages", {})[self.stage] = {
+            "input": self.input_facts,
+            "total_ms": total_ms,
+            "profiler_overhead_ms": round(self._overhead * 1000, 3),
+            "peak_traced_bytes": max((s["peak_bytes"] for s in self.steps), default=0),
+            "stack_samples": self._sampler.samples,
+            "sample_interval_ms": round(self._sampler._interval * 1000, 3),
+            "slowest_steps": [{"step": s["step"], "ms": s["ms"]} for s in slowest],
+            "files": files,
+            "python": sys.version.split()[0],
+            "written_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        print(f"Profile ({self.stage}): {len(self.steps)} steps, {self._sampler.samples} stack samples, "
+              f"{total_ms:.0f} ms → {folder}")
+
+
+def profiler_from_env(output_dir, stage, flag=False):
+    """A started StageProfiler for `stage` when profiling is on (HYPERLIT_PROFILE or `flag`), else None."""
+    if not enabled(flag):
+        return None
+    return StageProfiler(output_dir, stage).start()
@@ -0,0 +1,72 @@
+"""The one place the conversion pipeline picks its HTML parser.
+
+Every stage calls parse_html() for a whole document and parse_fragment() for a snippet that is serialised
+back with str() or appended into another soup. The backend is chosen per deployment by
+HYPERLIT_HTML_PARSER: `html.parser` (the default — output unchanged) or `lxml` (libxml2 tokenises under
+BeautifulSoup — about a fifth off a big book's parse). An unknown name, or lxml not installed, falls back
+to html.parser with one warning. The two backends repair broken markup differently, so
+run_regression.py --parser-parity converts every fixture under both and reports where the outputs differ.
+
+lxml builds a full document from any input — a fragment comes back wrapped in <html><body> (head-only tags
+such as <style> hoisted into <head>) — so parse_fragment() unwraps whatever wrapper the markup did not
+itself contain; html.parser never adds one.
+"""
+import os
+import re
+import sys
+import warnings
+
+from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+
+DEFAULT_PARSER = "html.parser"
+PARSERS = ("html.parser", "lxml")
+_WRAPPERS = ("head", "body", "html")
+_warned = set()
+
+
+def _available(name):
+    if name == "lxml":
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            return False
+    return True
+
+
+def parser_backend():
+    """The configured backend name (HYPERLIT_HTML_PARSER), falling back to html.parser."""
+    name = os.environ.get("HYPERLIT_HTML_PARSER", "").strip().lower() or DEFAULT_PARSER
+    if name in PARSERS and _available(name):
+        return name
+    if name not in _warned:
+        _warned.add(name)
+        why = "not installed" if name in PARSERS else f"not one of {', '.join(PARSERS)}"
+        print(f"⚠️ HYPERLIT_HTML_PARSER={name!r} is {why} — using {DEFAULT_PARSER}", file=sys.stderr)
+    return DEFAULT_PARSER
+
+
+def _soup(markup, parser):
+    with warnings.catch_warnings():
+        # EPUB spine documents are XHTML with an <?xml?> declaration; parsing them as HTML is deliberate.
+        warnings.simplefilter("ignore", XMLParsedAsHTMLWarning)
+        return BeautifulSoup(markup, parser)
+
+
+def parse_html(markup, parser=None):
+    """A whole document (a string, bytes or an open file) parsed with the configured backend."""
+    return _soup(markup, parser or parser_backend())
+
+
+def parse_fragment(markup, parser=None):
+    """An HTML snippet parsed with the configured backend, holding exactly the snippet's nodes at top level
+    (as html.parser returns it) — so str() round-trips it and its children can be moved into another soup."""
+    parser = parser or parser_backend()
+    soup = _soup(markup, parser)
+    if parser != "html.parser":
+        text = markup if isinstance(markup, str) else str(markup)
+        for name in _WRAPPERS:
+            if not re.search(rf"<{name}[\s>/]", text, re.I):
+                tag = soup.find(name)
+                if tag is not None:
+                    tag.unwrap()
+    return soup
@@ -0,0 +1,230 @@
+"""Checkpoint / resume for the DocPass pipeline.
+
+With checkpoints on (process_document.py --checkpoint, or HYPERLIT_CHECKPOINT=all / a comma list of pass
+names) the DocContext is saved after each selected pass into <output_dir>/checkpoints/NN-<pass>/: the soup
+as HTML, every other context field pickled with each soup Tag stored as its document-order index (re-bound
+to the re-parsed soup on load, so maps and lists still point INTO the tree), the ASSESSMENT records, and
+the `random` state + id minter (IDS) the footnote ids are drawn from. --resume-from <pass> loads the
+checkpoint written after the pass before it and runs from there, writing what the uninterrupted run wrote.
+"""
+import hashlib
+import os
+import pickle
+import random
+import shutil
+import time
+
+from bs4 import element as _bs4_element
+
+from shared.assessment import ASSESSMENT
+from shared.html_parsing import parse_fragment, parse_html, parser_backend
+from shared.stable_ids import IDS
+
+CHECKPOINT_DIRNAME = "checkpoints"
+CHECKPOINT_VERSION = 1
+_SOUP_NAME = "soup.html"
+_STATE_NAME = "state.pkl"
+
+
+class CheckpointError(Exception):
+    """A checkpoint that cannot be resumed from (missing, another input, or a soup that does not
+    re-parse to the same tree) — the caller should run from the start instead."""
+
+
+def checkpoint_passes(spec, passes):
+    """The pass names to checkpoint after, from a --checkpoint / HYPERLIT_CHECKPOINT spec: '', '0' or
+    None = none, 'all' / '1' = every pass, else a comma list of pass names (or class names)."""
+    spec = (spec or "").strip()
+    if spec in ("", "0"):
+        return set()
+    if spec.lower() in ("1", "all"):
+        return {p.name for p in passes}
+    return {passes[pass_index(passes, name)].name for name in spec.split(",") if name.strip()}
+
+
+def pass_index(passes, name):
+    """Index of the pass called `name` (its DocPass.name or class name)."""
+    name = name.strip()
+    for i, p in enumerate(passes):
+        if name in (p.name, type(p).__name__):
+            return i
+    raise CheckpointError(f"unknown pass {name!r} — one of: {', '.join(p.name for p in passes)}")
+
+
+def _input_digest(ctx):
+    h = hashlib.sha1(str(ctx.book_id).encode())
+    try:
+        with open(ctx.html_file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                h.update(chunk)
+    except OSError:
+        pass
+    return h.hexdigest()
+
+
+def _tag_signature(tags):
+    return hashlib.sha1("\n".join(t.name for t in tags).encode()).hexdigest()
+
+
+def _string_runs(soup):
+    """Where the live tree holds ADJACENT text nodes — the passes split strings with replace_with /
+    insert, and a re-parse merges each run back into one — as [(parent, merged_position, [piece
+    lengths])]; parent is a find_all(True) index, -1 for the soup. The split is observable
+    (get_text(strip=True) strips every piece), so load() re-splits to the exact same nodes."""
+    runs = []
+    for pi, parent in enumerate([soup] + soup.find_all(True), start=-1):
+        pos, run = 0, []
+        for child in parent.contents + [None]:
+            if child is not None and type(child) is _bs4_element.NavigableString:
+                run.append(len(child))
+                continue
+            if run:
+                if len(run) > 1 or not run[0]:
+                    runs.append((pi, pos, run))
+                pos += 1 if sum(run) else 0               # an all-empty run does not survive a re-parse
+                run = []
+            pos += child is not None
+    return runs
+
+
+def _split_runs(soup, runs):
+    parents = [soup] + soup.find_all(True)
+    for pi, pos, lengths in reversed(runs):           # later positions first: earlier ones stay valid
+        parent = parents[pi + 1]
+        if sum(lengths):
+            merged = parent.contents[pos] if pos < len(parent.contents) else None
+            if type(merged) is not _bs4_element.NavigableString or len(merged) != sum(lengths):
+                raise CheckpointError("the saved soup's text runs do not line up with its re-parse")
+            text, at, pieces = str(merged), 0, []
+            for n in lengths:
+                pieces.append(_bs4_element.NavigableString(text[at:at + n]))
+                at += n
+            merged.replace_with(*pieces)
+        else:
+            for k, _n in enumerate(lengths):
+                parent.insert(pos + k, _bs4_element.NavigableString(""))
+
+
+class _ContextPickler(pickle.Pickler):
+    """Pickles context fields with soup nodes stored BY REFERENCE: a Tag in the tree becomes its index
+    in soup.find_all(True) (document order), a detached node becomes its markup. (Pickling the tree
+    itself recurses along next_element and overflows the stack on any real book.)"""
+
+    def __init__(self, f, soup):
+        super().__init__(f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._soup = soup
+        self._index = {id(t): i for i, t in enumerate(soup.find_all(True))} if soup is not None else {}
+
+    def persistent_id(self, obj):
+        if isinstance(obj, _bs4_element.Tag):
+            if obj is self._soup:
+                return ("soup",)
+            i = self._index.get(id(obj))
+            return ("tag", i) if i is not None else ("markup", str(obj))
+        if isinstance(obj, _bs4_element.NavigableString):
+            return ("text", type(obj).__name__, str(obj))
+        return None
+
+
+class _ContextUnpickler(pickle.Unpickler):
+    def __init__(self, f, soup, parser):
+        super().__init__(f)
+        self._soup = soup
+        self._parser = parser
+        self._tags = soup.find_all(True) if soup is not None else []
+
+    def persistent_load(self, pid):
+        kind = pid[0]
+        if kind == "soup":
+            return self._soup
+        if kind == "tag":
+            return self._tags[pid[1]]
+        if kind == "markup":
+            frag = parse_fragment(pid[1], self._parser)
+            return next(iter(frag.find_all(True, recursive=False)), frag)
+        if kind == "text":
+            cls = getattr(_bs4_element, pid[1], _bs4_element.NavigableString)
+            return cls(pid[2])
+        raise pickle.UnpicklingError(f"unknown checkpoint reference {kind!r}")
+
+
+class PassCheckpoints:
+    """The checkpoints/ directory of one output dir: save() after a pass, load() before resuming."""
+
+    def __init__(self, output_dir, passes):
+        self.root = os.path.join(str(output_dir), CHECKPOINT_DIRNAME)
+        self.passes = passes
+
+    def path(self, index):
+        return os.path.join(self.root, f"{index:02d}-{self.passes[index].name}")
+
+    def save(self, ctx, index):
+        """Checkpoint ctx as it stands after passes[index]. Best-effort: a failure only warns."""
+        dest = self.path(index)
+        tmp = f"{dest}.{os.getpid()}.tmp"
+        started = time.perf_counter()
+        try:
+            os.makedirs(tmp, exist_ok=True)
+            soup = ctx.soup
+            fields = {k: v for k, v in vars(ctx).items() if k != "soup"}
+            header = {"version": CHECKPOINT_VERSION, "pass": self.passes[index].name, "index": index,
+                      "input": _input_digest(ctx), "has_soup": soup is not None}
+            if soup is not None:
+                tags = soup.find_all(True)
+                # The backend that built the soup re-parses it (html.parser and lxml repair markup differently).
+                header.update(tag_count=len(tags), tag_signature=_tag_signature(tags),
+                              string_runs=_string_runs(soup),
+                              parser=getattr(soup.builder, "NAME", None) or parser_backend())
+                with open(os.path.join(tmp, _SOUP_NAME), "w", encoding="utf-8") as f:
+                    f.write(str(soup))
+            with open(os.path.join(tmp, _STATE_NAME), "wb") as f:
+                pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+                _ContextPickler(f, soup).dump({"fields": fields, "assessment": ASSESSMENT.records,
+                                               "random": random.getstate(), "ids": vars(IDS)})
+            shutil.rmtree(dest, ignore_errors=True)
+            os.replace(tmp, dest)
+            print(f"  ⏺ checkpoint after {self.passes[index].name} "
+                  f"({time.perf_counter() - started:.2f}s) → {dest}")
+        except (OSError, pickle.PicklingError, TypeError, AttributeError) as e:
+            shutil.rmtree(tmp, ignore_errors=True)
+            print(f"Warning: could not checkpoint after {self.passes[index].name}: {e}")
+
+    def load(self, ctx, resume_from):
+        """Restore ctx (and ASSESSMENT, random, IDS) from the checkpoint written after the pass BEFORE
+        `resume_from`; returns the index of the first pass to run. Raises CheckpointError."""
+        start = pass_index(self.passes, resume_from)
+        if start == 0:
+            return 0                                          # resuming from the first pass = a full run
+        src = self.path(start - 1)
+        try:
+            with open(os.path.join(src, _STATE_NAME), "rb") as f:
+                header = pickle.load(f)
+                if header.get("version") != CHECKPOINT_VERSION:
+                    raise CheckpointError(f"checkpoint {src} is from another checkpoint format")
+                if header.get("input") != _input_digest(ctx):
+                    raise CheckpointError(f"checkpoint {src} was taken from a different HTML input / book_id")
+                soup = None
+                if header.get("has_soup"):
+                    with open(os.path.join(src, _SOUP_NAME), encoding="utf-8") as sf:
+                        soup = parse_html(sf.read(), header.get("parser", "html.parser"))
+                    tags = soup.find_all(True)
+                    if (len(tags) != header.get("tag_count")
+                            or _tag_signature(tags) != header.get("tag_signature")):
+                        raise CheckpointError(f"checkpoint {src}: the saved soup does not re-parse to the same tree")
+                    _split_runs(soup, header.get("string_runs", []))
+                state = _ContextUnpickler(f, soup, header.get("parser", "html.parser")).load()
+        except FileNotFoundError:
+            raise CheckpointError(f"no checkpoint after {self.passes[start - 1].name} in {self.root} "
+                                  f"— run once with --checkpoint first")
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, IndexError, ValueError) as e:
+            raise CheckpointError(f"checkpoint {src} is unreadable: {e}")
+        for k, v in state["fields"].items():
+            if k not in ("html_file_path", "output_dir"):     # the CURRENT run's paths win
+                setattr(ctx, k, v)
+        ctx.soup = soup
+        ASSESSMENT.records = state["assessment"]
+        random.setstate(state["random"])
+        vars(IDS).update(state.get("ids", {}))
+        print(f"  ⏵ resumed from checkpoint after {self.passes[start - 1].name} — "
+              f"running {', '.join(p.name for p in self.passes[start:])}")
+        return start
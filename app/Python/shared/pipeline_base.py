@@ -31,9 +31,13 @@ class DocPass(ABC):
         ...
 
 
-def run_passes(passes, ctx):
+def run_passes(passes, ctx, start=0, after_pass=None):
     """Apply each pass in order against the shared `ctx` (mirrors the LinkRule/TRANSFORM_PIPELINE
-    loop). Returns the context so callers can read the accumulated result."""
-    for p in passes:
-        p.apply(ctx)
+    loop). Returns the context so callers can read the accumulated result. `start` skips the passes
+    before it (a resume from a checkpointed context); `after_pass(ctx, index)` runs after each pass
+    (how process_document checkpoints)."""
+    for i in range(start, len(passes)):
+        passes[i].apply(ctx)
+        if after_pass is not None:
+            after_pass(ctx, i)
     return ctx
@@ -0,0 +1,256 @@
+"""Opt-in regex hot-spot profiler for the PDF / markdown normalisation layer.
+
+The PDF and markdown stages (pdf_shared, assembly, ocrFetch, recovery, simple_md_to_html) run hundreds of
+regex passes over page and document markdown. With HYPERLIT_REGEX_PROFILE=1 a stage entry point swaps each
+listed module's compiled patterns AND its `re` binding (so inline `re.sub(r'...')` literals are caught too)
+for timing proxies, then writes a ranked regex_profile.json next to conversion_stats.json: call count,
+total time, bytes scanned and the largest single input per pattern. Off (the default), nothing is wrapped.
+"""
+import json
+import os
+import re as _re
+import sys
+import threading
+import time
+
+PROFILE_NAME = "regex_profile.json"
+_TOP_N = 60                 # patterns kept per stage in the report (ranked by total time)
+_MAX_SITES = 5              # call sites remembered per pattern
+_TIMED = ("match", "fullmatch", "search", "sub", "subn", "findall", "split")
+
+
+def enabled():
+    return os.environ.get("HYPERLIT_REGEX_PROFILE", "") not in ("", "0")
+
+
+class _Stat:
+    __slots__ = ("pattern", "flags", "calls", "seconds", "bytes", "max_input", "max_call_s", "sites")
+
+    def __init__(self, pattern, flags):
+        self.pattern, self.flags = pattern, flags
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.max_input = 0
+        self.max_call_s = 0.0
+        self.sites = []
+
+    def as_dict(self):
+        return {"pattern": self.pattern[:200], "flags": self.flags, "calls": self.calls,
+                "total_ms": round(self.seconds * 1000, 3), "bytes_scanned": self.bytes,
+                "max_input_chars": self.max_input, "worst_call_ms": round(self.max_call_s * 1000, 3),
+                # bytes/ms falls off a cliff on a backtracking pattern; a healthy one stays roughly flat
+                "chars_per_ms": round(self.bytes / (self.seconds * 1000), 1) if self.seconds else None,
+                "sites": self.sites}
+
+
+class RegexProfiler:
+    """Collects per-pattern timings for the modules it is installed on. install() rebinds; uninstall()
+    restores every original binding, so a profiled run leaves the modules exactly as it found them."""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._undo = []
+
+    # --- recording ------------------------------------------------------------------------------
+    def record(self, pattern, flags, text, seconds):
+        key = (pattern, flags)
+        size = len(text) if isinstance(text, (str, bytes)) else 0
+        site = None
+        frame = sys._getframe(2)
+        # Walk out of this module (the proxy layers) to the conversion code that made the call.
+        while frame is not None and frame.f_globals.get("__name__") == __name__:
+            frame = frame.f_back
+        if frame is not None:
+            g = frame.f_globals
+            mod = g.get("__name__", "?")
+            if mod == "__main__" and g.get("__spec__") is not None:
+                mod = g["__spec__"].name          # an entry point run via its compatibility shim
+            site = f"{mod}:{frame.f_code.co_name}:{frame.f_lineno}"
+        with self._lock:
+            st = self._stats.get(key)
+            if st is None:
+                st = self._stats[key] = _Stat(pattern, flags)
+            st.calls += 1
+            st.seconds += seconds
+            st.bytes += size
+            st.max_input = max(st.max_input, size)
+            st.max_call_s = max(st.max_call_s, seconds)
+            if site and site not in st.sites and len(st.sites) < _MAX_SITES:
+                st.sites.append(site)
+
+    def ranked(self, top=_TOP_N):
+        with self._lock:
+            stats = sorted(self._stats.values(), key=lambda s: s.seconds, reverse=True)
+        return [s.as_dict() for s in stats[:top]]
+
+    # --- installation ---------------------------------------------------------------------------
+    def install(self, modules):
+        """Wrap each module's `re` binding and its module-level compiled patterns (bare, or one level
+        inside a module-level list / tuple / dict). A module may also be given as its globals() dict
+        (how an entry point running as __main__ profiles itself)."""
+        proxy_re = _ProfiledRe(self)
+        for mod in modules:
+            ns = mod if isinstance(mod, dict) else vars(mod)
+            for name, value in list(ns.items()):
+                wrapped = self._wrap_value(value, proxy_re)
+                if wrapped is not value:
+                    self._undo.append((ns, name, value))
+                    ns[name] = wrapped
+        return self
+
+    def _wrap_value(self, value, proxy_re):
+        if value is _re:
+            return proxy_re
+        if isinstance(value, _re.Pattern):
+            return _ProfiledPattern(value, self)
+        if isinstance(value, tuple) and any(isinstance(v, _re.Pattern) for v in value):
+            return tuple(_ProfiledPattern(v, self) if isinstance(v, _re.Pattern) else v for v in value)
+        if isinstance(value, list) and any(isinstance(v, _re.Pattern) for v in value):
+            originals = list(value)
+            value[:] = [_ProfiledPattern(v, self) if isinstance(v, _re.Pattern) else v for v in value]
+            self._undo.append((value, slice(None), originals))
+        elif isinstance(value, dict) and any(isinstance(v, _re.Pattern) for v in value.values()):
+            for k, v in list(value.items()):
+                if isinstance(v, _re.Pattern):
+                    self._undo.append((value, k, v))
+                    value[k] = _ProfiledPattern(v, self)
+        return value
+
+    def uninstall(self):
+        for container, key, original in reversed(self._undo):
+            container[key] = original
+        self._undo = []
+
+    # --- report ---------------------------------------------------------------------------------
+    def dump(self, output_dir, stage):
+        """Write (merge) this stage's ranked section into output_dir/regex_profile.json. Each stage
+        runs in its own process, so the file accumulates one section per stage of the import."""
+        path = os.path.join(str(output_dir), PROFILE_NAME)
+        report = {"stages": {}}
+        try:
+            with open(path, encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            pass
+        ranked = self.ranked()
+        report.setdefault("stages", {})[stage] = {
+            "patterns_seen": len(self._stats),
+            "total_ms": round(sum(s.seconds for s in self._stats.values()) * 1000, 3),
+            "ranked": ranked,
+        }
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"Regex profile ({stage}): {len(self._stats)} patterns → {path}")
+        except OSError as e:
+            print(f"Warning: could not write {PROFILE_NAME}: {e}")
+
+
+class _TimedIter:
+    """finditer is lazy — the scan happens as the caller iterates, so that's where the clock runs."""
+
+    def __init__(self, it, profiler, pattern, flags, text):
+        self._it, self._profiler = it, profiler
+        self._pattern, self._flags, self._text = pattern, flags, text
+        self._seconds = 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        t0 = time.perf_counter()
+        try:
+            item = next(self._it)
+        except StopIteration:
+            self._seconds += time.perf_counter() - t0
+            self._profiler.record(self._pattern, self._flags, self._text, self._seconds)
+            raise
+        self._seconds += time.perf_counter() - t0
+        return item
+
+
+class _ProfiledPattern:
+    """Stands in for a compiled pattern; every scanning method is timed, everything else delegates."""
+
+    def __init__(self, compiled, profiler):
+        self._compiled = compiled
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        attr = getattr(self._compiled, name)
+        if name in _TIMED:
+            # sub/subn scan their SECOND argument (the first is the replacement)
+            return _timed(attr, self._profiler, self._compiled.pattern, self._compiled.flags,
+                          text_arg=1 if name in ("sub", "subn") else 0)
+        if name == "finditer":
+            def finditer(string, *args, **kwargs):
+                return _TimedIter(attr(string, *args, **kwargs), self._profiler,
+                                  self._compiled.pattern, self._compiled.flags, string)
+            return finditer
+        return attr
+
+    def __repr__(self):
+        return repr(self._compiled)
+
+
+def _timed(fn, profiler, pattern, flags, text_arg=0):
+    def call(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            text = args[text_arg] if len(args) > text_arg else kwargs.get("string")
+            profiler.record(pattern, flags, text, time.perf_counter() - t0)
+    return call
+
+
+def _unwrap(pattern):
+    return pattern._compiled if isinstance(pattern, _ProfiledPattern) else pattern
+
+
+class _ProfiledRe:
+    """Stands in for the `re` module inside a profiled module: the module-level functions are timed
+    (keyed by the pattern string), compile() hands back a profiled pattern, and everything else
+    (flags, escape, error, Match…) is the real module's."""
+
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(_re, name)
+
+    def compile(self, pattern, flags=0):
+        return _ProfiledPattern(_re.compile(_unwrap(pattern), flags), self._profiler)
+
+    def match(self, pattern, string, flags=0):
+        return self.compile(pattern, flags).match(string)
+
+    def fullmatch(self, pattern, string, flags=0):
+        return self.compile(pattern, flags).fullmatch(string)
+
+    def search(self, pattern, string, flags=0):
+        return self.compile(pattern, flags).search(string)
+
+    def findall(self, pattern, string, flags=0):
+        return self.compile(pattern, flags).findall(string)
+
+    def finditer(self, pattern, string, flags=0):
+        return self.compile(pattern, flags).finditer(string)
+
+    def split(self, pattern, string, maxsplit=0, flags=0):
+        return self.compile(pattern, flags).split(string, maxsplit)
+
+    def sub(self, pattern, repl, string, count=0, flags=0):
+        return self.compile(pattern, flags).sub(repl, string, count)
+
+    def subn(self, pattern, repl, string, count=0, flags=0):
+        return self.compile(pattern, flags).subn(repl, string, count)
+
+
+def install_from_env(modules):
+    """A RegexProfiler installed on `modules` when HYPERLIT_REGEX_PROFILE is set, else None."""
+    if not enabled():
+        return None
+    return RegexProfiler().install(modules)
@@ -0,0 +1,79 @@
+"""Deterministic, content-derived footnote ids and node keys (opt-in, HYPERLIT_STABLE_IDS=1).
+
+By default footnote ids are Fn<ms timestamp>_<random> and node keys are positional ({book_id}_{n}), so two
+conversions of the same book share no ids. With stable ids on, each id is a hash of the book id, the
+item's structural position (section prefix / enclosing heading) and its content, plus an occurrence
+ordinal for identical twins: the same input mints the same ids on every run, and an edit elsewhere in the
+book leaves an item's id alone. Footnote ids keep the Fn<digits>_<suffix> shape the reader, the sub-book
+trigger and the link handlers match on ((^|_)Fn\\d).
+"""
+import hashlib
+import os
+import random
+import re
+import string
+import time
+
+_ALPHABET = string.ascii_lowercase + string.digits
+_WS = re.compile(r"\s+")
+
+
+def stable_ids_enabled():
+    return os.environ.get("HYPERLIT_STABLE_IDS", "") not in ("", "0")
+
+
+class IdMinter:
+    """The id source every mint site draws from. One process-wide instance (IDS), reset per document
+    like ASSESSMENT — the footnote extractors are plain functions of (soup, book_id) with no context
+    to carry a per-run registry. `seen` counts each (namespace, position, content) so duplicates get
+    distinct, still-deterministic ids."""
+
+    def __init__(self):
+        self.reset("")
+
+    def reset(self, book_id, enabled=None):
+        self.book_id = str(book_id or "")
+        self.enabled = stable_ids_enabled() if enabled is None else bool(enabled)
+        self.seen = {}
+        self.clock_ms = int(time.time() * 1000)
+
+    def _stamp(self):
+        """The legacy ids' ms timestamp: the document's start time, advanced by one per mint. The
+        sequence is minter state, so a run resumed from a checkpoint (which restores it along with
+        `random`) mints exactly the ids the uninterrupted run did."""
+        stamp = self.clock_ms
+        self.clock_ms += 1
+        return stamp
+
+    def _digest(self, namespace, parts):
+        base = "\x1f".join([namespace] + [_WS.sub(" ", str(p)).strip() for p in parts])
+        n = self.seen.get(base, 0)
+        self.seen[base] = n + 1
+        return hashlib.sha1(f"{self.book_id}\x1e{base}\x1e{n}".encode("utf-8")).digest()
+
+    def footnote_id(self, *parts, prefix="", suffix_len=4):
+        """A footnote id: `{prefix}Fn<13 digits>_<suffix>`. `parts` (marker, content, …) only matter
+        in stable mode; otherwise this is the legacy timestamp + random mint."""
+        if not self.enabled:
+            return f"{prefix}Fn{self._stamp()}_{''.join(random.choices(_ALPHABET, k=suffix_len))}"
+        h = self._digest("fn:" + prefix, parts)
+        digits = int.from_bytes(h[:8], "big") % 10 ** 13       # the width of a ms timestamp
+        suffix = "".join(_ALPHABET[b % len(_ALPHABET)] for b in h[8:8 + suffix_len])
+        return f"{prefix}Fn{digits:013d}_{suffix}"
+
+    def node_key(self, book_id, position, section, content):
+        """A node's `id`: positional `{book_id}_{position}` by default, else `{book_id}_n<hash of the
+        enclosing section heading + the node's own markup>`."""
+        if not self.enabled:
+            return f"{book_id}_{position}"
+        return f"{book_id}_n{self._digest('node:' + section, [content]).hex()[:16]}"
+
+    def row_node_id(self, book_id, node_key):
+        """The database node_id for a node row: the importer's `{book}_{ms}_{9 distinct chars}`
+        (FileHelpers::generateNodeId) by default, the stable node key itself in stable mode."""
+        if self.enabled and node_key:
+            return node_key
+        return f"{book_id}_{self._stamp()}_{''.join(random.sample(_ALPHABET, 9))}"
+
+
+IDS = IdMinter()
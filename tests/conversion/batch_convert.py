@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Bulk-convert a list of books on a pool of worker processes — re-converting the library after a
+pipeline fix, an auto-version sweep, a corpus harvest — through the SAME per-pathway stage chains
+classify_book.py runs (pathway = classify_book.detect_pipeline; PDFs replay their cached
+ocr_response.json, so no network).
+
+  python3 tests/conversion/batch_convert.py books.txt --out /tmp/reconvert
+  python3 tests/conversion/batch_convert.py --all --out /tmp/reconvert --workers 8
+  python3 tests/conversion/batch_convert.py books.txt --out /tmp/reconvert       # again: resumes
+
+The manifest lists one book per line — a book dir, or a resources/markdown/ book id (blank lines and
+# comments ignored); --all takes every dir under resources/markdown/. Each book's outputs land in
+<out>/<book>/ (never in the book dir itself).
+
+Limits, per book: --timeout bounds its wall clock (each stage subprocess gets the time the book has
+left); --memory-mb caps the data segment of every stage subprocess (RLIMIT_DATA, set as it starts —
+not RLIMIT_AS, which pandoc's runtime exhausts by reserving address space at startup). A
+book over either limit is recorded as `timeout` / `memory` and the batch moves on. The stages' own
+pools (HYPERLIT_ASSEMBLY_WORKERS, HYPERLIT_EPUB_LOAD_WORKERS) default to serial here unless set, so N
+workers mean N busy cores, not N×4. Each stage still takes an admission ticket (shared/admission.py), so
+workers whose books would not fit in memory together queue rather than all start.
+
+Resume: <out>/batch_status.json is rewritten after every book with its outcome, timing and
+conversion key (source + every stage's code, harvest_dedup.conversion_key). A re-run skips a book
+already `ok` under the same key — an interrupted batch picks up where it stopped — and re-does
+everything else; --force re-does all. <out>/batch_summary.md tabulates outcomes and timings per
+pathway over the whole manifest, reused results included.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import classify_book as cb      # noqa: E402
+import harvest_dedup as hd      # noqa: E402
+import run_regression as rr     # noqa: E402
+
+from shared.conversion_cache import book_source  # noqa: E402  (app/Python on path via harvest_dedup)
+
+MARKDOWN_DIR = hd.MARKDOWN_DIR
+STATUS_FILE = 'batch_status.json'
+SUMMARY_FILE = 'batch_summary.md'
+OUTCOMES = ('ok', 'failed', 'timeout', 'memory', 'skipped', 'crashed')
+# Stage-internal pools that would multiply the batch's own parallelism.
+_INNER_POOL_ENVS = ('HYPERLIT_ASSEMBLY_WORKERS', 'HYPERLIT_EPUB_LOAD_WORKERS')
+
+
+def read_manifest(path):
+    """Book dirs from a manifest file: one per line, a path or a resources/markdown/ book id."""
+    books = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            entry = line.split('#', 1)[0].strip()
+            if not entry:
+                continue
+            books.append(entry if os.path.isdir(entry) else os.path.join(MARKDOWN_DIR, entry))
+    return books
+
+
+def all_books():
+    if not os.path.isdir(MARKDOWN_DIR):
+        return []
+    return [os.path.join(MARKDOWN_DIR, d) for d in sorted(os.listdir(MARKDOWN_DIR))
+            if os.path.isdir(os.path.join(MARKDOWN_DIR, d))]
+
+
+def _source_bytes(book_dir):
+    total = 0
+    for root, _dirs, files in os.walk(book_dir):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _memory_cap(memory_mb):
+    """A subprocess preexec_fn capping the stage's data segment, or None for no cap."""
+    if not memory_mb:
+        return None
+    import resource
+    limit = memory_mb * 1024 * 1024
+    return lambda: resource.setrlimit(resource.RLIMIT_DATA, (limit, limit))
+
+
+def _outcome(err):
+    if err is None:
+        return 'ok'
+    if err.startswith('skipped:'):
+        return 'skipped'
+    if 'MemoryError' in err or 'Cannot allocate memory' in err or 'out of memory' in err:
+        return 'memory'
+    return 'failed'
+
+
+def convert_book(task):
+    """Convert one book into task['out_dir'] (pool worker). Returns its status record."""
+    book, book_dir, out_dir = task['book'], task['book_dir'], task['out_dir']
+    pipeline = cb.detect_pipeline(book_dir)
+    record = {'book': book, 'book_dir': book_dir, 'pipeline': pipeline, 'key': task['key'],
+              'status': 'skipped', 'error': None, 'seconds': 0.0}
+    if not pipeline:
+        record['error'] = 'no recognised source input'
+        return record
+
+    deadline = time.monotonic() + task['timeout']
+    cap = _memory_cap(task['memory_mb'])
+
+    def run(cmd, timeout=None):
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise subprocess.TimeoutExpired(cmd, task['timeout'])
+        return rr._run(cmd, left if timeout is None else min(timeout, left),
+                       conversion_cache=task['cache'], preexec_fn=cap, admission=True)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.makedirs(out_dir)
+    start = time.monotonic()
+    try:
+        err = cb._run_chain(pipeline, book_dir, out_dir, book, run=run)
+    except subprocess.TimeoutExpired:
+        err = f'timeout after {task["timeout"]:g}s'
+        record['status'] = 'timeout'
+    else:
+        record['status'] = _outcome(err)
+    record['error'] = err
+    record['seconds'] = round(time.monotonic() - start, 2)
+    return record
+
+
+def _load_status(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f).get('books', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_status(path, books):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'books': books}, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def summary_table(records):
+    """Markdown: outcomes and timings per pathway, then the slowest books and every failure."""
+    by_pipe = {}
+    for r in records:
+        by_pipe.setdefault(r.get('pipeline') or '-', []).append(r)
+    head = ['pathway', 'books', *OUTCOMES, 'total s', 'median s', 'max s']
+    lines = ['| ' + ' | '.join(head) + ' |', '|' + '---|' * len(head)]
+    for pipe in sorted(by_pipe) + ['all']:
+        rows = records if pipe == 'all' else by_pipe[pipe]
+        secs = [r['seconds'] for r in rows if r['status'] != 'skipped'] or [0.0]
+        counts = [sum(r['status'] == o for r in rows) for o in OUTCOMES]
+        lines.append('| ' + ' | '.join([pipe, str(len(rows)), *map(str, counts), f'{sum(secs):.1f}',
+                                        f'{statistics.median(secs):.1f}', f'{max(secs):.1f}']) + ' |')
+    slowest = sorted((r for r in records if r['status'] != 'skipped'), key=lambda r: -r['seconds'])[:10]
+    lines += ['', '**Slowest**', ''] + [f'- {r["seconds"]:.1f}s {r["pipeline"]} {r["book"]} ({r["status"]})'
+                                        for r in slowest]
+    bad = [r for r in records if r['status'] not in ('ok', 'skipped')]
+    if bad:
+        lines += ['', f'**Not converted ({len(bad)})**', '']
+        lines += [f'- {r["status"]} {r["pipeline"] or "-"} {r["book"]}: {(r["error"] or "")[:160]}' for r in bad]
+    return '\n'.join(lines) + '\n'
+
+
+def run_batch(book_dirs, out_dir, workers=4, timeout=1800, memory_mb=4096, cache=True, force=False, log=print):
+    """Convert every book in `book_dirs` into `out_dir`/<book>/; returns the status record of each book
+    (in manifest order), including those reused from an earlier run of the same batch."""
+    out_dir = os.path.abspath(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    status_path = os.path.join(out_dir, STATUS_FILE)
+    status = {} if force else _load_status(status_path)
+    for name in _INNER_POOL_ENVS:
+        os.environ.setdefault(name, '1')      # inherited by the workers and every stage subprocess
+
+    tasks, order, reused = [], [], 0
+    for book_dir in book_dirs:
+        book_dir = os.path.abspath(book_dir)
+        book = os.path.basename(os.path.normpath(book_dir))
+        if book in order:
+            log(f'  ! {book} is listed twice — converting the first only')
+            continue
+        order.append(book)
+        if os.path.join(out_dir, book) == book_dir:
+            status[book] = {'book': book, 'book_dir': book_dir, 'pipeline': None, 'key': None,
+                            'status': 'skipped', 'error': '--out would overwrite the book dir', 'seconds': 0.0}
+            continue
+        pipe, source_hash = book_source(book_dir) if os.path.isdir(book_dir) else (None, None)
+        key = hd.conversion_key(pipe, source_hash) if pipe else None
+        prev = status.get(book)
+        if prev and prev.get('status') == 'ok' and key and prev.get('key') == key:
+            reused += 1
+            continue
+        tasks.append({'book': book, 'book_dir': book_dir, 'out_dir': os.path.join(out_dir, book), 'key': key,
+                      'timeout': timeout, 'memory_mb': memory_mb, 'cache': cache})
+
+    # Longest first (by source size): a big book started last would otherwise run alone at the end.
+    tasks.sort(key=lambda t: -_source_bytes(t['book_dir']))
+    log(f'== {len(order)} books: {len(tasks)} to convert, {reused} unchanged since the last run; '
+        f'{workers} workers ==')
+
+    done = 0
+    if tasks:
+        with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(convert_book, t): t for t in tasks}
+            for fut in as_completed(futures):
+                t = futures[fut]
+                try:
+                    record = fut.result()
+                except Exception as e:  # noqa: BLE001 — one book's failure never stops the batch
+                    # A worker died outright (the OOM killer, a signal — BrokenProcessPool fails every book
+                    # still queued on the pool with it) or raised. Recorded, not retried: a re-run picks
+                    # them up.
+                    record = {'book': t['book'], 'book_dir': t['book_dir'],
+                              'pipeline': cb.detect_pipeline(t['book_dir']), 'key': t['key'],
+                              'status': 'crashed', 'error': f'{type(e).__name__}: {e}', 'seconds': 0.0}
+                status[record['book']] = record
+                _save_status(status_path, status)
+                done += 1
+                log(f'  [{done:>4}/{len(tasks)}] {record["pipeline"] or "-":<5} {record["book"][:40]:<40} '
+                    f'-> {record["status"]} ({record["seconds"]:.1f}s)'
+                    + (f'  {record["error"][:60]}' if record['status'] != 'ok' and record['error'] else ''))
+    _save_status(status_path, status)
+
+    records = [status[b] for b in order if b in status]
+    table = summary_table(records)
+    with open(os.path.join(out_dir, SUMMARY_FILE), 'w', encoding='utf-8') as f:
+        f.write(table)
+    log('\n' + table)
+    return records
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Convert many books on a process pool (resumable)')
+    ap.add_argument('manifest', nargs='?', help='file listing book dirs / resources/markdown book ids')
+    ap.add_argument('--all', action='store_true', help='every book under resources/markdown/')
+    ap.add_argument('--out', required=True, help='output root: <out>/<book>/ + batch_status.json + batch_summary.md')
+    ap.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+    ap.add_argument('--timeout', type=float, default=1800, help='per-book wall-clock limit, seconds')
+    ap.add_argument('--memory-mb', type=int, default=4096, help='per-stage data-segment cap in MB (0 = none)')
+    ap.add_argument('--no-cache', action='store_true', help='bypass the conversion cache (re-run every stage)')
+    ap.add_argument('--force', action='store_true', help='ignore the status file: re-convert every book')
+    args = ap.parse_args()
+    if bool(args.manifest) == args.all:
+        ap.error('give a manifest file or --all (not both)')
+    books = all_books() if args.all else read_manifest(args.manifest)
+    records = run_batch(books, args.out, workers=args.workers, timeout=args.timeout, memory_mb=args.memory_mb,
+                        cache=not args.no_cache, force=args.force)
+    sys.exit(0 if all(r['status'] in ('ok', 'skipped') for r in records) else 1)
+
+
+if __name__ == '__main__':
+    main()
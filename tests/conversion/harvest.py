@@ -10,6 +10,7 @@ conversions as candidate new pathways / bugs.
   python3 tests/conversion/harvest.py
   python3 tests/conversion/harvest.py --dry-run        # classify + report, write nothing
   python3 tests/conversion/harvest.py --capture-faulty # also capture faulty (locks current output)
+  python3 tests/conversion/harvest.py --no-memo        # re-classify books unchanged since the last sweep
 
 No LLM, no network (PDF replays cached ocr_response.json). Captured fixtures are
 verified by re-running the suite on them; a fixture that can't pass is rolled back.
@@ -36,6 +37,36 @@ import run_regression as rr     # noqa: E402
 FIXTURES_DIR = rr.FIXTURES_DIR
 MARKDOWN_DIR = hd.MARKDOWN_DIR
 
+from shared.conversion_cache import ConversionCache  # noqa: E402  (app/Python on path via harvest_dedup)
+
+
+def _memo_path(key):
+    """Where a book's classification is remembered, by its harvest_dedup conversion key (source +
+    every stage's code). None when the conversion cache is disabled."""
+    cache = ConversionCache.from_env()
+    return os.path.join(str(cache.root), 'harvest', f'{key}.json') if cache and key else None
+
+
+def classify_memoized(book_dir, key, use_memo=True):
+    """cb.classify(), skipped for a book already classified under the same key — neither its
+    source nor any conversion code changed since, so the result cannot have either."""
+    memo = _memo_path(key) if use_memo else None
+    if memo and os.path.isfile(memo):
+        try:
+            with open(memo, encoding='utf-8') as f:
+                return json.load(f), True
+        except (OSError, ValueError):
+            pass
+    c = cb.classify(book_dir)
+    if memo and c.get('ok'):
+        try:
+            os.makedirs(os.path.dirname(memo), exist_ok=True)
+            with open(memo, 'w', encoding='utf-8') as f:
+                json.dump(c, f)
+        except OSError:
+            pass
+    return c, False
+
 DET_SLUG = {
     'AnchorHeadingFootnoteDetector': 'anchor_heading', 'EnoteFootnoteDetector': 'enote',
     'Epub3SemanticFootnoteDetector': 'epub3_semantic', 'AriaRoleFootnoteDetector': 'aria_role',
@@ -148,7 +179,7 @@ def capture(c, book_dir, slug):
         return 'error', f'{slug}/{case_name}: {e}'
 
 
-def harvest_corpus(dry_run=False, capture_faulty=False):
+def harvest_corpus(dry_run=False, capture_faulty=False, use_memo=True):
     payload = json.loads(subprocess.run([sys.executable, os.path.join(rr.SCRIPT_DIR, 'harvest_dedup.py')],
                                          capture_output=True, text=True).stdout)
     books = payload['books']
@@ -157,12 +188,15 @@ def harvest_corpus(dry_run=False, capture_faulty=False):
 
     best = {}      # slug -> classification (highest footnote+ref score)
     faulty = []
+    unchanged = 0
     for i, b in enumerate(books, 1):
         book_dir = os.path.join(MARKDOWN_DIR, b['book'])
-        c = cb.classify(book_dir)
+        c, memoized = classify_memoized(book_dir, b.get('key'), use_memo)
+        unchanged += memoized
         slug = slug_for(c)
         flag = 'FAULTY' if is_faulty(c) else (slug or '-')
         print(f'  [{i:>3}/{len(books)}] {b["pipeline"]:<5} {b["book"][:34]:<34} -> {flag}'
+              + (' (unchanged)' if memoized else '')
               + (f'  fn={c.get("footnotes_count")} ref={c.get("references_count")}' if c.get('ok') else f'  ({c.get("error","")[:40]})'))
         if is_faulty(c):
             faulty.append(c)
@@ -175,6 +209,8 @@ def harvest_corpus(dry_run=False, capture_faulty=False):
             c['_score'] = score
             best[slug] = c
 
+    if unchanged:
+        print(f'\n   ({unchanged} unchanged book(s) reused their previous classification; --no-memo re-runs them)')
     uncovered = sorted(s for s in best if s not in covered)
     print(f'\n== pathways seen: {len(set(list(best)+list(covered)))} | uncovered to capture: {len(uncovered)} ==')
     for s in uncovered:
@@ -205,8 +241,10 @@ def main():
     ap = argparse.ArgumentParser(description='Harvest conversion fixtures from the local corpus')
     ap.add_argument('--dry-run', action='store_true')
     ap.add_argument('--capture-faulty', action='store_true')
+    ap.add_argument('--no-memo', action='store_true',
+                    help='re-classify every book, even ones unchanged since the last sweep')
     args = ap.parse_args()
-    harvest_corpus(dry_run=args.dry_run, capture_faulty=args.capture_faulty)
+    harvest_corpus(dry_run=args.dry_run, capture_faulty=args.capture_faulty, use_memo=not args.no_memo)
 
 
 if __name__ == '__main__':
@@ -4,7 +4,10 @@ Enumerate resources/markdown/ book dirs, dedup by underlying SOURCE-file content
 (the dir names are meaningless — many are the same book re-converted), and report
 the distinct sources plus which fixture pathways are already covered.
 
-Output JSON: {"books": [{"book": <repr-dir>, "pipeline": <type>}...], "covered": [<slug>...]}
+Output JSON: {"books": [{"book": <repr-dir>, "pipeline": <type>, "key": <conversion key>}...],
+              "covered": [<slug>...]}
+`key` changes when the source OR any stage's conversion code changes (conversion_cache.py), so a
+bulk re-run can skip books whose key it has already processed.
 Used as phase 0 of the fixture-harvest workflow.
 """
 
@@ -17,42 +20,19 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..'))
 MARKDOWN_DIR = os.path.join(PROJECT_ROOT, 'resources', 'markdown')
 FIXTURES_DIR = os.path.join(SCRIPT_DIR, 'fixtures')
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'app', 'Python'))
 
 
-def _sha1_file(fp):
-    h = hashlib.sha1()
-    with open(fp, 'rb') as f:
-        for chunk in iter(lambda: f.read(65536), b''):
-            h.update(chunk)
-    return h.hexdigest()
+# The source hashing lives in the conversion cache (app/Python/shared/conversion_cache.py) so the
+# pipeline's own stage keys and this dedup agree on what "the same book" means.
+from shared.conversion_cache import sha1_file as _sha1_file, sha1_dir as _sha1_dir  # noqa: E402,F401
+from shared.conversion_cache import book_source as _source, pipeline_digest  # noqa: E402
 
 
-def _sha1_dir(d):
-    h = hashlib.sha1()
-    for root, _, files in os.walk(d):
-        for fn in sorted(files):
-            fp = os.path.join(root, fn)
-            h.update(os.path.relpath(fp, d).encode())
-            try:
-                h.update(_sha1_file(fp).encode())
-            except OSError:
-                pass
-    return h.hexdigest()
-
-
-def _source(book_dir):
-    if os.path.isfile(os.path.join(book_dir, 'ocr_response.json')):
-        return 'pdf', _sha1_file(os.path.join(book_dir, 'ocr_response.json'))
-    if os.path.isdir(os.path.join(book_dir, 'epub_original')):
-        return 'epub', _sha1_dir(os.path.join(book_dir, 'epub_original'))
-    for ext in ('docx', 'doc'):
-        if os.path.isfile(os.path.join(book_dir, f'original.{ext}')):
-            return 'docx', _sha1_file(os.path.join(book_dir, f'original.{ext}'))
-    if os.path.isfile(os.path.join(book_dir, 'original.html')):
-        return 'html', _sha1_file(os.path.join(book_dir, 'original.html'))
-    if os.path.isfile(os.path.join(book_dir, 'original.md')):
-        return 'md', _sha1_file(os.path.join(book_dir, 'original.md'))
-    return None, None
+def conversion_key(pipeline, source_hash):
+    """Identity of a whole-book conversion result: the source + the current code of every stage.
+    Unchanged on a bulk re-run ⇒ the book converts to exactly what it did last time."""
+    return hashlib.sha1(f'{pipeline}:{source_hash}:{pipeline_digest()}'.encode()).hexdigest()
 
 
 def covered_slugs():
@@ -83,10 +63,10 @@ def main():
         groups.setdefault((pipe, h), []).append(d)
 
     books = []
-    for (pipe, _), dirs in groups.items():
+    for (pipe, h), dirs in groups.items():
         # representative: prefer a meaningfully-named dir over an auto-named book_<ts>/uuid
         rep = sorted(dirs, key=lambda b: (b.startswith('book_'), '-' in b and len(b) == 36, len(b)))[0]
-        books.append({'book': rep, 'pipeline': pipe})
+        books.append({'book': rep, 'pipeline': pipe, 'key': conversion_key(pipe, h)})
     books.sort(key=lambda b: (b['pipeline'], b['book']))
 
     print(json.dumps({'books': books, 'covered': sorted(covered_slugs())}))
@@ -29,6 +29,13 @@ Usage:
     python3 tests/conversion/run_regression.py --coverage
     python3 tests/conversion/run_regression.py --update-golden [--fixture X]
     python3 tests/conversion/run_regression.py --verbose | --json
+    python3 tests/conversion/run_regression.py --parser lxml
+    python3 tests/conversion/run_regression.py --parser-parity [--fixture X]
+
+--parser runs every stage under that HTML parser backend (HYPERLIT_HTML_PARSER, shared/html_parsing.py)
+and checks the usual expectations. --parser-parity converts each fixture under BOTH backends and reports
+where the normalised outputs differ from each other (not from the goldens) — the evidence a deployment
+needs before switching parsers.
 """
 
 import argparse
@@ -50,6 +57,8 @@ FIXTURES_LOCAL_DIR = os.path.join(SCRIPT_DIR, 'fixtures-local')
 # through the SAME chain instead of the fixture's committed Mistral response.
 ENGINE_CACHE_DIR = os.path.join(SCRIPT_DIR, 'engine-cache')
 OCR_VARIANT = None  # set from --ocr-variant in main()
+# The HTML parser backends --parser-parity compares (shared/html_parsing.PARSERS; the first is the default).
+PARSER_BACKENDS = ('html.parser', 'lxml')
 PATHWAYS_JSON = os.path.join(SCRIPT_DIR, 'pathways.json')
 PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..'))
 PY_DIR = os.path.join(PROJECT_ROOT, 'app', 'Python')
@@ -74,10 +83,18 @@ GOLDEN_FILES = ['footnotes.normalized.jsonl', 'nodes.summary.json', 'references.
 # Subprocess helper (always with PYTHONHASHSEED=0)
 # ---------------------------------------------------------------------------
 
-def _run(cmd, timeout=300):
+def _run(cmd, timeout=300, conversion_cache=False, preexec_fn=None, admission=None):
     env = dict(os.environ)
     env['PYTHONHASHSEED'] = '0'
-    return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, env=env)
+    # The regression must EXERCISE the code, not replay it: the conversion cache
+    # (shared/conversion_cache.py) stays off unless a caller opts in (the bulk corpus classify).
+    if not conversion_cache:
+        env['HYPERLIT_CONVERSION_CACHE_DIR'] = 'off'
+    # Nor queue behind (or record calibration for) fixture-sized runs: admission control
+    # (shared/admission.py) is for real books — a corpus sweep or a batch conversion keeps it.
+    if not (conversion_cache if admission is None else admission):
+        env.setdefault('HYPERLIT_ADMISSION_DIR', 'off')
+    return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, env=env, preexec_fn=preexec_fn)
 
 
 def _err(stage, result):
@@ -632,6 +649,82 @@ def run_fixture(fixture, verbose=False, update_golden=False):
     return ('pass' if all_passed else 'fail'), results, pipeline
 
 
+# ---------------------------------------------------------------------------
+# Parser parity (--parser-parity)
+# ---------------------------------------------------------------------------
+
+def _normalized_artifacts(tmp_dir, id_map):
+    """The outputs a parser switch could move: the golden artifacts plus every node's content (with the
+    random footnote ids remapped, as in the goldens)."""
+    out = {}
+    for fname in GOLDEN_FILES:
+        path = os.path.join(tmp_dir, fname)
+        out[fname] = open(path, encoding='utf-8').read() if os.path.isfile(path) else None
+    # A generated id no footnote carries (e.g. a sectioned in-text ref's s<section>_Fn… id) is random per
+    # run too — number those in first-appearance order as well.
+    extra = {}
+
+    def stable(m):
+        real = m.group(0)
+        if real in id_map:
+            return id_map[real]
+        return extra.setdefault(real, f'GEN{len(extra) + 1:04d}')
+
+    nodes = _read_jsonl(os.path.join(tmp_dir, 'nodes.jsonl'))
+    out['nodes.content'] = '\n'.join(GENERATED_ID_RE.sub(stable, node.get('content') or '') for node in nodes)
+    return out
+
+
+def _first_difference(a, b):
+    """'line N: …<a>… ≠ …<b>…' around the first differing character of two artifacts."""
+    if a is None or b is None:
+        return 'produced by only one backend'
+    a_lines, b_lines = a.splitlines(), b.splitlines()
+    for i, (x, y) in enumerate(zip(a_lines, b_lines), 1):
+        if x != y:
+            col = next((k for k, (p, q) in enumerate(zip(x, y)) if p != q), min(len(x), len(y)))
+            start = max(0, col - 30)
+            return f'line {i}: {x[start:col + 50]!r} ≠ {y[start:col + 50]!r}'
+    return f'{len(a_lines)} vs {len(b_lines)} lines'
+
+
+def run_parser_parity(fixture):
+    """Convert `fixture` once per PARSER_BACKENDS entry and compare the normalised outputs. Returns
+    (status, results, pipeline) like run_fixture: 'pass' = identical under every backend."""
+    pipeline = fixture['pipeline']
+    runner = RUNNERS.get(pipeline)
+    if runner is None:
+        return 'fail', [('pipeline', False, 'no recognised input file')], pipeline
+    outputs = {}
+    previous = os.environ.get('HYPERLIT_HTML_PARSER')
+    try:
+        for backend in PARSER_BACKENDS:
+            os.environ['HYPERLIT_HTML_PARSER'] = backend
+            with tempfile.TemporaryDirectory(prefix=f'conv_parity_{fixture["name"].replace(os.sep, "_")}_') as tmp_dir:
+                error = runner(fixture, tmp_dir)
+                if isinstance(error, str) and error.startswith('skipped'):
+                    reason = error if ':' in error else f'{pipeline}: tool unavailable (pandoc) — skipped'
+                    return 'skip', [('pipeline', True, reason)], pipeline
+                if error:
+                    return 'fail', [(backend, False, f'{error["stage"]} failed (exit {error["returncode"]}): '
+                                                     f'{error.get("stderr", "")[:200]}')], pipeline
+                outputs[backend] = _normalized_artifacts(tmp_dir, normalize_outputs(tmp_dir))
+    finally:
+        if previous is None:
+            os.environ.pop('HYPERLIT_HTML_PARSER', None)
+        else:
+            os.environ['HYPERLIT_HTML_PARSER'] = previous
+    base, *others = PARSER_BACKENDS
+    results = []
+    for other in others:
+        for name, text in outputs[base].items():
+            if text != outputs[other][name]:
+                results.append((name, False, f'{base} vs {other} — {_first_difference(text, outputs[other][name])}'))
+    if not results:
+        results.append(('parity', True, f'identical under {", ".join(PARSER_BACKENDS)}'))
+    return ('pass' if all(ok for _, ok, _ in results) else 'fail'), results, pipeline
+
+
 # ---------------------------------------------------------------------------
 # Coverage report
 # ---------------------------------------------------------------------------
@@ -684,6 +777,10 @@ def main():
                         help='Replay a foreign-engine OCR response from engine-cache/ '
                              '(written by ocr_engine_compare.py) instead of the fixture '
                              'ocr_response.json. PDF fixtures only; skips the golden comparator.')
+    parser.add_argument('--parser', choices=PARSER_BACKENDS,
+                        help='Run every stage under this HTML parser backend (HYPERLIT_HTML_PARSER)')
+    parser.add_argument('--parser-parity', action='store_true',
+                        help='Convert each fixture under every HTML parser backend and report output differences')
     args = parser.parse_args()
 
     if args.coverage:
@@ -694,6 +791,13 @@ def main():
               'as the fixture golden — refusing.', file=sys.stderr)
         sys.exit(1)
 
+    if args.parser_parity and (args.update_golden or args.parser):
+        print('--parser-parity compares the backends with each other — it takes neither --parser nor '
+              '--update-golden.', file=sys.stderr)
+        sys.exit(1)
+    if args.parser:
+        os.environ['HYPERLIT_HTML_PARSER'] = args.parser     # inherited by every stage subprocess
+
     global OCR_VARIANT
     OCR_VARIANT = args.ocr_variant
 
@@ -710,7 +814,12 @@ def main():
     json_results = []
     if not args.json:
         print()
-        print('Conversion Pipeline Regression Tests' + (' (updating goldens)' if args.update_golden else ''))
+        title = 'Conversion Pipeline Regression Tests'
+        if args.parser_parity:
+            title = f'HTML Parser Parity ({" vs ".join(PARSER_BACKENDS)})'
+        elif args.parser:
+            title += f' (parser: {args.parser})'
+        print(title + (' (updating goldens)' if args.update_golden else ''))
         print('=' * 40)
 
     n_pass = n_fail = n_skip = 0
@@ -719,7 +828,10 @@ def main():
         style = manifest.get('citation_style', '?')
         strategy = manifest.get('footnote_strategy', '?')
 
-        status, results, pipeline = run_fixture(fixture, verbose=args.verbose, update_golden=args.update_golden)
+        if args.parser_parity:
+            status, results, pipeline = run_parser_parity(fixture)
+        else:
+            status, results, pipeline = run_fixture(fixture, verbose=args.verbose, update_golden=args.update_golden)
 
         if args.json:
             json_results.append({
@@ -9,6 +9,13 @@ import os
 import sys
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'app', 'Python')))
+# Conversions the tests run in-process must not queue behind, or write calibration records beside, real
+# imports on this host (shared/admission.py); the admission tests point it at a tmp dir.
+os.environ.setdefault('HYPERLIT_ADMISSION_DIR', 'off')
+# Nor read or fill the host's shared caches: a stale entry would mask the code under test. Tests of the
+# caches themselves opt in with a tmp_path root.
+for _cache in ('HYPERLIT_CONVERSION_CACHE_DIR', 'HYPERLIT_OCR_CACHE_DIR', 'GROBID_CACHE_DIR'):
+    os.environ.setdefault(_cache, 'off')
 
 import pytest
 from bs4 import BeautifulSoup
@@ -0,0 +1,96 @@
+"""Unit tests for resource-aware admission control (shared/admission.py).
+
+A phase is admitted when its estimate fits beside the live tickets of OTHER processes and nobody queued
+earlier is still waiting; a phase alone is always admitted; a ticket whose process has died is swept;
+and a release records the estimate against the measured usage for calibration."""
+
+import json
+import subprocess
+import sys
+import time
+
+import pytest
+
+from shared import admission as A
+
+
+@pytest.fixture
+def other_process():
+    proc = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+    yield proc
+    proc.kill()
+    proc.wait()
+
+
+def _foreign_ticket(root, proc, state='running', reserved_mb=100, since=None):
+    root.mkdir(parents=True, exist_ok=True)
+    path = root / f'{proc.pid}-1.ticket'
+    path.write_text(json.dumps({'pid': proc.pid, 'start': A._start_time(proc.pid), 'state': state,
+                                'since': since or time.time(), 'stage': 'digestion',
+                                'reserved': reserved_mb * A.MB, 'facts': {}}))
+    return path
+
+
+def test_estimates_scale_with_the_input():
+    small, big = A.estimate('digestion', html_mb=0.1), A.estimate('digestion', html_mb=3)
+    assert small.peak_bytes < big.peak_bytes and small.seconds < big.seconds
+    pooled = A.estimate('pdf_assembly', pages=500, text_mb=1, workers=4)
+    assert pooled.peak_bytes > A.estimate('pdf_assembly', pages=500, text_mb=1).peak_bytes
+    assert A.estimate('digestion', html_mb=None).facts == {}
+
+
+def test_alone_is_admitted_and_release_records_calibration(tmp_path):
+    ctl = A.AdmissionController(tmp_path, budget_bytes=10 * A.MB, poll_s=0.01)
+    ticket = ctl.acquire(A.estimate('digestion', html_mb=5), log=None)    # far over budget, but alone
+    assert ticket.path.exists() and json.loads(ticket.path.read_text())['reserved'] == 10 * A.MB
+    ticket.release()
+    ticket.release()                                                      # idempotent
+    assert not list(tmp_path.glob('*.ticket'))
+    records = [json.loads(l) for l in (tmp_path / A.CALIBRATION_FILE).read_text().splitlines()]
+    assert len(records) == 1 and records[0]['stage'] == 'digestion' and records[0]['peak_mb'] > 0
+    assert A.calibration_report(tmp_path / A.CALIBRATION_FILE)['digestion']['runs'] == 1
+
+
+def test_waits_while_over_budget_then_runs(tmp_path, other_process):
+    _foreign_ticket(tmp_path, other_process, reserved_mb=90)
+    ctl = A.AdmissionController(tmp_path, budget_bytes=100 * A.MB, wait_s=0.3, poll_s=0.02)
+    notes = []
+    fits = ctl.acquire(A.estimate('pdf_normalize', decode_mpx=0), log=None, on_wait=notes.append)  # 40MB + 90MB
+    assert fits.waited >= 0.3 and notes and 'Waiting for memory' in notes[0]
+    fits.release()
+
+    other_process.kill()
+    other_process.wait()
+    ticket = ctl.acquire(A.estimate('pdf_normalize', decode_mpx=0), log=None)    # the dead ticket is swept
+    assert ticket.waited < 0.3 and [p.name for p in tmp_path.glob('*.ticket')] == [ticket.path.name]
+    ticket.release()
+
+
+def test_earlier_waiters_go_first(tmp_path, other_process):
+    ctl = A.AdmissionController(tmp_path, budget_bytes=1000 * A.MB, wait_s=0.2, poll_s=0.02)
+    _foreign_ticket(tmp_path, other_process, state='waiting', since=time.time() - 5)
+    blocked = ctl.acquire(A.estimate('digestion'), log=None)                      # fits, but queued behind
+    assert blocked.waited >= 0.2
+    blocked.release()
+
+    unbudgeted = A.AdmissionController(tmp_path, budget_bytes=None, wait_s=0.1, poll_s=0.02)
+    notes = []
+    queued = unbudgeted.acquire(A.estimate('digestion'), log=notes.append, on_wait=notes.append)
+    assert 'no budget' in notes[0] and 'no budget' in notes[-1]                  # no budget, still FIFO
+    queued.release()
+
+
+def test_own_tickets_never_block(tmp_path):
+    ctl = A.AdmissionController(tmp_path, budget_bytes=50 * A.MB, wait_s=5, poll_s=0.01)
+    first = ctl.acquire(A.estimate('digestion', html_mb=1), log=None)
+    second = ctl.acquire(A.estimate('digestion', html_mb=1), log=None)
+    assert second.waited < 1 and first.path != second.path
+    first.release()
+    second.release()
+
+
+def test_disabled_admission_is_a_no_op(monkeypatch):
+    monkeypatch.setenv('HYPERLIT_ADMISSION_DIR', 'off')
+    ticket = A.admit('digestion', html_mb=2)
+    assert ticket.controller is None
+    ticket.release()
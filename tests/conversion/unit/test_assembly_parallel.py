@@ -0,0 +1,75 @@
+"""Unit tests for page-parallel markdown assembly (ingestion/pdf/assembly.py).
+
+The page-local steps (the spine's prelude + each assembler's declared page_local) run across a process
+pool with the document-wide tables broadcast once; the stateful steps stay in the ordered serial merge.
+The pooled output — markdown AND the log lines the page steps print — must be byte-identical to the
+serial path for every layout class.
+"""
+
+import contextlib
+import io
+import json
+import os
+
+from ingestion.pdf import assembly as A
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_FIXTURE = os.path.join(_HERE, '..', 'fixtures', 'pdf', 'sequential', 'native-engine', 'ocr_response.json')
+
+
+def _doc(n=24):
+    with open(_FIXTURE, encoding='utf-8') as f:
+        base = json.load(f)['pages']
+    pages = []
+    for k in range(n):
+        md = base[k % len(base)].get('markdown', '')
+        if k % 6 == 0:
+            md = f"# Chapter {k // 6 + 1}\n\n" + md
+        if k % 5 == 1:
+            md += "\n\nA claim¹ and another.² Then [3] more.\n\n¹ First note.\n\n² Second note.\n\n```"
+        if k == n - 3:
+            md = "# Notes\n\n1. Endnote one.\n\n2. Endnote two.\n\n" + md
+        pages.append({'markdown': md + f"\n\n{k + 3}",
+                      'header': 'Running Title' if k % 2 else f'Part {k // 8}',
+                      'footer': f"{k % 9 + 1} A footer note here." if k % 4 == 0 else ''})
+    return {'pages': pages}
+
+
+_META = {'signals': {'trailing_page_number_consistency': 0.9, 'trailing_page_number_offset': 3},
+         'page_summary': [{'index': k, 'refs': [1, 2] if k < 18 else [], 'defs': [] if k < 18 else [1, 2, 3]}
+                          for k in range(24)]}
+
+
+def _assemble(classification, workers):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        md = A.assemble_markdown(_doc(), classification=classification, footnote_meta=_META, workers=workers)
+    log = ''.join(l for l in out.getvalue().splitlines(True) if 'worker processes' not in l)
+    return md, log
+
+
+def test_pooled_assembly_is_byte_identical_to_serial():
+    for classification in ('unknown', 'page_bottom', 'chapter_endnotes', 'document_endnotes',
+                           'wackSTEMbibliographyNotes'):
+        assert _assemble(classification, 2) == _assemble(classification, 1), classification
+
+
+def test_page_local_steps_never_touch_context():
+    # The declaration is the contract the pool relies on: the step reads only its broadcast tables.
+    ctx = A.AssemblyContext(_doc(), 'chapter_endnotes', _META)
+    assembler = A.PDF_ASSEMBLERS['chapter_endnotes']
+    assembler.setup(ctx)
+    tables = assembler.page_tables(ctx)
+    before = dict(vars(ctx))
+    assert assembler.has_page_local and not A._DEFAULT_ASSEMBLER.has_page_local
+    assert assembler.page_local(tables, 0, "A claim¹ here.") == "A claim[^1] here."
+    assert vars(ctx) == before
+
+
+def test_worker_count_from_env(monkeypatch):
+    monkeypatch.delenv('HYPERLIT_ASSEMBLY_WORKERS', raising=False)
+    assert A._assembly_workers(500) == 1                  # serial unless opted in
+    monkeypatch.setenv('HYPERLIT_ASSEMBLY_WORKERS', '3')
+    assert A._assembly_workers(10) == 3
+    monkeypatch.setenv('HYPERLIT_ASSEMBLY_WORKERS', '0')
+    assert A._assembly_workers(500) == 1
@@ -0,0 +1,50 @@
+"""Unit tests for tests/conversion/batch_convert.py — bulk conversion on a process pool.
+
+Each book converts through classify_book's stage chain into <out>/<book>/; the status file makes a
+re-run skip books already converted under the same conversion key, and a book over its time limit is
+recorded as such without stopping the batch."""
+
+import json
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import batch_convert as bc
+
+_MD = os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'md', 'sequential', 'synthetic', 'input.md')
+
+
+def _books(tmp_path):
+    for name in ('alpha', 'beta'):
+        (tmp_path / 'books' / name).mkdir(parents=True)
+        shutil.copy(_MD, tmp_path / 'books' / name / 'original.md')
+    (tmp_path / 'books' / 'empty').mkdir()
+    return [str(tmp_path / 'books' / n) for n in ('alpha', 'beta', 'empty')]
+
+
+def test_batch_converts_and_resumes(tmp_path, monkeypatch):
+    for name in bc._INNER_POOL_ENVS:
+        monkeypatch.setenv(name, '1')
+    books, out = _books(tmp_path), tmp_path / 'out'
+    records = bc.run_batch(books, out, workers=2, cache=False, log=lambda *a: None)
+    assert [(r['book'], r['pipeline'], r['status']) for r in records] == [
+        ('alpha', 'md', 'ok'), ('beta', 'md', 'ok'), ('empty', None, 'skipped')]
+    assert (out / 'alpha' / 'nodes.jsonl').is_file() and (out / 'beta' / 'nodes.jsonl').is_file()
+    status = json.loads((out / bc.STATUS_FILE).read_text())['books']
+    assert status['alpha']['key'] and status['alpha']['key'] == status['beta']['key']   # same source
+    assert '| md | 2 | 2 |' in (out / bc.SUMMARY_FILE).read_text()
+
+    lines = []
+    again = bc.run_batch(books, out, workers=2, cache=False, log=lines.append)
+    assert '1 to convert, 2 unchanged' in lines[0]                  # only the sourceless dir is retried
+    assert [r['status'] for r in again] == ['ok', 'ok', 'skipped']
+
+
+def test_over_the_time_limit_is_recorded(tmp_path, monkeypatch):
+    for name in bc._INNER_POOL_ENVS:
+        monkeypatch.setenv(name, '1')
+    records = bc.run_batch(_books(tmp_path)[:1], tmp_path / 'out', workers=1, timeout=0.001, cache=False,
+                           log=lambda *a: None)
+    assert records[0]['status'] == 'timeout' and 'timeout after' in records[0]['error']
+    assert '**Not converted (1)**' in (tmp_path / 'out' / bc.SUMMARY_FILE).read_text()
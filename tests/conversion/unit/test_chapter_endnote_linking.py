@@ -38,7 +38,7 @@ _MARKER_ANCHOR = 'wide gaps in understanding and sympathy'
 
 def _run_pdf_pipeline(ocr_path):
     """Replay the cached OCR through the full PDF pipeline; return (nodes_html, defs_by_id)."""
-    env = dict(os.environ, PYTHONHASHSEED='0')
+    env = dict(os.environ, PYTHONHASHSEED='0', HYPERLIT_CONVERSION_CACHE_DIR='off')
     tmp = tempfile.mkdtemp(prefix='docendnote_')
     try:
         shutil.copy2(ocr_path, os.path.join(tmp, 'ocr_response.json'))
@@ -0,0 +1,43 @@
+"""Unit tests for byte-budgeted node chunking (digestion/finalize/chunking.py).
+
+A chunk fills up to its byte budget (or node ceiling), an oversized node sits alone, a heading never
+ends a chunk apart from the paragraph it introduces, HYPERLIT_CHUNKING=legacy keeps the fixed 50, and
+the size distribution lands in conversion_stats.json beside the audit's counts.
+"""
+
+import json
+
+from digestion.finalize import chunking as C
+
+
+def test_budget_fills_chunks_and_isolates_oversized_nodes():
+    sizes = [40, 40, 40, 500, 10, 10]
+    assert C.budget_chunk_ids(sizes, [False] * 6, budget=100) == [0, 0, 1, 2, 3, 3]
+    assert C.budget_chunk_ids([1] * 5, [False] * 5, budget=100, max_nodes=2) == [0, 0, 1, 1, 2]
+
+
+def test_heading_moves_forward_with_its_first_paragraph():
+    sizes = [60, 10, 30, 50]
+    headings = [False, False, True, False]
+    # The budget breaks before the 4th node; the heading before it opens the next chunk instead.
+    assert C.budget_chunk_ids(sizes, headings, budget=100) == [0, 0, 1, 1]
+    # A chunk made only of headings is never emptied to do so.
+    assert C.budget_chunk_ids([10, 95], [True, False], budget=100) == [0, 1]
+
+
+def test_legacy_flag_and_stats(tmp_path, monkeypatch):
+    nodes = [{'content': '<p>' + 'x' * 100 + '</p>', 'type': 'p'} for _ in range(120)]
+    monkeypatch.setenv('HYPERLIT_CHUNKING', 'legacy')
+    stats = C.assign_chunk_ids(nodes)
+    assert [n['chunk_id'] for n in nodes[48:52]] == [0, 0, 1, 1] and stats['chunks'] == 3
+
+    monkeypatch.delenv('HYPERLIT_CHUNKING')
+    monkeypatch.setenv('HYPERLIT_CHUNK_BYTES', '2048')
+    stats = C.assign_chunk_ids(nodes)
+    assert stats['strategy'] == 'bytes' and stats['bytes_per_chunk']['max'] <= 2048
+    assert stats['nodes_per_chunk']['max'] == 2048 // 107
+
+    (tmp_path / 'conversion_stats.json').write_text(json.dumps({'footnotes_matched': 3}))
+    C.record_chunk_stats(str(tmp_path), stats)
+    written = json.loads((tmp_path / 'conversion_stats.json').read_text())
+    assert written['footnotes_matched'] == 3 and written['chunking']['chunks'] == stats['chunks']
@@ -0,0 +1,168 @@
+"""Unit tests for the whole-pipeline conversion cache (shared/conversion_cache.py).
+
+Stage outputs are keyed by input hash + the stage's code hash + its env flags, restored by copy (so a
+later stage rewriting an output in place never reaches the cache), and evicted least-recently-used
+past the byte budget. The md → html and PDF-replay entry points short-circuit on a hit.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import threading
+
+from shared.conversion_cache import STAGES, ConversionCache, book_source, code_digest, stage_key
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_PY = os.path.abspath(os.path.join(_HERE, '..', '..', '..', 'app', 'Python'))
+_FIXTURE = os.path.join(_HERE, '..', 'fixtures', 'pdf', 'sequential', 'synthetic', 'ocr_response.json')
+
+
+def test_store_then_fetch_round_trips_files_and_dirs(tmp_path):
+    cache = ConversionCache(tmp_path / 'cc')
+    src = tmp_path / 'src'
+    (src / 'media').mkdir(parents=True)
+    (src / 'main-text.html').write_text('<p>hi</p>')
+    (src / 'media' / 'a.png').write_bytes(b'png')
+    key = stage_key('epub_normalize', {'source': 'abc', 'book_id': 'b1'})
+    outputs = {n: src / n for n in ('main-text.html', 'footnotes.json', 'media')}
+    assert cache.store('epub_normalize', key, outputs)
+
+    dest = tmp_path / 'dest'
+    targets = {n: dest / n for n in ('main-text.html', 'footnotes.json', 'media')}
+    assert cache.fetch('epub_normalize', key, targets)
+    assert (dest / 'main-text.html').read_text() == '<p>hi</p>'
+    assert (dest / 'media' / 'a.png').read_bytes() == b'png'
+    assert not (dest / 'footnotes.json').exists()      # absent at store time → absent on replay
+
+    # Restored by copy: rewriting the restored output never reaches the entry.
+    (dest / 'main-text.html').write_text('rewritten')
+    assert cache.fetch('epub_normalize', key, targets)
+    assert (dest / 'main-text.html').read_text() == '<p>hi</p>'
+
+
+def test_key_covers_inputs_env_and_stage(monkeypatch):
+    base = stage_key('digestion', {'html': 'x', 'book_id': 'b'})
+    assert stage_key('digestion', {'html': 'x', 'book_id': 'c'}) != base
+    monkeypatch.setenv('GROBID_URL', 'http://localhost:8070')
+    assert stage_key('digestion', {'html': 'x', 'book_id': 'b'}) != base
+    assert code_digest('digestion') != code_digest('md_to_html')
+    pdf = stage_key('pdf_assembly', {'ocr_response': 'x'})
+    monkeypatch.setenv('HYPERLIT_EDIT_JOURNAL', '1')                # writes edit_journal.json beside the md
+    assert stage_key('pdf_assembly', {'ocr_response': 'x'}) != pdf
+    assert all('shared' in STAGES[stage]['code'] for stage in STAGES)     # the helpers they import
+
+
+def test_miss_and_unknown_target_leave_dest_untouched(tmp_path):
+    cache = ConversionCache(tmp_path / 'cc')
+    assert not cache.fetch('md_to_html', 'f' * 64, {'intermediate.html': tmp_path / 'x.html'})
+    src = tmp_path / 'a.html'
+    src.write_text('a')
+    cache.store('md_to_html', 'e' * 64, {'intermediate.html': src})
+    assert not cache.fetch('md_to_html', 'e' * 64, {'other.html': tmp_path / 'y.html'})
+    assert not (tmp_path / 'y.html').exists()
+
+
+def test_lru_eviction_past_byte_budget(tmp_path):
+    cache = ConversionCache(tmp_path / 'cc', max_bytes=10 ** 9)
+    src = tmp_path / 'out.md'
+    src.write_text('x' * 100)
+    keys = [f'{i:02d}' + 'a' * 62 for i in range(4)]
+    for i, key in enumerate(keys):
+        cache.store('pdf_assembly', key, {'main-text.md': src})
+        used = cache.entry_dir('pdf_assembly', key) / '.used'
+        os.utime(used, (1000 + i, 1000 + i))
+    os.utime(cache.entry_dir('pdf_assembly', keys[0]) / '.used', (2000, 2000))   # oldest, then re-used
+    cache.max_bytes = 350
+    assert cache.evict() == 2
+    kept = {i for i, k in enumerate(keys) if cache.entry_dir('pdf_assembly', k).is_dir()}
+    assert kept == {0, 3}
+
+
+def test_book_source_matches_harvest_dedup_identity(tmp_path):
+    book = tmp_path / 'book'
+    (book / 'epub_original' / 'OEBPS').mkdir(parents=True)
+    (book / 'epub_original' / 'OEBPS' / 'c1.xhtml').write_text('<p/>')
+    pipeline, digest = book_source(str(book))
+    assert pipeline == 'epub' and len(digest) == 40
+    assert book_source(str(tmp_path / 'empty')) == (None, None)
+
+
+def test_md_to_html_short_circuits_on_a_hit(tmp_path):
+    md = tmp_path / 'main-text.md'
+    md.write_text('# Title\n\nBody text.\n')
+    env = dict(os.environ, HYPERLIT_CONVERSION_CACHE_DIR=str(tmp_path / 'cc'))
+    cmd = [sys.executable, os.path.join(_PY, 'simple_md_to_html.py'), str(md), str(tmp_path / 'a.html')]
+    first = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    assert first.returncode == 0 and 'cache hit' not in first.stdout
+    cmd[-1] = str(tmp_path / 'b.html')
+    second = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    assert second.returncode == 0 and 'Conversion cache hit' in second.stdout
+    assert (tmp_path / 'a.html').read_bytes() == (tmp_path / 'b.html').read_bytes()
+
+
+def test_pdf_replay_restores_identical_markdown(tmp_path):
+    env = dict(os.environ, HYPERLIT_CONVERSION_CACHE_DIR=str(tmp_path / 'cc'),
+               HYPERLIT_OCR_CACHE_DIR='off', PYTHONHASHSEED='0')
+    outs = []
+    for name in ('a', 'b'):
+        book = tmp_path / name
+        book.mkdir()
+        shutil.copy(_FIXTURE, book / 'ocr_response.json')
+        r = subprocess.run([sys.executable, os.path.join(_PY, 'mistral_ocr.py'), '/dev/null', str(book)],
+                           capture_output=True, text=True, timeout=300, env=env)
+        assert r.returncode == 0, r.stderr[-400:]
+        outs.append(r.stdout)
+    assert 'Conversion cache hit' not in outs[0] and 'Conversion cache hit' in outs[1]
+    for name in ('main-text.md', 'footnote_meta.json', 'assessment.json'):
+        assert (tmp_path / 'a' / name).read_bytes() == (tmp_path / 'b' / name).read_bytes()
+
+
+def test_digestion_rerun_hits_and_keeps_the_upstream_seed(tmp_path):
+    book = tmp_path / 'book'
+    book.mkdir()
+    (book / 'main-text.md').write_text('# Title\n\nBody text.[^1]\n\n[^1]: A note.\n')
+    env = dict(os.environ, HYPERLIT_CONVERSION_CACHE_DIR=str(tmp_path / 'cc'), PYTHONHASHSEED='0')
+    subprocess.run([sys.executable, os.path.join(_PY, 'simple_md_to_html.py'), str(book / 'main-text.md'),
+                    str(book / 'main-text.html')], check=True, capture_output=True, env=env)
+    seed = '{"records": [{"module": "upstream", "decision": "seeded"}]}'
+    (book / 'assessment.json').write_text(seed)
+    runs = []
+    for _ in range(2):
+        r = subprocess.run([sys.executable, os.path.join(_PY, 'process_document.py'), str(book / 'main-text.html'),
+                            str(book), 'b1'], capture_output=True, text=True, timeout=300, env=env)
+        assert r.returncode == 0, r.stderr[-400:]
+        runs.append((r.stdout, (book / 'assessment.json').read_text()))
+    # The second run's side inputs are the same upstream hand-off, not the first run's outputs.
+    assert 'Conversion cache hit' not in runs[0][0] and 'Conversion cache hit' in runs[1][0]
+    assert runs[0][1] == runs[1][1] and runs[1][1].count('"upstream"') == 1
+
+
+def test_digestion_is_not_stored_when_grobid_did_not_answer(monkeypatch):
+    from digestion import process_document
+    from digestion.bibliographyExtraction import grobid_client
+    stored = []
+
+    class _Cache:
+        def store(self, stage, key, outputs):
+            stored.append(key)
+
+    monkeypatch.setattr(grobid_client, '_UNANSWERED', threading.Event())
+    process_document._store(_Cache(), 'k1', {})
+    # A configured server that is down: the regex fallback must not land under the "GROBID on" key.
+    assert not grobid_client.grobid_alive('http://127.0.0.1:9', timeout=1)
+    process_document._store(_Cache(), 'k2', {})
+    assert stored == ['k1']
+
+
+def test_digestion_without_the_cache_leaves_the_seeds_alone(tmp_path):
+    book = tmp_path / 'book'
+    book.mkdir()
+    (book / 'main-text.md').write_text('# Title\n\nBody text.\n')
+    env = dict(os.environ, HYPERLIT_CONVERSION_CACHE_DIR='off', PYTHONHASHSEED='0')
+    subprocess.run([sys.executable, os.path.join(_PY, 'simple_md_to_html.py'), str(book / 'main-text.md'),
+                    str(book / 'main-text.html')], check=True, capture_output=True, env=env)
+    r = subprocess.run([sys.executable, os.path.join(_PY, 'process_document.py'), str(book / 'main-text.html'),
+                        str(book), 'b1'], capture_output=True, text=True, timeout=300, env=env)
+    assert r.returncode == 0, r.stderr[-400:]
+    assert not (book / 'digestion_seed').exists()
@@ -0,0 +1,99 @@
+"""Unit tests for the COPY-ready outputs (digestion/finalize/copy_output.py).
+
+Each .copy file must load through `COPY … FROM STDIN` unchanged: text-format fields escape backslash,
+tab, CR and LF and drop NULs, csv fields keep NULL distinct from '', and the rows carry exactly what
+the importer derives (its renumbering and the id / data-node-id stamp on the node's first tag) in the
+manifest's column order. They are never cached: a hit rebuilds them, and a run with the flag off
+removes stale ones.
+"""
+
+import csv
+import io
+import json
+import os
+import re
+
+import process_document as P
+from digestion.finalize import copy_output
+from digestion.finalize.copy_output import COPY_FILES, NODE_COLUMNS, format_row, stamp_node_id
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_FIXTURE = os.path.join(_HERE, '..', 'fixtures', 'html', 'sectioned', 'synthetic', 'input.html')
+_VALUES = ('plain', 'tab\there', 'lines\r\nand\\slash', 'nul\x00byte', None, '', '"quoted", <p>')
+
+
+def _decode_text(line):
+    """PostgreSQL's text-format field decoding (the subset the emitter produces)."""
+    out = []
+    for field in line.split('\t'):
+        if field == '\\N':
+            out.append(None)
+            continue
+        out.append(re.sub(r'\\(.)', lambda m: {'t': '\t', 'n': '\n', 'r': '\r'}.get(m.group(1), m.group(1)), field))
+    return tuple(out)
+
+
+def test_text_format_round_trips():
+    line = format_row(_VALUES, 'text')
+    assert '\n' not in line and '\r' not in line and '\x00' not in line
+    assert _decode_text(line) == tuple(v.replace('\x00', '') if v is not None else None for v in _VALUES)
+
+
+def test_csv_format_keeps_null_apart_from_empty():
+    line = format_row(_VALUES, 'csv')
+    assert ',,"",' in line                                   # NULL is bare, '' is quoted
+    parsed = next(csv.reader(io.StringIO(line)))
+    assert parsed[6] == '"quoted", <p>' and parsed[2] == 'lines\r\nand\\slash' and parsed[3] == 'nulbyte'
+
+
+def test_stamp_matches_the_importer():
+    assert (stamp_node_id('<p id="3" class="x" data-node-id="old">Hi</p>', 300, 'b_1_a')
+            == '<p id="300" data-node-id="b_1_a" class="x">Hi</p>')
+
+
+def test_emitted_rows_follow_the_manifest(tmp_path, monkeypatch):
+    monkeypatch.setenv('HYPERLIT_COPY_OUTPUT', 'text')
+    monkeypatch.setenv('HYPERLIT_CONVERSION_CACHE_DIR', 'off')
+    P.main(_FIXTURE, str(tmp_path), 'book1')
+    with open(tmp_path / 'copy_manifest.json', encoding='utf-8') as f:
+        manifest = json.load(f)
+    nodes = manifest['tables'][0]
+    assert nodes['table'] == 'nodes' and tuple(nodes['columns']) == NODE_COLUMNS
+    with open(tmp_path / 'nodes.jsonl', encoding='utf-8') as f:
+        source = [json.loads(line) for line in f]
+    with open(tmp_path / 'nodes.copy', encoding='utf-8', newline='') as f:
+        rows = [dict(zip(NODE_COLUMNS, _decode_text(line.rstrip('\n')))) for line in f]
+    assert len(rows) == nodes['rows'] == len(source)
+    for i, (row, node) in enumerate(zip(rows, source)):
+        assert row['startLine'] == str((i + 1) * 100) and row['plainText'] == node['plainText']
+        assert row['content'].startswith(f'<{node["type"]} id="{(i + 1) * 100}" data-node-id="{row["node_id"]}"')
+        assert json.loads(row['footnotes']) == node['footnotes']
+    assert manifest['tables'][1]['rows'] == 4                # the fixture's four footnotes
+
+
+def test_copy_files_are_rebuilt_on_a_hit_and_removed_when_off(tmp_path, monkeypatch, capsys):
+    out = tmp_path / 'out'
+    monkeypatch.setenv('HYPERLIT_CONVERSION_CACHE_DIR', str(tmp_path / 'cc'))
+    monkeypatch.setenv('HYPERLIT_COPY_OUTPUT', 'text')
+    P.main(_FIXTURE, str(out), 'book1')
+    assert all((out / name).exists() for name in COPY_FILES)
+
+    monkeypatch.delenv('HYPERLIT_COPY_OUTPUT')
+    P.main(_FIXTURE, str(out), 'book1')                        # a hit: the flag is not part of the key
+    assert 'Conversion cache hit' in capsys.readouterr().out
+    assert not any((out / name).exists() for name in COPY_FILES)
+
+    monkeypatch.setenv('HYPERLIT_COPY_OUTPUT', 'text')
+    monkeypatch.setattr(copy_output.time, 'strftime', lambda fmt: '2030-01-02 03:04:05')
+    P.main(_FIXTURE, str(out), 'book1')
+    assert 'Conversion cache hit' in capsys.readouterr().out
+    manifest = json.loads((out / 'copy_manifest.json').read_text(encoding='utf-8'))
+    assert manifest['generated_at'] == '2030-01-02 03:04:05'
+    rows = (out / 'nodes.copy').read_text(encoding='utf-8').splitlines()
+    assert len(rows) == manifest['tables'][0]['rows'] == len((out / 'nodes.jsonl').read_text().splitlines())
+    assert all('2030-01-02 03:04:05' in row for row in rows)
+
+    monkeypatch.setenv('HYPERLIT_CONVERSION_CACHE_DIR', 'off')
+    monkeypatch.delenv('HYPERLIT_COPY_OUTPUT')
+    P.main(_FIXTURE, str(out), 'book1')                        # a full run with the flag off
+    assert not any((out / name).exists() for name in COPY_FILES)
@@ -0,0 +1,60 @@
+"""Unit tests for the deep profiling bundle (shared/deep_profile.py).
+
+A profiled digestion run writes profile/ beside its usual outputs — cProfile stats, flamegraph-ready
+collapsed stacks, a tracemalloc entry per DocPass and the input size facts; with profiling off nothing
+is installed.
+"""
+
+import json
+import os
+import pstats
+
+import process_document as P
+from shared import deep_profile as D
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_SECTIONED = os.path.join(_HERE, '..', 'fixtures', 'html', 'sectioned', 'synthetic', 'input.html')
+
+
+def test_off_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv('HYPERLIT_PROFILE', raising=False)
+    assert D.profiler_from_env(str(tmp_path), 'x') is None
+    monkeypatch.setenv('HYPERLIT_PROFILE', '0')
+    assert not D.enabled() and D.enabled(flag=True)
+
+
+def test_profiled_digestion_writes_the_bundle(tmp_path, monkeypatch):
+    monkeypatch.setenv('HYPERLIT_CONVERSION_CACHE_DIR', 'off')
+    monkeypatch.setenv('HYPERLIT_PROFILE_INTERVAL_MS', '1')
+    plain, profiled = tmp_path / 'plain', tmp_path / 'profiled'
+    plain.mkdir()
+    profiled.mkdir()
+    P.main(_SECTIONED, str(plain), 'book1')
+    P.main(_SECTIONED, str(profiled), 'book1', profile=True)
+
+    for name in ('nodes.jsonl', 'footnotes.jsonl'):
+        assert len((profiled / name).read_text().splitlines()) == len((plain / name).read_text().splitlines())
+    assert not (plain / D.PROFILE_DIR).exists()
+    bundle = profiled / D.PROFILE_DIR
+    stage = json.loads((bundle / D.MANIFEST_NAME).read_text())['stages']['digestion']
+    assert stage['input']['elements'] > 0 and stage['input']['text_bytes'] > 0
+    assert stage['input']['input_bytes'] == os.path.getsize(_SECTIONED)
+
+    steps = json.loads((bundle / 'digestion.memory.json').read_text())['steps']
+    assert [s['step'] for s in steps[:len(P.DOC_PASSES)]] == [p.name for p in P.DOC_PASSES]
+    assert all(s['peak_bytes'] >= s['traced_bytes'] >= 0 for s in steps)
+
+    assert pstats.Stats(str(bundle / 'digestion.pstats')).total_calls > 0
+    for line in (bundle / 'digestion.collapsed').read_text().splitlines():
+        stack, count = line.rsplit(' ', 1)
+        assert int(count) > 0 and stack
+
+
+def test_stages_accumulate_in_one_manifest(tmp_path):
+    for stage in ('pdf_assembly', 'md_to_html'):
+        with D.StageProfiler(str(tmp_path), stage) as prof:
+            prof.facts(pages=3, text_bytes=None)
+            prof.mark('work')
+    stages = json.loads((tmp_path / D.PROFILE_DIR / D.MANIFEST_NAME).read_text())['stages']
+    assert set(stages) == {'pdf_assembly', 'md_to_html'}
+    assert stages['pdf_assembly']['input'] == {'pages': 3}
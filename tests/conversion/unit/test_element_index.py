@@ -0,0 +1,57 @@
+"""Unit tests for the EPUB element index (ingestion/epub/elementIndex.py).
+
+Lookups answer what the tree walk would (`soup.find(id=)`, first in document order), mutations made
+through the index keep it current, a direct soup mutation degrades to a miss rather than a wrong
+element, and an indexed transform produces the same soup as the unindexed one.
+"""
+
+from ingestion.epub.elementIndex import ElementIndex, find_by_id
+import epub_normalizer as E
+
+_DOC = ('<body><div id="a" class="x y"><p id="dup">one</p></div><p id="dup" role="doc-note">two</p>'
+        '<aside epub:type="footnote" id="fn1">n</aside><a href="#fn1" class="y">1</a></body>')
+
+
+def test_lookups_match_the_tree_walk(soup):
+    s = soup(_DOC)
+    index = ElementIndex(s)
+    for eid in ('a', 'dup', 'fn1', 'missing'):
+        assert index.by_id(eid) is s.find(id=eid)
+    assert [el.name for el in index.by_class('y')] == ['div', 'a']
+    assert [el.name for el in index.with_attr('epub:type')] == ['aside']
+    assert [el.get('id') for el in index.by_tag('p')] == ['dup', 'dup']
+    assert index.ids() == {'a', 'dup', 'fn1'} and index.builds == 1
+
+
+def test_mutations_keep_the_index_current(soup):
+    s = soup(_DOC)
+    index = ElementIndex(s)
+    first = index.by_id('dup')
+    index.decompose(s.find(id='a'))                  # the first "dup" goes with its parent
+    assert index.by_id('dup') is s.find(id='dup') is not first
+    new = s.new_tag('span', id='fresh')
+    index.replace_with(s.find('aside'), new)
+    assert index.by_id('fresh') is new and index.by_id('fn1') is None
+    index.unwrap(s.find('a'))
+    assert index.by_tag('a') == [] and index.builds == 1
+
+    s.find(id='fresh')['id'] = 'renamed'             # behind the index's back: a miss, never a wrong hit
+    assert index.by_id('fresh') is None
+    index.invalidate()
+    assert index.by_id('renamed') is new and index.builds == 2
+
+
+def test_indexed_blind_notes_match_the_tree_walk(soup):
+    html = ('<body><p>Claim by <span id="P0"/>some critics. More <span id="P1"/>here.</p>'
+            '<ol class="blindnotes">'
+            + ''.join(f'<li><p>note {k}</p><p class="link_to_text"><a href="#P{k}">GO TO</a></p></li>'
+                      for k in range(3))
+            + '</ol></body>')
+    plain, indexed = soup(html), soup(html)
+    E.BlindNotesFootnoteDetector().transform(plain, lambda m: None)
+    det = E.BlindNotesFootnoteDetector()
+    det.set_element_index(ElementIndex(indexed))
+    out = det.transform(indexed, lambda m: None)
+    assert str(indexed) == str(plain)
+    assert [n['target_id'] for n in out['noterefs']] == ['P0', 'P1']
+    assert find_by_id(indexed, None, 'P1') is out['noterefs'][1]['element']
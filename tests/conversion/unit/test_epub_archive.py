@@ -0,0 +1,87 @@
+"""Unit tests for the streaming .epub reader (ingestion/epub/epubArchive.py).
+
+Loading a .epub reads only container.xml, the OPF, the documents, CSS and toc.ncx — never an image —
+and renders each document exactly as EbookLib's `get_content()` did, so the combined soup is unchanged;
+ImageProcessor then streams the images it needs out of the zip into media/.
+"""
+
+import zipfile
+
+from ebooklib import epub
+
+import epub_normalizer as E
+from ingestion.epub import epubArchive as A
+
+_OPF = ('<?xml version="1.0" encoding="utf-8"?>'
+        '<package xmlns="http://www.idpf.org/2007/opf" version="2.0" unique-identifier="uid">'
+        '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:title>Archive fixture</dc:title>'
+        '<dc:identifier id="uid">archive</dc:identifier><dc:language>en</dc:language></metadata>'
+        '<manifest>'
+        '<item id="ch1" href="Text/Chapter%2001.xhtml" media-type="application/xhtml+xml"/>'
+        '<item id="ch2" href="Text/ch2.xhtml" media-type="application/xhtml+xml"/>'
+        '<item id="css" href="Styles/s.css" media-type="text/css"/>'
+        '<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>'
+        '<item id="img" href="Images/fig.png" media-type="image/png"/>'
+        '</manifest><spine toc="ncx"><itemref idref="ch1"/><itemref idref="ch2"/></spine></package>')
+
+
+def _doc(body):
+    return ('<?xml version="1.0" encoding="utf-8"?><html xmlns="http://www.w3.org/1999/xhtml">'
+            f'<head><title>t</title></head><body>{body}</body></html>')
+
+
+def _build_epub(path):
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('mimetype', 'application/epub+zip')
+        zf.writestr('META-INF/container.xml',
+                    '<?xml version="1.0"?><container version="1.0" '
+                    'xmlns="urn:oasis:names:tc:opendocument:xmlns:container"><rootfiles>'
+                    '<rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>'
+                    '</rootfiles></container>')
+        zf.writestr('OEBPS/content.opf', _OPF)
+        zf.writestr('OEBPS/Text/Chapter 01.xhtml', _doc(
+            '<h1 id="c1">One</h1><p>Claim<a href="ch2.xhtml#n1"><sup>1</sup></a>.<br/></p>'
+            '<div><img src="../Images/fig.png" alt=""/></div>'))
+        zf.writestr('OEBPS/Text/ch2.xhtml', _doc('<p id="n1" epub:type="footnote">The note <p>nested</p></p>'))
+        zf.writestr('OEBPS/Styles/s.css', '.c { font-weight: bold }')
+        zf.writestr('OEBPS/toc.ncx', '<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1"><navMap/></ncx>')
+        zf.writestr('OEBPS/Images/fig.png', b'\x89PNG' + bytes(range(256)) * 64)
+    return path
+
+
+def test_documents_render_as_ebooklib_did(tmp_path):
+    path = _build_epub(str(tmp_path / 'book.epub'))
+    book = epub.read_epub(path)
+    expected = {item.get_name(): item.get_content().decode('utf-8')
+                for item in book.get_items() if item.get_type() == epub.ebooklib.ITEM_DOCUMENT}
+    archive = A.EpubArchive(path)
+    assert {item.name: A.render_document(archive.read(item.href), item) for item in archive.documents()} == expected
+    assert [s.name for s in archive.stylesheets()] == ['Styles/s.css'] and archive.ncx().name == 'toc.ncx'
+    assert archive.member('Images/fig.png') == 'OEBPS/Images/fig.png' and archive.member('Images/x.png') is None
+    archive.close()
+
+
+def test_loading_never_reads_an_image(tmp_path, monkeypatch):
+    path = _build_epub(str(tmp_path / 'book.epub'))
+    read = []
+    real_read = zipfile.ZipFile.read
+    monkeypatch.setattr(zipfile.ZipFile, 'read', lambda zf, name, *a: read.append(name) or real_read(zf, name, *a))
+    norm = E.EpubNormalizer(path, str(tmp_path), book_id='archive_test')
+    norm._load_from_epub_file()
+    A.close_archive(path)
+    assert 'OEBPS/Images/fig.png' not in read and 'OEBPS/Styles/s.css' in read
+    assert norm._raw_css == '.c { font-weight: bold }' and norm.spine_count == 2
+    assert norm.combined_soup.find('a', href='#ch2_n1') is not None
+
+
+def test_images_stream_from_the_zip_into_media(tmp_path, monkeypatch):
+    monkeypatch.setenv('HYPERLIT_CONVERSION_CACHE_DIR', 'off')
+    path = _build_epub(str(tmp_path / 'book.epub'))
+    out = tmp_path / 'out'
+    out.mkdir()
+    norm = E.EpubNormalizer(path, str(out), book_id='archive_test')
+    norm.process()
+    with zipfile.ZipFile(path) as zf:
+        assert (out / 'media' / 'fig.png').read_bytes() == zf.read('OEBPS/Images/fig.png')
+    assert 'src="fig.png"' in (out / 'main-text.html').read_text()
+    assert norm.archive is None and not A._OPEN
@@ -99,3 +99,31 @@ def test_spine_documents_load_in_spine_order(tmp_path):
     norm = _load(tmp_path)
     headings = [h.get_text() for h in norm.combined_soup.find_all('h1')]
     assert headings == ['FRONT MATTER', 'CHAPTER ONE', 'CHAPTER TWO', 'BACK MATTER'], headings
+
+
+def test_pooled_spine_parsing_matches_the_serial_load(tmp_path, monkeypatch, capsys):
+    """Spine documents parsed on a process pool (spineLoader.py) combine into exactly the soup the
+    serial loader builds: same order, id prefixes, same-file + cross-file links and image srcs."""
+    src = _build_extracted_epub(os.path.join(str(tmp_path), 'epub_original'))
+    text = os.path.join(src, 'OEBPS', 'Text')
+    _write(os.path.join(text, 'Chapter 01.xhtml'), _xhtml(
+        'CHAPTER ONE', 'Claim<a href="#r1" id="n1"><sup>1</sup></a>; see <a href="Chapter%2002.xhtml#n1">'
+                       'two</a>.</p><img src="../Images/a.png"/><p id="r1">Note &amp; more<br/>text'))
+    _write(os.path.join(text, 'Chapter 02.xhtml'), _xhtml(
+        'CHAPTER TWO', '<a name="n1"></a>Back to <a href="Chapter%2001.xhtml#r1">one</a><!-- c -->'))
+    loads = {}
+    for workers in ('1', '2'):
+        monkeypatch.setenv('HYPERLIT_EPUB_LOAD_WORKERS', workers)
+        out = os.path.join(str(tmp_path), 'out' + workers)
+        os.makedirs(out)
+        norm = E.EpubNormalizer(src, out, book_id='spine_loader_test')
+        norm._load_from_directory()
+        loads[workers] = str(norm.combined_soup)
+    assert loads['2'] == loads['1']
+    assert 'Spine parsed on 2 worker processes' in capsys.readouterr().out
+    norm.profiler = object()                  # pool workers would escape the profile: load serially
+    assert norm._load_workers(500) == 1
+    monkeypatch.delenv('HYPERLIT_EPUB_LOAD_WORKERS')
+    norm.profiler = None
+    assert norm._load_workers(500) == 1                # opt-in: serial unless HYPERLIT_EPUB_LOAD_WORKERS is set
+    assert 'id="Chapter%2001_r1"' in loads['1'] and 'OEBPS/Images/a.png"' in loads['1']
@@ -0,0 +1,75 @@
+"""Unit tests for EPUB transform prerequisites (epub_base.Prerequisites, ElementIndex.satisfies).
+
+A transform whose declared signals are all absent is skipped before detect(); the skip still lands in
+the assessment's "considered but rejected" set. A prerequisite must be a NECESSARY condition of its
+detect() — across the fixture corpus no detector fires on a document its prerequisites rule out.
+"""
+
+import glob
+import json
+import os
+
+import pytest
+
+from ingestion.epub.elementIndex import ElementIndex
+from ingestion.epub.epub_base import Prerequisites
+import epub_normalizer as E
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_EPUBS = sorted(glob.glob(os.path.join(_HERE, '..', 'fixtures', 'epub', '*', '*', 'epub_original')))
+
+
+def test_any_signal_satisfies(soup):
+    index = ElementIndex(soup('<body><p class="calibre12" id="fn3">x</p><a href="#fn3">3</a></body>'))
+    assert index.satisfies(Prerequisites(tags=('table', 'a')))
+    assert index.satisfies(Prerequisites(classes=(r'^calibre\d+$',)))
+    assert index.satisfies(Prerequisites(ids=(r'fn\d+',)))
+    assert index.satisfies(Prerequisites(attrs=('data-unindexed',)))      # cannot rule it out
+    assert not index.satisfies(Prerequisites(tags=('table',), attrs=('epub:type', 'role'),
+                                             classes=('notes',), ids=(r'note',)))
+    assert not index.satisfies(Prerequisites())
+
+
+def test_skipped_detectors_stay_in_the_assessment(tmp_path, monkeypatch):
+    monkeypatch.setenv('HYPERLIT_CONVERSION_CACHE_DIR', 'off')
+    norm = E.EpubNormalizer(str(tmp_path), str(tmp_path), book_id='prereq_test')
+    norm.combined_soup = E.BeautifulSoup(
+        '<body><p>Text<sup><a href="#n1" id="r1">1</a></sup>.</p>'
+        '<aside epub:type="footnote" id="n1"><p>The note.</p></aside></body>', 'html.parser')
+    norm._run_pipeline()
+    norm._convert_footnotes()
+
+    results = {r['name']: r for r in norm.results['fn_detector_results']}
+    assert results['Epub3SemanticFootnoteDetector']['found'] == 1
+    assert results['TableFootnoteDetector'].get('skipped') and 'TableFootnoteDetector' in norm._skipped
+    assert 'skipped' not in results['Epub3SemanticFootnoteDetector']
+
+    record = json.loads((tmp_path / 'assessment.json').read_text())['records'][0]
+    considered = {c['option']: c['rejected_because'] for c in record['considered']}
+    table = considered['identify footnotes via TableFootnoteDetector']
+    assert table.startswith('skipped before detect()') and 'tags <table>' in table
+
+
+@pytest.mark.skipif(not _EPUBS, reason='no EPUB fixtures')
+def test_prerequisites_are_necessary_on_the_corpus(tmp_path):
+    declared = [t for t in E.TRANSFORM_PIPELINE if t.prerequisites is not None]
+    assert declared
+    for k, src in enumerate(_EPUBS):
+        out = tmp_path / str(k)
+        out.mkdir()
+        norm = E.EpubNormalizer(src, str(out), book_id='prereq_corpus')
+        norm._load_from_directory()
+        profiler, toc = E.StyleProfiler.from_css_text(norm._raw_css), E.TocIndex.from_ncx(norm._toc_ncx_xml)
+        index = ElementIndex(norm.combined_soup)
+        for t in declared:
+            if hasattr(t, 'set_style_context'):
+                t.set_style_context(profiler, toc)
+            if index.satisfies(t.prerequisites) or not t.detect(norm.combined_soup):
+                continue
+            # An always-on fallback (HeuristicFootnoteDetector) detects everywhere — then its transform must
+            # be a no-op: nothing found, nothing rewritten.
+            before = str(norm.combined_soup)
+            probe = E.BeautifulSoup(before, 'html.parser')
+            out = t.transform(probe, lambda m: None) or {}
+            assert not out.get('footnotes') and not out.get('noterefs') and str(probe) == before, \
+                f'{t.name} acts on {src} despite its prerequisites'
@@ -248,3 +248,113 @@ def test_falls_back_to_none_on_transport_error(monkeypatch):
     monkeypatch.setattr(gc, 'extract_refs_from_pdf', boom)
     soup = BeautifulSoup('<p>whatever</p>', 'html.parser')
     assert B.extract_bibliography_via_grobid(soup, '/x.pdf', 'http://x') is None
+
+
+# --- windowed client against a local stand-in GROBID (no real server) ------------------------------
+
+def _stand_in_grobid(delay=0.05):
+    """A threaded HTTP/1.1 server answering /api/processReferences with one biblStruct per window,
+    titled by the window's page width (each test page gets a distinct /MediaBox), and /api/version
+    with stats['version']. Records every POST, the client ports that sent them (keep-alive ⇒ few
+    ports) and the peak concurrency."""
+    import re as _re
+    import threading
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    stats = {'requests': 0, 'ports': set(), 'inflight': 0, 'peak': 0, 'version': '0.8.0'}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            body = stats['version'].encode()
+            self.send_response(200 if self.path == '/api/version' else 404)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            with lock:
+                stats['requests'] += 1
+                stats['ports'].add(self.client_address[1])
+                stats['inflight'] += 1
+                stats['peak'] = max(stats['peak'], stats['inflight'])
+            time.sleep(delay)
+            width = _re.search(rb'/MediaBox \[ ?0(?:\.0)? 0(?:\.0)? (\d+)', body).group(1).decode()
+            tei = TEI.replace('Impact factors and prestige', f'Window {width}').encode()
+            with lock:
+                stats['inflight'] -= 1
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/xml')
+            self.send_header('Content-Length', str(len(tei)))
+            self.end_headers()
+            self.wfile.write(tei)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def _paged_pdf(path, pages):
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    for i in range(pages):
+        writer.add_blank_page(width=100 + i, height=200)
+    with open(path, 'wb') as f:
+        writer.write(f)
+    return str(path)
+
+
+def test_windows_post_concurrently_over_keepalive_and_merge_in_page_order(tmp_path):
+    from digestion.bibliographyExtraction import grobid_client as gc
+    server, stats = _stand_in_grobid()
+    try:
+        pdf = _paged_pdf(tmp_path / 'book.pdf', 6)
+        url = f'http://127.0.0.1:{server.server_address[1]}'
+        refs = gc.extract_refs_from_pdf(pdf, url, max_pages_per_request=1, concurrency=2, cache=False)
+    finally:
+        server.shutdown()
+    titles = [r['title'] for r in refs if r['title'].startswith('Window')]
+    assert titles == [f'Window {100 + i}' for i in range(6)]          # page order, not finish order
+    assert sum(r['first_author'] == 'Archambault' for r in refs) == 1  # de-duped across windows
+    assert stats['requests'] == 6
+    assert stats['peak'] == 2                                          # bounded by `concurrency`
+    assert len(stats['ports']) <= 2                                    # connections reused
+
+
+def test_window_cache_serves_replays_per_server_version(tmp_path):
+    from digestion.bibliographyExtraction import grobid_client as gc
+    server, stats = _stand_in_grobid(delay=0)
+    cache = gc._WindowCache(tmp_path / 'tei-cache')
+    pdf = _paged_pdf(tmp_path / 'book.pdf', 3)
+    url = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        first = gc.extract_refs_from_pdf(pdf, url, max_pages_per_request=1, cache=cache)
+        assert stats['requests'] == 3
+        # A replay of the same PDF against the same server answers entirely from the cache...
+        assert gc.extract_refs_from_pdf(pdf, url, max_pages_per_request=1, cache=cache) == first
+        assert stats['requests'] == 3
+        # ...but an upgraded server re-segments it.
+        stats['version'] = '0.8.1'
+        assert gc.extract_refs_from_pdf(pdf, url, max_pages_per_request=1, cache=cache) == first
+        assert stats['requests'] == 6
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_streaming_tei_parse_handles_empty_and_truncated_bodies():
+    import io
+    import pytest
+    import xml.etree.ElementTree as ET
+    from digestion.bibliographyExtraction.grobid_client import _iter_tei_references
+    assert list(_iter_tei_references(io.BytesIO(b''))) == []
+    assert len(list(_iter_tei_references(io.BytesIO(TEI.encode())))) == 2
+    with pytest.raises(ET.ParseError):
+        list(_iter_tei_references(io.BytesIO(TEI.encode()[:-200])))
@@ -0,0 +1,55 @@
+"""Unit tests for the HTML parser factory (shared/html_parsing.py).
+
+HYPERLIT_HTML_PARSER selects the backend; an unknown name falls back to html.parser. Under lxml a
+fragment must still come back as just the fragment — no <html>/<body> wrapper — so the string helpers
+that round-trip through it (sanitize_html, strip_leading_footnote_number, _strip_spans_html) produce the
+same output on either backend.
+"""
+
+import pytest
+
+from shared import html_parsing as H
+from shared.sanitize import sanitize_html
+from digestion.footnoteLinking.footnote_link_rules import strip_leading_footnote_number
+from digestion.finalize.finalize import _strip_spans_html
+
+_FRAGMENTS = [
+    'hello <b>x</b> tail',
+    '<p>a</p>\n<p>b <a href="javascript:alert(1)">x</a></p>',
+    '<li>one</li><li>two</li>',
+    '<sup>5</sup>. The note <span class="calibre3"><i>text</i></span>',
+    '<style>p {}</style><p>after a head-only tag</p>',
+]
+
+
+def test_backend_selection(monkeypatch, capsys):
+    monkeypatch.delenv('HYPERLIT_HTML_PARSER', raising=False)
+    assert H.parser_backend() == 'html.parser'
+    monkeypatch.setenv('HYPERLIT_HTML_PARSER', 'LXML')
+    assert H.parser_backend() == 'lxml'
+    monkeypatch.setenv('HYPERLIT_HTML_PARSER', 'html5lib')
+    assert H.parser_backend() == 'html.parser' and 'html5lib' in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('markup', _FRAGMENTS)
+def test_fragments_carry_no_wrapper(markup):
+    lx = H.parse_fragment(markup, 'lxml')
+    assert lx.find('html') is None and lx.find('body') is None
+    assert str(lx) == str(H.parse_fragment(markup, 'html.parser'))
+
+
+def test_documents_keep_their_structure():
+    doc = '<html><head><title>t</title></head><body><p id="a">x</p></body></html>'
+    for parser in H.PARSERS:
+        soup = H.parse_html(doc, parser)
+        assert soup.title.get_text() == 't' and soup.body.p['id'] == 'a'
+    assert H.parse_fragment('<body><p>x</p></body>', 'lxml').body is not None
+
+
+def test_string_helpers_agree_across_backends(monkeypatch):
+    outputs = {}
+    for parser in H.PARSERS:
+        monkeypatch.setenv('HYPERLIT_HTML_PARSER', parser)
+        outputs[parser] = [(sanitize_html(m), strip_leading_footnote_number(m), _strip_spans_html(m))
+                           for m in _FRAGMENTS]
+    assert outputs['lxml'] == outputs['html.parser']
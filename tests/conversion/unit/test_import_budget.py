@@ -0,0 +1,57 @@
+"""Import-time budget for the pipeline entry points.
+
+Every conversion is a fresh `python <entry>.py` subprocess, so whatever an entry point imports at load is
+paid per book — before any work, and again on a conversion-cache hit. The heavy optional libraries (the
+Mistral SDK, pypdf, Pillow, bleach, EbookLib, tinycss2) are imported inside the functions that need them;
+this test measures `python -X importtime -c "import <entry>"` for each entry script and fails when one of
+them is pulled back in at module load, or when the cumulative import time blows a (deliberately loose)
+budget. The module check is the deterministic one; the budget catches a new dependency nobody listed.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+_PY = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'app', 'Python'))
+
+# entry script → budget in ms. Measured at ~15-200ms on a dev box; the slack absorbs a slow CI runner.
+_BUDGET_MS = {
+    'process_document': 800,
+    'mistral_ocr': 800,
+    'epub_normalizer': 800,
+    'simple_md_to_html': 300,
+    'ar5iv_preprocessor': 600,
+}
+_LAZY = ('mistralai', 'pypdf', 'PIL', 'bleach', 'ebooklib', 'tinycss2')
+
+
+def _importtime(module):
+    """(cumulative µs of `module`, set of every module imported) from one `-X importtime` run."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    r = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                       capture_output=True, text=True, cwd=_PY, env=env, timeout=120)
+    assert r.returncode == 0, r.stderr[-600:]
+    total, names = None, set()
+    for line in r.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _self, cumulative, name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit():
+            continue                      # the header row
+        names.add(name.strip())
+        if name.strip() == module and not name.startswith('  '):
+            total = int(cumulative)
+    assert total is not None, f'no importtime row for {module}'
+    return total, names
+
+
+@pytest.mark.parametrize('entry', sorted(_BUDGET_MS))
+def test_entry_point_import_budget(entry):
+    # Best of two: the first run may be compiling .pyc files or warming the page cache.
+    runs = [_importtime(entry) for _ in range(2)]
+    heavy = sorted(n for n in runs[0][1] if n.split('.')[0] in _LAZY)
+    assert not heavy, f'{entry} imports {heavy} at load — import them where they are used'
+    best_ms = min(total for total, _ in runs) / 1000
+    assert best_ms < _BUDGET_MS[entry], f'{entry} takes {best_ms:.0f}ms to import (budget {_BUDGET_MS[entry]}ms)'
@@ -254,6 +254,22 @@ def test_classify_returns_signals_and_summary():
     assert isinstance(out['page_summary'], list)
 
 
+def test_page_signal_table_rescans_only_mutated_pages():
+    # The shared table is refreshed, not rebuilt: reclassifying after a mutation rescans just
+    # the pages whose markdown changed, and gives the same answer as a from-scratch classify.
+    rd = _resp(_page_bottom_page(1, 2), _page_bottom_page(1, 2),
+               _page_bottom_page(1, 2), _page_bottom_page(1, 2))
+    table = M.PageSignalTable(rd['pages'])
+    M.classify_footnotes(rd, table)
+    assert table.refresh() == 0
+    rd['pages'][2]['markdown'] = 'Plain prose now, no notes.'
+    assert table.refresh() == 1
+    rd['pages'][3]['markdown'] += '\n\n# A New Paper'
+    assert M.classify_footnotes(rd, table) == M.classify_footnotes(rd)
+    assert table.has_top_heading == [False, False, False, True]
+    assert table.refs[2] == frozenset()
+
+
 # ---------------------------------------------------------------------------
 # classify_footnotes fork-story (assessment.json) — considered / margin / rationale
 # ---------------------------------------------------------------------------
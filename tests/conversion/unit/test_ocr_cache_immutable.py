@@ -39,7 +39,7 @@ def test_pipeline_never_writes_ocr_response_back():
         shutil.copy(_FIXTURE, cache)
         before = _sha(cache)
 
-        env = dict(os.environ, PYTHONHASHSEED='0')
+        env = dict(os.environ, PYTHONHASHSEED='0', HYPERLIT_CONVERSION_CACHE_DIR='off')
         r = subprocess.run([sys.executable, _SCRIPT, '/dev/null', tmp],
                            capture_output=True, text=True, timeout=300, env=env)
         assert r.returncode == 0, f'pipeline failed: {r.stderr[-400:]}'
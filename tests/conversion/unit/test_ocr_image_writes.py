@@ -0,0 +1,87 @@
+"""Unit tests for the OCR image extraction (assembly.save_images / start_image_writes).
+
+Images are written on a thread pool overlapped with assembly, decoded in streamed base64 slices,
+and deduplicated by content hash: a logo OCR'd on every page lands in media/ once and every page's
+markdown link is pointed at that one file.
+"""
+
+import base64
+import threading
+
+from ingestion.pdf import assembly
+
+
+def _img(img_id, payload):
+    return {"id": img_id, "image_base64": "data:image/jpeg;base64," + base64.b64encode(payload).decode()}
+
+
+def _response():
+    logo = b"\xff\xd8logo-bytes" * 50
+    return {"pages": [
+        {"markdown": "Title\n\n![img-0.jpeg](img-0.jpeg)", "images": [_img("img-0.jpeg", logo)]},
+        {"markdown": "![img-1.jpeg](img-1.jpeg)\n\nFIGURE 1 a chart\n\n![img-2.jpeg](img-2.jpeg)",
+         "images": [_img("img-1.jpeg", logo), _img("img-2.jpeg", b"\x89PNGchart")]},
+        {"markdown": "![img-11.jpeg](img-11.jpeg)", "images": [_img("img-11.jpeg", logo)]},
+    ]}
+
+
+def test_duplicate_payloads_written_once_and_refs_rewritten(tmp_path):
+    resp = _response()
+    count = assembly.save_images(resp, tmp_path)
+    assert count == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["img-0.jpeg", "img-2.jpeg"]
+    assert (tmp_path / "img-2.jpeg").read_bytes() == b"\x89PNGchart"
+    assert "](img-0.jpeg)" in resp["pages"][1]["markdown"]
+    assert "](img-2.jpeg)" in resp["pages"][1]["markdown"]
+    assert resp["pages"][2]["markdown"] == "![img-11.jpeg](img-0.jpeg)"
+
+
+def test_streamed_decode_matches_whole_decode(tmp_path, monkeypatch):
+    monkeypatch.setattr(assembly, "_B64_STREAM_CHARS", 8)
+    payload = bytes(range(256)) * 3
+    resp = {"pages": [{"markdown": "![a](a.png)", "images": [_img("a.png", payload)]}]}
+    job = assembly.start_image_writes(resp, tmp_path, max_workers=2)
+    assert job.aliases == {}
+    assert job.result() == 1
+    assert (tmp_path / "a.png").read_bytes() == payload
+
+    wrapped = {"id": "b.png", "image_base64": base64.encodebytes(payload).decode()}   # 76-char lines
+    assembly.start_image_writes({"pages": [{"markdown": "", "images": [wrapped]}]}, tmp_path).result()
+    assert (tmp_path / "b.png").read_bytes() == payload
+
+
+def test_rewrite_only_touches_link_targets():
+    md = "![img-1.jpeg](img-1.jpeg) and ![x](c0-img-1.jpeg)"
+    assert assembly.rewrite_image_refs(md, {"img-1.jpeg": "img-0.jpeg"}) == \
+        "![img-1.jpeg](img-0.jpeg) and ![x](c0-img-1.jpeg)"
+
+
+def test_payloads_can_stream_from_a_separate_page_source(tmp_path):
+    # Replay path: the response the assembler sees is text-only; payloads come from the store.
+    full = _response()
+    text_only = {"pages": [dict(p, images=[{"id": i["id"]} for i in p["images"]]) for p in full["pages"]]}
+    job = assembly.start_image_writes(text_only, tmp_path, image_pages=lambda: iter(full["pages"]))
+    assert job.result() == 2
+    assert text_only["pages"][2]["markdown"] == "![img-11.jpeg](img-0.jpeg)"
+
+
+def test_start_returns_before_the_writes_are_queued(tmp_path):
+    # The dedup pass is synchronous; the write pass runs on the producer thread, so a slow payload
+    # source no longer holds up the caller (assembly) until all but the last few writes finish.
+    full = _response()
+    gate = threading.Event()
+    passes = []
+
+    def pages():
+        passes.append(len(passes))
+        for page in full["pages"]:
+            if len(passes) > 1:
+                gate.wait(5)
+            yield page
+
+    job = assembly.start_image_writes(full, tmp_path, max_workers=1, image_pages=pages)
+    assert full["pages"][2]["markdown"] == "![img-11.jpeg](img-0.jpeg)"
+    assert not (tmp_path / "img-0.jpeg").exists()
+    gate.set()
+    assert job.result() == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["img-0.jpeg", "img-2.jpeg"]
@@ -0,0 +1,90 @@
+"""Unit tests for the shared content-addressed OCR cache (ingestion/pdf/ocrCache.py).
+
+Keyed by PDF SHA-256 + OCR model: a hit is copied into the book dir (writable, with a zero-amount
+billing marker) and replayed with no API call (so no key is needed), entries themselves are read-only,
+and the cache evicts least-recently-used entries past its byte budget.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+from ingestion.pdf.ocrCache import OcrResultCache, pdf_sha256, write_free_ocr_marker, write_json_atomic
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_SCRIPT = os.path.abspath(os.path.join(_HERE, '..', '..', '..', 'app', 'Python', 'mistral_ocr.py'))
+_FIXTURE = os.path.join(_HERE, '..', 'fixtures', 'pdf', 'sequential', 'synthetic', 'ocr_response.json')
+
+
+def _pdf(tmp_path, name='book.pdf', body=b'%PDF-1.4 fake bytes'):
+    path = tmp_path / name
+    path.write_bytes(body)
+    return path
+
+
+def test_hit_is_a_writable_copy_of_a_read_only_entry(tmp_path):
+    cache = OcrResultCache(tmp_path / 'cas')
+    src_dir = tmp_path / 'book_a'
+    src_dir.mkdir()
+    src = src_dir / 'ocr_response.json'
+    src.write_text('{"pages": []}')
+    digest = pdf_sha256(_pdf(tmp_path))
+    assert cache.store(digest, 'mistral-ocr-2512', src)
+    assert os.access(src, os.W_OK) and not os.path.samefile(src, cache.entry_path(digest, 'mistral-ocr-2512'))
+
+    dest_dir = tmp_path / 'book_b'
+    dest_dir.mkdir()
+    dest = dest_dir / 'ocr_response.json'
+    assert not cache.fetch(digest, 'other-model', dest)
+    assert cache.fetch(digest, 'mistral-ocr-2512', dest)
+    assert not os.path.samefile(dest, cache.entry_path(digest, 'mistral-ocr-2512'))
+    assert not os.access(cache.entry_path(digest, 'mistral-ocr-2512'), os.W_OK) or os.geteuid() == 0
+    assert os.stat(dest).st_mode & 0o200                  # shutil.copy2 of the book dir stays writable
+
+    write_json_atomic(dest, '{"pages": [{"markdown": "new"}]}')
+    assert cache.entry_path(digest, 'mistral-ocr-2512').read_text() == '{"pages": []}'
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = OcrResultCache(tmp_path / 'cas', max_bytes=350)
+    src = tmp_path / 'r.json'
+    for i in range(3):
+        src.write_text('x' * 100)
+        cache.store(f'{i:064x}', 'm', src)
+        os.utime(cache.entry_path(f'{i:064x}', 'm').with_name(
+            cache.entry_path(f'{i:064x}', 'm').name + '.used'), (1000 + i, 1000 + i))
+        src.unlink()
+    # Touch the oldest, then add a fourth: only the least-recently-used (#1) goes.
+    cache.fetch(f'{0:064x}', 'm', tmp_path / 'hit.json')
+    src.write_text('x' * 100)
+    cache.store(f'{3:064x}', 'm', src)
+    kept = {i for i in range(4) if cache.entry_path(f'{i:064x}', 'm').exists()}
+    assert kept == {0, 2, 3}
+
+
+def test_pipeline_replays_a_shared_hit_without_an_api_key(tmp_path):
+    pdf = _pdf(tmp_path)
+    cas = tmp_path / 'cas'
+    OcrResultCache(cas).store(pdf_sha256(pdf), 'mistral-ocr-2512', shutil.copy(_FIXTURE, tmp_path / 'seed.json'))
+    out = tmp_path / 'book'
+    env = dict(os.environ, HYPERLIT_OCR_CACHE_DIR=str(cas), HYPERLIT_CONVERSION_CACHE_DIR='off',
+               PYTHONHASHSEED='0')
+    env.pop('MISTRAL_OCR_API_KEY', None)
+    r = subprocess.run([sys.executable, _SCRIPT, str(pdf), str(out)],
+                       capture_output=True, text=True, timeout=300, env=env)
+    assert r.returncode == 0, r.stderr[-400:]
+    assert 'Shared OCR cache hit' in r.stdout
+    assert json.loads((out / 'ocr_charged.json').read_text())['amount'] == 0
+    assert (out / 'main-text.md').is_file()
+    assert json.loads((out / 'ocr_response.json').read_text()) == json.loads(open(_FIXTURE).read())
+
+
+def test_free_marker_never_replaces_a_real_charge(tmp_path):
+    assert write_free_ocr_marker(tmp_path)
+    marker = json.loads((tmp_path / 'ocr_charged.json').read_text())
+    assert marker['amount'] == 0 and marker['book'] == tmp_path.name
+    (tmp_path / 'ocr_charged.json').write_text('{"amount": 1.5}')
+    assert not write_free_ocr_marker(tmp_path)
+    assert json.loads((tmp_path / 'ocr_charged.json').read_text()) == {'amount': 1.5}
@@ -0,0 +1,70 @@
+"""Unit tests for the page-indexed OCR store (ingestion/pdf/ocrStore.py).
+
+The sidecar is DERIVED from ocr_response.json, which stays ground truth: it must round-trip every
+page exactly, serve random access by index, rebuild itself when the cache changes underneath it,
+and never write back to the legacy file.
+"""
+
+import hashlib
+import json
+import os
+
+import pytest
+
+from ingestion.pdf.ocrStore import OcrPageStore, STORE_DIRNAME
+
+
+def _write_cache(tmp_path, n=5):
+    resp = {
+        "model": "mistral-ocr-2512",
+        "_chunk_boundaries": [3],
+        "pages": [{"index": i, "markdown": f"Page {i} text — ü[^{i}]",
+                   "images": [{"id": f"img-{i}.jpeg", "image_base64": "QUJD" * (i + 1)}]}
+                  for i in range(n)],
+    }
+    path = tmp_path / "ocr_response.json"
+    path.write_text(json.dumps(resp), encoding="utf-8")
+    return resp, path
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_store_round_trips_pages_and_header(tmp_path, compress):
+    resp, path = _write_cache(tmp_path)
+    before = hashlib.sha256(path.read_bytes()).hexdigest()
+    store = OcrPageStore.build(path, compress=compress)
+    assert len(store) == 5
+    assert store.header["_chunk_boundaries"] == [3]
+    assert store.page(3) == resp["pages"][3]
+    assert list(store.iter_pages()) == resp["pages"]
+    assert store.response_dict() == resp
+    assert hashlib.sha256(path.read_bytes()).hexdigest() == before
+
+
+def test_text_only_view_drops_image_payloads(tmp_path):
+    _write_cache(tmp_path)
+    store = OcrPageStore.open(tmp_path)
+    page = store.response_dict(text_only=True)["pages"][2]
+    assert page["images"] == [{"id": "img-2.jpeg"}]
+    assert page["markdown"].startswith("Page 2")
+
+
+def test_open_reuses_fresh_sidecar_and_rebuilds_stale_one(tmp_path):
+    resp, path = _write_cache(tmp_path)
+    OcrPageStore.open(tmp_path)
+    header = tmp_path / STORE_DIRNAME / "header.json"
+    built_at = header.stat().st_mtime_ns
+    assert OcrPageStore.open(tmp_path).page(0) == resp["pages"][0]
+    assert header.stat().st_mtime_ns == built_at
+
+    resp["pages"][0]["markdown"] = "Replaced by a fresh OCR run, longer than before."
+    path.write_text(json.dumps(resp), encoding="utf-8")
+    assert OcrPageStore.open(tmp_path).page(0)["markdown"].startswith("Replaced")
+
+
+def test_mutating_a_page_never_reaches_the_store(tmp_path):
+    _write_cache(tmp_path)
+    store = OcrPageStore.open(tmp_path)
+    rd = store.response_dict()
+    rd["pages"][1]["markdown"] = "mutated"
+    assert store.page(1)["markdown"].startswith("Page 1")
+    assert os.path.isfile(tmp_path / "ocr_response.json")
@@ -0,0 +1,68 @@
+"""Unit tests for the OCR page edit journal (ingestion/pdf/pageJournal.py).
+
+The fold / renumber / revert passes record span-level substitutions with provenance: a journaled sub
+must produce exactly what re.sub does, revert must put back exactly the spans a pass changed (never
+re-derive them), a page rewritten behind the journal's back must make revert decline rather than
+guess, and the journal must stay plain JSON on the response dict.
+"""
+
+import copy
+import json
+import re
+
+from ingestion.pdf.ocrFetch import renumber_chunk_footnotes, revert_partial_renumber
+from ingestion.pdf.pageJournal import PageJournal
+
+
+def _anthology():
+    return {'pages': [
+        {'markdown': 'Paper one claim.[^1] more.[^2] and.[^7] end.[^8]'},
+        {'markdown': 'Paper two opens.¹ with.[^2] its own.[^3] refs.\n\n'
+                     '[1] First def.\n1. Listed note.\n205. A long numbered list item.'},
+    ]}
+
+
+def test_sub_matches_re_sub_and_reverts_exactly():
+    rd = {'pages': [{'markdown': 'a1 b22 c333 d'}]}
+    journal = PageJournal(rd)
+    assert journal.sub(0, r'\d+', lambda m: str(int(m.group(0)) * 10), 'scale') == 3
+    assert rd['pages'][0]['markdown'] == re.sub(r'\d+', lambda m: str(int(m.group(0)) * 10), 'a1 b22 c333 d')
+    assert journal.dirty_spans(0) == [(1, 3, 'scale'), (5, 8, 'scale'), (10, 14, 'scale')]
+    assert journal.revert('scale') == 1
+    assert rd['pages'][0]['markdown'] == 'a1 b22 c333 d'
+    json.dumps(rd)                                   # the journal is plain data
+
+
+def test_revert_undoes_exactly_what_renumber_shifted():
+    rd = _anthology()
+    renumber_chunk_footnotes(rd)
+    offset = rd['_footnote_renumber_page_offsets'][1]
+    assert offset == 8 and '[^9]' in rd['pages'][1]['markdown']
+    assert revert_partial_renumber(rd) == 1
+    page = rd['pages'][1]['markdown']
+    # The normalisation (¹ → [^1]) stays; every shifted number is back to print numbering — and the
+    # 205. list item, which the shift never touched, is not "un-shifted" to 197.
+    assert page.startswith('Paper two opens.[^1] with.[^2] its own.[^3]')
+    assert '[1] First def.\n1. Listed note.\n205. A long' in page
+    assert PageJournal(rd).passes() == {'renumber_normalise'}
+
+
+def test_revert_falls_back_when_the_page_changed_behind_the_journal():
+    rd = _anthology()
+    renumber_chunk_footnotes(rd)
+    rd['pages'][1]['markdown'] += ' tail'            # an unjournaled rewrite
+    snapshot = copy.deepcopy(rd['pages'])
+    assert PageJournal(rd).revert('renumber') is None
+    assert rd['pages'] == snapshot                   # declined without touching anything
+    assert revert_partial_renumber(rd) == 1          # the re-derivation path still restores it
+    assert '[^9]' not in rd['pages'][1]['markdown']
+
+
+def test_revert_declines_when_a_later_pass_sits_on_top():
+    rd = {'pages': [{'markdown': 'x [^3] y'}]}
+    journal = PageJournal(rd)
+    journal.sub(0, r'\[\^3\]', '[^5]', 'renumber')
+    journal.edit(0, 0, 1, 'X', 'later')
+    assert journal.revert('renumber') is None
+    assert journal.revert('later') == 1 and journal.revert('renumber') == 1
+    assert rd['pages'][0]['markdown'] == 'x [^3] y'
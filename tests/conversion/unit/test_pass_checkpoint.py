@@ -0,0 +1,75 @@
+"""Unit tests for DocContext checkpoint / resume (shared/pass_checkpoint.py).
+
+A checkpoint stores the soup as HTML and every other context field pickled with its soup nodes held by
+reference, so a restored map must point INTO the re-parsed tree, the tree must come back with the same
+text-node splits the passes left, a checkpoint from another input must refuse to load, and a run
+resumed from any pass must write exactly what the uninterrupted run wrote.
+"""
+
+import os
+import types
+
+from bs4 import BeautifulSoup, NavigableString
+
+import process_document as P
+from shared.pass_checkpoint import CheckpointError, PassCheckpoints, checkpoint_passes
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_FIXTURE = os.path.join(_HERE, '..', 'fixtures', 'html', 'sectioned', 'synthetic', 'input.html')
+
+
+class _Pass:
+    def __init__(self, name):
+        self.name = name
+
+
+_PASSES = [_Pass('first'), _Pass('second')]
+
+
+def _ctx(tmp_path, html='<p id="a">one <b>two</b></p><p id="b">three</p>'):
+    src = tmp_path / 'in.html'
+    src.write_text(html)
+    soup = BeautifulSoup(html, 'html.parser')
+    return types.SimpleNamespace(html_file_path=str(src), output_dir=str(tmp_path), book_id='bk',
+                                 soup=soup, by_id={p['id']: p for p in soup.find_all('p')}, count=2)
+
+
+def test_round_trip_rebinds_tags_and_text_splits(tmp_path):
+    ctx = _ctx(tmp_path)
+    ctx.by_id['b'].string.replace_with(NavigableString('th'), NavigableString('ree'))
+    PassCheckpoints(tmp_path, _PASSES).save(ctx, 0)
+
+    fresh = _ctx(tmp_path)
+    fresh.soup, fresh.by_id, fresh.count = None, None, 0
+    assert PassCheckpoints(tmp_path, _PASSES).load(fresh, 'second') == 1
+    assert fresh.count == 2
+    assert fresh.by_id['a'] is fresh.soup.find(id='a')          # into the tree, not a copy
+    assert [str(s) for s in fresh.by_id['b'].contents] == ['th', 'ree']
+    assert fresh.by_id['b'].get_text(strip=True) == ctx.by_id['b'].get_text(strip=True)
+
+
+def test_checkpoint_from_another_input_refuses_to_load(tmp_path):
+    PassCheckpoints(tmp_path, _PASSES).save(_ctx(tmp_path), 0)
+    other = _ctx(tmp_path, html='<p id="a">changed</p><p id="b">x</p>')
+    try:
+        PassCheckpoints(tmp_path, _PASSES).load(other, 'second')
+    except CheckpointError:
+        pass
+    else:
+        raise AssertionError('a checkpoint of another input was resumed')
+    assert checkpoint_passes('all', _PASSES) == {'first', 'second'}
+    assert checkpoint_passes('', _PASSES) == set()
+
+
+def test_resumed_run_matches_the_uninterrupted_run(tmp_path):
+    def outputs():
+        # Raw, ids included: the minted timestamp sequence is restored along with `random`.
+        return {name: (tmp_path / name).read_text(encoding='utf-8')
+                for name in P.DOC_OUTPUTS if (tmp_path / name).exists()}
+
+    P.main(_FIXTURE, str(tmp_path), 'book1', checkpoint='all')
+    full = outputs()
+    assert full
+    for name in ('traditional_footnotes', 'sectioned_footnotes', 'link_citations', 'sanitize_and_write'):
+        P.main(_FIXTURE, str(tmp_path), 'book1', resume_from=name)
+        assert outputs() == full, name
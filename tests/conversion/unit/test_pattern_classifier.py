@@ -0,0 +1,63 @@
+"""Unit tests for the compiled id / class / href pattern classifier (ingestion/epub/patternClassifier.py).
+
+Every family of a kind is compiled into one alternation; a value's classification must be exactly what
+the per-pattern `re.match` / `re.search` loops the detectors used to run would say, for every family it
+belongs to — and the orchestrator's per-document table carries the families of every pipeline transform.
+"""
+
+import re
+
+import pytest
+
+from ingestion.epub.elementIndex import ElementIndex
+from ingestion.epub.patternClassifier import PatternClassifier, PatternFamily, classifier_for, pipeline_families
+import epub_normalizer as E
+
+_IDS = ['fn1', 'FN12', 'ch01_fn3', 'filepos1234', 'pg400fn39', 'part0031_fn87_01', 'x_FTN-2', 'note7a',
+        'en0001en', 'intro', 'calibre_link-12', 'chapter-fn-1', '', 'footnote-3']
+_CLASSES = ['footnote', 'calibre12', 'fnref', 'en', 'endnote-ref', 'x-fn2', 'annotation', 'noteref', 'enote',
+            'ENOTE', 'notes', 'prefix-enote3']
+
+
+def test_classification_matches_the_pattern_loops():
+    H, C = E.HeuristicFootnoteDetector, E.ClassPatternFootnoteDetector
+    clf = classifier_for(pipeline_families(E.TRANSFORM_PIPELINE))
+    for eid in _IDS:
+        assert ('heuristic-id' in clf.classify('id', eid)) == any(re.match(p, eid, re.I) for p in H.ID_PATTERNS)
+    for cls in _CLASSES:
+        fams = clf.classify('class', cls)
+        assert ('footnote-class' in fams) == any(re.search(p, cls, re.I) for p in C.FOOTNOTE_PATTERNS)
+        assert ('noteref-class' in fams) == any(re.search(p, cls, re.I) for p in C.NOTEREF_PATTERNS)
+        assert ('enote-class' in fams) == ('enote' in cls)
+    assert 'cross-file-fn-href' in clf.classify('href', 'pg0400fn.html#pg400fn39')
+    assert not clf.classify('href', '#fn1')
+
+
+def test_every_matching_family_is_reported():
+    clf = PatternClassifier([PatternFamily('a', 'id', [r'fn\d+$']), PatternFamily('b', 'id', [r'x']),
+                             PatternFamily('c', 'id', [r'fn']), PatternFamily('d', 'id', [r'(f)n\1'])])
+    assert clf.classify('id', 'fn1') == {'a', 'c'}
+    assert clf.classify('id', 'fnf') == {'c', 'd'}          # the backreference family runs on its own
+    assert clf.classify('id', 'zfn1') == frozenset()        # ids match at the start
+    with pytest.raises(ValueError):
+        PatternClassifier([PatternFamily('a', 'id', ['x']), PatternFamily('a', 'class', ['y'])])
+
+
+def test_table_precomputes_the_document(soup):
+    index = ElementIndex(soup('<body><p id="fn1" class="footnote calibre3">a</p><p id="intro">b</p></body>'))
+    table = classifier_for(pipeline_families(E.TRANSFORM_PIPELINE)).table(index)
+    assert table.precomputed == 4                     # 2 ids + 2 class names
+    assert table.matches('id', 'fn1', 'heuristic-id') and not table.matches('id', 'intro', 'heuristic-id')
+    assert table.any_class(['calibre3', 'footnote'], 'footnote-class') and not table.matches('id', None, 'x')
+    assert table.matches('id', 'note9', 'heuristic-id')     # unseen: classified on first sight
+
+
+def test_pipeline_hands_detectors_the_shared_table(tmp_path, monkeypatch):
+    monkeypatch.setenv('HYPERLIT_CONVERSION_CACHE_DIR', 'off')
+    norm = E.EpubNormalizer(str(tmp_path), str(tmp_path), book_id='pattern_test')
+    norm.combined_soup = E.BeautifulSoup(
+        '<body><p>Text<sup><a href="#fn1">1</a></sup>.</p><p id="fn1">1. The note.</p></body>', 'html.parser')
+    norm._run_pipeline()
+    heuristic = next(t for t in E.TRANSFORM_PIPELINE if t.name == 'HeuristicFootnoteDetector')
+    assert heuristic.patterns() is norm.pattern_table
+    assert [fn['id'] for fn in norm.results['all_footnotes']] == ['fn1']
@@ -0,0 +1,72 @@
+"""Unit tests for the opt-in regex hot-spot profiler (shared/regex_profile.py).
+
+Installing on a module wraps its `re` binding and its module-level compiled patterns (bare or inside
+a list / dict) so every scan is counted and timed by pattern; uninstalling restores the exact
+original objects; the report ranks patterns by total time per stage.
+"""
+
+import json
+import re
+import types
+
+from shared.regex_profile import RegexProfiler, install_from_env
+
+
+def _module():
+    mod = types.ModuleType('fake_normaliser')
+    exec(
+        "import re\n"
+        "WORD_RE = re.compile(r'\\w+')\n"
+        "PATTERNS = [re.compile(r'a+'), 'not a pattern']\n"
+        "BY_NAME = {'digits': re.compile(r'\\d+')}\n"
+        "def normalise(text):\n"
+        "    text = re.sub(r'\\s+', ' ', text)\n"
+        "    words = WORD_RE.findall(text)\n"
+        "    hits = [m.group(0) for m in BY_NAME['digits'].finditer(text)]\n"
+        "    return PATTERNS[0].sub('A', text), words, hits\n",
+        mod.__dict__)
+    return mod
+
+
+def test_profiled_module_behaves_identically_and_is_counted():
+    mod = _module()
+    expected = mod.normalise('aa  bb 12  c 345')
+    prof = RegexProfiler().install([mod])
+    assert mod.normalise('aa  bb 12  c 345') == expected
+    mod.normalise('x' * 1000)
+
+    stats = {s['pattern']: s for s in prof.ranked()}
+    assert stats[r'\s+']['calls'] == 2
+    assert stats[r'\s+']['max_input_chars'] == 1000
+    assert stats[r'\w+']['bytes_scanned'] == len('aa bb 12 c 345') + 1000
+    assert stats[r'\d+']['calls'] == 2                     # finditer timed as it is consumed
+    assert stats['a+']['sites'][0].startswith('fake_normaliser:normalise:')
+
+
+def test_uninstall_restores_original_objects():
+    mod = _module()
+    originals = (mod.re, mod.WORD_RE, mod.PATTERNS[0], mod.BY_NAME['digits'])
+    prof = RegexProfiler().install([mod])
+    assert mod.re is not re and not isinstance(mod.WORD_RE, re.Pattern)
+    prof.uninstall()
+    assert (mod.re, mod.WORD_RE, mod.PATTERNS[0], mod.BY_NAME['digits']) == originals
+    assert mod.re is re
+
+
+def test_dump_merges_one_section_per_stage(tmp_path):
+    mod = _module()
+    prof = RegexProfiler().install([mod])
+    mod.normalise('aaa 1')
+    prof.dump(tmp_path, 'md_to_html')
+    RegexProfiler().dump(tmp_path, 'pdf_assembly')
+    report = json.loads((tmp_path / 'regex_profile.json').read_text())
+    assert set(report['stages']) == {'md_to_html', 'pdf_assembly'}
+    ranked = report['stages']['md_to_html']['ranked']
+    assert [r['total_ms'] for r in ranked] == sorted((r['total_ms'] for r in ranked), reverse=True)
+
+
+def test_off_by_default(monkeypatch):
+    monkeypatch.delenv('HYPERLIT_REGEX_PROFILE', raising=False)
+    mod = _module()
+    assert install_from_env([mod]) is None
+    assert mod.re is re
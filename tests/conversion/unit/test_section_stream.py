@@ -0,0 +1,77 @@
+"""Unit tests for section-streaming digestion (digestion/section_stream.py).
+
+The body is cut at its repeated top-level heading without building the tree, cuts never separate
+footnote markers from their definitions, and a streamed book converts to the same nodes, footnotes,
+references and audit as the whole-document run — while a book whose notes all sit at the end falls
+back to that run.
+"""
+
+import json
+import os
+
+import process_document as P
+from digestion import section_stream as S
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_WHOLE_DOCUMENT = os.path.join(_HERE, '..', 'fixtures', 'html', 'numbering_ambiguous_suppressed',
+                               'synthetic', 'input.html')
+
+
+def _book():
+    parts = ['<html><head><title>t</title></head><body><h1>Book</h1><p>Front matter (Smith 2001).</p>']
+    for c in range(1, 4):
+        parts.append(f'<h2>Chapter {c}</h2>')
+        parts += [f'<p>Para {c}.{k} cites (Jones 1999), note<sup>{k}</sup> <span class="italic">here</span>.</p>'
+                  for k in (1, 2)]
+        parts.append('<h3>Notes</h3>')
+        parts += [f'<p>[{k}]: chapter {c} note {k}.</p>' for k in (1, 2)]
+        parts.append('<hr/>')
+    parts.append('<h2>Bibliography</h2><p>Jones, A. 1999. A Book. Press.</p><p>Smith, B. 2001. Another. Press.</p>')
+    return '\n'.join(parts + ['</body></html>'])
+
+
+def test_split_cuts_at_the_repeated_top_level_heading():
+    html = ('<html><body><h1>Title</h1><p>x</p><h2>One</h2><div><h2>nested</h2></div>'
+            '<p>y</p><h2>Two</h2><p>z</p></body></html>')
+    assert S.split_sections(html) == ['<h1>Title</h1><p>x</p>',
+                                      '<h2>One</h2><div><h2>nested</h2></div><p>y</p>', '<h2>Two</h2><p>z</p>']
+    assert S.split_sections('<html><body><h1>Only</h1><p>x</p></body></html>') == ['<h1>Only</h1><p>x</p>']
+
+
+def test_groups_never_separate_markers_from_their_notes():
+    # (refs, defs, ref-section markers, def-section markers) per section
+    assert S.group_sections([(2, 2, 0, 0), (3, 3, 0, 0)], [1, 1], 0) == [[0], [1]]
+    # markers waiting on an endnotes section; the definition-only section joins the group before it
+    assert S.group_sections([(2, 0, 0, 0), (0, 0, 0, 0), (0, 2, 0, 0), (0, 4, 0, 0)], [1] * 4, 0) == [[0, 1, 2, 3]]
+    # sequential restart markers: cut only once every ref section has met its def section
+    assert S.group_sections([(1, 0, 1, 0), (1, 1, 1, 1), (0, 1, 0, 1), (1, 1, 1, 1)], [1] * 4, 0) == [[0, 1, 2], [3]]
+    assert S.group_sections([(2, 2, 0, 0), (3, 3, 0, 0)], [10, 10], 15) == [[0, 1]]
+
+
+def test_streamed_book_matches_the_whole_document_run(tmp_path, monkeypatch):
+    monkeypatch.setenv('HYPERLIT_CONVERSION_CACHE_DIR', 'off')
+    monkeypatch.setenv('HYPERLIT_STABLE_IDS', '1')
+    src = tmp_path / 'input.html'
+    src.write_text(_book(), encoding='utf-8')
+    whole, streamed = tmp_path / 'whole', tmp_path / 'streamed'
+    whole.mkdir()
+    streamed.mkdir()
+    P.main(str(src), str(whole), 'book1')
+    monkeypatch.setenv('HYPERLIT_STREAM_SECTIONS', '1')
+    monkeypatch.setenv('HYPERLIT_STREAM_MIN_BYTES', '0')
+    P.main(str(src), str(streamed), 'book1')
+
+    for name in ('nodes.jsonl', 'footnotes.jsonl', 'references.json', 'audit.json'):
+        assert (streamed / name).read_text(encoding='utf-8') == (whole / name).read_text(encoding='utf-8'), name
+    stats = json.loads((streamed / 'conversion_stats.json').read_text())
+    assert stats['streaming']['groups'] == 5 and stats['citations_linked'] == 7
+    assert not (streamed / S.SPOOL_DIR).exists()
+
+
+def test_end_of_book_notes_take_the_whole_document_run(tmp_path, monkeypatch):
+    monkeypatch.setenv('HYPERLIT_CONVERSION_CACHE_DIR', 'off')
+    monkeypatch.setenv('HYPERLIT_STREAM_SECTIONS', '1')
+    monkeypatch.setenv('HYPERLIT_STREAM_MIN_BYTES', '0')
+    P.main(_WHOLE_DOCUMENT, str(tmp_path), 'book1')
+    stats = json.loads((tmp_path / 'conversion_stats.json').read_text())
+    assert 'streaming' not in stats and stats['footnote_strategy'] == 'whole_document'
@@ -0,0 +1,70 @@
+"""Unit tests for content-derived ids (shared/stable_ids.py) and nodes.diff.jsonl
+(digestion/finalize/artifact_diff.py).
+
+With HYPERLIT_STABLE_IDS on, the same input must mint the same footnote ids and node keys on every
+run (still in the Fn<digits>_<suffix> shape the frontend matches), duplicates must stay distinct, and
+the diff against the previous conversion must list only what actually changed — a node that merely
+moved is not a change.
+"""
+
+import json
+import os
+import re
+
+import process_document as P
+from digestion.finalize.artifact_diff import DIFF_NAME, record_digest
+from shared.stable_ids import IdMinter
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_FIXTURE = os.path.join(_HERE, '..', 'fixtures', 'html', 'sectioned', 'synthetic', 'input.html')
+_FRONTEND_FN = re.compile(r'(^|_)Fn\d')
+
+
+def test_stable_mint_is_deterministic_and_keeps_the_id_shape():
+    a, b = IdMinter(), IdMinter()
+    a.reset('book1', enabled=True)
+    b.reset('book1', enabled=True)
+    ids = [a.footnote_id('Ibid.'), a.footnote_id('Ibid.'), a.footnote_id('A note.', prefix='s2_')]
+    assert ids == [b.footnote_id('Ibid.'), b.footnote_id('Ibid.'), b.footnote_id('A note.', prefix='s2_')]
+    assert len(set(ids)) == 3                               # identical twins get distinct ids
+    assert all(_FRONTEND_FN.search(i) for i in ids) and ids[2].startswith('s2_Fn')
+    legacy = IdMinter()
+    legacy.reset('book1', enabled=False)
+    assert re.fullmatch(r'Fn\d{13}_[a-z0-9]{8}', legacy.footnote_id('x', suffix_len=8))
+    assert legacy.node_key('book1', 7, '', 'p') == 'book1_7'
+
+
+def test_moved_node_is_not_a_change():
+    node = {'id': 'b_nabc', 'startLine': 3, 'chunk_id': 0, 'content': '<p id="3">Text</p>', 'type': 'p'}
+    moved = dict(node, startLine=9, content='<p id="9">Text</p>')
+    assert record_digest('node', node) == record_digest('node', moved)
+    assert record_digest('node', node) != record_digest('node', dict(node, content='<p id="3">Text!</p>'))
+
+
+def test_reconvert_diffs_only_what_changed(tmp_path, monkeypatch):
+    monkeypatch.setenv('HYPERLIT_STABLE_IDS', '1')
+    monkeypatch.setenv('HYPERLIT_CONVERSION_CACHE_DIR', 'off')
+    src = tmp_path / 'input.html'
+    with open(_FIXTURE, encoding='utf-8') as f:
+        html = f.read()
+    src.write_text(html, encoding='utf-8')
+    out = tmp_path / 'book'
+    out.mkdir()
+
+    def run():
+        P.main(str(src), str(out), 'book1')
+        with open(out / DIFF_NAME, encoding='utf-8') as f:
+            return [json.loads(line) for line in f], (out / 'nodes.jsonl').read_text(encoding='utf-8')
+
+    first, nodes = run()
+    assert first and {d['op'] for d in first} == {'added'}
+    for name in ('nodes.jsonl', 'footnotes.jsonl'):                 # a reconvert deletes these first
+        (out / name).unlink()
+    again, nodes_again = run()
+    assert again == [] and nodes_again == nodes
+
+    # A new paragraph early in chapter two: everything after it moves, only it is new.
+    src.write_text(html.replace('<h1>Chapter Two</h1>', '<h1>Chapter Two</h1><p>A new opening.</p>'),
+                   encoding='utf-8')
+    edited, _ = run()
+    assert [(d['op'], d['kind']) for d in edited] == [('added', 'node')]
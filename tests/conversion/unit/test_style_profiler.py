@@ -104,3 +104,16 @@ def test_empty_ncx_is_inert():
     toc = TocIndex.from_ncx(None)
     assert toc.navpoint_count == 0 and toc.has_toc is False
     assert toc.depth_for_id('anything') is None
+
+
+def test_fingerprints_are_interned_per_style_key(prof):
+    # Same (tag, classes, style) → the same cached object; a different key with the same merged
+    # declarations → the same interned signature; inline style still wins.
+    a, b = prof.fingerprint(_El(['chap'])), prof.fingerprint(_El(['chap']))
+    assert a is b
+    assert prof.fingerprint(_El(['chap'], name='p')) is a
+    assert prof.fingerprint(_El(['chap'], style='font-size: 2em')).font_size_em == 2.0
+    assert prof.fingerprint(_El(['pageref'])) is None
+    base = prof.fingerprint(_El(['body']))
+    assert prof.prominence(a, base) == StyleProfiler.prominence(a, base) > 0
+    assert prof.stats() == {'lookups': 6, 'keys': 5, 'signatures': 3}